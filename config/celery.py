@@ -49,6 +49,62 @@ app.conf.beat_schedule = {
             'expires': 7200,  # Task expires after 2 hours
         }
     },
+    'prune-sync-tombstones-daily': {
+        'task': 'config.tasks.prune_sync_tombstones_task',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 03:00 AM
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'prune-sync-change-log-daily': {
+        'task': 'config.tasks.prune_sync_change_log_task',
+        'schedule': crontab(hour=3, minute=30),  # Daily at 03:30 AM
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'sequence-sync-changes': {
+        'task': 'config.tasks.sequence_sync_changes_task',
+        'schedule': 60.0,  # Every minute
+        'options': {
+            'expires': 60,
+        }
+    },
+    'build-sync-snapshots': {
+        'task': 'config.tasks.build_sync_snapshots_task',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+        'options': {
+            'expires': 600,  # Task expires after 10 minutes
+        }
+    },
+    'recompile-promotions': {
+        'task': 'config.tasks.recompile_promotions_task',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes (sweep; changes are queued on commit)
+        'options': {
+            'expires': 240,
+        }
+    },
+    'flush-sync-events': {
+        'task': 'config.tasks.flush_sync_events_task',
+        'schedule': crontab(),  # Every minute
+        'options': {
+            'expires': 55,
+        }
+    },
+    'prune-sync-events-daily': {
+        'task': 'config.tasks.prune_sync_events_task',
+        'schedule': crontab(hour=4, minute=0),  # Daily at 04:00 AM
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'backfill-photo-renditions-hourly': {
+        'task': 'config.tasks.generate_photo_renditions_task',
+        'schedule': crontab(minute=45),  # Every hour at :45
+        'options': {
+            'expires': 1800,
+        }
+    },
 }
 
 # Celery Beat timezone
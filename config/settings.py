@@ -59,11 +59,13 @@ INSTALLED_APPS = [
     'analytics',      # Reporting & Analytics
     'dashboard',      # Dashboard & UI
     'settings',       # Settings & Bulk Import
+    'sync_api',       # Edge Sync API (HO → Edge)
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files
+    'sync_api.middleware.SyncTelemetryMiddleware',  # Edge sync telemetry (SyncEvent)
     'corsheaders.middleware.CorsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',  # HTMX       # CORS
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -239,7 +241,19 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
+        # Opt-in binary encodings for Edge sync/push (Accept: application/x-msgpack or application/cbor)
+        'sync_api.binary.MessagePackRenderer',
+        'sync_api.binary.CBORRenderer',
     ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'sync_api.binary.MessagePackParser',
+        'sync_api.binary.CBORParser',
+    ),
+    # Binary encodings whose package is not installed are not offered
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'sync_api.binary.ContentNegotiation',
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
     # API Documentation with drf-spectacular
@@ -609,7 +623,12 @@ MINIO_EXTERNAL_ENDPOINT = env('MINIO_EXTERNAL_ENDPOINT', default='localhost:9000
 MINIO_ACCESS_KEY = env('MINIO_ACCESS_KEY', default='foodlife_admin')
 MINIO_SECRET_KEY = env('MINIO_SECRET_KEY', default='foodlife_secret_2026')
 MINIO_USE_SSL = env.bool('MINIO_USE_SSL', default=False)
+MINIO_REGION = env('MINIO_REGION', default='us-east-1')
 MINIO_BUCKET_PRODUCTS = 'product-images'  # Bucket for product photos
+MINIO_BUCKET_SYNC = 'sync-snapshots'  # Bucket for prebuilt store sync snapshots
+
+# Base URL for absolute media URLs in sync snapshots (built outside a request)
+SYNC_SNAPSHOT_BASE_URL = env('SYNC_SNAPSHOT_BASE_URL', default='http://localhost:8000')
 
 # CSRF Settings for HTMX
 CSRF_COOKIE_HTTPONLY = False  # Allow JavaScript to read CSRF cookie
@@ -69,34 +69,45 @@ def generate_daily_reports_task():
 @shared_task
 def sync_health_check_task():
     """
-    Check sync health from Edge servers
+    Check sync health from Edge servers (sync telemetry of the last 24 hours)
     Run every hour
     """
     logger.info(f"Starting sync health check at {timezone.now()}")
     
+    from core.models import Store
+    from sync_api import telemetry
     from transactions.models import Bill
     from datetime import timedelta
-    from django.db.models import Max
     
     try:
-        # Check for bills synced in last 24 hours per store
         yesterday = timezone.now() - timedelta(days=1)
         
-        recent_syncs = Bill.objects.filter(
-            synced_at__gte=yesterday
-        ).values('store_id').annotate(
-            bill_count=Count('id'),
-            last_sync=Max('synced_at')
-        )
+        # Flush first so the rollup includes the buffered events
+        telemetry.flush_events()
+        rollup = telemetry.store_rollup(since=yesterday)
+        active_store_ids = {str(row['store_id']) for row in rollup}
         
-        logger.info(f"Sync health check: {recent_syncs.count()} stores active")
+        # Active stores that did not call the sync API at all
+        silent_stores = [
+            store.store_code for store in Store.objects.filter(is_active=True).only('id', 'store_code')
+            if str(store.id) not in active_store_ids
+        ]
+        failing_stores = [str(row['store_id']) for row in rollup if row['errors']]
         
-        # TODO: Alert if no sync from a store for > 24h
-        # TODO: Store health metrics
+        pushing_stores = Bill.objects.filter(
+            synced_at__gte=yesterday
+        ).values('store_id').distinct().count()
+        
+        if silent_stores:
+            logger.warning(f"Sync health check: no sync in 24h from {len(silent_stores)} stores: {silent_stores[:20]}")
+        logger.info(f"Sync health check: {len(active_store_ids)} stores active, {pushing_stores} pushing bills")
         
         return {
             'status': 'success',
-            'active_stores': recent_syncs.count(),
+            'active_stores': len(active_store_ids),
+            'pushing_stores': pushing_stores,
+            'silent_stores': silent_stores,
+            'failing_stores': failing_stores,
             'timestamp': timezone.now().isoformat()
         }
     except Exception as e:
@@ -133,3 +144,250 @@ def cleanup_old_logs_task():
     except Exception as e:
         logger.error(f"Log cleanup failed: {str(e)}")
         return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def prune_sync_tombstones_task():
+    """
+    Prune deletion tombstones every store has already synced past
+    Run daily (03:00 AM)
+    """
+    logger.info(f"Starting sync tombstone pruning at {timezone.now()}")
+    
+    from sync_api.tombstones import prune_tombstones
+    
+    try:
+        deleted_count = prune_tombstones()
+        
+        return {
+            'status': 'success',
+            'deleted_count': deleted_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync tombstone pruning failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def prune_sync_change_log_task():
+    """
+    Prune sync change log rows older than the cursor retention
+    Run daily (03:30 AM)
+    """
+    logger.info(f"Starting sync change log pruning at {timezone.now()}")
+    
+    from sync_api.changelog import prune_changes
+    
+    try:
+        deleted_count = prune_changes()
+        
+        return {
+            'status': 'success',
+            'deleted_count': deleted_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync change log pruning failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def sequence_sync_changes_task():
+    """
+    Sequence committed change log rows whose commit hook never ran
+    (process stopped between commit and hook)
+    Run every minute
+    """
+    from sync_api.changelog import sequence_changes
+    
+    try:
+        stamped_count = sequence_changes()
+        if stamped_count:
+            logger.warning(f"Sequenced {stamped_count} change log rows missed by their commit hook")
+        
+        return {
+            'status': 'success',
+            'stamped_count': stamped_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync change sequencing failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def build_sync_snapshots_task(company_id=None):
+    """
+    Build prebuilt sync snapshots of every active store (unchanged stores are skipped)
+    Run every 15 minutes
+    """
+    logger.info(f"Starting sync snapshot build at {timezone.now()}")
+    
+    from sync_api.deltas import prune_deltas
+    from sync_api.snapshots import build_snapshots, prune_snapshots
+    
+    try:
+        result = build_snapshots(company_id=company_id)
+        pruned_count = prune_snapshots()
+        pruned_deltas = prune_deltas()
+        
+        return {
+            'status': 'success',
+            **result,
+            'pruned_count': pruned_count,
+            'pruned_deltas': pruned_deltas,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync snapshot build failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def recompile_promotions_task(promotion_ids=None):
+    """
+    Recompile dirty / missing precompiled promotions (CompiledPromotion)
+    Queued after promotion changes commit; without promotion_ids, sweeps every pending one (every 5 minutes)
+    """
+    from promotions.services.precompiled import recompile
+    
+    try:
+        result = recompile(promotion_ids=promotion_ids)
+        
+        return {
+            'status': 'success' if not result['failed'] else 'partial',
+            'compiled_count': result['compiled'],
+            'changed_count': result['changed'],
+            'failed_count': result['failed'],
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Promotion recompile failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def compile_promotion_chunk_task(job_id, promotion_ids):
+    """
+    Compile one chunk of a company compile job (promotions.services.compile_jobs)
+    Runs in parallel with the other chunks; the chord merges the results
+    """
+    from promotions.services import compile_jobs
+    
+    try:
+        return compile_jobs.compile_chunk(job_id, promotion_ids)
+    except Exception as e:
+        logger.error(f"Compile job {job_id} chunk failed: {str(e)}")
+        compile_jobs.fail(job_id, e)
+        return []
+
+
+@shared_task
+def merge_company_compile_task(chunk_results, job_id, company_id):
+    """
+    Merge the chunks of a company compile job into the compile_for_company() result
+    Chord callback of compile_promotion_chunk_task
+    """
+    from promotions.services import compile_jobs
+    
+    state = compile_jobs.progress(job_id)
+    if state and state['status'] == 'failed':
+        return {'status': 'failed', 'error': state['error']}
+    
+    try:
+        summary = compile_jobs.merge(job_id, company_id, chunk_results)
+        
+        return {
+            'status': 'success',
+            'job_id': job_id,
+            **summary,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Compile job {job_id} merge failed: {str(e)}")
+        compile_jobs.fail(job_id, e)
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def generate_photo_renditions_task(photo_id=None, force=False):
+    """
+    Generate resized renditions (thumb / POS tile / kiosk) of a product photo
+    Queued after upload; without photo_id, backfills every photo missing them (hourly)
+    """
+    logger.info(f"Starting photo rendition generation at {timezone.now()}")
+    
+    from products.models import ProductPhoto
+    from products.renditions import generate_renditions
+    
+    try:
+        photos = ProductPhoto.objects.exclude(object_key='')
+        if photo_id:
+            photos = photos.filter(id=photo_id)
+        elif not force:
+            photos = photos.filter(renditions={})
+        
+        generated_count = 0
+        failed_count = 0
+        for photo in photos.iterator():
+            try:
+                if generate_renditions(photo, force=force):
+                    generated_count += 1
+            except Exception as e:
+                failed_count += 1
+                logger.error(f"Renditions of photo {photo.id} failed: {str(e)}")
+        
+        return {
+            'status': 'success' if not failed_count else 'partial',
+            'generated_count': generated_count,
+            'failed_count': failed_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Photo rendition generation failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def flush_sync_events_task():
+    """
+    Move buffered sync telemetry events from Redis to the SyncEvent table
+    Run every minute
+    """
+    from sync_api.telemetry import flush_events
+    
+    try:
+        written_count = flush_events()
+        
+        return {
+            'status': 'success',
+            'written_count': written_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync event flush failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def prune_sync_events_task():
+    """
+    Prune sync telemetry events older than the retention
+    Run daily (04:00 AM)
+    """
+    logger.info(f"Starting sync event pruning at {timezone.now()}")
+    
+    from sync_api.telemetry import prune_events
+    
+    try:
+        deleted_count = prune_events()
+        
+        return {
+            'status': 'success',
+            'deleted_count': deleted_count,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Sync event pruning failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
@@ -2,9 +2,7 @@
 MinIO Storage Service - Handle object storage for images
 Vibe coding - plain mode: simple, direct, no over-engineering
 """
-import os
 import hashlib
-import uuid
 from datetime import timedelta
 from minio import Minio
 from minio.error import S3Error
@@ -32,11 +30,13 @@ class MinIOStorage:
         )
         
         self.bucket_products = settings.MINIO_BUCKET_PRODUCTS
+        self.bucket_sync = settings.MINIO_BUCKET_SYNC
         self.internal_endpoint = settings.MINIO_ENDPOINT
         self.external_endpoint = settings.MINIO_EXTERNAL_ENDPOINT
         
         # Ensure bucket exists (using internal client)
         self._ensure_bucket_exists(self.bucket_products)
+        self._ensure_bucket_exists(self.bucket_sync)
     
     def _ensure_bucket_exists(self, bucket_name):
         """Create bucket if not exists"""
@@ -51,14 +51,18 @@ class MinIOStorage:
         """
         Upload product image to MinIO
         
+        Images are content-addressed (object key from the MD5 checksum), so an
+        image used by several products or brands is stored once. Uploading an
+        image that is already stored only returns its metadata.
+        
         Args:
             file: Django UploadedFile object
-            product_id: Product UUID
-            is_primary: Whether this is primary image
+            product_id: Product UUID (kept for compatibility, not part of the key)
+            is_primary: Whether this is primary image (kept for compatibility)
             
         Returns:
             dict: {
-                'object_key': 'products/uuid/filename.jpg',
+                'object_key': 'images/md5hash',
                 'size': 12345,
                 'content_type': 'image/jpeg',
                 'checksum': 'md5hash',
@@ -66,26 +70,22 @@ class MinIOStorage:
             }
         """
         try:
-            # Generate object key: products/{product_id}/{uuid}_{filename}
-            file_uuid = uuid.uuid4().hex[:8]
-            ext = os.path.splitext(file.name)[1].lower()
-            filename = f"{file_uuid}_{file.name}" if not is_primary else f"primary{ext}"
-            object_key = f"products/{product_id}/{filename}"
-            
             # Calculate MD5 checksum
             file.seek(0)
             file_data = file.read()
             checksum = hashlib.md5(file_data).hexdigest()
+            object_key = self.image_object_key(checksum)
             
-            # Upload to MinIO
+            # Upload to MinIO unless the same image is stored already
             file.seek(0)
-            self.client.put_object(
-                bucket_name=self.bucket_products,
-                object_name=object_key,
-                data=BytesIO(file_data),
-                length=len(file_data),
-                content_type=file.content_type or 'image/jpeg'
-            )
+            if not self.image_exists(object_key):
+                self.client.put_object(
+                    bucket_name=self.bucket_products,
+                    object_name=object_key,
+                    data=BytesIO(file_data),
+                    length=len(file_data),
+                    content_type=file.content_type or 'image/jpeg'
+                )
             
             return {
                 'object_key': object_key,
@@ -100,6 +100,39 @@ class MinIOStorage:
             print(f"✗ MinIO upload error: {e}")
             raise Exception(f"Failed to upload image: {e}")
     
+    def image_object_key(self, checksum):
+        """Content-addressed object key of a product image"""
+        return f"images/{checksum}"
+    
+    def image_exists(self, object_key):
+        """Is the object stored in the product bucket"""
+        try:
+            self.client.stat_object(self.bucket_products, object_key)
+            return True
+        except S3Error:
+            return False
+    
+    def upload_image_data(self, data, object_key, content_type):
+        """
+        Upload generated image bytes (e.g. a rendition) to the product bucket
+        
+        Args:
+            data: Image bytes
+            object_key: Object key in MinIO
+            content_type: MIME type
+        """
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket_products,
+                object_name=object_key,
+                data=BytesIO(data),
+                length=len(data),
+                content_type=content_type
+            )
+        except S3Error as e:
+            print(f"✗ MinIO upload error: {e}")
+            raise Exception(f"Failed to upload image: {e}")
+    
     def get_image_url(self, object_key, expires=3600):
         """
         Get direct URL for image access (no presigning - requires public bucket)
@@ -170,6 +203,81 @@ class MinIOStorage:
             print(f"✗ MinIO download error: {e}")
             raise Exception(f"Failed to download image: {str(e)}")
     
+    def upload_sync_snapshot(self, file, object_key, length):
+        """
+        Upload a store sync snapshot to MinIO
+        
+        Args:
+            file: Binary file object positioned at the start
+            object_key: Object key (e.g., "stores/uuid/version.ndjson.gz")
+            length: File size in bytes
+        """
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket_sync,
+                object_name=object_key,
+                data=file,
+                length=length,
+                content_type='application/gzip'
+            )
+        except S3Error as e:
+            print(f"✗ MinIO snapshot upload error: {e}")
+            raise Exception(f"Failed to upload sync snapshot: {e}")
+    
+    def open_sync_snapshot(self, object_key, offset=0, length=0):
+        """
+        Open a byte range of a sync snapshot for streaming
+        
+        Args:
+            object_key: Object key in MinIO
+            offset: First byte
+            length: Number of bytes (0 = to the end)
+            
+        Returns:
+            urllib3 response (caller must close() and release_conn())
+        """
+        try:
+            return self.client.get_object(
+                bucket_name=self.bucket_sync,
+                object_name=object_key,
+                offset=offset,
+                length=length
+            )
+        except S3Error as e:
+            print(f"✗ MinIO snapshot download error: {e}")
+            raise Exception(f"Failed to download sync snapshot: {str(e)}")
+    
+    def get_sync_snapshot_url(self, object_key, expires=3600):
+        """
+        Get a presigned URL for direct snapshot download (supports Range requests)
+        
+        Signed for the external endpoint (the host is part of the signature)
+        """
+        external_client = Minio(
+            self.external_endpoint,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_USE_SSL,
+            region=settings.MINIO_REGION  # Known region: presigning needs no request
+        )
+        return external_client.presigned_get_object(
+            bucket_name=self.bucket_sync,
+            object_name=object_key,
+            expires=timedelta(seconds=expires)
+        )
+    
+    def delete_sync_snapshot(self, object_key):
+        """Delete sync snapshot from MinIO"""
+        try:
+            self.client.remove_object(
+                bucket_name=self.bucket_sync,
+                object_name=object_key
+            )
+            return True
+        except S3Error as e:
+            print(f"✗ MinIO delete error: {e}")
+            return False
+    
     def test_connection(self):
         """
         Test MinIO connection and return status
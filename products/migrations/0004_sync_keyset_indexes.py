@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("products", "0003_tables_shape"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["updated_at", "id"], name="category_updated_ad961f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="modifier",
+            index=models.Index(
+                fields=["updated_at", "id"], name="modifier_updated_2a2010_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="modifieroption",
+            index=models.Index(
+                fields=["created_at", "id"], name="modifier_op_created_40248c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["company", "updated_at", "id"],
+                name="product_company_7cf9be_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productphoto",
+            index=models.Index(
+                fields=["updated_at", "id"], name="product_pho_updated_c97d60_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tablearea",
+            index=models.Index(
+                fields=["store", "updated_at", "id"],
+                name="table_area_store_i_7ee7af_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tablegroup",
+            index=models.Index(
+                fields=["created_at", "id"], name="table_group_created_ce336a_idx"
+            ),
+        ),
+    ]
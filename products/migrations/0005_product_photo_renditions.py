@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0004_sync_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productphoto",
+            name="renditions",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Resized WebP/JPEG renditions: {name: {object_key, width, height, size, content_type, checksum}}",
+            ),
+        ),
+    ]
@@ -43,6 +43,8 @@ class Category(models.Model):
         indexes = [
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['parent']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -104,6 +106,8 @@ class Product(models.Model):
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['sku']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['company', 'updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -142,6 +146,10 @@ class ProductPhoto(models.Model):
     content_type = models.CharField(max_length=100, default='image/jpeg')
     checksum = models.CharField(max_length=64, blank=True, default='', help_text="MD5 checksum for integrity")
     version = models.IntegerField(default=1, help_text="Image version for sync")
+    renditions = models.JSONField(
+        default=dict, blank=True,
+        help_text="Resized WebP/JPEG renditions: {name: {object_key, width, height, size, content_type, checksum}}"
+    )
     
     # Legacy field for backward compatibility (can be removed later)
     photo = models.ImageField(upload_to='product_photos/', blank=True, null=True)
@@ -160,6 +168,8 @@ class ProductPhoto(models.Model):
             models.Index(fields=['product', 'is_primary']),
             models.Index(fields=['object_key']),
             models.Index(fields=['checksum']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -216,6 +226,8 @@ class Modifier(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['brand', 'is_active']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -248,6 +260,8 @@ class ModifierOption(models.Model):
         ordering = ['sort_order', 'name']
         indexes = [
             models.Index(fields=['modifier', 'is_active']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -313,6 +327,8 @@ class TableArea(models.Model):
             models.Index(fields=['company', 'is_active']),
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['store', 'is_active']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['store', 'updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -416,6 +432,8 @@ class TableGroup(models.Model):
         indexes = [
             models.Index(fields=['brand', 'created_at']),
             models.Index(fields=['main_table']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -0,0 +1,175 @@
+"""
+Product Photo Renditions
+Resized WebP copies of product photos, generated in the background by Celery
+
+Uploads are stored as they come (often multi-megabyte phone photos) while
+POS tiles show them at about 200px. After an upload, Celery renders one
+copy per rendition with Pillow and stores it under its own prefix:
+
+    images/<md5>                  original
+    renditions/<md5>/thumb.webp   96px
+    renditions/<md5>/pos.webp     256px (POS tile)
+    renditions/<md5>/kiosk.webp   800px (kiosk / customer display)
+
+The original is an object named images/<md5>, and MinIO rejects objects
+below a key that is itself an object (XMinioParentIsObject), so renditions
+cannot live under the original's key.
+
+Sizes are the longest side; images are never upscaled. JPEG is used if
+Pillow was built without WebP. ProductPhoto.renditions records key,
+dimensions, size and checksum per rendition, and the sync endpoints expose
+them so an Edge Server only downloads the size it renders.
+
+Photos sharing an image (same checksum) share its renditions, which are
+rendered once.
+
+Usage:
+    renditions.schedule(photo)                # after upload, on commit
+    renditions.generate_renditions(photo)     # in the Celery task
+"""
+
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Rendition name: longest side in pixels
+RENDITIONS = {
+    'thumb': 96,
+    'pos': 256,
+    'kiosk': 800,
+}
+
+RENDITION_PREFIX = 'renditions'
+
+# Prefix of content-addressed originals (core.storage)
+ORIGINAL_PREFIX = 'images/'
+
+if features.check('webp'):
+    FORMAT, EXTENSION, CONTENT_TYPE = 'WEBP', 'webp', 'image/webp'
+else:
+    FORMAT, EXTENSION, CONTENT_TYPE = 'JPEG', 'jpg', 'image/jpeg'
+
+# Encoder options of the rendition format
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 80, 'optimize': True},
+}
+
+
+def _storage():
+    from core.storage import minio_storage
+    return minio_storage
+
+
+def rendition_key(object_key, name):
+    """Object key of a rendition (renditions/<md5>/<name>.<ext> for content-addressed originals)"""
+    stem = os.path.splitext(object_key)[0].removeprefix(ORIGINAL_PREFIX)
+    return f"{RENDITION_PREFIX}/{stem}/{name}.{EXTENSION}"
+
+
+def is_complete(renditions):
+    return set(RENDITIONS) <= set(renditions or {})
+
+
+def render(data, sizes=None):
+    """
+    Resize image bytes to every rendition size
+
+    Returns:
+        Dict: {name: (bytes, width, height)}
+    """
+    sizes = sizes or RENDITIONS
+    image = Image.open(BytesIO(data))
+    # Decode big JPEGs at a reduced scale, enough for the largest rendition
+    largest = max(sizes.values())
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha and FORMAT == 'WEBP' else 'RGB')
+
+    result = {}
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        copy = image.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        copy.save(buffer, FORMAT, **SAVE_OPTIONS[FORMAT])
+        result[name] = (buffer.getvalue(), copy.width, copy.height)
+    return result
+
+
+def generate_renditions(photo, force=False):
+    """
+    Render and store the renditions of a photo
+
+    Args:
+        photo: ProductPhoto
+        force: Render again even if the photo has every rendition
+
+    Returns:
+        Dict: The photo's renditions (empty for photos without object)
+    """
+    from products.models import ProductPhoto
+
+    if not photo.object_key:
+        return {}
+    if is_complete(photo.renditions) and not force:
+        return photo.renditions
+
+    shared = None
+    if photo.checksum and not force:
+        shared = ProductPhoto.objects.filter(checksum=photo.checksum).exclude(
+            id=photo.id
+        ).exclude(renditions={}).values_list('renditions', flat=True).first()
+
+    if shared and is_complete(shared):
+        renditions = shared
+    else:
+        storage = _storage()
+        renditions = {}
+        for name, (data, width, height) in render(storage.download_image(photo.object_key)).items():
+            key = rendition_key(photo.object_key, name)
+            storage.upload_image_data(data, key, CONTENT_TYPE)
+            renditions[name] = {
+                'object_key': key,
+                'width': width,
+                'height': height,
+                'size': len(data),
+                'content_type': CONTENT_TYPE,
+                'checksum': hashlib.md5(data).hexdigest(),
+            }
+
+    # save() (not update()) so the sync change log and versions see the change
+    photo.renditions = renditions
+    photo.save(update_fields=['renditions', 'updated_at'])
+    return renditions
+
+
+def with_urls(renditions, storage=None):
+    """Renditions of a sync payload, with download URL"""
+    if not renditions:
+        return {}
+    storage = storage or _storage()
+    return {
+        name: dict(info, url=storage.get_image_url(info['object_key']))
+        for name, info in renditions.items()
+    }
+
+
+def schedule(photo):
+    """Queue rendition generation of a new photo once the upload is committed"""
+    from config.tasks import generate_photo_renditions_task
+
+    def _enqueue():
+        try:
+            generate_photo_renditions_task.delay(str(photo.id))
+        except Exception as e:
+            # The periodic backfill picks the photo up later
+            logger.warning(f"Could not queue renditions of photo {photo.id}: {e}")
+
+    transaction.on_commit(_enqueue)
@@ -9,6 +9,7 @@ from django.contrib import messages
 from django.db.models import Q
 from django.core.paginator import Paginator
 from products.models import Product, ProductPhoto, Category, Modifier, ProductModifier
+from products import renditions
 from core.models import Brand
 
 
@@ -161,7 +162,7 @@ def product_create(request):
                     )
                     
                     # Save metadata to database
-                    ProductPhoto.objects.create(
+                    photo = ProductPhoto.objects.create(
                         product=product,
                         object_key=result['object_key'],
                         filename=result['filename'],
@@ -172,6 +173,8 @@ def product_create(request):
                         is_primary=True,
                         sort_order=0
                     )
+                    # Resized renditions for the Edge Servers (Celery)
+                    renditions.schedule(photo)
                 except Exception as img_error:
                     logger.error(f"Image upload error: {str(img_error)}")
             
@@ -283,11 +286,18 @@ def product_update(request, pk):
                 
                 for old_photo in old_photos:
                     try:
-                        # Delete from MinIO
-                        if old_photo.object_key:
+                        # Delete from MinIO, unless another photo shares the (content-addressed)
+                        # image or its renditions
+                        same_image = Q(object_key=old_photo.object_key)
+                        if old_photo.checksum:
+                            same_image |= Q(checksum=old_photo.checksum)
+                        shared = ProductPhoto.objects.filter(same_image).exclude(id=old_photo.id).exists()
+                        if old_photo.object_key and not shared:
                             logger.info(f"Deleting from MinIO: {old_photo.object_key}")
                             delete_result = minio_storage.delete_image(old_photo.object_key)
                             logger.info(f"MinIO delete result: {delete_result}")
+                            for rendition in old_photo.renditions.values():
+                                minio_storage.delete_image(rendition['object_key'])
                         # Delete from database
                         old_photo.delete()
                         logger.info(f"Deleted photo record from database: {old_photo.id}")
@@ -320,6 +330,7 @@ def product_update(request, pk):
                         sort_order=0
                     )
                     logger.info(f"Created new photo record: {new_photo.id}")
+                    renditions.schedule(new_photo)
                 except Exception as img_error:
                     logger.error(f"Image upload error during edit: {str(img_error)}")
                     logger.error(traceback.format_exc())
@@ -7,7 +7,7 @@ from django.utils.html import format_html
 from .models import (
     Promotion, PackagePromotion, PackageItem, PromotionTier,
     Voucher, PromotionUsage, PromotionLog, CustomerPromotionHistory,
-    PromotionApproval
+    PromotionApproval, CompiledPromotion
 )
 from .models_settings import PromotionSyncSettings
 
@@ -122,12 +122,22 @@ class PromotionAdmin(admin.ModelAdmin):
     duplicate_promotion.short_description = "Duplicate selected promotions"
     
     def activate_promotions(self, request, queryset):
-        count = queryset.update(is_active=True)
+        # Save one by one so signals fire (snapshot invalidation, sync tombstones)
+        count = 0
+        for promotion in queryset.exclude(is_active=True):
+            promotion.is_active = True
+            promotion.save(update_fields=['is_active', 'updated_at'])
+            count += 1
         self.message_user(request, f"{count} promotions activated")
     activate_promotions.short_description = "Activate selected promotions"
     
     def deactivate_promotions(self, request, queryset):
-        count = queryset.update(is_active=False)
+        # Save one by one so signals fire (snapshot invalidation, sync tombstones)
+        count = 0
+        for promotion in queryset.exclude(is_active=False):
+            promotion.is_active = False
+            promotion.save(update_fields=['is_active', 'updated_at'])
+            count += 1
         self.message_user(request, f"{count} promotions deactivated")
     deactivate_promotions.short_description = "Deactivate selected promotions"
 
@@ -256,6 +266,18 @@ class PromotionApprovalAdmin(admin.ModelAdmin):
     date_hierarchy = 'requested_at'
 
 
+@admin.register(CompiledPromotion)
+class CompiledPromotionAdmin(admin.ModelAdmin):
+    list_display = ['promotion', 'content_hash', 'compiler_version', 'source_version', 'is_dirty', 'compiled_at', 'updated_at']
+    list_filter = ['is_dirty', 'compiler_version']
+    search_fields = ['promotion__code', 'promotion__name', 'content_hash']
+    readonly_fields = ['promotion', 'body', 'content_hash', 'compiler_version', 'source_version',
+                       'is_dirty', 'compiled_at', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False  # Written by the recompile task
+
+
 @admin.register(PromotionSyncSettings)
 class PromotionSyncSettingsAdmin(admin.ModelAdmin):
     list_display = ['company', 'sync_strategy', 'future_days', 'past_days', 'auto_sync_enabled', 'updated_at']
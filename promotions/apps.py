@@ -5,3 +5,7 @@ class PromotionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "promotions"
     verbose_name = "Promotion Engine"
+
+    def ready(self):
+        # Register signal handlers (snapshot cache invalidation)
+        from promotions import signals  # noqa: F401
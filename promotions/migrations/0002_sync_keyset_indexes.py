@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:18
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("members", "0001_initial"),
+        ("products", "0004_sync_keyset_indexes"),
+        ("promotions", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="promotionsyncsettings",
+            name="max_promotions_per_sync",
+            field=models.IntegerField(
+                default=100,
+                help_text="Maximum number of promotions per sync page (further pages via next_page_token)",
+                validators=[
+                    django.core.validators.MinValueValidator(10),
+                    django.core.validators.MaxValueValidator(500),
+                ],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="promotion",
+            index=models.Index(
+                fields=["company", "brand", "updated_at", "id"],
+                name="promotion_company_6315c9_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("promotions", "0002_sync_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="promotionsyncsettings",
+            name="enable_compression",
+            field=models.BooleanField(
+                default=True,
+                help_text="Compress sync responses (zstd or gzip, as accepted by the Edge Server)",
+            ),
+        ),
+    ]
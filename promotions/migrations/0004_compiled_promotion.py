@@ -0,0 +1,64 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("promotions", "0003_sync_compression_help_text"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompiledPromotion",
+            fields=[
+                (
+                    "promotion",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="compiled",
+                        serialize=False,
+                        to="promotions.promotion",
+                    ),
+                ),
+                (
+                    "body",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Compiled JSON without compiled_at",
+                        null=True,
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        blank=True,
+                        help_text="SHA-256 of the canonical body",
+                        max_length=64,
+                    ),
+                ),
+                ("compiler_version", models.CharField(blank=True, max_length=20)),
+                (
+                    "source_version",
+                    models.PositiveIntegerField(
+                        default=1, help_text="Bumped on every change of the promotion"
+                    ),
+                ),
+                ("is_dirty", models.BooleanField(db_index=True, default=True)),
+                (
+                    "compiled_at",
+                    models.DateTimeField(
+                        blank=True, help_text="Last time the body changed", null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Compiled Promotion",
+                "verbose_name_plural": "Compiled Promotions",
+                "db_table": "compiled_promotion",
+            },
+        ),
+    ]
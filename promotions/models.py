@@ -325,6 +325,8 @@ class Promotion(models.Model):
             models.Index(fields=['promo_type']),
             models.Index(fields=['code']),
             models.Index(fields=['execution_priority']),
+            # Keyset pagination of sync endpoints
+            models.Index(fields=['company', 'brand', 'updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -715,3 +717,31 @@ class PromotionApproval(models.Model):
             return True  # Company scope can approve all
         # TODO: Check brand match for brand/store scope
         return True
+
+
+class CompiledPromotion(models.Model):
+    """
+    Precompiled Edge JSON of a promotion (see promotions.services.precompiled)
+    Marked dirty by the change signals, recompiled by a Celery worker
+    """
+    promotion = models.OneToOneField(
+        Promotion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compiled'
+    )
+    body = models.JSONField(null=True, blank=True, help_text="Compiled JSON without compiled_at")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the canonical body")
+    compiler_version = models.CharField(max_length=20, blank=True)
+    source_version = models.PositiveIntegerField(default=1, help_text="Bumped on every change of the promotion")
+    is_dirty = models.BooleanField(default=True, db_index=True)
+    compiled_at = models.DateTimeField(null=True, blank=True, help_text="Last time the body changed")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'compiled_promotion'
+        verbose_name = 'Compiled Promotion'
+        verbose_name_plural = 'Compiled Promotions'
+    
+    def __str__(self):
+        return f"{self.promotion_id} ({self.content_hash[:12] or 'not compiled'})"
@@ -69,12 +69,12 @@ class PromotionSyncSettings(models.Model):
     max_promotions_per_sync = models.IntegerField(
         default=100,
         validators=[MinValueValidator(10), MaxValueValidator(500)],
-        help_text='Maximum number of promotions per sync request'
+        help_text='Maximum number of promotions per sync page (further pages via next_page_token)'
     )
     
     enable_compression = models.BooleanField(
         default=True,
-        help_text='Enable gzip compression for API responses'
+        help_text='Compress sync responses (zstd or gzip, as accepted by the Edge Server)'
     )
     
     # Audit
@@ -0,0 +1,169 @@
+"""
+Company Compile Jobs
+Company-wide promotion compilation fanned out over Celery workers
+
+compile_for_company() in a web request times out for the largest
+companies. A job splits the company's promotions into chunks (grouped by
+brand, at most CHUNK_SIZE promotions each), compiles the chunks in
+parallel (Celery group) and merges them in a chord callback into the same
+structure as PromotionCompiler.compile_for_company(). Wall time drops with
+the number of workers; the merge only assigns compiled promotions to stores.
+
+Progress and result live in the default cache (Redis in production) for
+JOB_TIMEOUT seconds:
+
+    {job_id, company_id, status: queued|running|done|failed,
+     total_chunks, done_chunks, promotions, started_at, finished_at, error}
+
+Chunks run concurrently, so the state is never read, modified and written
+back: the fixed fields are written once by start(), the chunk count is an
+atomic counter and every status change is its own key written with
+cache.add(). The first recorded failure wins; later chunks or the merge
+cannot overwrite it.
+
+Usage:
+    job = compile_jobs.start(company)
+    compile_jobs.progress(job['job_id'])   # poll
+    compile_jobs.result(job['job_id'])     # once status is 'done'
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'default'
+KEY_PREFIX = 'compile_job'
+
+# Promotions compiled per chunk task
+CHUNK_SIZE = 200
+
+# Lifetime of job progress and result
+JOB_TIMEOUT = 60 * 60
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(job_id, part='state'):
+    return f"{KEY_PREFIX}:{job_id}:{part}"
+
+
+def chunk_promotions(promotions, chunk_size=CHUNK_SIZE):
+    """Promotion id lists, grouped by brand and split at chunk_size"""
+    by_brand = defaultdict(list)
+    for promotion in promotions:
+        by_brand[promotion.brand_id].append(str(promotion.id))
+    chunks = []
+    for promotion_ids in by_brand.values():
+        chunks.extend(promotion_ids[start:start + chunk_size] for start in range(0, len(promotion_ids), chunk_size))
+    return chunks
+
+
+def _mark(job_id, part, value):
+    """Record a status change once (cache.add never overwrites)"""
+    return _cache().add(_key(job_id, part), value, timeout=JOB_TIMEOUT)
+
+
+def start(company, chunk_size=CHUNK_SIZE):
+    """
+    Queue the compilation of a company
+
+    Returns:
+        Job state (see module docstring)
+    """
+    from celery import chord
+    from config.tasks import compile_promotion_chunk_task, merge_company_compile_task
+    from promotions.services.compiler import PromotionCompiler
+
+    scope = PromotionCompiler().company_scope(company)
+    chunks = chunk_promotions(scope['promotions'], chunk_size)
+    job_id = uuid.uuid4().hex
+    state = {
+        'job_id': job_id,
+        'company_id': str(company.id),
+        'total_chunks': len(chunks),
+        'promotions': len(scope['promotions']),
+        'started_at': timezone.now().isoformat(),
+    }
+    _cache().set(_key(job_id), state, timeout=JOB_TIMEOUT)
+    _cache().set(_key(job_id, 'done'), 0, timeout=JOB_TIMEOUT)
+
+    logger.info(f"Company compile job {job_id}: {len(scope['promotions'])} promotions in {len(chunks)} chunks")
+    header = [compile_promotion_chunk_task.s(job_id, promotion_ids) for promotion_ids in chunks]
+    merge = merge_company_compile_task.s(job_id, str(company.id))
+    if header:
+        chord(header)(merge)
+    else:
+        merge.delay([])
+    return dict(state, status='queued', done_chunks=0, finished_at=None, error=None)
+
+
+def compile_chunk(job_id, promotion_ids):
+    """Compiled promotions of one chunk (precompiled rows where clean)"""
+    from promotions.models import Promotion
+    from promotions.services import precompiled
+
+    _mark(job_id, 'running', True)
+    compiled = precompiled.load(Promotion.objects.filter(id__in=promotion_ids))
+    try:
+        _cache().incr(_key(job_id, 'done'))
+    except ValueError:
+        # Progress expired; the result is still merged
+        pass
+    return compiled
+
+
+def merge(job_id, company_id, chunk_results):
+    """Merge chunk results into the compile_for_company() structure"""
+    from core.models import Company
+    from promotions.services import precompiled
+    from promotions.services.compiler import PromotionCompiler
+
+    compiler = PromotionCompiler()
+    company = Company.objects.get(id=company_id)
+    scope = compiler.company_scope(company)
+
+    compiled = [promotion for chunk in chunk_results for promotion in chunk]
+    # Promotions created after the job started
+    seen = {promotion['id'] for promotion in compiled}
+    missing = [promotion for promotion in scope['promotions'] if str(promotion.id) not in seen]
+    if missing:
+        compiled.extend(precompiled.load(missing))
+
+    result = compiler.assemble_company_result(company, scope, compiled)
+    _cache().set(_key(job_id, 'result'), result, timeout=JOB_TIMEOUT)
+    _mark(job_id, 'finished', timezone.now().isoformat())
+    return result['summary']
+
+
+def fail(job_id, error):
+    """Record the job's failure (only the first one is kept)"""
+    _mark(job_id, 'failed', {'error': str(error), 'finished_at': timezone.now().isoformat()})
+
+
+def progress(job_id):
+    """Job state with the current status and chunk count, or None (unknown / expired)"""
+    parts = ['state', 'done', 'running', 'finished', 'failed']
+    values = _cache().get_many([_key(job_id, part) for part in parts])
+    state, done, running, finished, failed = (values.get(_key(job_id, part)) for part in parts)
+    if state is None:
+        return None
+
+    if failed:
+        status, finished_at, error = 'failed', failed['finished_at'], failed['error']
+    elif finished:
+        status, finished_at, error = 'done', finished, None
+    else:
+        status, finished_at, error = 'running' if running else 'queued', None, None
+    return dict(state, status=status, done_chunks=done or 0, finished_at=finished_at, error=error)
+
+
+def result(job_id):
+    """compile_for_company() structure of a finished job, or None"""
+    return _cache().get(_key(job_id, 'result'))
@@ -10,19 +10,139 @@ Date: 2026-01-27
 Version: 1.0
 """
 
+from collections import defaultdict
 from typing import Dict, List, Optional
 from decimal import Decimal
 from django.db.models import Q
 from django.utils import timezone
 from promotions.models import Promotion, PromotionTier, PackagePromotion
 from products.models import Product, Category
-from core.models import Store
+from core.models import Brand, Store
+from promotions.services import lookup_index
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
 
+class PromotionRelations:
+    """
+    Related rows of a set of promotions, loaded in bulk
+
+    One query per many-to-many relation, one for the active tiers and two
+    for the packages and their items - the same number of queries for 1 or
+    1000 promotions. FK targets are not loaded (the compiler only needs
+    their ids).
+
+    Usage:
+        relations = PromotionRelations(promotions)
+        relations.ids(promotion, 'stores')  # like promotion.stores.values_list('id', flat=True)
+    """
+
+    M2M_FIELDS = [
+        'categories', 'exclude_categories', 'products', 'exclude_products',
+        'stores', 'brands', 'exclude_brands', 'trigger_brands', 'benefit_brands',
+        'combo_products',
+    ]
+
+    def __init__(self, promotions: List[Promotion]):
+        promotion_ids = [promotion.id for promotion in promotions]
+        self._ids = {}
+        for name in self.M2M_FIELDS:
+            self._ids[name] = self._load_m2m(name, promotion_ids)
+
+        # Same filter and order as promotion.tiers.filter(is_active=True).order_by('tier_order')
+        self._tiers = defaultdict(list)
+        for tier in PromotionTier.objects.filter(
+            promotion_id__in=promotion_ids, is_active=True
+        ).order_by('tier_order'):
+            self._tiers[tier.promotion_id].append(tier)
+
+        self._packages = {
+            package.promotion_id: package
+            for package in PackagePromotion.objects.filter(
+                promotion_id__in=promotion_ids
+            ).prefetch_related('items')
+        }
+
+    def _load_m2m(self, name: str, promotion_ids: List) -> Dict:
+        """{promotion_id: [related ids]} in the related model's default order"""
+        field = Promotion._meta.get_field(name)
+        query_name = field.related_query_name()
+        ids = defaultdict(list)
+        rows = field.related_model._default_manager.filter(
+            **{f"{query_name}__in": promotion_ids}
+        ).values_list(query_name, 'id')
+        for promotion_id, related_id in rows:
+            ids[promotion_id].append(related_id)
+        return ids
+
+    def ids(self, promotion: Promotion, name: str) -> List:
+        return self._ids[name].get(promotion.id, [])
+
+    def tiers(self, promotion: Promotion) -> List[PromotionTier]:
+        return self._tiers.get(promotion.id, [])
+
+    def package(self, promotion: Promotion) -> PackagePromotion:
+        try:
+            return self._packages[promotion.id]
+        except KeyError:
+            raise PackagePromotion.DoesNotExist(f"Promotion {promotion.id} has no package")
+
+
+class PromotionIndex:
+    """
+    In-memory store applicability of a set of promotions
+
+    Same rules as the compile_for_store() query: all_stores or the store
+    in promotion.stores, and - for stores with brands - company scope, a
+    shared brand (scope 'brands') or the store's brand (scope 'single').
+
+    Usage:
+        index = PromotionIndex(promotions, relations)
+        index.for_store(store_id, brand_ids)  # promotions in input order
+    """
+
+    def __init__(self, promotions: List[Promotion], relations: PromotionRelations):
+        self.position = {promotion.id: position for position, promotion in enumerate(promotions)}
+        self.promotions = promotions
+        self.all_stores = set()
+        self.by_store = defaultdict(set)
+        self.company_scope = set()
+        self.by_brand = defaultdict(set)
+
+        for promotion in promotions:
+            if promotion.all_stores:
+                self.all_stores.add(promotion.id)
+            for store_id in relations.ids(promotion, 'stores'):
+                self.by_store[store_id].add(promotion.id)
+
+            if promotion.scope == 'company':
+                self.company_scope.add(promotion.id)
+            elif promotion.scope == 'brands':
+                for brand_id in relations.ids(promotion, 'brands'):
+                    self.by_brand[brand_id].add(promotion.id)
+            elif promotion.scope == 'single' and promotion.brand_id:
+                self.by_brand[promotion.brand_id].add(promotion.id)
+
+    def for_store(self, store_id, brand_ids: List) -> List[Promotion]:
+        candidates = self.all_stores | self.by_store.get(store_id, set())
+        if brand_ids:
+            candidates &= self.company_scope.union(*(self.by_brand.get(brand_id, set()) for brand_id in brand_ids))
+        return [self.promotions[position] for position in sorted(self.position[pk] for pk in candidates)]
+
+
+def _store_brand_ids(stores) -> Dict:
+    """{store_id: [active brand ids]} of stores, one query"""
+    brand_ids = defaultdict(list)
+    rows = Brand.objects.filter(
+        is_active=True, stores__in=stores
+    ).order_by('name').values_list('stores', 'id')
+    for store_id, brand_id in rows:
+        brand_ids[store_id].append(brand_id)
+    return brand_ids
+
+
 class PromotionCompiler:
     """
     Main compiler class - converts Promotion model to JSON
@@ -35,6 +155,16 @@ class PromotionCompiler:
     def __init__(self):
         self.version = "1.0"
         self.compiler_name = "PromotionCompiler"
+        # Bulk-loaded relations while compile_multiple() runs
+        self.relations: Optional[PromotionRelations] = None
+    
+    def _related_ids(self, promotion: Promotion, name: str) -> List[str]:
+        """Ids of a many-to-many relation as strings (bulk-loaded in batch mode)"""
+        if self.relations is not None:
+            ids = self.relations.ids(promotion, name)
+        else:
+            ids = getattr(promotion, name).values_list('id', flat=True)
+        return [str(related_id) for related_id in ids]
     
     def compile_promotion(self, promotion: Promotion) -> Dict:
         """
@@ -136,18 +266,18 @@ class PromotionCompiler:
         
         # Categories
         if promotion.apply_to == 'category':
-            scope["categories"] = [str(cat_id) for cat_id in promotion.categories.values_list('id', flat=True)]
-            scope["exclude_categories"] = [str(cat_id) for cat_id in promotion.exclude_categories.values_list('id', flat=True)]
+            scope["categories"] = self._related_ids(promotion, 'categories')
+            scope["exclude_categories"] = self._related_ids(promotion, 'exclude_categories')
         
         # Products
         if promotion.apply_to == 'product':
-            scope["products"] = [str(prod_id) for prod_id in promotion.products.values_list('id', flat=True)]
-            scope["exclude_products"] = [str(prod_id) for prod_id in promotion.exclude_products.values_list('id', flat=True)]
+            scope["products"] = self._related_ids(promotion, 'products')
+            scope["exclude_products"] = self._related_ids(promotion, 'exclude_products')
         
         # For 'all' - still need exclusions
         if promotion.apply_to == 'all':
-            scope["exclude_categories"] = [str(cat_id) for cat_id in promotion.exclude_categories.values_list('id', flat=True)]
-            scope["exclude_products"] = [str(prod_id) for prod_id in promotion.exclude_products.values_list('id', flat=True)]
+            scope["exclude_categories"] = self._related_ids(promotion, 'exclude_categories')
+            scope["exclude_products"] = self._related_ids(promotion, 'exclude_products')
         
         return scope
     
@@ -167,19 +297,20 @@ class PromotionCompiler:
         if promotion.all_stores:
             targeting["stores"] = "all"
         else:
-            targeting["stores"] = [str(store_id) for store_id in promotion.stores.values_list('id', flat=True)]
+            targeting["stores"] = self._related_ids(promotion, 'stores')
         
         # Brand targeting
         if promotion.scope == 'company':
             targeting["brands"] = "all"
         elif promotion.scope == 'brands':
-            targeting["brands"] = [str(brand_id) for brand_id in promotion.brands.values_list('id', flat=True)]
-        elif promotion.scope == 'single' and promotion.brand:
-            targeting["brands"] = [str(promotion.brand.id)]
+            targeting["brands"] = self._related_ids(promotion, 'brands')
+        elif promotion.scope == 'single' and promotion.brand_id:
+            targeting["brands"] = [str(promotion.brand_id)]
         
         # Exclude brands
-        if promotion.exclude_brands.exists():
-            targeting["exclude_brands"] = [str(brand_id) for brand_id in promotion.exclude_brands.values_list('id', flat=True)]
+        exclude_brands = self._related_ids(promotion, 'exclude_brands')
+        if exclude_brands:
+            targeting["exclude_brands"] = exclude_brands
         
         # Customer targeting
         targeting["member_only"] = promotion.member_only
@@ -267,8 +398,8 @@ class PromotionCompiler:
         }
         
         # If specific get_product is defined
-        if promotion.get_product:
-            rules["get_product_id"] = str(promotion.get_product.id)
+        if promotion.get_product_id:
+            rules["get_product_id"] = str(promotion.get_product_id)
             rules["same_product_only"] = False
         else:
             rules["same_product_only"] = True
@@ -280,19 +411,15 @@ class PromotionCompiler:
         Type 4: Combo Deal
         Example: Burger + Fries + Drink = Rp 45,000
         """
-        combo_products = list(
-            promotion.combo_products.values('id', 'name', 'price')
-        )
-        
         return {
             "type": "combo",
             "combo_price": float(promotion.combo_price),
             "products": [
                 {
-                    "product_id": str(p['id']),
+                    "product_id": product_id,
                     "quantity": 1,  # Default, can be enhanced
                 }
-                for p in combo_products
+                for product_id in self._related_ids(promotion, 'combo_products')
             ],
             "all_required": True,
         }
@@ -307,12 +434,12 @@ class PromotionCompiler:
             "min_purchase": float(promotion.min_purchase),
         }
         
-        if promotion.required_product:
-            rules["trigger_product_id"] = str(promotion.required_product.id)
+        if promotion.required_product_id:
+            rules["trigger_product_id"] = str(promotion.required_product_id)
             rules["trigger_min_qty"] = promotion.buy_quantity or 1
         
-        if promotion.get_product:
-            rules["free_product_id"] = str(promotion.get_product.id)
+        if promotion.get_product_id:
+            rules["free_product_id"] = str(promotion.get_product_id)
             rules["free_quantity"] = promotion.get_quantity or 1
         
         return rules
@@ -367,7 +494,7 @@ class PromotionCompiler:
         Example: Family Package - 2 mains + 2 sides + 4 drinks = Rp 200k
         """
         try:
-            package = promotion.package
+            package = self.relations.package(promotion) if self.relations is not None else promotion.package
             items = []
             
             for item in package.items.all():
@@ -377,10 +504,10 @@ class PromotionCompiler:
                     "is_required": item.is_required,
                 }
                 
-                if item.product:
-                    item_data["product_id"] = str(item.product.id)
-                elif item.category:
-                    item_data["category_id"] = str(item.category.id)
+                if item.product_id:
+                    item_data["product_id"] = str(item.product_id)
+                elif item.category_id:
+                    item_data["category_id"] = str(item.category_id)
                     item_data["min_selection"] = item.min_selection
                     item_data["max_selection"] = item.max_selection
                 
@@ -422,12 +549,12 @@ class PromotionCompiler:
             "upsell_message": promotion.upsell_message,
         }
         
-        if promotion.required_product:
-            rules["required_product_id"] = str(promotion.required_product.id)
+        if promotion.required_product_id:
+            rules["required_product_id"] = str(promotion.required_product_id)
             rules["required_min_qty"] = promotion.buy_quantity or 1
         
-        if promotion.upsell_product:
-            rules["upsell_product_id"] = str(promotion.upsell_product.id)
+        if promotion.upsell_product_id:
+            rules["upsell_product_id"] = str(promotion.upsell_product_id)
             rules["special_price"] = float(promotion.upsell_special_price)
         
         return rules
@@ -438,8 +565,12 @@ class PromotionCompiler:
         Example: Spend Rp 100k get 10% off, Rp 200k get 15% off
         """
         tiers = []
+        if self.relations is not None:
+            active_tiers = self.relations.tiers(promotion)
+        else:
+            active_tiers = promotion.tiers.filter(is_active=True).order_by('tier_order')
         
-        for tier in promotion.tiers.filter(is_active=True).order_by('tier_order'):
+        for tier in active_tiers:
             tier_data = {
                 "tier_name": tier.tier_name,
                 "min_amount": float(tier.min_amount),
@@ -448,8 +579,8 @@ class PromotionCompiler:
                 "discount_value": float(tier.discount_value),
             }
             
-            if tier.free_product:
-                tier_data["free_product_id"] = str(tier.free_product.id)
+            if tier.free_product_id:
+                tier_data["free_product_id"] = str(tier.free_product_id)
             
             if tier.discount_type == 'points_multiplier':
                 tier_data["points_multiplier"] = float(tier.points_multiplier)
@@ -491,9 +622,9 @@ class PromotionCompiler:
         }
         
         if promotion.cross_brand_type == 'trigger_benefit':
-            cross_brand["trigger_brands"] = [str(brand_id) for brand_id in promotion.trigger_brands.values_list('id', flat=True)]
+            cross_brand["trigger_brands"] = self._related_ids(promotion, 'trigger_brands')
             cross_brand["trigger_min_amount"] = float(promotion.trigger_min_amount or 0)
-            cross_brand["benefit_brands"] = [str(brand_id) for brand_id in promotion.benefit_brands.values_list('id', flat=True)]
+            cross_brand["benefit_brands"] = self._related_ids(promotion, 'benefit_brands')
         
         # Add custom rules from JSON field
         if promotion.cross_brand_rules:
@@ -505,27 +636,48 @@ class PromotionCompiler:
     # BATCH OPERATIONS
     # ============================================================================
     
-    def compile_multiple(self, promotions: List[Promotion]) -> List[Dict]:
+    def compile_multiple(self, promotions: List[Promotion],
+                         relations: Optional[PromotionRelations] = None) -> List[Dict]:
         """
         Compile multiple promotions (batch operation)
         
+        Related rows of all promotions are loaded up front (PromotionRelations),
+        so the query count does not grow with the number of promotions. The
+        output is the same as compile_promotion() per promotion.
+        
         Args:
             promotions: List of Promotion instances
+            relations: Relations already loaded for these promotions
             
         Returns:
             List of compiled promotion dicts
         """
+        promotions = list(promotions)
         compiled = []
-        for promotion in promotions:
-            try:
-                compiled.append(self.compile_promotion(promotion))
-            except Exception as e:
-                logger.error(f"Error compiling promotion {promotion.id}: {str(e)}")
-                continue
+        self.relations = relations or PromotionRelations(promotions)
+        try:
+            for promotion in promotions:
+                try:
+                    compiled.append(self.compile_promotion(promotion))
+                except Exception as e:
+                    logger.error(f"Error compiling promotion {promotion.id}: {str(e)}")
+                    continue
+        finally:
+            self.relations = None
         
         logger.info(f"Batch compiled {len(compiled)} promotions")
         return compiled
     
+    def _active_promotions(self, company_id):
+        """Active promotions of a company valid today"""
+        today = timezone.now().date()
+        return Promotion.objects.filter(
+            is_active=True,
+            start_date__lte=today,
+            end_date__gte=today,
+            company_id=company_id
+        )
+    
     def compile_for_store(self, store_id: str) -> List[Dict]:
         """
         Compile all active promotions for a specific store
@@ -545,21 +697,17 @@ class PromotionCompiler:
             return []
         
         # Get promotions applicable to this store
-        now = timezone.now()
-        promotions = Promotion.objects.filter(
-            Q(all_stores=True) | Q(stores=store),
-            is_active=True,
-            start_date__lte=now.date(),
-            end_date__gte=now.date(),
-            company=store.company
+        promotions = self._active_promotions(store.company_id).filter(
+            Q(all_stores=True) | Q(stores=store)
         ).distinct()
         
-        # Filter by brand
-        if store.brand:
+        # Filter by the brands operating in the store
+        brand_ids = _store_brand_ids([store]).get(store.id, [])
+        if brand_ids:
             promotions = promotions.filter(
                 Q(scope='company') |
-                Q(scope='brands', brands=store.brand) |
-                Q(scope='single', brand=store.brand)
+                Q(scope='brands', brands__in=brand_ids) |
+                Q(scope='single', brand_id__in=brand_ids)
             )
         
         logger.info(f"Found {promotions.count()} promotions for store {store.store_name}")
@@ -580,6 +728,11 @@ class PromotionCompiler:
         This is the main method for HO to compile promotions for entire company.
         Generates promotion JSON for every store and brand combination.
         
+        Each applicable promotion is compiled once and assigned to the stores
+        it applies to (PromotionIndex), so the work grows with the number of
+        promotions, not promotions x stores. Every store gets the same list
+        as compile_for_store().
+        
         Args:
             company_id: Company UUID
             
@@ -589,12 +742,14 @@ class PromotionCompiler:
                 "company_id": "uuid",
                 "compiled_at": "timestamp",
                 "stores": {
-                    "store-uuid-1": [promotions...],
-                    "store-uuid-2": [promotions...],
+                    "store-uuid-1": {"brand_ids": [...], "promotions": [...],
+                                     "indexes": {...} (lookup_index.build()), ...},
+                    "store-uuid-2": {"brand_ids": [...], "promotions": [...], ...},
                 },
                 "summary": {
                     "total_stores": 10,
                     "total_promotions": 50,
+                    "unique_promotions": 12,
                     "stores_with_promotions": 8
                 }
             }
@@ -610,38 +765,88 @@ class PromotionCompiler:
                 "company_id": company_id
             }
         
-        # Get all active stores for this company
-        stores = Store.objects.filter(
+        scope = self.company_scope(company)
+        logger.info(f"Compiling promotions for company {company.name} ({len(scope['stores'])} stores)")
+        
+        # Compile every applicable promotion once, then assign them to stores
+        relations = PromotionRelations(scope['promotions'])
+        compiled = self.compile_multiple(scope['promotions'], relations=relations)
+        result = self.assemble_company_result(company, scope, compiled, relations)
+        
+        return result
+
+
+    def company_scope(self, company) -> Dict:
+        """
+        Active stores of a company, their brands and the promotions that
+        may apply to any of them
+        
+        Returns:
+            Dict with "stores", "brand_ids" ({store_id: [brand ids]}),
+            "brand_names" ({brand_id: name}) and "promotions"
+        """
+        stores = list(Store.objects.filter(
             company=company,
             is_active=True
-        ).select_related('company').prefetch_related('brands').order_by('company__name', 'store_name')
+        ).order_by('store_name'))
+        promotions = list(self._active_promotions(company.id).filter(
+            Q(all_stores=True) | Q(stores__in=stores)
+        ).distinct())
+        return {
+            "stores": stores,
+            "brand_ids": _store_brand_ids(stores),
+            "brand_names": dict(Brand.objects.filter(stores__in=stores).values_list('id', 'name')),
+            "promotions": promotions,
+        }
+    
+    def assemble_company_result(self, company, scope: Dict, compiled: List[Dict],
+                                relations: Optional[PromotionRelations] = None) -> Dict:
+        """
+        Assign compiled promotions to the stores of company_scope()
         
-        logger.info(f"Compiling promotions for company {company.name} ({stores.count()} stores)")
+        Args:
+            company: Company instance
+            scope: company_scope() of the company
+            compiled: Compiled promotions (any order, failed ones missing)
+            relations: Relations already loaded for scope["promotions"]
+            
+        Returns:
+            compile_for_company() result
+        """
+        promotions = scope["promotions"]
+        compiled = {promotion["id"]: promotion for promotion in compiled}
+        index = PromotionIndex(promotions, relations or PromotionRelations(promotions))
         
         result = {
-            "company_id": str(company_id),
+            "company_id": str(company.id),
             "company_name": company.name,
             "compiled_at": timezone.now().isoformat(),
             "stores": {},
             "summary": {
-                "total_stores": stores.count(),
+                "total_stores": len(scope["stores"]),
                 "total_promotions": 0,
+                "unique_promotions": len(compiled),
                 "stores_with_promotions": 0,
                 "by_brand": {}
             }
         }
         
-        # Compile for each store
-        for store in stores:
-            store_promotions = self.compile_for_store(str(store.id))
+        for store in scope["stores"]:
+            store_brand_ids = scope["brand_ids"].get(store.id, [])
+            store_promotions = [
+                dict(compiled[str(promotion.id)], store_id=str(store.id))
+                for promotion in index.for_store(store.id, store_brand_ids)
+                if str(promotion.id) in compiled
+            ]
             
             result["stores"][str(store.id)] = {
                 "store_id": str(store.id),
                 "store_code": store.store_code,
                 "store_name": store.store_name,
-                "brand_id": str(store.brand_id),
-                "brand_name": store.brand.name,
+                "brand_ids": [str(brand_id) for brand_id in store_brand_ids],
+                "brand_names": [scope["brand_names"][brand_id] for brand_id in store_brand_ids],
                 "promotions": store_promotions,
+                "indexes": lookup_index.build(store_promotions),
                 "count": len(store_promotions)
             }
             
@@ -650,18 +855,17 @@ class PromotionCompiler:
             if len(store_promotions) > 0:
                 result["summary"]["stores_with_promotions"] += 1
             
-            # Track by brand
-            brand_name = store.brand.name
-            if brand_name not in result["summary"]["by_brand"]:
-                result["summary"]["by_brand"][brand_name] = {
-                    "stores": 0,
-                    "promotions": 0
-                }
-            result["summary"]["by_brand"][brand_name]["stores"] += 1
-            result["summary"]["by_brand"][brand_name]["promotions"] += len(store_promotions)
+            # Track by brand (promotions of the brand in this store)
+            for brand_id in store_brand_ids:
+                brand_summary = result["summary"]["by_brand"].setdefault(
+                    scope["brand_names"][brand_id], {"stores": 0, "promotions": 0}
+                )
+                brand_summary["stores"] += 1
+                brand_summary["promotions"] += len(index.for_store(store.id, [brand_id]))
         
         logger.info(
-            f"Company compilation complete: {result['summary']['total_promotions']} promotions "
+            f"Company compilation complete: {len(compiled)} promotions compiled, "
+            f"{result['summary']['total_promotions']} assigned "
             f"across {result['summary']['stores_with_promotions']}/{result['summary']['total_stores']} stores"
         )
         
@@ -0,0 +1,193 @@
+"""
+Promotion Lookup Indexes
+Inverted indexes over a store's compiled promotions
+
+Evaluating a cart against the promotion list means scanning the scope of
+every promotion for every cart line. The indexes map the keys of a cart
+line to the promotions that can apply to it, so only those are evaluated:
+
+    {
+        "version": 1,
+        "products":     {product_id: [promotion ids]},   # apply_to 'product'
+        "categories":   {category_id: [promotion ids]},  # apply_to 'category'
+        "all_products": [promotion ids],                 # apply_to 'all'
+        "order_level":  [promotion ids],                 # apply_to 'bill' / 'payment'
+        "brands":       {brand_id: [promotion ids]},
+        "all_brands":   [promotion ids],                 # scope 'company'
+        "time_windows": [{"day": 0-6, "start": "HH:MM:SS" | null,
+                          "end": "HH:MM:SS" | null, "promotions": [ids]}]
+    }
+
+Promotion ids keep the order of the compiled list (execution priority).
+Days follow Promotion.valid_days (0=Monday .. 6=Sunday, as weekday());
+entries outside 0-6 are skipped with a warning. Promotions without valid
+days are listed on every day, windows with start > end run past midnight.
+
+The indexes only narrow the candidates: exclusions, dates, targeting and
+rules are still checked on the compiled promotion itself.
+
+They are shipped with complete promotion sets only (full single-page
+sync_promotions responses, the bundle); after incremental or paged syncs
+the Edge rebuilds them with build() from its merged promotion list.
+
+Usage:
+    from promotions.services import lookup_index
+
+    indexes = lookup_index.build(compiled)
+    ids = lookup_index.candidates(indexes, lines, when=timezone.localtime())
+"""
+
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+DAYS = range(7)
+
+# apply_to values evaluated on the whole order instead of a line
+ORDER_LEVEL = ('bill', 'payment')
+
+
+def _append(mapping, key, promotion_id):
+    ids = mapping[key]
+    if not ids or ids[-1] != promotion_id:
+        ids.append(promotion_id)
+
+
+def _days(promotion_id, days_of_week):
+    """Valid weekdays of a promotion (valid_days is free-form JSON)"""
+    days = set()
+    for value in days_of_week or []:
+        try:
+            day = int(value)
+        except (TypeError, ValueError):
+            day = None
+        if day not in DAYS:
+            logger.warning(f"Promotion {promotion_id}: ignoring invalid day {value!r} in valid_days")
+            continue
+        days.add(day)
+    return sorted(days) or DAYS
+
+
+def build(compiled):
+    """
+    Lookup indexes of compiled promotions
+
+    Args:
+        compiled: Compiled promotions (PromotionCompiler output)
+
+    Returns:
+        Dict (see module docstring)
+    """
+    products = defaultdict(list)
+    categories = defaultdict(list)
+    brands = defaultdict(list)
+    windows = defaultdict(list)
+    all_products, order_level, all_brands = [], [], []
+
+    for promotion in compiled:
+        promotion_id = promotion['id']
+        scope = promotion.get('scope', {})
+        apply_to = scope.get('apply_to', promotion.get('apply_to'))
+
+        if apply_to == 'product':
+            for product_id in scope.get('products', []):
+                _append(products, product_id, promotion_id)
+        elif apply_to == 'category':
+            for category_id in scope.get('categories', []):
+                _append(categories, category_id, promotion_id)
+        elif apply_to in ORDER_LEVEL:
+            order_level.append(promotion_id)
+        else:
+            all_products.append(promotion_id)
+
+        target_brands = promotion.get('targeting', {}).get('brands', 'all')
+        if target_brands == 'all':
+            all_brands.append(promotion_id)
+        else:
+            for brand_id in target_brands:
+                _append(brands, brand_id, promotion_id)
+
+        validity = promotion.get('validity', {})
+        for day in _days(promotion_id, validity.get('days_of_week')):
+            _append(windows, (day, validity.get('time_start'), validity.get('time_end')), promotion_id)
+
+    return {
+        'version': VERSION,
+        'products': dict(products),
+        'categories': dict(categories),
+        'all_products': all_products,
+        'order_level': order_level,
+        'brands': dict(brands),
+        'all_brands': all_brands,
+        'time_windows': [
+            {'day': day, 'start': start, 'end': end, 'promotions': ids}
+            for (day, start, end), ids in sorted(windows.items(), key=lambda item: (
+                item[0][0], item[0][1] or '', item[0][2] or ''
+            ))
+        ],
+    }
+
+
+def _in_window(window, time):
+    start, end = window['start'], window['end']
+    if start and end and start > end:
+        return time >= start or time <= end
+    return (not start or time >= start) and (not end or time <= end)
+
+
+def active_at(indexes, when):
+    """Promotion ids whose day and time window contain a datetime"""
+    day, time = when.weekday(), when.strftime('%H:%M:%S')
+    return {
+        promotion_id
+        for window in indexes['time_windows']
+        if window['day'] == day and _in_window(window, time)
+        for promotion_id in window['promotions']
+    }
+
+
+def _brand_ids(indexes, brand_id):
+    return set(indexes['all_brands']) | set(indexes['brands'].get(brand_id, []))
+
+
+def line_candidates(indexes, product_id, category_id=None, brand_id=None):
+    """Promotion ids that may apply to one cart line"""
+    ids = set(indexes['all_products']) | set(indexes['products'].get(product_id, []))
+    if category_id:
+        ids |= set(indexes['categories'].get(category_id, []))
+    if brand_id:
+        ids &= _brand_ids(indexes, brand_id)
+    return ids
+
+
+def candidates(indexes, lines, when=None):
+    """
+    Promotion ids to evaluate for a cart
+
+    Args:
+        indexes: build() result
+        lines: Cart lines, dicts with "product_id" and optional
+            "category_id" / "brand_id"
+        when: Evaluation time (datetime), None skips the time windows
+
+    Returns:
+        Set of promotion ids: line candidates of every line, plus the
+        order level promotions of the cart's brands
+    """
+    ids = set()
+    cart_brands = set()
+    for line in lines:
+        ids |= line_candidates(indexes, line['product_id'], line.get('category_id'), line.get('brand_id'))
+        cart_brands.add(line.get('brand_id'))
+
+    order_level = set(indexes['order_level'])
+    if None not in cart_brands:
+        order_level &= set().union(*(_brand_ids(indexes, brand_id) for brand_id in cart_brands))
+    ids |= order_level
+
+    if when is not None:
+        ids &= active_at(indexes, when)
+    return ids
@@ -0,0 +1,223 @@
+"""
+Precompiled Promotions
+Persisted Edge JSON per promotion (CompiledPromotion)
+
+Compiling on the request path repeats the same work for every sync call.
+The compiled JSON of each promotion is stored with the SHA-256 of its
+canonical form (sorted keys, compact separators) and the compiler version:
+
+- the change signals (promotions.signals) call mark_dirty() in the saving
+  transaction; the recompile task is queued once it commits
+- recompile() (Celery, plus a periodic sweep) compiles dirty, missing and
+  outdated rows in batches with PromotionCompiler.compile_multiple
+- load() serves clean rows as stored. Rows still dirty (task not run yet)
+  or missing (promotions created without signals) are compiled in memory,
+  so a read never returns data older than the last committed change
+
+Dirty tracking is race free: every change bumps source_version, and a
+recompile only clears the flag if source_version is still the one it read.
+
+compiled_at is kept out of the hashed body and only moves when the hash
+changes, so an unchanged promotion keeps its hash and payload bytes.
+
+Usage:
+    from promotions.services import precompiled
+
+    precompiled.mark_dirty([promotion.id])
+    compiled = precompiled.load(promotions)  # like compile_multiple()
+    precompiled.recompile()
+"""
+
+import hashlib
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from promotions.models import CompiledPromotion, Promotion
+from promotions.services.compiler import PromotionCompiler
+
+logger = logging.getLogger(__name__)
+
+# Fields of the compiled JSON that are not part of the content
+VOLATILE_FIELDS = ('compiled_at',)
+
+# Promotions compiled per batch by recompile()
+BATCH_SIZE = 500
+
+COMPILER_VERSION = PromotionCompiler().version
+
+
+def canonical_json(body):
+    return json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+
+def content_hash(body):
+    """SHA-256 of the canonical body"""
+    return hashlib.sha256(canonical_json(body).encode()).hexdigest()
+
+
+def _body(compiled):
+    return {key: value for key, value in compiled.items() if key not in VOLATILE_FIELDS}
+
+
+def _served(body, compiled_at):
+    """Compiled promotion as returned to callers (sorted keys, whatever the database kept)"""
+    served = json.loads(canonical_json(body))
+    served['compiled_at'] = compiled_at.isoformat()
+    return served
+
+
+# ----------------------------------------------------------------------
+# Dirty tracking
+# ----------------------------------------------------------------------
+
+def mark_dirty(promotion_ids, create=False):
+    """
+    Mark promotions for recompilation (inside the saving transaction)
+
+    Args:
+        promotion_ids: Changed promotions
+        create: Also create missing rows (only for promotions known to
+            exist - not while a promotion is being deleted)
+    """
+    promotion_ids = list(set(promotion_ids))
+    if not promotion_ids:
+        return
+    if create:
+        # Insert before the update: a row a concurrent recompile inserts
+        # first is still dirtied below
+        CompiledPromotion.objects.bulk_create(
+            [CompiledPromotion(promotion_id=promotion_id) for promotion_id in promotion_ids],
+            ignore_conflicts=True,
+        )
+    CompiledPromotion.objects.filter(promotion_id__in=promotion_ids).update(
+        is_dirty=True, source_version=F('source_version') + 1
+    )
+    schedule(promotion_ids)
+
+
+def schedule(promotion_ids):
+    """Queue a recompile of the promotions once the transaction commits"""
+    from config.tasks import recompile_promotions_task
+
+    promotion_ids = [str(promotion_id) for promotion_id in promotion_ids]
+
+    def _enqueue():
+        try:
+            recompile_promotions_task.delay(promotion_ids)
+        except Exception as e:
+            # The periodic sweep picks them up later
+            logger.warning(f"Could not queue recompile of {len(promotion_ids)} promotions: {e}")
+
+    transaction.on_commit(_enqueue)
+
+
+def pending():
+    """Promotions whose row is dirty, missing or from another compiler version"""
+    return Promotion.objects.filter(
+        Q(compiled__isnull=True) | Q(compiled__is_dirty=True) | ~Q(compiled__compiler_version=COMPILER_VERSION)
+    )
+
+
+# ----------------------------------------------------------------------
+# Compiling
+# ----------------------------------------------------------------------
+
+def _compile(promotions):
+    """{promotion_id: body} (promotions failing to compile are left out, as in compile_multiple)"""
+    ids = {str(promotion.id): promotion.id for promotion in promotions}
+    return {
+        ids[compiled['id']]: _body(compiled)
+        for compiled in PromotionCompiler().compile_multiple(promotions)
+    }
+
+
+def recompile(promotion_ids=None, batch_size=BATCH_SIZE):
+    """
+    Recompile pending promotions and store the results
+
+    Args:
+        promotion_ids: Only these promotions (still only if pending)
+        batch_size: Promotions compiled per batch
+
+    Returns:
+        Dict: {'compiled': n, 'changed': n (new hash), 'failed': n}
+    """
+    queryset = pending()
+    if promotion_ids is not None:
+        queryset = queryset.filter(id__in=promotion_ids)
+    ids = list(queryset.values_list('id', flat=True))
+
+    result = {'compiled': 0, 'changed': 0, 'failed': 0}
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        # Read before compiling: a change during the compile keeps the row dirty
+        rows = {row.promotion_id: row for row in CompiledPromotion.objects.filter(promotion_id__in=batch)}
+        promotions = list(Promotion.objects.filter(id__in=batch))
+        bodies = _compile(promotions)
+        result['failed'] += len(promotions) - len(bodies)
+
+        now = timezone.now()
+        new_rows = []
+        for promotion_id, body in bodies.items():
+            digest = content_hash(body)
+            row = rows.get(promotion_id)
+            result['compiled'] += 1
+            if row is None:
+                new_rows.append(CompiledPromotion(
+                    promotion_id=promotion_id, body=body, content_hash=digest,
+                    compiler_version=COMPILER_VERSION, is_dirty=False, compiled_at=now,
+                ))
+                result['changed'] += 1
+                continue
+
+            fields = {'is_dirty': False, 'compiler_version': COMPILER_VERSION}
+            if digest != row.content_hash:
+                fields.update(body=body, content_hash=digest, compiled_at=now)
+                result['changed'] += 1
+            CompiledPromotion.objects.filter(
+                promotion_id=promotion_id, source_version=row.source_version
+            ).update(**fields)
+
+        # A row mark_dirty() created meanwhile wins (it is dirty)
+        CompiledPromotion.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+    if ids:
+        logger.info(f"Recompiled {result['compiled']} promotions ({result['changed']} changed, {result['failed']} failed)")
+    return result
+
+
+def load(promotions):
+    """
+    Compiled promotions, in the given order
+
+    Same output as PromotionCompiler.compile_multiple() (keys sorted,
+    compiled_at = last content change). Pending promotions are compiled
+    in memory; storing them is left to recompile().
+    """
+    promotions = list(promotions)
+    rows = {
+        row.promotion_id: row
+        for row in CompiledPromotion.objects.filter(
+            promotion_id__in=[promotion.id for promotion in promotions],
+            is_dirty=False,
+            compiler_version=COMPILER_VERSION,
+        )
+    }
+    stale = [promotion for promotion in promotions if promotion.id not in rows]
+    bodies = _compile(stale) if stale else {}
+    if stale:
+        logger.debug(f"Compiled {len(stale)} pending promotions on read")
+
+    now = timezone.now()
+    compiled = []
+    for promotion in promotions:
+        row = rows.get(promotion.id)
+        if row is not None:
+            compiled.append(_served(row.body, row.compiled_at))
+        elif promotion.id in bodies:
+            compiled.append(_served(bodies[promotion.id], now))
+    return compiled
@@ -0,0 +1,167 @@
+"""
+Promotion Snapshot Cache
+Caches compiled promotion lists for Edge Server sync
+
+Snapshots are keyed by company / brand / store and the company's sync
+strategy, and stored in the ``default`` cache (Redis in production).
+
+Invalidation is generation based: every company has a generation number
+that is part of each snapshot key. Signals in ``promotions.signals`` bump
+the generation after a Promotion (or its M2M / tier / package rows) is
+committed, so stale snapshots are simply never read again and expire on
+their own.
+
+Usage:
+    from promotions.services.snapshot_cache import promotion_snapshot_cache
+
+    key = promotion_snapshot_cache.build_key(company_id, brand_id, store_id, sync_settings, today)
+    snapshot = promotion_snapshot_cache.get(key)
+    if snapshot is None:
+        snapshot = {...}
+        promotion_snapshot_cache.set(key, snapshot)
+"""
+
+import logging
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class PromotionSnapshotCache:
+    """
+    Snapshot cache for compiled promotion lists
+    """
+
+    KEY_PREFIX = 'promo_snapshot'
+    SNAPSHOT_TIMEOUT = 60 * 60  # 1 hour (generation bump is the real invalidation)
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    # ------------------------------------------------------------------
+    # Generation (per company)
+    # ------------------------------------------------------------------
+
+    def _generation_key(self, company_id):
+        return f"{self.KEY_PREFIX}:gen:{company_id}"
+
+    @staticmethod
+    def _new_generation():
+        # Seed with a timestamp so an evicted counter never re-uses old keys
+        return int(time.time() * 1000)
+
+    def get_generation(self, company_id):
+        """Get current snapshot generation for a company"""
+        key = self._generation_key(company_id)
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, self._new_generation(), timeout=None)
+            generation = self.cache.get(key)
+        return generation
+
+    def invalidate_company(self, company_id):
+        """Invalidate all snapshots of a company by bumping its generation"""
+        if not company_id:
+            return
+        key = self._generation_key(company_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, self._new_generation(), timeout=None)
+        logger.debug(f"Promotion snapshots invalidated for company={company_id}")
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def build_key(self, company_id, brand_id, store_id, sync_settings, today, page=None):
+        """
+        Build snapshot key for a sync request
+
+        The key contains every sync setting that changes the promotion query,
+        so editing PromotionSyncSettings never serves an outdated snapshot.
+        Date based strategies also include the current date, paged requests
+        the page (KeysetPage.cache_key).
+        """
+        strategy = sync_settings.sync_strategy
+        day = today.isoformat() if strategy != 'all_active' else '-'
+        return ':'.join([
+            self.KEY_PREFIX,
+            str(company_id),
+            str(self.get_generation(company_id)),
+            str(brand_id),
+            str(store_id),
+            strategy,
+            str(sync_settings.future_days),
+            str(sync_settings.past_days),
+            '1' if sync_settings.include_inactive else '0',
+            str(sync_settings.max_promotions_per_sync),
+            day,
+        ] + ([page] if page else []))
+
+    def get(self, key):
+        """Get snapshot (or None) and record hit/miss"""
+        snapshot = self.cache.get(key)
+        self._record('hits' if snapshot is not None else 'misses')
+        return snapshot
+
+    def set(self, key, snapshot):
+        """Store snapshot"""
+        self.cache.set(key, snapshot, timeout=self.SNAPSHOT_TIMEOUT)
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
+    def _stats_key(self, name):
+        return f"{self.KEY_PREFIX}:stats:{name}"
+
+    def _record(self, name):
+        key = self._stats_key(name)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self):
+        """
+        Get hit/miss counters
+
+        Returns:
+            Dict: {'hits': int, 'misses': int, 'hit_ratio': float}
+        """
+        hits = self.cache.get(self._stats_key('hits')) or 0
+        misses = self.cache.get(self._stats_key('misses')) or 0
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+        }
+
+    def reset_stats(self):
+        """Reset hit/miss counters"""
+        self.cache.delete_many([self._stats_key('hits'), self._stats_key('misses')])
+
+
+# Singleton instance
+promotion_snapshot_cache = PromotionSnapshotCache()
+
+
+def invalidate_promotion_snapshots(company_id):
+    """
+    Invalidate snapshots of a company once the current transaction commits
+
+    Bumping after commit guarantees a concurrent sync request cannot cache
+    the pre-change data under the new generation.
+    """
+    if company_id:
+        transaction.on_commit(lambda: promotion_snapshot_cache.invalidate_company(company_id))
@@ -0,0 +1,151 @@
+"""
+Promotion Signals
+Invalidate compiled promotion snapshots and mark precompiled promotions
+dirty when promotion data changes
+"""
+
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from promotions.models import Promotion, PromotionTier, PackagePromotion, PackageItem
+from promotions.services import precompiled
+from promotions.services.snapshot_cache import invalidate_promotion_snapshots
+
+
+# M2M fields that are part of the compiled promotion JSON
+COMPILED_M2M_FIELDS = [
+    'stores',
+    'brands',
+    'exclude_brands',
+    'categories',
+    'products',
+    'exclude_categories',
+    'exclude_products',
+    'trigger_brands',
+    'benefit_brands',
+    'combo_products',
+]
+
+
+def _company_ids_for_promotions(promotion_ids):
+    """Get distinct company IDs for a set of promotion IDs"""
+    if not promotion_ids:
+        return set()
+    return set(
+        Promotion.objects.filter(id__in=promotion_ids).values_list('company_id', flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def promotion_changed(sender, instance, **kwargs):
+    """Promotion created/updated/deleted"""
+    invalidate_promotion_snapshots(instance.company_id)
+
+
+@receiver(post_save, sender=Promotion)
+def promotion_saved(sender, instance, **kwargs):
+    """Promotion created/updated - recompile it"""
+    precompiled.mark_dirty([instance.pk], create=True)
+
+
+@receiver([post_save, post_delete], sender=PromotionTier)
+@receiver([post_save, post_delete], sender=PackagePromotion)
+def promotion_child_changed(sender, instance, **kwargs):
+    """Tier or package of a promotion changed"""
+    precompiled.mark_dirty([instance.promotion_id])
+    for company_id in _company_ids_for_promotions([instance.promotion_id]):
+        invalidate_promotion_snapshots(company_id)
+
+
+@receiver([post_save, post_delete], sender=PackageItem)
+def package_item_changed(sender, instance, **kwargs):
+    """Package component changed"""
+    promotion_ids = list(PackagePromotion.objects.filter(
+        id=instance.package_id
+    ).values_list('promotion_id', flat=True))
+    precompiled.mark_dirty(promotion_ids)
+    for company_id in _company_ids_for_promotions(promotion_ids):
+        invalidate_promotion_snapshots(company_id)
+
+
+def promotion_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """M2M relation of a promotion changed (forward or reverse side)"""
+    if action == 'pre_clear' and reverse:
+        # pk_set is empty on clear(), collect the promotions before the rows are gone
+        field = next(f for f in sender._meta.fields if f.is_relation and f.related_model is type(instance))
+        instance._compiled_cleared_promotion_ids = list(
+            sender.objects.filter(**{field.name: instance.pk}).values_list('promotion_id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        precompiled.mark_dirty([instance.pk])
+        invalidate_promotion_snapshots(instance.company_id)
+        return
+
+    # Reverse side (e.g. store.promotions.add(...)): pk_set holds promotion IDs
+    precompiled.mark_dirty(pk_set or getattr(instance, '_compiled_cleared_promotion_ids', []))
+    if pk_set:
+        company_ids = _company_ids_for_promotions(pk_set)
+    else:
+        company_id = getattr(instance, 'company_id', None)
+        if company_id is None and getattr(instance, 'brand_id', None):
+            company_id = instance.brand.company_id
+        company_ids = {company_id}
+
+    for company_id in company_ids:
+        invalidate_promotion_snapshots(company_id)
+
+
+def _linked_promotion_ids(instance):
+    """Promotions linked to a store/brand/category/product through the compiled M2M fields"""
+    promotion_ids = set()
+    for field_name in COMPILED_M2M_FIELDS:
+        field = Promotion._meta.get_field(field_name)
+        if field.related_model is not type(instance):
+            continue
+        promotion_ids.update(field.remote_field.through.objects.filter(
+            **{field.m2m_reverse_field_name(): instance.pk}
+        ).values_list(field.m2m_field_name(), flat=True))
+    return promotion_ids
+
+
+def promotion_target_deleting(sender, instance, **kwargs):
+    """
+    Store, brand, category or product about to be deleted
+    Cascades bypass m2m_changed, so collect the linked promotions before the through rows are gone
+    """
+    instance._compiled_linked_promotion_ids = _linked_promotion_ids(instance)
+
+
+def promotion_target_deleted(sender, instance, **kwargs):
+    """Linked promotions of a deleted store/brand/category/product changed (once per promotion set)"""
+    promotion_ids = getattr(instance, '_compiled_linked_promotion_ids', None)
+    if not promotion_ids:
+        return
+    precompiled.mark_dirty(promotion_ids)
+    for company_id in _company_ids_for_promotions(promotion_ids):
+        invalidate_promotion_snapshots(company_id)
+
+
+for _field_name in COMPILED_M2M_FIELDS:
+    m2m_changed.connect(
+        promotion_m2m_changed,
+        sender=getattr(Promotion, _field_name).through,
+        dispatch_uid=f'promotion_snapshot_m2m_{_field_name}',
+    )
+
+# Deleting a promotion itself is handled by promotion_changed
+for _target in {Promotion._meta.get_field(name).related_model for name in COMPILED_M2M_FIELDS}:
+    pre_delete.connect(
+        promotion_target_deleting,
+        sender=_target,
+        dispatch_uid=f'promotion_snapshot_target_pre_{_target._meta.label_lower}',
+    )
+    post_delete.connect(
+        promotion_target_deleted,
+        sender=_target,
+        dispatch_uid=f'promotion_snapshot_target_{_target._meta.label_lower}',
+    )
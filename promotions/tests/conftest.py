@@ -155,3 +155,108 @@ def happy_hour_promotion(db, base_promotion_data):
         valid_time_end=time(17, 0),
         valid_days=[1, 2, 3, 4, 5]
     )
+
+
+# ============================================================================
+# SYNC API FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def sync_company(db):
+    """Company for sync API tests"""
+    return Company.objects.create(code='SYNC', name='Sync Company')
+
+
+@pytest.fixture
+def sync_brand(db, sync_company):
+    """Brand for sync API tests"""
+    return Brand.objects.create(company=sync_company, code='SYNC-BR1', name='Sync Brand')
+
+
+@pytest.fixture
+def sync_store(db, sync_company, sync_brand):
+    """Store with one active brand (StoreBrand junction)"""
+    from core.models import StoreBrand
+    store = Store.objects.create(
+        company=sync_company,
+        store_code='SYNC-ST1',
+        store_name='Sync Store',
+        address='Sync Address',
+        phone='021000000'
+    )
+    StoreBrand.objects.create(store=store, brand=sync_brand)
+    return store
+
+
+@pytest.fixture
+def sync_user(db, sync_company):
+    """User for sync API tests"""
+    return User.objects.create_user(
+        username='syncuser',
+        password='syncpass123',
+        company=sync_company,
+        role_scope='company'
+    )
+
+
+@pytest.fixture
+def make_promotion(db, sync_company, sync_brand, sync_user):
+    """Factory for valid promotions in the sync company"""
+    counter = {'n': 0}
+
+    def _make(**kwargs):
+        counter['n'] += 1
+        today = timezone.now().date()
+        data = {
+            'company': sync_company,
+            'brand': sync_brand,
+            'scope': 'single',
+            'name': f'Sync Promotion {counter["n"]}',
+            'code': f'SYNC-PROMO-{counter["n"]}',
+            'promo_type': 'percent_discount',
+            'discount_percent': Decimal('10.00'),
+            'start_date': today - timedelta(days=1),
+            'end_date': today + timedelta(days=5),
+            'created_by': sync_user,
+            'is_active': True,
+        }
+        data.update(kwargs)
+        return Promotion.objects.create(**data)
+
+    return _make
+
+
+@pytest.fixture
+def sync_post(sync_user):
+    """
+    Call a sync view directly with an authenticated POST request
+    (bypasses URL routing so tests do not need MinIO)
+    """
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    factory = APIRequestFactory()
+
+    def _post(view, data, **extra):
+        request = factory.post('/api/v1/sync/', data, format='json', **extra)
+        force_authenticate(request, user=sync_user)
+        return view(request)
+
+    return _post
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Per-endpoint table of the query budget suite (test_sync_query_budget)"""
+    import sys
+
+    module = sys.modules.get('promotions.tests.test_sync_query_budget')
+    if module is None or not module.QUERY_BUDGET_REPORT:
+        return
+    terminalreporter.section('sync query budget')
+    header = f"{'endpoint':<22}" + ''.join(
+        f"{f'{scale}x queries':>14}{'scanned':>9}{'ms':>9}" for scale in module.SCALES
+    )
+    terminalreporter.write_line(header)
+    for name, results in sorted(module.QUERY_BUDGET_REPORT.items()):
+        terminalreporter.write_line(f"{name:<22}" + ''.join(
+            f"{count:>14}{scanned:>9}{elapsed * 1000:>9.1f}" for _scale, count, scanned, elapsed in results
+        ))
@@ -0,0 +1,96 @@
+"""
+Tests for company compile jobs (Celery chunk fan-out, merge and progress endpoint)
+"""
+import json
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from config import celery_app
+from core.models import Brand, Company, Store, StoreBrand
+from promotions.services import compile_jobs
+from promotions.services.compiler import PromotionCompiler
+from promotions.views import compiler_views
+
+
+@pytest.fixture(autouse=True)
+def eager_celery(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, 'task_always_eager', True)
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def company_promotions(make_promotion, sync_company, sync_brand, sync_store):
+    other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Other Brand')
+    store = Store.objects.create(
+        company=sync_company, store_code='SYNC-ST2', store_name='Other Store', address='-', phone='-'
+    )
+    StoreBrand.objects.create(store=store, brand=other_brand)
+    for _ in range(3):
+        make_promotion()
+        make_promotion(brand=other_brand)
+    make_promotion(scope='company')
+    return [sync_store, store]
+
+
+def _stores(result):
+    return {
+        store_id: [promotion['id'] for promotion in store['promotions']]
+        for store_id, store in result['stores'].items()
+    }
+
+
+@pytest.mark.django_db
+class TestCompileJobs:
+    """Test the chunked company compilation"""
+
+    def test_chunks_group_by_brand(self, company_promotions, sync_company):
+        promotions = PromotionCompiler().company_scope(sync_company)['promotions']
+        chunks = compile_jobs.chunk_promotions(promotions, chunk_size=2)
+        assert sorted(len(chunk) for chunk in chunks) == [1, 2, 2, 2]
+        assert sorted(sum(chunks, [])) == sorted(str(promotion.id) for promotion in promotions)
+
+    def test_job_result_matches_synchronous_compile(self, company_promotions, sync_company):
+        job = compile_jobs.start(sync_company, chunk_size=2)
+
+        state = compile_jobs.progress(job['job_id'])
+        assert (state['status'], state['done_chunks'], state['total_chunks']) == ('done', 4, 4)
+        result = compile_jobs.result(job['job_id'])
+        expected = PromotionCompiler().compile_for_company(str(sync_company.id))
+        assert _stores(result) == _stores(expected)
+        assert result['summary'] == expected['summary']
+
+    def test_first_failure_is_never_overwritten(self, monkeypatch, company_promotions, sync_company):
+        """A chunk starting or the merge after a failure keeps the job failed"""
+        monkeypatch.setattr('celery.chord', lambda header: lambda callback: None)
+        job = compile_jobs.start(sync_company, chunk_size=2)
+        assert compile_jobs.progress(job['job_id'])['status'] == 'queued'
+
+        compile_jobs.compile_chunk(job['job_id'], [])
+        assert compile_jobs.progress(job['job_id'])['status'] == 'running'
+
+        compile_jobs.fail(job['job_id'], 'chunk 1 failed')
+        compile_jobs.compile_chunk(job['job_id'], [])
+        compile_jobs.fail(job['job_id'], 'chunk 2 failed')
+        compile_jobs.merge(job['job_id'], str(sync_company.id), [])
+
+        state = compile_jobs.progress(job['job_id'])
+        assert (state['status'], state['error'], state['done_chunks']) == ('failed', 'chunk 1 failed', 2)
+        assert state['finished_at'] is not None
+
+    def test_status_view_reports_progress_and_result(self, company_promotions, sync_company, sync_user):
+        job = compile_jobs.start(sync_company)
+        request = RequestFactory().get(f'/promotions/compiler/compile-company/{job["job_id"]}/')
+        request.user = sync_user
+
+        data = json.loads(compiler_views.compile_job_status(request, job['job_id']).content)
+        assert (data['job']['status'], data['job']['done_chunks']) == ('done', 2)
+        assert data['summary']['unique_promotions'] == 7
+        assert set(data['stores']) == {str(store.id) for store in company_promotions}
+
+        # Jobs of another company are not visible
+        sync_user.company = Company.objects.create(code='OTHER', name='Other Company')
+        assert compiler_views.compile_job_status(request, job['job_id']).status_code == 404
+        assert compiler_views.compile_job_status(request, 'unknown').status_code == 404
@@ -0,0 +1,178 @@
+"""
+Tests for batch compilation (compile_multiple with bulk-loaded relations, compile_for_company)
+"""
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Brand, Store, StoreBrand
+from products.models import Category, Product
+from promotions.models import PackageItem, PackagePromotion, Promotion, PromotionTier
+from promotions.services.compiler import PromotionCompiler
+
+
+@pytest.fixture
+def catalog(sync_company, sync_brand):
+    categories = [Category.objects.create(brand=sync_brand, name=f'Category {i}') for i in range(2)]
+    products = [
+        Product.objects.create(
+            company=sync_company, brand=sync_brand, category=categories[i % 2], sku=f'SKU-{i}',
+            name=f'Product {i}', price=Decimal('10000'), cost=Decimal('5000')
+        )
+        for i in range(4)
+    ]
+    other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Other Brand')
+    return categories, products, other_brand
+
+
+@pytest.fixture
+def make_set(make_promotion, catalog, sync_brand, sync_store):
+    """n promotions of every type with their relations"""
+    categories, products, other_brand = catalog
+
+    def _make(n):
+        for i in range(n):
+            category = make_promotion(apply_to='category', all_stores=False)
+            category.categories.set(categories)
+            category.exclude_products.add(products[0])
+            category.stores.add(sync_store)
+
+            product = make_promotion(apply_to='product', scope='brands')
+            product.products.set(products[1:])
+            product.brands.set([sync_brand, other_brand])
+            product.exclude_brands.add(other_brand)
+
+            make_promotion(promo_type='buy_x_get_y', buy_quantity=2, get_quantity=1, get_product=products[2])
+            combo = make_promotion(promo_type='combo', combo_price=Decimal('25000'))
+            combo.combo_products.set(products[:3])
+            make_promotion(
+                promo_type='upsell', required_product=products[0], upsell_product=products[1],
+                upsell_special_price=Decimal('5000'), upsell_message='Add one',
+            )
+
+            threshold = make_promotion(promo_type='threshold_tier')
+            for order in (2, 1):
+                PromotionTier.objects.create(
+                    promotion=threshold, tier_name=f'Tier {order}', tier_order=order,
+                    min_amount=Decimal(order * 100000), discount_type='free_item',
+                    discount_value=Decimal('0'), free_product=products[3],
+                )
+            PromotionTier.objects.create(
+                promotion=threshold, tier_name='Off', tier_order=3, min_amount=Decimal('300000'),
+                discount_type='percent', discount_value=Decimal('15'), is_active=False,
+            )
+
+            package = make_promotion(promo_type='package')
+            details = PackagePromotion.objects.create(
+                promotion=package, package_name='Family', package_sku=f'PKG-{package.code}',
+                package_price=Decimal('200000'),
+            )
+            PackageItem.objects.create(package=details, item_type='product', product=products[0], quantity=2)
+            PackageItem.objects.create(
+                package=details, item_type='category', category=categories[1], quantity=1,
+                min_selection=1, max_selection=2, sort_order=1,
+            )
+            make_promotion(promo_type='package')  # package details missing
+
+            cross = make_promotion(is_cross_brand=True, cross_brand_type='trigger_benefit')
+            cross.trigger_brands.add(sync_brand)
+            cross.benefit_brands.add(other_brand)
+        return list(Promotion.objects.order_by('code'))
+
+    return _make
+
+
+def _without_timestamp(compiled):
+    return [{key: value for key, value in promotion.items() if key != 'compiled_at'} for promotion in compiled]
+
+
+@pytest.mark.django_db
+class TestBatchCompile:
+    """Test that batch compilation matches per-promotion compilation"""
+
+    def test_batch_output_matches_single_compile(self, make_set):
+        promotions = make_set(1)
+        compiler = PromotionCompiler()
+
+        single = [compiler.compile_promotion(promotion) for promotion in promotions]
+        batch = compiler.compile_multiple(promotions)
+
+        assert _without_timestamp(batch) == _without_timestamp(single)
+        assert compiler.relations is None
+        threshold = next(promotion for promotion in batch if promotion['promo_type'] == 'threshold_tier')
+        assert [tier['tier_name'] for tier in threshold['rules']['tiers']] == ['Tier 1', 'Tier 2']
+
+    def test_query_count_is_constant(self, make_set):
+        compiler = PromotionCompiler()
+
+        promotions = make_set(1)
+        with CaptureQueriesContext(connection) as small:
+            compiler.compile_multiple(promotions)
+        promotions = make_set(5)
+        with CaptureQueriesContext(connection) as large:
+            compiled = compiler.compile_multiple(promotions)
+
+        assert len(compiled) == 6 * 9
+        assert len(large) == len(small)
+
+
+@pytest.fixture
+def company_stores(sync_company, sync_brand, sync_store):
+    """sync_store (sync brand), a store of another brand and a food court with both"""
+    other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Other Brand')
+    stores = [sync_store]
+    for code, brands in [('SYNC-ST2', [other_brand]), ('SYNC-ST3', [sync_brand, other_brand])]:
+        store = Store.objects.create(
+            company=sync_company, store_code=code, store_name=f'Store {code}', address='-', phone='-'
+        )
+        for brand in brands:
+            StoreBrand.objects.create(store=store, brand=brand)
+        stores.append(store)
+    return stores, other_brand
+
+
+@pytest.mark.django_db
+class TestCompanyCompile:
+    """Test that compile_for_company compiles once and matches compile_for_store"""
+
+    def test_stores_get_the_compile_for_store_list(self, make_promotion, company_stores, sync_company):
+        stores, other_brand = company_stores
+        make_promotion(scope='company')
+        make_promotion()  # sync brand, all stores
+        make_promotion(brand=other_brand)
+        brands = make_promotion(scope='brands')
+        brands.brands.add(other_brand)
+        picked = make_promotion(all_stores=False, execution_priority=5)
+        picked.stores.set(stores[1:])
+        make_promotion(is_active=False)
+
+        compiler = PromotionCompiler()
+        result = compiler.compile_for_company(str(sync_company.id))
+
+        for store in stores:
+            expected = compiler.compile_for_store(str(store.id))
+            compiled = result['stores'][str(store.id)]['promotions']
+            assert [promotion['id'] for promotion in compiled] == [promotion['id'] for promotion in expected]
+            assert all(promotion['store_id'] == str(store.id) for promotion in compiled)
+        assert result['stores'][str(stores[2].id)]['count'] == 5
+        assert result['summary']['unique_promotions'] == 5
+        assert result['summary']['by_brand'] == {
+            'Other Brand': {'stores': 2, 'promotions': 6},
+            'Sync Brand': {'stores': 2, 'promotions': 5},
+        }
+
+    def test_each_promotion_is_compiled_once(self, monkeypatch, make_promotion, company_stores, sync_company):
+        for _ in range(3):
+            make_promotion(scope='company')
+        compiled = []
+        compile_promotion = PromotionCompiler.compile_promotion
+        monkeypatch.setattr(
+            PromotionCompiler, 'compile_promotion',
+            lambda self, promotion: compiled.append(promotion.id) or compile_promotion(self, promotion)
+        )
+
+        result = PromotionCompiler().compile_for_company(str(sync_company.id))
+
+        assert len(compiled) == len(set(compiled)) == 3
+        assert result['summary']['total_promotions'] == 3 * len(company_stores[0])
@@ -0,0 +1,139 @@
+"""
+Tests for promotion lookup indexes (build, candidates, sync payload)
+"""
+import pytest
+from datetime import datetime, time
+from decimal import Decimal
+from django.core.cache import cache
+
+from core.models import Brand
+from products.models import Category, Product
+from promotions.services import lookup_index
+from promotions.services.compiler import PromotionCompiler
+from sync_api import bundle_views, sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def indexed(make_promotion, sync_company, sync_brand):
+    category = Category.objects.create(brand=sync_brand, name='Drinks')
+    products = [
+        Product.objects.create(
+            company=sync_company, brand=sync_brand, category=category, sku=f'SKU-{i}',
+            name=f'Product {i}', price=Decimal('10000'), cost=Decimal('5000')
+        )
+        for i in range(3)
+    ]
+    other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Other Brand')
+
+    by_product = make_promotion(apply_to='product', execution_priority=9)
+    by_product.products.set(products[:2])
+    by_category = make_promotion(
+        apply_to='category', valid_days=[0, 1], valid_time_start=time(10), valid_time_end=time(14)
+    )
+    by_category.categories.add(category)
+    everything = make_promotion(scope='company', valid_time_start=time(22), valid_time_end=time(2))
+    bill = make_promotion(apply_to='bill')
+    other = make_promotion(apply_to='product', brand=other_brand)
+    other.products.add(products[2])
+
+    promotions = {
+        'product': by_product, 'category': by_category, 'all': everything, 'bill': bill, 'other': other,
+    }
+    ids = {name: str(promotion.id) for name, promotion in promotions.items()}
+    compiled = PromotionCompiler().compile_multiple(list(promotions.values()))
+    return compiled, ids, products, category, other_brand
+
+
+@pytest.mark.django_db
+class TestLookupIndex:
+    """Test the inverted indexes and the candidate lookup"""
+
+    def test_build(self, indexed, sync_brand):
+        compiled, ids, products, category, other_brand = indexed
+        indexes = lookup_index.build(compiled)
+
+        assert indexes['products'] == {
+            str(products[0].id): [ids['product']],
+            str(products[1].id): [ids['product']],
+            str(products[2].id): [ids['other']],
+        }
+        assert indexes['categories'] == {str(category.id): [ids['category']]}
+        assert indexes['all_products'] == [ids['all']]
+        assert indexes['order_level'] == [ids['bill']]
+        assert indexes['all_brands'] == [ids['all']]
+        assert indexes['brands'][str(other_brand.id)] == [ids['other']]
+        monday = [window for window in indexes['time_windows'] if window['day'] == 0]
+        assert [(window['start'], window['end'], window['promotions']) for window in monday] == [
+            (None, None, [ids['product'], ids['bill'], ids['other']]),
+            ('10:00:00', '14:00:00', [ids['category']]),
+            ('22:00:00', '02:00:00', [ids['all']]),
+        ]
+        assert {window['day'] for window in indexes['time_windows']} == set(range(7))
+
+    def test_invalid_days_are_skipped(self, caplog):
+        """valid_days is free-form JSON: keep 0-6 entries, otherwise every day"""
+        compiled = [
+            {'id': 'weekend', 'validity': {'days_of_week': ['5', 6, 7, 'sunday', None]}},
+            {'id': 'garbage', 'validity': {'days_of_week': ['x', 9]}},
+        ]
+        indexes = lookup_index.build(compiled)
+        days = {
+            promotion_id: {window['day'] for window in indexes['time_windows'] if promotion_id in window['promotions']}
+            for promotion_id in ('weekend', 'garbage')
+        }
+        assert days == {'weekend': {5, 6}, 'garbage': set(range(7))}
+        assert len([record for record in caplog.records if 'invalid day' in record.message]) == 5
+
+    def test_candidates_by_line_and_time(self, indexed, sync_brand):
+        compiled, ids, products, category, other_brand = indexed
+        indexes = lookup_index.build(compiled)
+        line = {'product_id': str(products[0].id), 'category_id': str(category.id), 'brand_id': str(sync_brand.id)}
+
+        monday_noon = datetime(2026, 10, 12, 12, 0)
+        assert lookup_index.candidates(indexes, [line], when=monday_noon) == {
+            ids['product'], ids['category'], ids['bill'],
+        }
+        # Overnight window, and the category promotion is Monday/Tuesday only
+        sunday_night = datetime(2026, 10, 18, 23, 30)
+        assert lookup_index.candidates(indexes, [line], when=sunday_night) == {
+            ids['product'], ids['all'], ids['bill'],
+        }
+        other_line = {'product_id': str(products[2].id), 'brand_id': str(other_brand.id)}
+        assert lookup_index.line_candidates(indexes, **other_line) == {ids['all'], ids['other']}
+        assert lookup_index.candidates(indexes, []) == set()
+
+    def test_sync_payload_and_company_compile_carry_indexes(self, indexed, sync_post, sync_company,
+                                                            sync_store):
+        response = sync_post(sync_views.sync_promotions, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+        })
+        assert response.data['indexes'] == lookup_index.build(response.data['promotions'])
+
+        # Partial sets (incremental sync, pages) carry no indexes
+        response = sync_post(sync_views.sync_promotions, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+            'cursor': response.data['next_cursor'],
+        })
+        assert 'indexes' not in response.data
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id), 'limit': 2}
+        response = sync_post(sync_views.sync_promotions, data)
+        assert response.data['has_more'] and 'indexes' not in response.data
+        response = sync_post(sync_views.sync_promotions, dict(data, page_token=response.data['next_page_token']))
+        assert not response.data['has_more'] and 'indexes' not in response.data
+
+        response = sync_post(bundle_views.sync_bundle, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id), 'sections': ['promotions'],
+        })
+        section = response.data['sections']['promotions']
+        assert section['indexes'] == lookup_index.build(section['data'])
+
+        store = PromotionCompiler().compile_for_company(str(sync_company.id))['stores'][str(sync_store.id)]
+        assert store['indexes'] == lookup_index.build(store['promotions'])
+        assert len(store['indexes']['order_level']) == 1
@@ -0,0 +1,111 @@
+"""
+Tests for background product photo renditions
+"""
+import pytest
+from decimal import Decimal
+from io import BytesIO
+from PIL import Image
+
+from config.tasks import generate_photo_renditions_task
+from products import renditions
+from products.models import Product, ProductPhoto
+from sync_api import photos
+
+
+class FakeStorage:
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+
+    def download_image(self, object_key):
+        self.downloads += 1
+        return self.objects[object_key]
+
+    def upload_image_data(self, data, object_key, content_type):
+        self.objects[object_key] = data
+
+    def get_image_url(self, object_key, expires=3600):
+        return f"http://minio.test/product-images/{object_key}"
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    fake = FakeStorage()
+    monkeypatch.setattr(renditions, '_storage', lambda: fake)
+    monkeypatch.setattr(photos, '_storage', lambda: fake)
+    return fake
+
+
+def jpeg(width=2400, height=1600):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 80, 40)).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def add_photo(storage, sync_company, sync_brand):
+    def _add(sku, checksum='abc123', data=None):
+        product = Product.objects.create(
+            company=sync_company, brand=sync_brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+        object_key = f"images/{checksum}"
+        storage.objects[object_key] = data or jpeg()
+        return ProductPhoto.objects.create(
+            product=product, object_key=object_key, checksum=checksum,
+            size=len(storage.objects[object_key]), is_primary=True
+        )
+    return _add
+
+
+@pytest.mark.django_db
+class TestPhotoRenditions:
+    """Test rendition rendering, storage and sync exposure"""
+
+    def test_renditions_are_resized_under_their_own_prefix(self, storage, add_photo):
+        """Every size is stored under renditions/<md5>, aspect ratio kept"""
+        photo = add_photo('A')
+        result = renditions.generate_renditions(photo)
+
+        assert set(result) == set(renditions.RENDITIONS)
+        for name, size in renditions.RENDITIONS.items():
+            info = result[name]
+            assert info['object_key'] == f"renditions/abc123/{name}.{renditions.EXTENSION}"
+            # MinIO: no object below a key that is itself an object
+            assert not info['object_key'].startswith(f"{photo.object_key}/")
+            assert (info['width'], info['height']) == (size, round(size * 2 / 3))
+            data = storage.objects[info['object_key']]
+            assert info['size'] == len(data) < photo.size
+            assert Image.open(BytesIO(data)).size == (info['width'], info['height'])
+
+        photo.refresh_from_db()
+        assert photo.renditions == result
+
+    def test_small_images_are_not_upscaled(self, storage, add_photo):
+        photo = add_photo('A', data=jpeg(120, 80))
+        result = renditions.generate_renditions(photo)
+        assert (result['thumb']['width'], result['kiosk']['width']) == (96, 120)
+
+    def test_shared_image_is_rendered_once(self, storage, add_photo):
+        """Photos with the same checksum reuse renditions; complete photos are skipped"""
+        first = add_photo('A')
+        second = add_photo('B')
+
+        result = generate_photo_renditions_task()
+        assert result['generated_count'] == 2
+        assert storage.downloads == 1
+        second.refresh_from_db()
+        assert second.renditions == ProductPhoto.objects.get(id=first.id).renditions
+
+        assert generate_photo_renditions_task()['generated_count'] == 0
+        assert generate_photo_renditions_task(str(first.id))['generated_count'] == 1
+        assert storage.downloads == 1
+
+    def test_manifest_exposes_rendition_urls(self, storage, add_photo, sync_company, sync_brand):
+        photo = add_photo('A')
+        renditions.generate_renditions(photo)
+
+        blob = photos.manifest_diff(photos.store_photos(sync_company.id, [sync_brand.id]))['blobs'][0]
+        pos = blob['renditions']['pos']
+        assert pos['url'] == f"http://minio.test/product-images/{pos['object_key']}"
+        assert pos['width'] == 256
@@ -0,0 +1,115 @@
+"""
+Tests for precompiled promotions (CompiledPromotion dirty tracking, recompile, load)
+"""
+import pytest
+from decimal import Decimal
+
+from config.tasks import recompile_promotions_task
+from products.models import Product
+from promotions.models import CompiledPromotion, PromotionTier
+from promotions.services import precompiled
+from promotions.services.compiler import PromotionCompiler
+
+
+def _without_timestamp(compiled):
+    return {key: value for key, value in compiled.items() if key != 'compiled_at'}
+
+
+@pytest.mark.django_db
+class TestPrecompiledPromotions:
+    """Test dirty marking, recompilation and reads"""
+
+    def test_change_marks_dirty_and_recompile_keeps_hash(self, make_promotion):
+        promotion = make_promotion()
+        row = CompiledPromotion.objects.get(promotion=promotion)
+        assert row.is_dirty and row.body is None
+
+        assert precompiled.recompile() == {'compiled': 1, 'changed': 1, 'failed': 0}
+        row.refresh_from_db()
+        assert not row.is_dirty
+        assert row.content_hash == precompiled.content_hash(row.body)
+        first_hash, first_compiled_at = row.content_hash, row.compiled_at
+
+        # Saved without a content change: same hash, same compiled_at
+        promotion.save()
+        assert CompiledPromotion.objects.get(promotion=promotion).is_dirty
+        assert precompiled.recompile() == {'compiled': 1, 'changed': 0, 'failed': 0}
+        row.refresh_from_db()
+        assert (row.content_hash, row.compiled_at, row.is_dirty) == (first_hash, first_compiled_at, False)
+
+        promotion.name = 'Renamed'
+        promotion.save()
+        assert precompiled.recompile()['changed'] == 1
+        row.refresh_from_db()
+        assert row.content_hash != first_hash
+        assert precompiled.recompile() == {'compiled': 0, 'changed': 0, 'failed': 0}
+
+    def test_related_changes_mark_dirty(self, make_promotion, sync_company, sync_brand, sync_store):
+        promotion = make_promotion(all_stores=False, promo_type='threshold_tier')
+        product = Product.objects.create(
+            company=sync_company, brand=sync_brand, sku='SKU-1', name='Product',
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+        precompiled.recompile()
+
+        PromotionTier.objects.create(
+            promotion=promotion, tier_name='Tier', tier_order=1, min_amount=Decimal('100000'),
+            discount_type='percent', discount_value=Decimal('5'),
+        )
+        assert precompiled.recompile()['changed'] == 1
+
+        sync_store.promotions.add(promotion)
+        assert CompiledPromotion.objects.get(promotion=promotion).is_dirty
+        precompiled.recompile()
+
+        promotion.products.add(product)
+        assert CompiledPromotion.objects.get(promotion=promotion).is_dirty
+        precompiled.recompile()
+        sync_store.promotions.clear()
+        assert CompiledPromotion.objects.get(promotion=promotion).is_dirty
+
+    def test_change_during_recompile_stays_dirty(self, monkeypatch, make_promotion):
+        promotion = make_promotion()
+        compile_bodies = precompiled._compile
+
+        def compile_then_change(promotions):
+            bodies = compile_bodies(promotions)
+            precompiled.mark_dirty([promotion.id])  # committed while compiling
+            return bodies
+
+        monkeypatch.setattr(precompiled, '_compile', compile_then_change)
+        precompiled.recompile()
+        assert CompiledPromotion.objects.get(promotion=promotion).is_dirty
+
+    def test_load_serves_rows_and_compiles_pending(self, monkeypatch, make_promotion):
+        promotions = [make_promotion(), make_promotion(discount_percent=Decimal('15'))]
+        expected = [_without_timestamp(compiled) for compiled in PromotionCompiler().compile_multiple(promotions)]
+        precompiled.recompile()
+
+        # Clean rows: nothing is compiled
+        monkeypatch.setattr(PromotionCompiler, 'compile_multiple', lambda self, promotions, relations=None: 1 / 0)
+        loaded = precompiled.load(promotions)
+        assert [_without_timestamp(compiled) for compiled in loaded] == expected
+        row = CompiledPromotion.objects.get(promotion=promotions[0])
+        assert loaded[0]['compiled_at'] == row.compiled_at.isoformat()
+        assert list(loaded[0])[:-1] == sorted(_without_timestamp(loaded[0]))  # deterministic key order
+        monkeypatch.undo()
+
+        # A dirty row is compiled in memory with the current data
+        promotions[1].discount_percent = Decimal('20')
+        promotions[1].save()
+        loaded = precompiled.load(promotions)
+        assert loaded[1]['rules']['discount_percent'] == 20.0
+        assert CompiledPromotion.objects.get(promotion=promotions[1]).is_dirty
+
+    def test_task_is_queued_on_commit(self, monkeypatch, make_promotion, django_capture_on_commit_callbacks):
+        queued = []
+        monkeypatch.setattr(recompile_promotions_task, 'delay', lambda ids: queued.append(ids))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion = make_promotion()
+        assert queued == [[str(promotion.id)]]
+
+        result = recompile_promotions_task(queued[0])
+        assert (result['status'], result['compiled_count']) == ('success', 1)
+        assert not CompiledPromotion.objects.get(promotion=promotion).is_dirty
@@ -0,0 +1,118 @@
+"""
+Tests for the compiled promotion snapshot cache used by sync_promotions
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Product
+from promotions.models import PromotionTier
+from promotions.services.snapshot_cache import promotion_snapshot_cache
+from sync_api import sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestPromotionSnapshotCache:
+    """Test snapshot cache hit/miss and invalidation"""
+
+    def _sync(self, sync_post, company, store):
+        return sync_post(sync_views.sync_promotions, {
+            'company_id': str(company.id),
+            'store_id': str(store.id),
+        })
+
+    def test_second_request_is_cache_hit(self, sync_post, sync_company, sync_store, make_promotion):
+        """Same company/brand/store is compiled once"""
+        make_promotion()
+
+        first = self._sync(sync_post, sync_company, sync_store)
+        second = self._sync(sync_post, sync_company, sync_store)
+
+        assert first.status_code == 200
+        assert first['X-Snapshot-Cache'] == 'MISS'
+        assert second['X-Snapshot-Cache'] == 'HIT'
+        assert second.data['promotions'] == first.data['promotions']
+
+        stats = promotion_snapshot_cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_promotion_save_invalidates(self, sync_post, sync_company, sync_store, make_promotion,
+                                        django_capture_on_commit_callbacks):
+        """Editing a promotion bumps the company generation"""
+        promotion = make_promotion()
+        self._sync(sync_post, sync_company, sync_store)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion.name = 'Renamed Promotion'
+            promotion.save()
+
+        response = self._sync(sync_post, sync_company, sync_store)
+        assert response['X-Snapshot-Cache'] == 'MISS'
+        assert response.data['promotions'][0]['name'] == 'Renamed Promotion'
+
+    def test_m2m_and_tier_changes_invalidate(self, sync_post, sync_company, sync_store, sync_brand,
+                                             make_promotion, django_capture_on_commit_callbacks):
+        """M2M and tier changes invalidate, unrelated requests stay cached"""
+        promotion = make_promotion(promo_type='threshold_tier')
+        self._sync(sync_post, sync_company, sync_store)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion.exclude_brands.add(sync_brand)
+        assert self._sync(sync_post, sync_company, sync_store)['X-Snapshot-Cache'] == 'MISS'
+        assert self._sync(sync_post, sync_company, sync_store)['X-Snapshot-Cache'] == 'HIT'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PromotionTier.objects.create(
+                promotion=promotion, tier_name='Tier 1', tier_order=1,
+                min_amount=Decimal('100000'), discount_type='percent', discount_value=Decimal('10')
+            )
+        response = self._sync(sync_post, sync_company, sync_store)
+        assert response['X-Snapshot-Cache'] == 'MISS'
+        assert len(response.data['promotions'][0]['rules']['tiers']) == 1
+
+    def test_deleted_product_invalidates_once(self, sync_post, sync_company, sync_store, sync_brand,
+                                              make_promotion, django_capture_on_commit_callbacks):
+        """A cascaded M2M delete costs the same queries however many promotions link the product"""
+        products = [
+            Product.objects.create(
+                company=sync_company, brand=sync_brand, sku=f'SKU-{i}', name=f'Product {i}',
+                price=Decimal('10000'), cost=Decimal('5000')
+            )
+            for i in range(2)
+        ]
+        for product, count in zip(products, [1, 4]):
+            for _ in range(count):
+                promotion = make_promotion(apply_to='product')
+                promotion.products.add(product)
+                promotion.exclude_products.add(product)
+        self._sync(sync_post, sync_company, sync_store)
+
+        queries = []
+        for product in products:
+            with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as captured:
+                product.delete()
+            queries.append(len(captured))
+        assert queries[0] == queries[1]
+        assert self._sync(sync_post, sync_company, sync_store)['X-Snapshot-Cache'] == 'MISS'
+
+    def test_incremental_sync_bypasses_cache(self, sync_post, sync_company, sync_store, make_promotion):
+        """updated_since requests are never cached"""
+        make_promotion()
+        response = sync_post(sync_views.sync_promotions, {
+            'company_id': str(sync_company.id),
+            'store_id': str(sync_store.id),
+            'updated_since': '2020-01-01T00:00:00Z',
+        })
+        assert response.status_code == 200
+        assert 'X-Snapshot-Cache' not in response
+        assert promotion_snapshot_cache.stats()['misses'] == 0
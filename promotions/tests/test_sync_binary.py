@@ -0,0 +1,88 @@
+"""
+Tests for the MessagePack / CBOR sync encodings
+"""
+import io
+import uuid
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.core.cache import cache
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from products.models import Product
+from sync_api import binary, sync_views
+
+ENCODINGS = [
+    pytest.param(binary.MSGPACK, marks=pytest.mark.skipif(binary.msgpack is None, reason='msgpack not installed')),
+    pytest.param(binary.CBOR, marks=pytest.mark.skipif(binary.cbor2 is None, reason='cbor2 not installed')),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def product(sync_company, sync_brand):
+    return Product.objects.create(
+        company=sync_company, brand=sync_brand, sku='SKU-1', name='Nasi Goreng',
+        price=Decimal('25000.50'), cost=Decimal('10000')
+    )
+
+
+@pytest.mark.django_db
+class TestSyncBinary:
+    """Test binary encodings of sync responses and push bodies"""
+
+    @pytest.mark.parametrize('media_type', ENCODINGS)
+    def test_round_trip_keeps_types(self, media_type):
+        """UUID, Decimal and aware datetime survive encode/decode"""
+        data = {
+            'id': uuid.uuid4(),
+            'price': Decimal('-12.340'),
+            'at': datetime(2026, 1, 27, 10, 0, 0, 123456, tzinfo=dt_timezone.utc),
+            'tags': ['a', 1, None, True],
+        }
+        assert binary.decode(binary.encode(data, media_type), media_type) == data
+
+    @pytest.mark.parametrize('media_type', ENCODINGS)
+    def test_sync_products_native_values(self, media_type, sync_post, product, sync_company, sync_store):
+        """Accept header selects the encoding; rows carry native values"""
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        response = sync_post(sync_views.sync_products, data, HTTP_ACCEPT=media_type).render()
+        assert response.status_code == 200
+        assert response['Content-Type'] == media_type
+        assert response['ETag']
+
+        row = binary.decode(response.content, media_type)['products'][0]
+        assert row['id'] == product.id
+        assert row['price'] == Decimal('25000.50')
+        assert row['updated_at'] == product.updated_at
+
+        json_response = sync_post(sync_views.sync_products, data).render()
+        assert json_response['Content-Type'].startswith('application/json')
+        assert json_response['ETag'] != response['ETag']
+        assert json_response.data['products'][0]['price'] == '25000.50'
+
+    @pytest.mark.parametrize('media_type', ENCODINGS)
+    def test_push_body(self, media_type, sync_user, sync_store):
+        """Push endpoints parse binary bodies"""
+        body = binary.encode({'usages': [{
+            'promotion_id': uuid.uuid4(), 'bill_id': 'B001', 'discount_amount': Decimal('15000'),
+            'used_at': datetime.now(dt_timezone.utc), 'store_id': sync_store.id,
+        }]}, media_type)
+        request = APIRequestFactory().post('/api/v1/sync/usage/', body, content_type=media_type)
+        force_authenticate(request, user=sync_user)
+        response = sync_views.upload_usage(request)
+        assert response.status_code == 200
+        assert response.data['created'] == 1
+
+    def test_malformed_body_is_rejected(self):
+        """Broken binary body raises a DRF parse error"""
+        pytest.importorskip('msgpack')
+        with pytest.raises(ParseError):
+            binary.MessagePackParser().parse(io.BytesIO(b'\xc1'))
@@ -0,0 +1,94 @@
+"""
+Tests for the bundled master data sync endpoint
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from core.models import Brand
+from products.models import Product
+from sync_api import bundle_views, sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncBundle:
+    """Test bundle sections and per-section versions"""
+
+    def _bundle(self, sync_post, company, store, **data):
+        return sync_post(bundle_views.sync_bundle, {
+            'company_id': str(company.id),
+            'store_id': str(store.id),
+            **data,
+        })
+
+    def _product(self, company, brand, sku):
+        return Product.objects.create(
+            company=company, brand=brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+
+    def test_bundle_matches_single_endpoints(self, sync_post, sync_company, sync_brand, sync_store,
+                                             make_promotion):
+        """Every section is returned with the same rows as its own endpoint"""
+        self._product(sync_company, sync_brand, 'SKU-1')
+        make_promotion()
+
+        response = self._bundle(sync_post, sync_company, sync_store)
+        assert response.status_code == 200
+        sections = response.data['sections']
+        assert set(sections) == set(bundle_views.BUNDLE_SECTIONS)
+        assert response.data['next_cursor']
+
+        products = sync_post(sync_views.sync_products, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+        })
+        assert sections['products']['data'] == products.data['products']
+
+        promotions = sync_post(sync_views.sync_promotions, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+        })
+        # sync_promotions pages in (updated_at, id) order, the bundle sends all by priority
+        def by_id(rows):
+            return sorted(({**row, 'compiled_at': None} for row in rows), key=lambda row: row['id'])
+        assert by_id(sections['promotions']['data']) == by_id(promotions.data['promotions'])
+        assert sections['brands']['data'][0]['id'] == str(sync_brand.id)
+
+    def test_unchanged_sections_are_skipped(self, sync_post, sync_company, sync_brand, sync_store,
+                                            django_capture_on_commit_callbacks):
+        """Only sections whose version moved are sent again"""
+        first = self._bundle(sync_post, sync_company, sync_store)
+        versions = {name: section['version'] for name, section in first.data['sections'].items()}
+
+        again = self._bundle(sync_post, sync_company, sync_store, versions=versions)
+        assert all(section['unchanged'] for section in again.data['sections'].values())
+        assert 'data' not in again.data['sections']['products']
+
+        # Another brand's product is not visible in this store
+        other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Other Brand')
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, other_brand, 'SKU-OTHER')
+        again = self._bundle(sync_post, sync_company, sync_store, versions=versions)
+        assert all(section['unchanged'] for section in again.data['sections'].values())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, sync_brand, 'SKU-NEW')
+        changed = self._bundle(sync_post, sync_company, sync_store, versions=versions)
+        sent = {name for name, section in changed.data['sections'].items() if not section['unchanged']}
+        assert sent == {'products', 'product_modifiers', 'product_photos'}
+        assert changed.data['sections']['products']['total'] == 1
+
+    def test_selected_and_invalid_sections(self, sync_post, sync_company, sync_store):
+        """sections limits the response, unknown names are rejected"""
+        response = self._bundle(sync_post, sync_company, sync_store, sections=['tables', 'table_areas'])
+        assert set(response.data['sections']) == {'tables', 'table_areas'}
+
+        response = self._bundle(sync_post, sync_company, sync_store, sections=['nope'])
+        assert response.status_code == 400
+        assert response.data['code'] == 'INVALID_SECTION'
@@ -0,0 +1,107 @@
+"""
+Tests for negotiated compression of sync responses
+"""
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from products.models import Product
+from promotions.models_settings import PromotionSyncSettings
+from sync_api import changelog, compression, sync_views
+from sync_api.models import SyncCommit
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncCompression:
+    """Test Accept-Encoding negotiation and the compressed body cache"""
+
+    @pytest.fixture
+    def products(self, sync_company, sync_brand):
+        return [
+            Product.objects.create(
+                company=sync_company, brand=sync_brand, sku=f'SKU-{index:03d}',
+                name=f'Product {index}', price=Decimal('10000'), cost=Decimal('5000')
+            )
+            for index in range(20)
+        ]
+
+    def _data(self, company, store):
+        return {'company_id': str(company.id), 'store_id': str(store.id)}
+
+    def test_gzip_response_decodes_to_same_json(self, products, sync_post, sync_company, sync_store):
+        """Compressed body is the same JSON as the plain response"""
+        data = self._data(sync_company, sync_store)
+        plain = sync_post(sync_views.sync_products, data)
+        plain.render()
+
+        response = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert response['ETag'] == plain['ETag']
+        assert float(response['X-Compression-Ratio']) > 1
+        body = json.loads(gzip.decompress(response.content))
+        assert body['products'] == json.loads(plain.content)['products']
+
+    def test_disabled_setting_sends_plain_json(self, products, sync_post, sync_company, sync_store):
+        """enable_compression=False ignores Accept-Encoding"""
+        PromotionSyncSettings.objects.create(company=sync_company, enable_compression=False)
+
+        response = sync_post(
+            sync_views.sync_products, self._data(sync_company, sync_store), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert response.status_code == 200
+        assert not response.has_header('Content-Encoding')
+        assert len(response.data['products']) == 20
+
+    def test_compressed_body_cached_by_etag(self, products, sync_post, sync_company, sync_store):
+        """Unchanged payload is compressed once and then served from cache"""
+        data = self._data(sync_company, sync_store)
+        first = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip')
+        second = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert first['X-Compression-Cache'] == 'MISS'
+        assert second['X-Compression-Cache'] == 'HIT'
+        assert second.content == first.content
+        assert compression.compression_stats()['gzip']['responses'] == 1
+
+    def test_cached_body_follows_the_cursor_high_water_mark(self, products, sync_post, sync_company,
+                                                            sync_store):
+        """A change outside the ETag's data still moves next_cursor, so the cached body is not replayed"""
+        data = self._data(sync_company, sync_store)
+        first = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip')
+
+        # e.g. a promotion change: products ETag unchanged, high water mark moved
+        commit = SyncCommit.objects.create(company_id=sync_company.id)
+        second = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert second['ETag'] == first['ETag']
+        assert second['X-Compression-Cache'] == 'MISS'
+        cursor = json.loads(gzip.decompress(second.content))['next_cursor']
+        assert changelog.decode_cursor(cursor) == commit.id
+
+    def test_streamed_response_is_compressed(self, products, sync_post, sync_company, sync_store):
+        """Streamed rows are compressed incrementally"""
+        data = dict(self._data(sync_company, sync_store), stream=True)
+        response = sync_post(sync_views.sync_products, data, HTTP_ACCEPT_ENCODING='gzip;q=1, identity;q=0.5')
+        assert response['Content-Encoding'] == 'gzip'
+
+        body = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        assert body['total'] == 20
+        stats = compression.compression_stats()['gzip']
+        assert stats['responses'] == 1
+        assert stats['raw_bytes'] > stats['compressed_bytes']
+
+    def test_negotiate(self, rf):
+        """Codecs with q=0 or unknown to the server are not chosen"""
+        assert compression.negotiate(rf.get('/', HTTP_ACCEPT_ENCODING='br, gzip;q=0')) is None
+        assert compression.negotiate(rf.get('/', HTTP_ACCEPT_ENCODING='br, gzip')) == 'gzip'
+        assert compression.negotiate(rf.get('/')) is None
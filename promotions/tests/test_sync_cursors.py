@@ -0,0 +1,128 @@
+"""
+Tests for change-sequence cursors on incremental sync
+"""
+import pytest
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+
+from products.models import Product
+from sync_api import changelog, sync_views
+from sync_api.models import SyncChange
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncCursors:
+    """Test cursor / next_cursor on sync endpoints"""
+
+    def _sync(self, sync_post, view, company, store, cursor=None):
+        data = {'company_id': str(company.id), 'store_id': str(store.id)}
+        if cursor:
+            data['cursor'] = cursor
+        return sync_post(view, data)
+
+    def _product(self, company, brand, sku):
+        return Product.objects.create(
+            company=company, brand=brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+
+    def test_products_resume_from_cursor(self, sync_post, sync_company, sync_brand, sync_store,
+                                         django_capture_on_commit_callbacks):
+        """Only products changed after the cursor are returned"""
+        with django_capture_on_commit_callbacks(execute=True):
+            old = self._product(sync_company, sync_brand, 'OLD')
+        full = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store)
+        assert [p['id'] for p in full.data['products']] == [str(old.id)]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            new = self._product(sync_company, sync_brand, 'NEW')
+        response = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store,
+                               full.data['next_cursor'])
+        assert [p['id'] for p in response.data['products']] == [str(new.id)]
+        assert response.data['deleted_ids'] == []
+
+        old_id = str(old.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            old.delete()
+            new.is_active = False
+            new.save()
+        deleted = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store,
+                             response.data['next_cursor'])
+        assert deleted.data['products'] == []
+        assert sorted(deleted.data['deleted_ids']) == sorted([old_id, str(new.id)])
+
+        # Nothing changed since
+        again = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store,
+                           deleted.data['next_cursor'])
+        assert again.data['products'] == []
+        assert again.data['deleted_ids'] == []
+
+    def test_promotion_m2m_changes_are_sequenced(self, sync_post, sync_company, sync_brand,
+                                                 sync_store, make_promotion, django_capture_on_commit_callbacks):
+        """M2M edits do not touch updated_at but are still picked up by the cursor"""
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion = make_promotion(all_stores=False)
+            promotion.stores.add(sync_store)
+        full = self._sync(sync_post, sync_views.sync_promotions, sync_company, sync_store)
+        assert len(full.data['promotions']) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion.exclude_brands.add(sync_brand)
+        changed = self._sync(sync_post, sync_views.sync_promotions, sync_company, sync_store,
+                             full.data['next_cursor'])
+        assert [p['id'] for p in changed.data['promotions']] == [str(promotion.id)]
+
+        # Removed from the store -> the edge must drop it
+        with django_capture_on_commit_callbacks(execute=True):
+            promotion.stores.remove(sync_store)
+        removed = self._sync(sync_post, sync_views.sync_promotions, sync_company, sync_store,
+                             changed.data['next_cursor'])
+        assert removed.data['promotions'] == []
+        assert removed.data['deleted_ids'] == [str(promotion.id)]
+
+    def test_change_committed_late_is_not_skipped(self, sync_post, sync_company, sync_brand, sync_store,
+                                                  django_capture_on_commit_callbacks):
+        """A lower change ID committed after a higher one is served on the next cursor sync"""
+        with django_capture_on_commit_callbacks() as slow_commit:
+            slow = self._product(sync_company, sync_brand, 'SLOW')
+        slow_change = SyncChange.objects.get(object_id=slow.id)
+        # Still uncommitted: invisible to other connections
+        SyncChange.objects.filter(id=slow_change.id).update(company_id=uuid.uuid4())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            fast = self._product(sync_company, sync_brand, 'FAST')
+        assert SyncChange.objects.get(object_id=fast.id).id > slow_change.id
+        first = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store,
+                           changelog.encode_cursor(0))
+        assert [p['id'] for p in first.data['products']] == [str(fast.id)]
+
+        # The slow transaction commits
+        SyncChange.objects.filter(id=slow_change.id).update(company_id=sync_company.id)
+        for callback in slow_commit:
+            callback()
+        response = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store,
+                              first.data['next_cursor'])
+        assert [p['id'] for p in response.data['products']] == [str(slow.id)]
+
+    def test_invalid_and_expired_cursor(self, sync_post, sync_company, sync_store):
+        """Bad cursors are rejected, expired cursors ask for a full sync"""
+        response = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store, 'not-a-cursor')
+        assert response.status_code == 400
+        assert response.data['code'] == 'INVALID_CURSOR'
+
+        expired = changelog.encode_cursor(
+            1, issued_at=timezone.now() - timedelta(days=changelog.CHANGE_LOG_RETENTION_DAYS)
+        )
+        response = self._sync(sync_post, sync_views.sync_products, sync_company, sync_store, expired)
+        assert response.status_code == 410
+        assert response.data['code'] == 'CURSOR_EXPIRED'
@@ -0,0 +1,91 @@
+"""
+Tests for conditional sync requests (ETag / If-None-Match)
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from products.models import Product
+from sync_api import binary, sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncETag:
+    """Test 304 responses driven by the store's data versions"""
+
+    def _data(self, company, store):
+        return {'company_id': str(company.id), 'store_id': str(store.id)}
+
+    def _product(self, company, brand, sku):
+        return Product.objects.create(
+            company=company, brand=brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+
+    @pytest.mark.parametrize('view', [
+        sync_views.sync_products,
+        sync_views.sync_modifiers,
+        sync_views.sync_tables,
+        sync_views.sync_promotions,
+    ])
+    def test_matching_etag_returns_304(self, view, sync_post, sync_company, sync_store,
+                                       django_assert_max_num_queries):
+        """Unchanged data answers If-None-Match with 304 and no body"""
+        data = self._data(sync_company, sync_store)
+        response = sync_post(view, data)
+        assert response.status_code == 200
+        etag = response['ETag']
+
+        # Auth, store, brand list (and sync settings/company) only
+        with django_assert_max_num_queries(5):
+            response = sync_post(view, data, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert response['Vary'] == 'Accept, Accept-Encoding'
+
+    @pytest.mark.parametrize('view', [sync_views.sync_promotions, sync_views.sync_tables])
+    def test_etag_covers_negotiated_media_type(self, view, sync_post, sync_company, sync_store):
+        """A JSON ETag does not answer a MessagePack request with 304"""
+        pytest.importorskip('msgpack')
+        data = self._data(sync_company, sync_store)
+        etag = sync_post(view, data)['ETag']
+
+        response = sync_post(view, data, HTTP_ACCEPT=binary.MSGPACK, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert response['Vary'] == 'Accept, Accept-Encoding'
+
+    def test_change_in_store_brand_changes_etag(self, sync_post, sync_company, sync_brand, sync_store,
+                                                django_capture_on_commit_callbacks):
+        """Saving a product of the store's brand invalidates the ETag"""
+        data = self._data(sync_company, sync_store)
+        etag = sync_post(sync_views.sync_products, data)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, sync_brand, 'SKU-1')
+
+        response = sync_post(sync_views.sync_products, data, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert len(response.data['products']) == 1
+
+    def test_other_brand_change_keeps_etag(self, sync_post, sync_company, sync_store,
+                                           django_capture_on_commit_callbacks):
+        """Changes of a brand the store does not serve do not invalidate it"""
+        from core.models import Brand
+        other_brand = Brand.objects.create(company=sync_company, code='OTHER', name='Other')
+        data = self._data(sync_company, sync_store)
+        etag = sync_post(sync_views.sync_products, data)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, other_brand, 'SKU-2')
+
+        response = sync_post(sync_views.sync_products, data, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
@@ -0,0 +1,81 @@
+"""
+Tests for sparse fieldsets (fields / profile) on sync endpoints
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Modifier, ModifierOption, Product
+from sync_api import sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def products(sync_company, sync_brand):
+    return [
+        Product.objects.create(
+            company=sync_company, brand=sync_brand, sku=f'SKU-{i}', name=f'Product {i}',
+            description='Long description', price=Decimal('25000'), cost=Decimal('10000')
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestSyncFieldsets:
+    """Test field projection of catalog sync endpoints"""
+
+    def _data(self, company, store, **extra):
+        return dict({'company_id': str(company.id), 'store_id': str(store.id)}, **extra)
+
+    def test_pos_profile_narrows_rows_and_columns(self, sync_post, products, sync_company, sync_store):
+        """Profile rows carry only its fields; the SQL does not select the others"""
+        with CaptureQueriesContext(connection) as queries:
+            response = sync_post(sync_views.sync_products, self._data(sync_company, sync_store, profile='pos'))
+        assert response.status_code == 200
+        row = response.data['products'][0]
+        assert 'cost' not in row and 'description' not in row and 'image' not in row
+        assert row['price'] == '25000.00'
+
+        product_sql = [q['sql'] for q in queries.captured_queries if 'FROM "product"' in q['sql']]
+        assert product_sql
+        assert all('"description"' not in sql and '"cost"' not in sql for sql in product_sql)
+
+    def test_fields_list_with_paging(self, sync_post, products, sync_company, sync_store):
+        """Explicit fields plus id; paged requests keep the order field"""
+        response = sync_post(sync_views.sync_products, self._data(sync_company, sync_store, fields='name,price'))
+        assert set(response.data['products'][0]) == {'id', 'name', 'price'}
+
+        data = self._data(sync_company, sync_store, fields=['name'], limit=2)
+        first = sync_post(sync_views.sync_products, data)
+        assert set(first.data['products'][0]) == {'id', 'name', 'updated_at'}
+        second = sync_post(sync_views.sync_products, dict(data, page_token=first.data['next_page_token']))
+        assert len(first.data['products']) + len(second.data['products']) == 3
+
+    def test_modifiers_without_options_skip_option_query(self, sync_post, sync_brand, sync_company, sync_store):
+        """Options are only loaded when requested"""
+        modifier = Modifier.objects.create(brand=sync_brand, name='Size')
+        ModifierOption.objects.create(modifier=modifier, name='Large')
+        with CaptureQueriesContext(connection) as queries:
+            response = sync_post(sync_views.sync_modifiers, self._data(sync_company, sync_store, fields=['name']))
+        assert response.data['modifiers'] == [{'id': str(modifier.id), 'name': 'Size'}]
+        assert not any('FROM "modifier_option"' in q['sql'] for q in queries.captured_queries)
+
+    def test_invalid_projection(self, sync_post, products, sync_company, sync_store):
+        """Unknown fields/profiles and instance resources are rejected"""
+        for view, extra in [
+            (sync_views.sync_products, {'fields': ['name', 'secret']}),
+            (sync_views.sync_products, {'profile': 'tiny'}),
+            (sync_views.sync_table_groups, {'fields': ['id']}),
+        ]:
+            response = sync_post(view, self._data(sync_company, sync_store, **extra))
+            assert response.status_code == 400
+            assert response.data['code'] == 'INVALID_FIELDS'
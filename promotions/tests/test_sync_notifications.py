@@ -0,0 +1,157 @@
+"""
+Tests for Edge Server change notifications (publish, SSE / WebSocket endpoint)
+"""
+import asyncio
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Brand
+from sync_api import notifications, sync_views, tombstones, versions
+from sync_api.asgi import notification_router
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+async def not_django(scope, receive, send):
+    raise AssertionError('routed to Django')
+
+
+app = notification_router(not_django)
+
+
+class Client:
+    """Drives the ASGI application like a server would"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        await self.sent.put(message)
+
+    async def next(self, timeout=5):
+        return await asyncio.wait_for(self.sent.get(), timeout)
+
+    def start(self):
+        return asyncio.ensure_future(app(self.scope, self.receive, self.send))
+
+
+def scope(kind, company, store, token, path=notifications.PATH):
+    query = f"company_id={company.id}&store_id={store.id}"
+    headers = []
+    if kind == 'http':
+        headers.append((b'authorization', f"Bearer {token}".encode()))
+    else:
+        query += f"&token={token}"
+    return {
+        'type': kind, 'path': path, 'method': 'GET',
+        'query_string': query.encode(), 'headers': headers,
+    }
+
+
+def sse_events(body):
+    events = []
+    for frame in body.decode().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in frame.split('\n') if ': ' in line and not line.startswith(':'))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+@pytest.mark.django_db
+class TestSyncNotifications:
+    """Test change publishing and the notification endpoint"""
+
+    def test_committed_change_is_published(self, monkeypatch, sync_company, sync_brand,
+                                           django_capture_on_commit_callbacks):
+        published = []
+        monkeypatch.setattr(notifications, 'publish', lambda *args: published.append(args))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            versions.bump_version(tombstones.PRODUCT, sync_company.id, brand_id=sync_brand.id)
+            assert published == []  # only after commit
+
+        (company_id, model, version, brand_id, store_id, changed_at), = published
+        assert (company_id, model, brand_id, store_id) == (sync_company.id, tombstones.PRODUCT, sync_brand.id, None)
+        assert version == versions.company_versions(sync_company.id, [tombstones.PRODUCT])[tombstones.PRODUCT]
+
+    def test_sse_stream_forwards_visible_changes_coalesced(self, sync_company, sync_brand, sync_store, sync_user):
+        other_brand = Brand.objects.create(company=sync_company, code='OTHER', name='Other Brand')
+        token = AccessToken.for_user(sync_user)
+
+        async def run():
+            client = Client(scope('http', sync_company, sync_store, token))
+            task = client.start()
+            start = await client.next()
+            assert start['status'] == 200
+            assert (b'content-type', b'text/event-stream') in start['headers']
+            (event, hello), = sse_events((await client.next())['body'])
+            assert event == 'hello'
+            assert hello['brand_ids'] == [str(sync_brand.id)]
+            assert 'products' in hello['endpoints']
+
+            publish = notifications.publish
+            publish(sync_company.id, tombstones.PRODUCT, 5, brand_id=sync_brand.id, changed_at=1700000000)
+            publish(sync_company.id, tombstones.PRODUCT, 7, brand_id=sync_brand.id)
+            publish(sync_company.id, tombstones.PRODUCT, 6, brand_id=sync_brand.id)
+            publish(sync_company.id, tombstones.PROMOTION, 9, brand_id=other_brand.id)  # not in the store
+            publish(sync_company.id, tombstones.CATEGORY, 3)  # unscoped
+
+            events = sse_events((await client.next())['body']) + sse_events((await client.next())['body'])
+            await client.incoming.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 5)
+            return events
+
+        events = async_to_sync(run)()
+        changes = {data['model']: data for event, data in events if event == 'change'}
+        assert set(changes) == {tombstones.PRODUCT, tombstones.CATEGORY}
+        assert changes[tombstones.PRODUCT]['version'] == 7
+        assert 'products' in changes[tombstones.PRODUCT]['endpoints']
+        assert 'promotions' not in changes[tombstones.CATEGORY]['endpoints']
+        assert notifications._local_broker.subscribers[notifications.channel(sync_company.id)] == set()
+
+    def test_websocket_hello_and_rejections(self, sync_company, sync_store, sync_user):
+        token = AccessToken.for_user(sync_user)
+
+        async def connect(ws_scope):
+            client = Client(ws_scope)
+            await client.incoming.put({'type': 'websocket.connect'})
+            task = client.start()
+            first = await client.next()
+            if first['type'] == 'websocket.accept':
+                frame = json.loads((await client.next())['text'])
+                await client.incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+                await asyncio.wait_for(task, 5)
+                return frame
+            await asyncio.wait_for(task, 5)
+            return first
+
+        frame = async_to_sync(connect)(scope('websocket', sync_company, sync_store, token))
+        assert frame['event'] == 'hello'
+        assert frame['data']['safety_poll_seconds'] == notifications.SAFETY_POLL_SECONDS
+
+        rejected = async_to_sync(connect)(scope('websocket', sync_company, sync_store, 'not-a-token'))
+        assert rejected == {'type': 'websocket.close', 'code': 4401}
+        unknown = scope('websocket', sync_company, sync_store, token)
+        unknown['query_string'] = unknown['query_string'].replace(str(sync_store.id).encode(), str(sync_company.id).encode())
+        assert async_to_sync(connect)(unknown) == {'type': 'websocket.close', 'code': 4404}
+
+    def test_sync_version_announces_notifications(self, sync_post, sync_company, sync_store):
+        response = sync_post(sync_views.sync_version, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+        })
+        assert response.data['notifications'] == {
+            'url': '/api/v1/sync/events/', 'safety_poll_seconds': notifications.SAFETY_POLL_SECONDS,
+        }
@@ -0,0 +1,104 @@
+"""
+Tests for keyset pagination of the sync endpoints
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from products.models import Product
+from promotions.models_settings import PromotionSyncSettings
+from sync_api import sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _walk(sync_post, view, data):
+    """Follow next_page_token until has_more is false"""
+    pages = []
+    token = None
+    while True:
+        response = sync_post(view, {**data, **({'page_token': token} if token else {})})
+        assert response.status_code == 200, response.data
+        pages.append(response.data)
+        if not response.data['has_more']:
+            return pages
+        assert response.data['next_cursor'] is None
+        token = response.data['next_page_token']
+        assert len(pages) < 20
+
+
+@pytest.mark.django_db
+class TestSyncPagination:
+    """Test keyset pages on (updated_at, id)"""
+
+    def _data(self, company, store, **extra):
+        return {'company_id': str(company.id), 'store_id': str(store.id), **extra}
+
+    def test_products_pages_cover_every_row_once(self, sync_post, sync_company, sync_brand, sync_store):
+        """Pages follow each other without gaps or duplicates"""
+        created = {
+            str(Product.objects.create(
+                company=sync_company, brand=sync_brand, sku=f'SKU-{index}', name=f'Product {index}',
+                price=Decimal('10000'), cost=Decimal('5000')
+            ).id)
+            for index in range(5)
+        }
+
+        pages = _walk(sync_post, sync_views.sync_products, self._data(sync_company, sync_store, limit=2))
+
+        assert [len(page['products']) for page in pages] == [2, 2, 1]
+        returned = [product['id'] for page in pages for product in page['products']]
+        assert sorted(returned) == sorted(created)
+        assert pages[-1]['next_cursor'] and pages[-1]['next_page_token'] is None
+
+    def test_promotions_are_paged_not_truncated(self, sync_post, sync_company, sync_store, make_promotion):
+        """max_promotions_per_sync is the page size - nothing is dropped"""
+        settings = PromotionSyncSettings.get_for_company(sync_company)
+        settings.max_promotions_per_sync = 2
+        settings.save()
+        created = {str(make_promotion().id) for _ in range(5)}
+
+        pages = _walk(sync_post, sync_views.sync_promotions, self._data(sync_company, sync_store))
+
+        assert len(pages) == 3
+        assert pages[0]['total_available'] == 5
+        returned = [promotion['id'] for page in pages for promotion in page['promotions']]
+        assert sorted(returned) == sorted(created)
+
+    def test_promotion_pages_keep_execution_order(self, sync_post, sync_company, sync_store, make_promotion):
+        """Pages are cut by (updated_at, id), each page is in execution order"""
+        for priority in [1, 5, 3, 9, 7]:
+            make_promotion(execution_priority=priority)
+
+        def priorities(response):
+            return [promotion['execution_priority'] for promotion in response['promotions']]
+
+        full = sync_post(sync_views.sync_promotions, self._data(sync_company, sync_store)).data
+        assert priorities(full) == [9, 7, 5, 3, 1]
+
+        pages = _walk(sync_post, sync_views.sync_promotions, self._data(sync_company, sync_store, limit=2))
+        assert [priorities(page) for page in pages] == [[5, 1], [9, 3], [7]]
+
+    def test_page_token_is_bound_to_request(self, sync_post, sync_company, sync_brand, sync_store):
+        """A token can't be replayed against another query"""
+        for index in range(3):
+            Product.objects.create(
+                company=sync_company, brand=sync_brand, sku=f'SKU-{index}', name=f'Product {index}',
+                price=Decimal('10000'), cost=Decimal('5000')
+            )
+        data = self._data(sync_company, sync_store, limit=1)
+        token = sync_post(sync_views.sync_products, data).data['next_page_token']
+
+        response = sync_post(sync_views.sync_products, {
+            **data, 'page_token': token, 'updated_since': '2020-01-01T00:00:00Z'
+        })
+        assert response.status_code == 400
+        assert response.data['code'] == 'INVALID_PAGE_TOKEN'
+
+        response = sync_post(sync_views.sync_products, {**data, 'page_token': 'garbage'})
+        assert response.status_code == 400
@@ -0,0 +1,111 @@
+"""
+Tests for the content-addressed product photo manifest
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from core.models import Brand, StoreBrand
+from products.models import Product, ProductPhoto
+from sync_api import photos, sync_views
+
+
+class FakeStorage:
+    def get_image_url(self, object_key, expires=3600):
+        return f"http://minio.test/product-images/{object_key}"
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(photos, '_storage', lambda: FakeStorage())
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def add_product(sync_company, sync_brand):
+    def _add(sku, checksum=None, brand=None, **photo):
+        product = Product.objects.create(
+            company=sync_company, brand=brand or sync_brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+        if checksum is not None:
+            ProductPhoto.objects.create(
+                product=product, checksum=checksum, object_key=f"images/{checksum}",
+                size=100, is_primary=True, **photo
+            )
+        return product
+    return _add
+
+
+@pytest.mark.django_db
+class TestPhotoManifest:
+    """Test manifest tuples, diffing and blob deduplication"""
+
+    def _post(self, sync_post, company, store, **extra):
+        response = sync_post(sync_views.sync_photo_manifest, dict(
+            {'company_id': str(company.id), 'store_id': str(store.id)}, **extra
+        ))
+        assert response.status_code == 200, response.data
+        return response.data
+
+    def test_shared_images_are_one_blob(self, sync_post, add_product, sync_company, sync_store):
+        """Products (also of other brands in the store) sharing an image list it once"""
+        other_brand = Brand.objects.create(company=sync_company, code='OTHER', name='Other Brand')
+        StoreBrand.objects.create(store=sync_store, brand=other_brand)
+        first = add_product('A', 'aaa')
+        second = add_product('B', 'aaa', brand=other_brand)
+        third = add_product('C', 'ccc', version=3)
+        add_product('D')  # no photo
+        ProductPhoto.objects.create(product=first, checksum='old', is_primary=False, sort_order=1)
+
+        data = self._post(sync_post, sync_company, sync_store)
+        assert data['columns'] == ['product_id', 'checksum', 'version', 'size']
+        assert sorted(data['photos']) == sorted([
+            [str(first.id), 'aaa', 1, 100],
+            [str(second.id), 'aaa', 1, 100],
+            [str(third.id), 'ccc', 3, 100],
+        ])
+        assert sorted(blob['checksum'] for blob in data['blobs']) == ['aaa', 'ccc']
+        assert data['blobs'][0]['url'].startswith('http://minio.test/product-images/images/')
+        assert (data['total'], data['unique']) == (3, 2)
+
+    def test_have_map_returns_only_changes(self, sync_post, add_product, sync_company, sync_store):
+        """Unchanged tuples are skipped; known checksums are not downloaded again"""
+        first = add_product('A', 'aaa')
+        second = add_product('B', 'bbb')
+        have = {str(first.id): 'aaa', str(second.id): 'old', 'gone-product': 'zzz'}
+        ProductPhoto.objects.filter(product=second).update(checksum='aaa')
+
+        data = self._post(sync_post, sync_company, sync_store, have=have)
+        assert data['photos'] == [[str(second.id), 'aaa', 1, 100]]
+        assert data['blobs'] == []  # aaa is already stored on the Edge
+        assert data['removed'] == ['gone-product']
+
+    def test_have_checksum_list(self, sync_post, add_product, sync_company, sync_store):
+        """A checksum list returns every tuple but only unknown blobs"""
+        add_product('A', 'aaa')
+        add_product('B', 'bbb')
+
+        data = self._post(sync_post, sync_company, sync_store, have=['aaa'])
+        assert len(data['photos']) == 2
+        assert [blob['checksum'] for blob in data['blobs']] == ['bbb']
+
+    def test_etag_and_invalid_have(self, sync_post, add_product, sync_company, sync_store,
+                                   django_capture_on_commit_callbacks):
+        """Unchanged manifest is a 304; malformed have is rejected"""
+        add_product('A', 'aaa')
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        first = sync_post(sync_views.sync_photo_manifest, data)
+        again = sync_post(sync_views.sync_photo_manifest, data, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert again.status_code == 304
+
+        with django_capture_on_commit_callbacks(execute=True):
+            add_product('B', 'bbb')
+        changed = sync_post(sync_views.sync_photo_manifest, data, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert changed.status_code == 200
+
+        response = sync_post(sync_views.sync_photo_manifest, dict(data, have='aaa'))
+        assert response.status_code == 400
+        assert response.data['code'] == 'INVALID_HAVE'
@@ -0,0 +1,442 @@
+"""
+Query budget regression suite for the sync (HO → Edge) and push (Edge → HO) APIs
+
+Seeds the sync store with 10x, 100x and 1000x rows of every entity and
+calls each endpoint cold (empty cache) at every scale. The number of SQL
+queries must not grow with the data: an N+1 loop fails the build.
+
+Fixed-size batches are allowed (chunked row builders, SQLite splitting
+prefetch IN lists at 999 parameters): at most one extra query per
+BATCH_ROWS rows over the 10x count.
+
+Rows scanned are the rows each captured SELECT reads through a full table
+(or full index) scan, taken from SQLite's EXPLAIN QUERY PLAN: index
+searches read about the rows they return, a scan reads the whole table.
+A scan of a table that grows with the seed fails the build, even behind
+a narrow result.
+
+A per-endpoint table (queries, rows scanned, response time per scale) is
+printed in the terminal summary.
+"""
+import re
+import time
+import uuid
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Brand, Store, StoreBrand
+from products.models import (
+    Category, Product, ProductPhoto, Modifier, ModifierOption, ProductModifier,
+    TableArea, Tables, TableGroup, TableGroupMember,
+)
+from promotions.models import Promotion
+from sync_api import bundle_views, photos, resources, snapshot_views, snapshots, sync_views
+from sync_api.models import SyncSnapshot
+from transactions.api import views as push_views
+from transactions.models import Bill, CashDrop, InventoryMovement, StoreSession
+
+SCALES = [10, 100, 1000]
+BATCH_ROWS = 250
+
+# Known N+1 loops (endpoint: reason), expected to fail until fixed
+KNOWN_N_PLUS_ONE = {}
+
+# Filled by the tests, printed by pytest_terminal_summary (conftest)
+QUERY_BUDGET_REPORT = {}
+
+pytestmark = pytest.mark.urls('promotions.tests.urls')
+
+
+class FakeObject:
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeStorage:
+    def open_sync_snapshot(self, object_key, offset=0, length=0):
+        return FakeObject(b'\x00' * (length or 1))
+
+    def get_image_url(self, object_key, expires=3600):
+        return f"http://minio.test/product-images/{object_key}"
+
+    def get_sync_snapshot_url(self, object_key, expires=3600):
+        return f"http://minio.test/sync-snapshots/{object_key}"
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch):
+    monkeypatch.setattr(photos, '_storage', lambda: FakeStorage())
+    monkeypatch.setattr(snapshots, '_storage', lambda: FakeStorage())
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def seed(sync_company, sync_brand, sync_store, sync_user):
+    """Grow the store's data to n rows of every entity"""
+    state = {'n': 0}
+
+    def _seed(n):
+        start, state['n'] = state['n'], n
+        index = range(start, n)
+        now = timezone.now()
+        today = now.date()
+
+        # Catalog of the store's brand
+        categories = Category.objects.bulk_create([
+            Category(brand=sync_brand, name=f'Category {i}') for i in index
+        ])
+        products = Product.objects.bulk_create([
+            Product(
+                company=sync_company, brand=sync_brand, category=category, sku=f'SKU-{i}',
+                name=f'Product {i}', price=Decimal('10000'), cost=Decimal('5000')
+            )
+            for i, category in zip(index, categories)
+        ])
+        ProductPhoto.objects.bulk_create([
+            ProductPhoto(product=product, checksum=f'{i:032x}', size=100, is_primary=True)
+            for i, product in zip(index, products)
+        ])
+        modifiers = Modifier.objects.bulk_create([
+            Modifier(brand=sync_brand, name=f'Modifier {i}') for i in index
+        ])
+        ModifierOption.objects.bulk_create([
+            ModifierOption(modifier=modifier, name=f'Option {i}.{j}')
+            for i, modifier in zip(index, modifiers) for j in range(2)
+        ])
+        ProductModifier.objects.bulk_create([
+            ProductModifier(product=product, modifier=modifier)
+            for product, modifier in zip(products, modifiers)
+        ])
+        areas = TableArea.objects.bulk_create([
+            TableArea(company=sync_company, brand=sync_brand, store=sync_store, name=f'Area {i}')
+            for i in index
+        ])
+        tables = Tables.objects.bulk_create([
+            Tables(area=area, number=f'T{i}', capacity=4) for i, area in zip(index, areas)
+        ])
+        groups = TableGroup.objects.bulk_create([
+            TableGroup(brand=sync_brand, main_table=table, created_by=sync_user) for table in tables
+        ])
+        TableGroupMember.objects.bulk_create([
+            TableGroupMember(table_group=group, table=table) for group, table in zip(groups, tables)
+        ])
+
+        # Promotions with M2M scope
+        promotions = Promotion.objects.bulk_create([
+            Promotion(
+                company=sync_company, brand=sync_brand, scope='single', name=f'Promotion {i}',
+                code=f'BUDGET-{i}', promo_type='percent_discount', discount_percent=Decimal('10'),
+                start_date=today - timedelta(days=1), end_date=today + timedelta(days=5),
+                created_by=sync_user, is_active=True,
+            )
+            for i in index
+        ])
+        Promotion.products.through.objects.bulk_create([
+            Promotion.products.through(promotion_id=promotion.id, product_id=product.id)
+            for promotion, product in zip(promotions, products)
+        ])
+        Promotion.categories.through.objects.bulk_create([
+            Promotion.categories.through(promotion_id=promotion.id, category_id=category.id)
+            for promotion, category in zip(promotions, categories)
+        ])
+
+        # Other brands and stores of the company
+        brands = Brand.objects.bulk_create([
+            Brand(company=sync_company, code=f'BR-{i}', name=f'Brand {i}') for i in index
+        ])
+        stores = Store.objects.bulk_create([
+            Store(
+                company=sync_company, store_code=f'ST-{i}', store_name=f'Store {i}',
+                address='Address', phone='021000000'
+            )
+            for i in index
+        ])
+        StoreBrand.objects.bulk_create([
+            StoreBrand(store=store, brand=brand) for store, brand in zip(stores, brands)
+        ])
+        SyncSnapshot.objects.bulk_create([
+            SyncSnapshot(
+                company=sync_company, store=sync_store, version=f'v{i}', sections={},
+                object_key=f'stores/{i}', checksum='0' * 64, size=1, created_at=now + timedelta(seconds=i),
+            )
+            for i in index
+        ])
+
+        # Pushed transactions already at HO
+        ids = {'company_id': sync_company.id, 'brand_id': sync_brand.id, 'store_id': sync_store.id}
+        Bill.objects.bulk_create([
+            Bill(
+                **ids, terminal_id=uuid.uuid4(), bill_number=f'SEED-{i}', bill_type='DINE_IN',
+                status='PAID', created_by=uuid.uuid4(), created_at=now,
+            )
+            for i in index
+        ])
+        CashDrop.objects.bulk_create([
+            CashDrop(
+                **ids, terminal_id=uuid.uuid4(), transaction_type='DROP', amount=Decimal('1000'),
+                created_by=uuid.uuid4(), created_at=now,
+            )
+            for i in index
+        ])
+        StoreSession.objects.bulk_create([
+            StoreSession(
+                **ids, session_date=today - timedelta(days=i + 1), opened_at=now, opened_by=uuid.uuid4(),
+            )
+            for i in index
+        ])
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                **ids, inventory_item_id=uuid.uuid4(), movement_type='SALE', quantity=Decimal('1'),
+                unit='pcs', created_at=now, created_by=uuid.uuid4(),
+            )
+            for i in index
+        ])
+
+    return _seed
+
+
+def _store(company, store):
+    return {'company_id': str(company.id), 'store_id': str(store.id)}
+
+
+def _bill(ids, scale, n=0):
+    return dict(
+        ids, terminal_id=str(uuid.uuid4()), bill_number=f'PUSH-{scale}-{n}', bill_type='TAKEAWAY',
+        created_by=str(uuid.uuid4()), created_at=timezone.now().isoformat(),
+    )
+
+
+def _push_ids(company, brand, store):
+    return {'company_id': str(company.id), 'brand_id': str(brand.id), 'store_id': str(store.id)}
+
+
+def _cash_drop(ids):
+    return dict(
+        ids, terminal_id=str(uuid.uuid4()), transaction_type='DROP', amount='1000',
+        created_by=str(uuid.uuid4()), created_at=timezone.now(),
+    )
+
+
+def _movement(ids):
+    return dict(
+        ids, inventory_item_id=str(uuid.uuid4()), movement_type='SALE', quantity='1', unit='pcs',
+        created_by=str(uuid.uuid4()), created_at=timezone.now(),
+    )
+
+
+# name: (view, request data builder(company, brand, store, scale))
+SYNC_ENDPOINTS = {
+    'promotions': (sync_views.sync_promotions, lambda c, b, s, n: _store(c, s)),
+    'categories': (sync_views.sync_categories, lambda c, b, s, n: _store(c, s)),
+    'products': (sync_views.sync_products, lambda c, b, s, n: _store(c, s)),
+    'modifiers': (sync_views.sync_modifiers, lambda c, b, s, n: _store(c, s)),
+    'modifier_options': (sync_views.sync_modifier_options, lambda c, b, s, n: _store(c, s)),
+    'product_modifiers': (sync_views.sync_product_modifiers, lambda c, b, s, n: _store(c, s)),
+    'tables': (sync_views.sync_tables, lambda c, b, s, n: _store(c, s)),
+    'table_areas': (sync_views.sync_table_areas, lambda c, b, s, n: _store(c, s)),
+    'table_groups': (sync_views.sync_table_groups, lambda c, b, s, n: _store(c, s)),
+    'product_photos': (sync_views.sync_product_photos, lambda c, b, s, n: dict(_store(c, s), limit=1000)),
+    'photo_manifest': (sync_views.sync_photo_manifest, lambda c, b, s, n: _store(c, s)),
+    'version': (sync_views.sync_version, lambda c, b, s, n: _store(c, s)),
+    'bundle': (bundle_views.sync_bundle, lambda c, b, s, n: _store(c, s)),
+    'snapshot': (snapshot_views.sync_snapshot, lambda c, b, s, n: _store(c, s)),
+    'snapshot_download': (
+        snapshot_views.download_snapshot,
+        lambda c, b, s, n: dict(_store(c, s), version=f'v{n - 1}'),
+    ),
+    'delta': (snapshot_views.sync_delta, lambda c, b, s, n: dict(_store(c, s), from_version=f'v{n - 1}')),
+    'companies': (sync_views.sync_companies, lambda c, b, s, n: {}),
+    'brands': (sync_views.sync_brands, lambda c, b, s, n: _store(c, s)),
+    'stores': (sync_views.sync_stores, lambda c, b, s, n: {'company_id': str(c.id)}),
+    'store_brands': (sync_views.sync_store_brands, lambda c, b, s, n: _store(c, s)),
+    'usage': (sync_views.upload_usage, lambda c, b, s, n: {'usages': [
+        {'promotion_id': str(uuid.uuid4()), 'bill_id': 'B001', 'discount_amount': 1000, 'store_id': str(s.id)}
+    ]}),
+}
+
+PUSH_ENDPOINTS = {
+    'bills.push': (
+        push_views.BillPushViewSet.as_view({'post': 'push'}),
+        lambda c, b, s, n: _bill(_push_ids(c, b, s), n),
+    ),
+    'bills.push_bulk': (
+        push_views.BillPushViewSet.as_view({'post': 'push_bulk'}),
+        lambda c, b, s, n: {'bills': [_bill(_push_ids(c, b, s), n, i) for i in range(3)]},
+    ),
+    'cash_drops.push': (
+        push_views.CashDropPushViewSet.as_view({'post': 'push'}),
+        lambda c, b, s, n: _cash_drop(_push_ids(c, b, s)),
+    ),
+    'cash_drops.push_bulk': (
+        push_views.CashDropPushViewSet.as_view({'post': 'push_bulk'}),
+        lambda c, b, s, n: {'cash_drops': [_cash_drop(_push_ids(c, b, s)) for i in range(3)]},
+    ),
+    'sessions.push': (
+        push_views.StoreSessionPushViewSet.as_view({'post': 'push'}),
+        lambda c, b, s, n: dict(
+            _push_ids(c, b, s), session_date=(timezone.now().date() + timedelta(days=n)).isoformat(),
+            opened_at=timezone.now().isoformat(), opened_by=str(uuid.uuid4()),
+        ),
+    ),
+    'shifts.push': (
+        push_views.CashierShiftPushViewSet.as_view({'post': 'push'}),
+        lambda c, b, s, n: {
+            'store_session_id': str(uuid.uuid4()), 'terminal_id': str(uuid.uuid4()),
+            'cashier_id': str(uuid.uuid4()), 'opened_at': timezone.now().isoformat(),
+        },
+    ),
+    'inventory.push_bulk': (
+        push_views.InventoryMovementPushViewSet.as_view({'post': 'push_bulk'}),
+        lambda c, b, s, n: {'movements': [_movement(_push_ids(c, b, s)) for i in range(3)]},
+    ),
+    'bulk_push': (
+        push_views.bulk_push,
+        lambda c, b, s, n: {
+            'bills': [_bill(_push_ids(c, b, s), f'bulk-{n}', i) for i in range(3)],
+        },
+    ),
+}
+
+ENDPOINTS = dict(SYNC_ENDPOINTS, **PUSH_ENDPOINTS)
+
+# Endpoints called with GET (query parameters) instead of a JSON POST
+GET_ENDPOINTS = {'snapshot_download'}
+
+# "table" T3 / "table" AS T3 in Django's SQL
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?(\w+)')
+
+
+def _full_scans(queries):
+    """(table, rows) read by every full scan in the captured SELECTs"""
+    tables = set(connection.introspection.table_names())
+    sizes = {}
+    scans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            aliases = dict((alias, table) for table, alias in TABLE_ALIAS.findall(sql) if table in tables)
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for *_ids, detail in cursor.fetchall():
+                if not detail.startswith('SCAN '):
+                    continue
+                name = detail.split()[1]
+                table = aliases.get(name, name)
+                if table not in tables:
+                    continue  # SCAN CONSTANT ROW, SCAN SUBQUERY n
+                if table not in sizes:
+                    cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                    sizes[table] = cursor.fetchone()[0]
+                scans.append((table, sizes[table]))
+    return scans
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """Every endpoint runs the same number of queries at 10x, 100x and 1000x data"""
+
+    def _measure(self, name, seed, sync_user, sync_company, sync_brand, sync_store):
+        view, build = ENDPOINTS[name]
+        factory = APIRequestFactory()
+
+        def call(scale):
+            data = build(sync_company, sync_brand, sync_store, scale)
+            if name in GET_ENDPOINTS:
+                request = factory.get('/api/v1/', data)
+            else:
+                request = factory.post('/api/v1/', data, format='json')
+            force_authenticate(request, user=sync_user)
+            response = view(request)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+
+        # One-time work (sync settings, first sync records) is not part of the budget
+        seed(1)
+        call(0)
+
+        results = []
+        scans = []
+        for scale in SCALES:
+            seed(scale)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = call(scale)
+                elapsed = time.perf_counter() - started
+            assert response.status_code < 300, (name, scale, response.status_code, getattr(response, 'data', None))
+            scans.append(_full_scans(queries))
+            results.append((scale, len(queries), sum(rows for _table, rows in scans[-1]), elapsed))
+
+        QUERY_BUDGET_REPORT[name] = results
+        base = results[0][1]
+        over_budget = [
+            f"{scale}x={count} (budget {base + scale // BATCH_ROWS})"
+            for scale, count, _scanned, _elapsed in results if count > base + scale // BATCH_ROWS
+        ]
+        assert not over_budget, f"{name}: queries grow with data, 10x={base}, " + ', '.join(over_budget)
+        first, last = dict(scans[0]), dict(scans[-1])
+        growing = sorted(table for table, rows in last.items() if rows > first.get(table, 0) + SCALES[0])
+        assert not growing, f"{name}: full table scan of {', '.join(growing)}"
+
+    @pytest.mark.parametrize('name', [
+        pytest.param(name, marks=pytest.mark.xfail(strict=True, reason=KNOWN_N_PLUS_ONE[name]))
+        if name in KNOWN_N_PLUS_ONE else name
+        for name in SYNC_ENDPOINTS
+    ])
+    def test_sync_endpoint(self, name, seed, sync_user, sync_company, sync_brand, sync_store):
+        self._measure(name, seed, sync_user, sync_company, sync_brand, sync_store)
+
+    @pytest.mark.parametrize('name', list(PUSH_ENDPOINTS))
+    def test_push_endpoint(self, name, seed, sync_user, sync_company, sync_brand, sync_store):
+        self._measure(name, seed, sync_user, sync_company, sync_brand, sync_store)
+
+    def test_full_scan_is_counted(self, seed, sync_brand):
+        """A narrow result read through a table scan counts the whole table"""
+        seed(100)
+        with CaptureQueriesContext(connection) as queries:
+            list(Product.objects.filter(name='Product 1'))
+            list(Product.objects.filter(brand=sync_brand, sku='SKU-1'))
+        assert _full_scans(queries) == [('product', 100)]
+
+    @pytest.mark.parametrize('name', sorted(resources.REGISTRY))
+    def test_compressed_catalog_reads_sync_settings_once(self, name, seed, sync_user, sync_company, sync_brand,
+                                                         sync_store):
+        """Compression uses the sync settings of the store context, not a query of its own"""
+        view, build = SYNC_ENDPOINTS[name]
+        factory = APIRequestFactory()
+
+        def call():
+            request = factory.post(
+                '/api/v1/', build(sync_company, sync_brand, sync_store, 10), format='json',
+                HTTP_ACCEPT_ENCODING='gzip',
+            )
+            force_authenticate(request, user=sync_user)
+            return view(request)
+
+        seed(10)
+        call()  # creates the sync settings
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+        assert response.status_code == 200
+        settings_queries = [query for query in queries if 'promotion_sync_settings' in query['sql']]
+        assert len(settings_queries) == 1  # loaded with the store context
@@ -0,0 +1,115 @@
+"""
+Tests for the declarative sync resource engine
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import (
+    Category, Product, Modifier, ModifierOption, ProductModifier,
+    TableArea, Tables, TableGroup, TableGroupMember,
+)
+from sync_api import resources, sync_views
+from sync_api.bundle_views import BUNDLE_SECTIONS
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def add_rows(sync_company, sync_brand, sync_store, sync_user):
+    """Factory adding n rows of every catalog resource"""
+    counter = {'n': 0}
+
+    def _add(n):
+        for _ in range(n):
+            counter['n'] += 1
+            i = counter['n']
+            category = Category.objects.create(brand=sync_brand, name=f'Category {i}')
+            product = Product.objects.create(
+                company=sync_company, brand=sync_brand, category=category, sku=f'SKU-{i}',
+                name=f'Product {i}', price=Decimal('10000'), cost=Decimal('5000')
+            )
+            modifier = Modifier.objects.create(brand=sync_brand, name=f'Modifier {i}')
+            ModifierOption.objects.create(modifier=modifier, name=f'Option {i}')
+            ProductModifier.objects.create(product=product, modifier=modifier)
+            area = TableArea.objects.create(
+                company=sync_company, brand=sync_brand, store=sync_store, name=f'Area {i}'
+            )
+            table = Tables.objects.create(area=area, number=f'T{i}', capacity=4)
+            group = TableGroup.objects.create(brand=sync_brand, main_table=table, created_by=sync_user)
+            TableGroupMember.objects.create(table_group=group, table=table)
+
+    return _add
+
+
+VIEWS = {
+    'categories': sync_views.sync_categories,
+    'products': sync_views.sync_products,
+    'modifiers': sync_views.sync_modifiers,
+    'modifier_options': sync_views.sync_modifier_options,
+    'product_modifiers': sync_views.sync_product_modifiers,
+    'table_groups': sync_views.sync_table_groups,
+}
+
+
+@pytest.mark.django_db
+class TestSyncResources:
+    """Test the registry and the query budget of the engine"""
+
+    def _queries(self, sync_post, view, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = sync_post(view, data)
+        assert response.status_code == 200
+        return response, len(queries)
+
+    def test_registry_covers_views(self):
+        """Every engine endpoint is registered and has a bundle section"""
+        assert set(resources.REGISTRY) == set(VIEWS)
+        assert set(resources.REGISTRY) <= set(BUNDLE_SECTIONS)
+
+    @pytest.mark.parametrize('name', sorted(VIEWS))
+    def test_query_count_does_not_grow_with_rows(self, name, sync_post, add_rows, sync_company, sync_store):
+        """Same number of queries for 1 and for 6 rows"""
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        add_rows(1)
+        sync_post(VIEWS[name], data)  # warm store context
+
+        response, one = self._queries(sync_post, VIEWS[name], data)
+        assert response.data['total'] == 1
+
+        add_rows(5)
+        response, six = self._queries(sync_post, VIEWS[name], data)
+        assert response.data['total'] == 6
+        assert six == one
+
+    def test_product_modifiers_pages_by_id(self, sync_post, add_rows, sync_company, sync_store):
+        """Resources without timestamps page on id"""
+        add_rows(3)
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id), 'limit': 2}
+        first = sync_post(sync_views.sync_product_modifiers, data)
+        assert first.status_code == 200
+        assert first.data['has_more'] is True
+
+        second = sync_post(
+            sync_views.sync_product_modifiers, dict(data, page_token=first.data['next_page_token'])
+        )
+        assert second.data['has_more'] is False
+        ids = [row['id'] for row in first.data['product_modifiers'] + second.data['product_modifiers']]
+        assert ids == sorted(ids) and len(set(ids)) == 3
+
+    def test_unknown_brand_filter_is_empty(self, sync_post, add_rows, sync_company, sync_store):
+        """brand_id outside the store's brands selects nothing"""
+        add_rows(1)
+        response = sync_post(sync_views.sync_categories, {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id), 'brand_id': 'not-a-brand',
+        })
+        assert response.status_code == 200
+        assert response.data['categories'] == []
+        assert response.data['filter']['brand_id'] == 'not-a-brand'
@@ -0,0 +1,279 @@
+"""
+Tests for prebuilt per-store sync snapshots
+"""
+import gzip
+import hashlib
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import parse_qsl, urlsplit
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+
+from core.models import Store
+from products.models import Product
+from sync_api import changelog, snapshot_views, snapshots
+from sync_api.models import SyncSnapshot
+
+pytestmark = pytest.mark.urls('promotions.tests.urls')
+
+
+class FakeObject:
+    """Object body as returned by MinIO get_object()"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeStorage:
+    """In-memory stand-in for the MinIO sync bucket"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_sync_snapshot(self, file, object_key, length):
+        self.objects[object_key] = file.read(length)
+
+    def open_sync_snapshot(self, object_key, offset=0, length=0):
+        data = self.objects[object_key][offset:]
+        return FakeObject(data[:length] if length else data)
+
+    def get_sync_snapshot_url(self, object_key, expires=3600):
+        return f"http://minio.test/sync-snapshots/{object_key}"
+
+    def delete_sync_snapshot(self, object_key):
+        return self.objects.pop(object_key, None) is not None
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch):
+    cache.clear()
+    fake = FakeStorage()
+    monkeypatch.setattr(snapshots, '_storage', lambda: fake)
+    yield fake
+    cache.clear()
+
+
+@pytest.fixture
+def product(sync_company, sync_brand):
+    return Product.objects.create(
+        company=sync_company, brand=sync_brand, sku='SKU-1', name='Nasi Goreng',
+        price=Decimal('25000'), cost=Decimal('10000')
+    )
+
+
+def read_lines(data):
+    return [json.loads(line) for line in gzip.decompress(data).decode().splitlines()]
+
+
+@pytest.mark.django_db
+class TestSyncSnapshots:
+    """Test snapshot build, versioning and download"""
+
+    def test_build_writes_ndjson_with_checksum(self, storage, product, sync_store):
+        """Object holds a header plus one line per row, checksum is its SHA-256"""
+        snapshot, built = snapshots.build_snapshot(sync_store)
+        assert built
+
+        data = storage.objects[snapshot.object_key]
+        assert snapshot.checksum == hashlib.sha256(data).hexdigest()
+        assert snapshot.size == len(data)
+
+        header, *rows = read_lines(data)
+        assert header['type'] == 'header'
+        assert header['version'] == snapshot.version
+        products = [row['data'] for row in rows if row['section'] == 'products']
+        assert [p['id'] for p in products] == [str(product.id)]
+        assert snapshot.row_counts['products'] == 1
+
+    def test_unchanged_store_is_not_rebuilt(self, storage, product, sync_company, sync_brand, sync_store,
+                                            django_capture_on_commit_callbacks):
+        """Same data version reuses the snapshot, a change builds a new one"""
+        first, _built = snapshots.build_snapshot(sync_store)
+        again, built = snapshots.build_snapshot(sync_store)
+        assert not built
+        assert again.id == first.id
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.name = 'Nasi Goreng Spesial'
+            product.save()
+
+        second, built = snapshots.build_snapshot(sync_store)
+        assert built
+        assert second.version != first.version
+        assert len(storage.objects) == 2
+
+        assert snapshots.prune_snapshots(keep=1) == 1
+        assert list(SyncSnapshot.objects.values_list('id', flat=True)) == [second.id]
+        assert list(storage.objects) == [second.object_key]
+
+    def test_build_uses_cached_store_context(self, storage, product, sync_store):
+        """Store and brands come from the store context of the live endpoints"""
+        snapshots.build_snapshot(sync_store)
+        with CaptureQueriesContext(connection) as captured:
+            _snapshot, built = snapshots.build_snapshot(sync_store)
+        assert not built
+        assert not [query for query in captured if 'FROM "brand"' in query['sql'] or 'FROM "store"' in query['sql']]
+
+    def test_snapshot_endpoint(self, sync_post, product, sync_company, sync_store):
+        """Latest snapshot metadata, 404 before the first build"""
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        response = sync_post(snapshot_views.sync_snapshot, data)
+        assert response.status_code == 404
+        assert response.data['code'] == 'SNAPSHOT_NOT_AVAILABLE'
+
+        snapshot, _built = snapshots.build_snapshot(sync_store)
+        response = sync_post(snapshot_views.sync_snapshot, dict(data, version=snapshot.version))
+        assert response.status_code == 200
+        assert response.data['unchanged'] is True
+        assert response.data['snapshot']['checksum'] == snapshot.checksum
+        assert response.data['snapshot']['download_url'].endswith(snapshot.object_key)
+
+    def test_stale_snapshot_cursor_expires(self, sync_post, storage, product, sync_company, sync_store):
+        """The cursor is issued at build time; old unchanged snapshots are rebuilt"""
+        snapshot, _built = snapshots.build_snapshot(sync_store)
+        SyncSnapshot.objects.filter(id=snapshot.id).update(
+            created_at=timezone.now() - timedelta(days=changelog.CHANGE_LOG_RETENTION_DAYS)
+        )
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        response = sync_post(snapshot_views.sync_snapshot, data)
+        with pytest.raises(changelog.CursorExpired):
+            changelog.decode_cursor(response.data['snapshot']['next_cursor'])
+
+        rebuilt, built = snapshots.build_snapshot(sync_store)
+        assert built
+        assert rebuilt.version == snapshot.version
+        assert list(storage.objects) == [rebuilt.object_key]
+        response = sync_post(snapshot_views.sync_snapshot, data)
+        assert changelog.decode_cursor(response.data['snapshot']['next_cursor']) == rebuilt.change_seq
+
+    def test_download_supports_range_resume(self, storage, sync_user, product, sync_company, sync_store):
+        """Full download, resumed download and unsatisfiable range"""
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        snapshot, _built = snapshots.build_snapshot(sync_store)
+        data = storage.objects[snapshot.object_key]
+        params = {'company_id': sync_company.id, 'store_id': sync_store.id, 'version': snapshot.version}
+
+        def get(**headers):
+            request = APIRequestFactory().get('/api/v1/sync/snapshot/download/', params, **headers)
+            force_authenticate(request, user=sync_user)
+            return snapshot_views.download_snapshot(request)
+
+        response = get()
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == data
+
+        response = get(HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=f'"{snapshot.checksum}"')
+        assert response.status_code == 206
+        assert response['Content-Range'] == f"bytes 10-{len(data) - 1}/{len(data)}"
+        assert b''.join(response.streaming_content) == data[10:]
+
+        response = get(HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"stale"')
+        assert response.status_code == 200
+
+        response = get(HTTP_RANGE=f'bytes={len(data)}-')
+        assert response.status_code == 416
+
+
+@pytest.mark.django_db
+class TestSyncSnapshotDeltas:
+    """Test patches between consecutive snapshots"""
+
+    def _build(self, store):
+        # Fresh store: same field values as the scheduled build reads
+        snapshot, _built = snapshots.build_snapshot(Store.objects.get(pk=store.pk))
+        return snapshot
+
+    def _change(self, product, store, capture, **fields):
+        with capture(execute=True):
+            for name, value in fields.items():
+                setattr(product, name, value)
+            product.save()
+        return self._build(store)
+
+    def test_price_change_is_single_field_op(self, product, sync_store, django_capture_on_commit_callbacks):
+        """Only the changed fields of the changed row are in the patch"""
+        first = self._build(sync_store)
+        second = self._change(product, sync_store, django_capture_on_commit_callbacks, price=Decimal('27000'))
+
+        delta = second.store.sync_snapshot_deltas.get()
+        assert (delta.from_version, delta.to_version) == (first.version, second.version)
+        assert delta.ops == [{
+            'section': 'products', 'op': 'set', 'id': str(product.id),
+            'fields': {'price': '27000.00', 'updated_at': delta.ops[0]['fields']['updated_at']},
+        }]
+
+    def test_delta_endpoint_modes(self, sync_post, product, sync_company, sync_brand, sync_store,
+                                  django_capture_on_commit_callbacks):
+        """Chain of patches, unchanged, and full snapshot for unknown versions"""
+        first = self._build(sync_store)
+        self._change(product, sync_store, django_capture_on_commit_callbacks, price=Decimal('27000'))
+        third = self._change(product, sync_store, django_capture_on_commit_callbacks, name='Nasi Goreng Spesial')
+
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id)}
+        response = sync_post(snapshot_views.sync_delta, dict(data, from_version=first.version))
+        assert response.data['mode'] == 'delta'
+        assert response.data['version'] == third.version
+        patches = response.data['patches']
+        assert [patch['from_version'] for patch in patches][0] == first.version
+        assert [patch['to_version'] for patch in patches][-1] == third.version
+        assert patches[1]['ops'][0]['fields']['name'] == 'Nasi Goreng Spesial'
+
+        response = sync_post(snapshot_views.sync_delta, dict(data, from_version=third.version))
+        assert response.data['mode'] == 'unchanged'
+        assert changelog.decode_cursor(response.data['next_cursor']) == third.change_seq
+
+        # Cursor issued at the snapshot build time
+        SyncSnapshot.objects.update(
+            created_at=F('created_at') - timedelta(days=changelog.CHANGE_LOG_RETENTION_DAYS)
+        )
+        response = sync_post(snapshot_views.sync_delta, dict(data, from_version=first.version))
+        assert response.data['mode'] == 'delta'
+        with pytest.raises(changelog.CursorExpired):
+            changelog.decode_cursor(response.data['next_cursor'])
+
+        response = sync_post(snapshot_views.sync_delta, dict(data, from_version='unknown'))
+        assert response.data['mode'] == 'snapshot'
+        assert response.data['snapshot']['version'] == third.version
+
+    def test_snapshot_mode_proxy_url_downloads(self, sync_post, sync_user, storage, product, sync_company,
+                                               sync_store):
+        """proxy_url of a delta response points at the download route"""
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        snapshot = self._build(sync_store)
+        data = {'company_id': str(sync_company.id), 'store_id': str(sync_store.id), 'from_version': 'unknown'}
+        response = sync_post(snapshot_views.sync_delta, data)
+        assert response.data['mode'] == 'snapshot'
+
+        url = urlsplit(response.data['snapshot']['proxy_url'])
+        assert url.path == '/api/v1/sync/snapshot/download/'
+        view = resolve(url.path).func
+        request = APIRequestFactory().get(url.path, dict(parse_qsl(url.query)))
+        force_authenticate(request, user=sync_user)
+        response = view(request)
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == storage.objects[snapshot.object_key]
+
+    def test_removed_row_is_delete_op(self):
+        """Rows missing from the new snapshot become delete ops"""
+        from sync_api import deltas
+        old = {'products': {'a': {'id': 'a', 'name': 'A'}, 'b': {'id': 'b', 'name': 'B'}}}
+        new = {'products': {'a': {'id': 'a', 'name': 'A'}}}
+        assert deltas.diff_rows(old, new) == [{'section': 'products', 'op': 'delete', 'id': 'b'}]
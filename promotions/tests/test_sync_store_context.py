@@ -0,0 +1,71 @@
+"""
+Tests for the cached store context of sync requests
+"""
+import pytest
+from django.core.cache import cache
+
+from core.models import Brand, StoreBrand
+from promotions.models_settings import PromotionSyncSettings
+from sync_api import store_context
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestStoreContext:
+    """Test resolve() caching and signal invalidation"""
+
+    def test_warm_resolve_runs_no_query(self, sync_company, sync_brand, sync_store, django_assert_num_queries):
+        """Second resolve is served from the cache"""
+        ctx = store_context.resolve(sync_company.id, sync_store.id)
+        assert ctx.store == sync_store
+        assert ctx.company == sync_company
+        assert ctx.brand_ids == [sync_brand.id]
+        assert ctx.sync_settings.company_id == sync_company.id
+
+        with django_assert_num_queries(0):
+            assert store_context.resolve(str(sync_company.id), str(sync_store.id)).brand_ids == [sync_brand.id]
+
+    def test_unknown_or_inactive_store(self, sync_company, sync_store, django_capture_on_commit_callbacks):
+        """Wrong company, bad id and inactive stores resolve to None"""
+        from core.models import Company
+        other = Company.objects.create(code='OTHER', name='Other Company')
+        assert store_context.resolve(other.id, sync_store.id) is None
+        assert store_context.resolve(sync_company.id, 'not-a-uuid') is None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sync_store.is_active = False
+            sync_store.save()
+        assert store_context.resolve(sync_company.id, sync_store.id) is None
+        assert store_context.resolve(sync_company.id, sync_store.id, active_only=False).store == sync_store
+
+    def test_brand_assignment_invalidates(self, sync_company, sync_brand, sync_store,
+                                          django_capture_on_commit_callbacks):
+        """New StoreBrand and deactivated Brand are picked up on the next resolve"""
+        store_context.resolve(sync_company.id, sync_store.id)
+        other_brand = Brand.objects.create(company=sync_company, code='SYNC-BR2', name='Another Brand')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            StoreBrand.objects.create(store=sync_store, brand=other_brand)
+        ctx = store_context.resolve(sync_company.id, sync_store.id)
+        assert set(ctx.brand_ids) == {sync_brand.id, other_brand.id}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sync_brand.is_active = False
+            sync_brand.save()
+        assert store_context.resolve(sync_company.id, sync_store.id).brand_ids == [other_brand.id]
+
+    def test_sync_settings_change_invalidates(self, sync_company, sync_store, django_capture_on_commit_callbacks):
+        """Saved PromotionSyncSettings replace the cached ones"""
+        assert store_context.resolve(sync_company.id, sync_store.id).sync_settings.future_days == 7
+
+        with django_capture_on_commit_callbacks(execute=True):
+            settings = PromotionSyncSettings.objects.get(company=sync_company)
+            settings.future_days = 14
+            settings.save()
+        assert store_context.resolve(sync_company.id, sync_store.id).sync_settings.future_days == 14
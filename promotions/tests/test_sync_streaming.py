@@ -0,0 +1,67 @@
+"""
+Tests for streamed sync responses
+"""
+import json
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+
+from products.models import Modifier, ModifierOption, Product
+from sync_api import streaming, sync_views
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _streamed_json(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return json.loads(b''.join(response.streaming_content))
+
+
+@pytest.mark.django_db
+class TestSyncStreaming:
+    """Test that streamed responses carry the same JSON as regular ones"""
+
+    def _data(self, company, store, **extra):
+        return {'company_id': str(company.id), 'store_id': str(store.id), **extra}
+
+    def test_streamed_products_match_regular(self, sync_post, sync_company, sync_brand, sync_store):
+        """Streaming changes the transport, not the payload"""
+        for index in range(3):
+            Product.objects.create(
+                company=sync_company, brand=sync_brand, sku=f'SKU-{index}', name=f'Product {index}',
+                price=Decimal('10000'), cost=Decimal('5000')
+            )
+
+        regular = sync_post(sync_views.sync_products, self._data(sync_company, sync_store))
+        streamed = sync_post(sync_views.sync_products, self._data(sync_company, sync_store, stream=True))
+        body = _streamed_json(streamed)
+
+        assert streamed['ETag'] == regular['ETag']
+        assert body['total'] == 3
+        assert body['products'] == json.loads(json.dumps(regular.data['products']))
+        assert body['deleted_ids'] == []
+
+    def test_streamed_modifiers_nest_options(self, sync_post, sync_company, sync_brand, sync_store):
+        """Options are loaded per chunk and nested under their modifier"""
+        modifier = Modifier.objects.create(brand=sync_brand, name='Size')
+        ModifierOption.objects.create(modifier=modifier, name='Large', price_adjustment=Decimal('5000'))
+        ModifierOption.objects.create(modifier=modifier, name='Gone', is_active=False)
+
+        body = _streamed_json(sync_post(
+            sync_views.sync_modifiers, self._data(sync_company, sync_store, stream='true')
+        ))
+
+        assert body['total'] == 1
+        assert [option['name'] for option in body['modifiers'][0]['options']] == ['Large']
+
+    def test_iter_json_evaluates_callables_after_rows(self):
+        """Trailer fields see the row count"""
+        rows = streaming.RowStream(iter([{'id': 'a'}, {'id': 'b'}]))
+        text = ''.join(streaming.iter_json({'rows': rows, 'total': lambda: rows.count}))
+        assert json.loads(text) == {'rows': [{'id': 'a'}, {'id': 'b'}], 'total': 2}
@@ -0,0 +1,165 @@
+"""
+Tests for Edge sync telemetry (SyncEvent buffering, flush and rollups)
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from config.tasks import sync_health_check_task
+from core.models import Store
+from products.models import Product
+from sync_api import changelog, sync_views, telemetry
+from sync_api.middleware import SyncTelemetryMiddleware
+from sync_api.models import SyncEvent
+from transactions.api.views import CashDropPushViewSet
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    cache.clear()
+    telemetry._local_buffer.items.clear()
+    yield
+    telemetry._local_buffer.items.clear()
+    cache.clear()
+
+
+@pytest.fixture
+def call(sync_user):
+    """Run a view behind the telemetry middleware"""
+    factory = APIRequestFactory()
+
+    def _call(view, path, data, **extra):
+        def get_response(request):
+            # Rendered like the request handler does before the middleware sees it
+            response = view(request)
+            return response.render() if hasattr(response, 'render') else response
+
+        request = factory.post(path, data, format='json', **extra)
+        force_authenticate(request, user=sync_user)
+        return SyncTelemetryMiddleware(get_response)(request)
+
+    return _call
+
+
+@pytest.fixture
+def products(sync_company, sync_brand):
+    return [
+        Product.objects.create(
+            company=sync_company, brand=sync_brand, sku=f"SKU-{index}", name=f"Product {index}",
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+        for index in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestSyncTelemetry:
+    """Test event recording, buffering and flushing"""
+
+    def _body(self, company, store, **extra):
+        return dict({'company_id': str(company.id), 'store_id': str(store.id)}, **extra)
+
+    def test_call_is_buffered_then_flushed(self, call, products, sync_company, sync_store):
+        """The request only buffers the event; the flush writes it in bulk"""
+        response = call(sync_views.sync_products, '/api/v1/sync/products/', self._body(sync_company, sync_store))
+        assert response.status_code == 200
+        assert telemetry.buffered_count() == 1
+        assert not SyncEvent.objects.exists()
+
+        assert telemetry.flush_events() == 1
+        assert telemetry.buffered_count() == 0
+        event = SyncEvent.objects.get()
+        assert (event.company_id, event.store_id) == (sync_company.id, sync_store.id)
+        assert (event.direction, event.endpoint, event.status, event.status_code) == ('pull', 'sync/products', 'ok', 200)
+        assert event.rows == 3
+        assert event.bytes == len(response.content)
+        assert event.cursor_lag is None
+        assert event.duration_ms > 0
+
+    def test_cursor_lag_and_not_modified(self, call, products, sync_company, sync_store):
+        """Cursor syncs record how far the Edge is behind; 304s are counted apart"""
+        # Committed changes (the commit hooks do not run in the test transaction)
+        changelog.sequence_changes()
+        body = self._body(sync_company, sync_store, cursor=changelog.encode_cursor(0))
+        first = call(sync_views.sync_products, '/api/v1/sync/products/', body)
+        call(sync_views.sync_products, '/api/v1/sync/products/', body, HTTP_IF_NONE_MATCH=first['ETag'])
+        telemetry.flush_events()
+
+        synced, not_modified = SyncEvent.objects.order_by('created_at', 'id')
+        assert synced.cursor_lag == changelog.high_water_mark(sync_company.id)
+        assert synced.cursor_lag == 1  # the products were committed together
+        assert (not_modified.status, not_modified.rows, not_modified.store_id) == ('not_modified', 0, sync_store.id)
+
+    def test_streamed_response_is_recorded_after_last_chunk(self, call, products, sync_company, sync_store):
+        response = call(
+            sync_views.sync_products, '/api/v1/sync/products/', self._body(sync_company, sync_store, stream=True)
+        )
+        assert response.streaming
+        assert telemetry.buffered_count() == 0
+
+        body = b''.join(response.streaming_content)
+        telemetry.flush_events()
+        event = SyncEvent.objects.get()
+        assert (event.rows, event.bytes) == (3, len(body))
+
+    def test_push_and_rejected_calls(self, call, sync_company, sync_store):
+        """Pushes count the received records; 4xx calls are recorded as rejected"""
+        call(
+            CashDropPushViewSet.as_view({'post': 'push_bulk'}), '/api/v1/transactions/cash-drops/push_bulk/',
+            {'cash_drops': []},
+        )
+        call(sync_views.sync_products, '/api/v1/sync/products/', {'company_id': str(sync_company.id)})
+        call(sync_views.sync_products, '/api/v1/sync-other/', self._body(sync_company, sync_store))
+        telemetry.flush_events()
+
+        push, rejected = SyncEvent.objects.order_by('created_at', 'id')
+        assert (push.direction, push.endpoint, push.status_code) == ('push', 'transactions/cash-drops/push_bulk', 201)
+        assert (rejected.status, rejected.status_code, rejected.store_id) == ('rejected', 400, None)
+        assert rejected.company_id == sync_company.id
+
+
+@pytest.mark.django_db
+class TestSyncTelemetryRollup:
+    """Test per-store rollups and the health check"""
+
+    def _event(self, store, **fields):
+        return SyncEvent(**dict({
+            'company_id': store.company_id, 'store_id': store.id, 'direction': 'pull',
+            'endpoint': 'sync/products', 'status': 'ok', 'status_code': 200,
+            'rows': 10, 'bytes': 1000, 'duration_ms': 20.0,
+        }, **fields))
+
+    def test_store_rollup(self, sync_store):
+        SyncEvent.objects.bulk_create([
+            self._event(sync_store),
+            self._event(sync_store, bytes=3000, duration_ms=60.0, cursor_lag=7),
+            self._event(sync_store, status='not_modified', status_code=304, rows=0, bytes=0),
+            self._event(sync_store, status='error', status_code=500, endpoint='sync/bundle'),
+            self._event(sync_store, created_at=timezone.now() - timedelta(days=2)),
+        ])
+
+        since = timezone.now() - timedelta(days=1)
+        (row,) = telemetry.store_rollup(since=since)
+        assert (row['store_id'], row['calls'], row['errors'], row['not_modified']) == (sync_store.id, 4, 1, 1)
+        assert (row['rows'], row['bytes'], row['max_ms'], row['max_cursor_lag']) == (30, 5000, 60.0, 7)
+
+        endpoints = {row['endpoint']: row['calls'] for row in telemetry.endpoint_rollup(since=since)}
+        assert endpoints == {'sync/products': 3, 'sync/bundle': 1}
+
+    def test_health_check_reports_silent_stores(self, call, sync_company, sync_store):
+        """Buffered events are flushed; active stores without any sync are listed"""
+        silent = Store.objects.create(
+            company=sync_company, store_code='SYNC-ST2', store_name='Silent Store', address='-', phone='-'
+        )
+        call(sync_views.sync_products, '/api/v1/sync/products/', {
+            'company_id': str(sync_company.id), 'store_id': str(sync_store.id),
+        })
+
+        result = sync_health_check_task()
+        assert result['status'] == 'success'
+        assert result['active_stores'] == 1
+        assert result['silent_stores'] == [silent.store_code]
+        assert SyncEvent.objects.count() == 1
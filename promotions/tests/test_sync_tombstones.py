@@ -0,0 +1,118 @@
+"""
+Tests for deletion tombstones returned as deleted_ids on incremental sync
+"""
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from promotions.models import Promotion
+from sync_api import sync_views, tombstones
+from sync_api.models import StoreSyncWatermark, SyncTombstone
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncTombstones:
+    """Test tombstone recording, incremental deleted_ids and pruning"""
+
+    def _sync(self, sync_post, company, store, updated_since):
+        return sync_post(sync_views.sync_promotions, {
+            'company_id': str(company.id),
+            'store_id': str(store.id),
+            'updated_since': updated_since.isoformat(),
+        })
+
+    def test_deleted_promotion_in_deleted_ids(self, sync_post, sync_company, sync_store, make_promotion):
+        """Deleting a promotion returns its ID on the next incremental sync"""
+        since = timezone.now() - timedelta(minutes=1)
+        promotion = make_promotion()
+        promotion_id = str(promotion.id)
+        promotion.delete()
+
+        response = self._sync(sync_post, sync_company, sync_store, since)
+        assert response.status_code == 200
+        assert response.data['deleted_ids'] == [promotion_id]
+
+        # Nothing was deleted after this point
+        later = self._sync(sync_post, sync_company, sync_store, timezone.now())
+        assert later.data['deleted_ids'] == []
+
+    def test_deactivation_and_reactivation(self, sync_post, sync_company, sync_store, make_promotion):
+        """Deactivation is reported as deleted, reactivation clears it"""
+        since = timezone.now() - timedelta(minutes=1)
+        promotion = make_promotion()
+
+        promotion.is_active = False
+        promotion.save()
+        response = self._sync(sync_post, sync_company, sync_store, since)
+        assert response.data['deleted_ids'] == [str(promotion.id)]
+
+        promotion.is_active = True
+        promotion.save()
+        response = self._sync(sync_post, sync_company, sync_store, since)
+        assert response.data['deleted_ids'] == []
+        assert [p['id'] for p in response.data['promotions']] == [str(promotion.id)]
+
+    def test_deactivation_is_detected_without_reading_the_row(self, make_promotion):
+        """is_active is compared with the loaded value, deferred loads still work"""
+        promotion = Promotion.objects.get(pk=make_promotion().pk)
+        promotion.is_active = False
+        with CaptureQueriesContext(connection) as captured:
+            promotion.save()
+        assert not [query for query in captured if query['sql'].startswith('SELECT "promotion"."is_active"')]
+        assert SyncTombstone.objects.get(object_id=promotion.id).reason == 'deactivated'
+
+        # Saves that do not write is_active skip the check
+        promotion.name = 'Renamed'
+        promotion.save(update_fields=['name'])
+        assert SyncTombstone.objects.count() == 1
+
+        deferred = Promotion.objects.only('id', 'company_id', 'brand_id').get(pk=promotion.pk)
+        deferred.is_active = True
+        deferred.save()
+        assert SyncTombstone.objects.count() == 0
+
+    def test_watermark_write_is_throttled(self, sync_post, sync_company, sync_store, make_promotion):
+        """Repeated syncs within the resolution window do not update the watermark"""
+        since = timezone.now() - timedelta(minutes=1)
+        self._sync(sync_post, sync_company, sync_store, since)
+        watermark = StoreSyncWatermark.objects.get(store=sync_store, model=tombstones.PROMOTION)
+
+        with CaptureQueriesContext(connection) as captured:
+            self._sync(sync_post, sync_company, sync_store, since)
+        assert not [query for query in captured if 'store_sync_watermark' in query['sql']]
+        assert StoreSyncWatermark.objects.get(pk=watermark.pk).synced_at == watermark.synced_at
+
+        # Window over
+        cache.clear()
+        self._sync(sync_post, sync_company, sync_store, since)
+        assert StoreSyncWatermark.objects.get(pk=watermark.pk).synced_at > watermark.synced_at
+
+    def test_prune_waits_for_every_store(self, sync_post, sync_company, sync_store, make_promotion):
+        """Tombstones are pruned only once all active stores synced past them"""
+        make_promotion().delete()
+        assert SyncTombstone.objects.count() == 1
+
+        # Store has not synced promotions yet
+        assert tombstones.prune_tombstones() == 0
+
+        self._sync(sync_post, sync_company, sync_store, timezone.now() - timedelta(minutes=1))
+        assert tombstones.prune_tombstones() == 1
+        assert SyncTombstone.objects.count() == 0
+
+    def test_prune_max_age(self, sync_company, sync_store, make_promotion):
+        """Old tombstones are pruned even when a store never syncs"""
+        make_promotion().delete()
+        SyncTombstone.objects.update(
+            deleted_at=timezone.now() - timedelta(days=tombstones.TOMBSTONE_MAX_AGE_DAYS + 1)
+        )
+        assert tombstones.prune_tombstones() == 1
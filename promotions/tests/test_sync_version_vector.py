@@ -0,0 +1,93 @@
+"""
+Tests for the per-entity version vector returned by sync_version
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+
+from core.models import Brand
+from products.models import Product, TableArea
+from sync_api import sync_views, tombstones
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestSyncVersionVector:
+    """Test version counters per entity type and scope"""
+
+    def _version(self, sync_post, company, store=None):
+        data = {'company_id': str(company.id)}
+        if store:
+            data['store_id'] = str(store.id)
+        response = sync_post(sync_views.sync_version, data)
+        assert response.status_code == 200
+        return response.data
+
+    def _product(self, company, brand, sku):
+        return Product.objects.create(
+            company=company, brand=brand, sku=sku, name=sku,
+            price=Decimal('10000'), cost=Decimal('5000')
+        )
+
+    def test_only_changed_endpoints_move(self, sync_post, sync_company, sync_brand, sync_store,
+                                         django_capture_on_commit_callbacks):
+        """A product save moves the product endpoints, not tables or promotions"""
+        before = self._version(sync_post, sync_company, sync_store)
+        assert before['brand_ids'] == [str(sync_brand.id)]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, sync_brand, 'SKU-1')
+
+        after = self._version(sync_post, sync_company, sync_store)
+        product = tombstones.PRODUCT
+        assert after['versions']['company'][product] > before['versions']['company'][product]
+        brand_id = str(sync_brand.id)
+        assert after['versions']['brands'][brand_id][product] > before['versions']['brands'][brand_id][product]
+        assert after['changed_at'][product] is not None
+        assert after['endpoints']['products'] != before['endpoints']['products']
+        assert after['endpoints']['product_photos'] != before['endpoints']['product_photos']
+        assert after['endpoints']['tables'] == before['endpoints']['tables']
+        assert after['endpoints']['promotions'] == before['endpoints']['promotions']
+        assert after['version'] == before['version']
+
+    def test_store_scope_ignores_other_stores(self, sync_post, sync_company, sync_brand, sync_store,
+                                              django_capture_on_commit_callbacks):
+        """Changes of other brands/stores keep the store's endpoint versions"""
+        other_brand = Brand.objects.create(company=sync_company, code='OTHER', name='Other')
+        before = self._version(sync_post, sync_company, sync_store)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._product(sync_company, other_brand, 'SKU-2')
+            TableArea.objects.create(company=sync_company, brand=other_brand, name='Terrace')
+
+        after = self._version(sync_post, sync_company, sync_store)
+        assert after['endpoints'] == before['endpoints']
+        # Company wide view still sees the change
+        assert after['versions']['company'][tombstones.PRODUCT] > before['versions']['company'][tombstones.PRODUCT]
+
+    def test_promotion_settings_move_promotions(self, sync_post, sync_company, sync_store,
+                                                django_capture_on_commit_callbacks):
+        """Changing the sync window invalidates the promotions endpoint"""
+        from promotions.models_settings import PromotionSyncSettings
+        before = self._version(sync_post, sync_company, sync_store)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            settings = PromotionSyncSettings.get_for_company(sync_company)
+            settings.future_days = 30
+            settings.save()
+
+        after = self._version(sync_post, sync_company, sync_store)
+        assert after['endpoints']['promotions'] != before['endpoints']['promotions']
+        assert after['endpoints']['products'] == before['endpoints']['products']
+
+    def test_warm_version_runs_no_query(self, sync_post, sync_company, sync_store, django_assert_num_queries):
+        """No MAX() scans: once the store context is cached no query runs"""
+        self._version(sync_post, sync_company, sync_store)
+        with django_assert_num_queries(0):
+            self._version(sync_post, sync_company, sync_store)
@@ -0,0 +1,8 @@
+"""
+Sync routes for tests that reverse() them (the project URLconf needs a live MinIO at import)
+"""
+from django.urls import include, path
+
+urlpatterns = [
+    path('api/v1/sync/', include(('sync_api.sync_urls', 'sync_api'), namespace='sync_api_v1')),
+]
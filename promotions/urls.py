@@ -16,6 +16,7 @@ urlpatterns = [
     path('compiler/compile-all/', compiler_views.compile_all_active, name='compile_all_active'),
     path('compiler/compile-store/<uuid:store_id>/', compiler_views.compile_for_store, name='compile_for_store'),
     path('compiler/compile-company/', compiler_views.compile_for_company, name='compile_for_company'),
+    path('compiler/compile-company/<str:job_id>/', compiler_views.compile_job_status, name='compile_job_status'),
     path('compiler/preview/<uuid:promotion_id>/', compiler_views.preview_compiled_json, name='preview_json'),
     # path('compiler/api-docs/', compiler_views.api_documentation, name='api_documentation'),
     
@@ -6,12 +6,14 @@ Manages promotion compilation and Edge Server sync
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
 from promotions.models import Promotion
+from promotions.services import compile_jobs, lookup_index, precompiled
 from promotions.services.compiler import PromotionCompiler
 from core.models import Store
 import json
@@ -199,8 +201,7 @@ def compile_all_active(request):
                     'passes_date_filter': (p.start_date <= today and p.end_date >= today),
                 })
         
-        compiler = PromotionCompiler()
-        compiled = compiler.compile_multiple(promotions)
+        compiled = precompiled.load(promotions)
         
         # Add store_id context if user has specific store or from global filter
         store_id_context = None
@@ -247,7 +248,8 @@ def compile_for_store(request, store_id):
             'store_name': store.store_name,
             'store_code': store.store_code,
             'count': len(compiled),
-            'promotions': compiled
+            'promotions': compiled,
+            'indexes': lookup_index.build(compiled)
         })
         
     except Store.DoesNotExist:
@@ -262,6 +264,13 @@ def compile_for_store(request, store_id):
         }, status=500)
 
 
+def _request_company(request):
+    """Company from the global filter or the user"""
+    if hasattr(request, 'current_company') and request.current_company:
+        return request.current_company
+    return request.user.company
+
+
 @login_required
 @require_http_methods(["POST"])
 def compile_for_company(request):
@@ -270,36 +279,26 @@ def compile_for_company(request):
     
     This generates promotion JSON for every store and brand.
     Perfect for scheduled compilation and bulk distribution.
+    
+    Runs as a Celery job (chunks compiled in parallel, see
+    promotions.services.compile_jobs); poll compile_job_status for the
+    progress and the result.
     """
     try:
-        # Get company from user or global filter
-        company = None
-        if hasattr(request, 'current_company') and request.current_company:
-            company = request.current_company
-        elif request.user.company:
-            company = request.user.company
-        else:
+        company = _request_company(request)
+        if not company:
             return JsonResponse({
                 'success': False,
                 'error': 'No company context available'
             }, status=400)
         
-        compiler = PromotionCompiler()
-        result = compiler.compile_for_company(str(company.id))
-        
-        if 'error' in result:
-            return JsonResponse({
-                'success': False,
-                'error': result['error']
-            }, status=404)
+        job = compile_jobs.start(company)
         
         return JsonResponse({
             'success': True,
-            'company_name': result['company_name'],
-            'compiled_at': result['compiled_at'],
-            'summary': result['summary'],
-            'stores': result['stores']
-        })
+            'job': job,
+            'status_url': reverse('promotion:compile_job_status', args=[job['job_id']]),
+        }, status=202)
         
     except Exception as e:
         import traceback
@@ -310,6 +309,32 @@ def compile_for_company(request):
         }, status=500)
 
 
+@login_required
+@require_http_methods(["GET"])
+def compile_job_status(request, job_id):
+    """
+    Progress of a company compile job, with the result once done
+    """
+    job = compile_jobs.progress(job_id)
+    company = _request_company(request)
+    if job is None or not company or job['company_id'] != str(company.id):
+        return JsonResponse({
+            'success': False,
+            'error': 'Compile job not found or expired'
+        }, status=404)
+    
+    response = {'success': True, 'job': job}
+    if job['status'] == 'done':
+        result = compile_jobs.result(job_id)
+        response.update({
+            'company_name': result['company_name'],
+            'compiled_at': result['compiled_at'],
+            'summary': result['summary'],
+            'stores': result['stores']
+        })
+    return JsonResponse(response)
+
+
 @login_required
 def preview_compiled_json(request, promotion_id):
     """
@@ -0,0 +1,60 @@
+"""
+Admin configuration for Sync API app
+"""
+
+from django.contrib import admin
+from .models import SyncTombstone, StoreSyncWatermark, SyncChange, SyncSnapshot, SyncSnapshotDelta, SyncEvent
+
+
+@admin.register(SyncTombstone)
+class SyncTombstoneAdmin(admin.ModelAdmin):
+    list_display = ['model', 'object_id', 'company', 'reason', 'deleted_at']
+    list_filter = ['company', 'model', 'reason']
+    search_fields = ['object_id']
+    readonly_fields = ['id', 'company', 'model', 'object_id', 'brand_id', 'store_id', 'reason', 'deleted_at']
+
+
+@admin.register(StoreSyncWatermark)
+class StoreSyncWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['store', 'model', 'synced_at']
+    list_filter = ['model']
+    search_fields = ['store__store_code', 'store__store_name']
+    readonly_fields = ['id', 'store', 'model', 'synced_at']
+
+
+@admin.register(SyncChange)
+class SyncChangeAdmin(admin.ModelAdmin):
+    list_display = ['id', 'seq', 'model', 'object_id', 'company', 'action', 'created_at']
+    list_filter = ['company', 'model', 'action']
+    search_fields = ['object_id']
+    readonly_fields = ['id', 'seq', 'company', 'model', 'object_id', 'brand_id', 'store_id', 'action', 'created_at']
+
+
+@admin.register(SyncSnapshot)
+class SyncSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['store', 'version', 'size', 'change_seq', 'created_at']
+    list_filter = ['company']
+    search_fields = ['store__store_code', 'version', 'checksum']
+    readonly_fields = [
+        'id', 'company', 'store', 'version', 'sections', 'row_counts', 'change_seq',
+        'object_key', 'checksum', 'size', 'format', 'created_at',
+    ]
+
+
+@admin.register(SyncSnapshotDelta)
+class SyncSnapshotDeltaAdmin(admin.ModelAdmin):
+    list_display = ['store', 'from_version', 'to_version', 'op_count', 'size', 'created_at']
+    search_fields = ['store__store_code', 'from_version', 'to_version']
+    readonly_fields = ['id', 'store', 'from_version', 'to_version', 'ops', 'op_count', 'size', 'created_at']
+
+
+@admin.register(SyncEvent)
+class SyncEventAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'store_id', 'endpoint', 'status_code', 'rows', 'bytes', 'duration_ms', 'cursor_lag']
+    list_filter = ['direction', 'status', 'endpoint']
+    search_fields = ['store_id', 'company_id']
+    date_hierarchy = 'created_at'
+    readonly_fields = [
+        'id', 'company_id', 'store_id', 'direction', 'endpoint', 'method', 'status', 'status_code',
+        'rows', 'bytes', 'encoding', 'duration_ms', 'cursor_lag', 'created_at',
+    ]
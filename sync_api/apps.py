@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SyncApiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "sync_api"
+    verbose_name = "Edge Sync API"
+
+    def ready(self):
+        # Register signal handlers (deletion tombstones)
+        from sync_api import signals  # noqa: F401
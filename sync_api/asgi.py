@@ -0,0 +1,194 @@
+"""
+ASGI Notification Endpoint for Edge Servers
+
+GET  /api/v1/sync/events/?company_id=<uuid>&store_id=<uuid>    Server-Sent Events
+WS   /api/v1/sync/events/?company_id=<uuid>&store_id=<uuid>    WebSocket (JSON text frames)
+
+Authentication is the JWT access token of the sync API: Authorization
+header, or ``token`` query parameter (WebSocket clients that cannot set
+headers). Events come from sync_api.notifications.stream().
+
+SSE frames:
+    event: hello / change    data: <JSON>
+    : keepalive              (heartbeat comment)
+
+WebSocket frames:
+    {"event": "hello" | "change" | "ping", "data": {...}}
+
+Long-lived connections must not hold WSGI workers, so the endpoint is a
+plain ASGI application routed in config/asgi.py in front of Django (run
+with uvicorn, see docker-compose.prod.yml). Under WSGI the path is not
+served.
+
+Usage (config/asgi.py):
+    application = notification_router(get_asgi_application())
+"""
+
+import asyncio
+import contextlib
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from sync_api import notifications
+
+# Reconnect delay announced to SSE clients
+RETRY_MS = 5000
+
+# WebSocket close codes (4000 + HTTP status)
+WS_UNAUTHORIZED = 4401
+WS_BAD_REQUEST = 4400
+WS_NOT_FOUND = 4404
+
+
+class _Rejected(Exception):
+    def __init__(self, status, message, code):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _authenticate(raw_token):
+    """User of a JWT access token"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+
+
+async def _subscription_params(scope):
+    """(company_id, store_id) of an authenticated request"""
+    query = {key: values[0] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    headers = dict(scope.get('headers') or [])
+
+    raw_token = query.get('token')
+    authorization = headers.get(b'authorization', b'').decode()
+    if authorization.startswith('Bearer '):
+        raw_token = authorization[len('Bearer '):]
+    user = await sync_to_async(_authenticate)(raw_token) if raw_token else None
+    if user is None or not user.is_active:
+        raise _Rejected(401, 'Authentication credentials were not provided or are invalid', 'NOT_AUTHENTICATED')
+
+    company_id, store_id = query.get('company_id'), query.get('store_id')
+    if not company_id:
+        raise _Rejected(400, 'company_id is required', 'MISSING_COMPANY_ID')
+    if not store_id:
+        raise _Rejected(400, 'store_id is required', 'MISSING_STORE_ID')
+    return company_id, store_id
+
+
+async def _pump(events, receive, on_event, closed_types):
+    """Forward events until the stream ends or the client goes away"""
+    client = asyncio.ensure_future(receive())
+    try:
+        while True:
+            next_event = asyncio.ensure_future(events.__anext__())
+            while not next_event.done():
+                await asyncio.wait({next_event, client}, return_when=asyncio.FIRST_COMPLETED)
+                if client.done():
+                    if client.result()['type'] in closed_types:
+                        next_event.cancel()
+                        with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                            await next_event
+                        return
+                    # Frames from the client are not used
+                    client = asyncio.ensure_future(receive())
+            try:
+                event, data = next_event.result()
+            except StopAsyncIteration:
+                return
+            await on_event(event, data)
+    finally:
+        client.cancel()
+        await events.aclose()
+
+
+def _sse_frame(event, data):
+    if event is None:
+        return b': keepalive\n\n'
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+async def serve_sse(scope, receive, send):
+    async def respond_error(status, message, code):
+        body = json.dumps({'error': message, 'code': code}).encode()
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    if scope['method'] != 'GET':
+        return await respond_error(405, 'Method not allowed', 'METHOD_NOT_ALLOWED')
+    try:
+        company_id, store_id = await _subscription_params(scope)
+        events = notifications.stream(company_id, store_id)
+        # The first event resolves the store (404 before the stream starts)
+        first = await events.__anext__()
+    except _Rejected as e:
+        return await respond_error(e.status, str(e), e.code)
+    except notifications.StoreNotFound as e:
+        return await respond_error(404, str(e), e.code)
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),  # nginx: send each event at once
+    ]})
+    await send({'type': 'http.response.body', 'body': f"retry: {RETRY_MS}\n\n".encode() + _sse_frame(*first),
+                'more_body': True})
+
+    async def on_event(event, data):
+        await send({'type': 'http.response.body', 'body': _sse_frame(event, data), 'more_body': True})
+
+    await _pump(events, receive, on_event, closed_types={'http.disconnect'})
+    with contextlib.suppress(Exception):
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def serve_websocket(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    try:
+        company_id, store_id = await _subscription_params(scope)
+        events = notifications.stream(company_id, store_id)
+        first = await events.__anext__()
+    except _Rejected as e:
+        return await send({'type': 'websocket.close', 'code': WS_UNAUTHORIZED if e.status == 401 else WS_BAD_REQUEST})
+    except notifications.StoreNotFound:
+        return await send({'type': 'websocket.close', 'code': WS_NOT_FOUND})
+
+    await send({'type': 'websocket.accept'})
+
+    async def on_event(event, data):
+        frame = {'event': event or 'ping', 'data': data or {}}
+        await send({'type': 'websocket.send', 'text': json.dumps(frame, separators=(',', ':'))})
+
+    await on_event(*first)
+    await _pump(events, receive, on_event, closed_types={'websocket.disconnect'})
+    with contextlib.suppress(Exception):
+        await send({'type': 'websocket.close', 'code': 1000})
+
+
+def notification_router(django_application):
+    """ASGI application serving the notification endpoint, everything else by Django"""
+
+    async def application(scope, receive, send):
+        if scope['type'] in ('http', 'websocket') and scope['path'] == notifications.PATH:
+            if scope['type'] == 'http':
+                return await serve_sse(scope, receive, send)
+            return await serve_websocket(scope, receive, send)
+        if scope['type'] == 'websocket':
+            # Django serves no WebSocket
+            await receive()
+            return await send({'type': 'websocket.close', 'code': 1000})
+        return await django_application(scope, receive, send)
+
+    return application
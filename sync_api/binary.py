@@ -0,0 +1,220 @@
+"""
+Binary Sync Encodings
+Opt-in MessagePack / CBOR bodies for the sync and push APIs
+
+JSON turns every UUID, Decimal and datetime into a string, and for large
+catalogs rendering costs more CPU than the queries. An Edge Server that
+sends ``Accept: application/x-msgpack`` (or ``application/cbor``) gets
+the same payload in a compact binary encoding, and may post push bodies
+with the matching Content-Type:
+
+- UUID: 16 bytes (MessagePack ext type 1, CBOR tag 37)
+- Decimal: scaled integer [exponent, mantissa] (ext type 2, CBOR tag 4)
+- datetime: epoch seconds + nanoseconds (MessagePack timestamp ext -1,
+  CBOR tag 1); naive datetimes are taken as UTC
+- date / time: ISO 8601 strings (as in JSON)
+
+Catalog rows of the sync resources are built with native values when a
+binary encoding is negotiated (see payloads.Projection), so the
+stringification is skipped altogether.
+
+Both encodings are optional dependencies (``msgpack``, ``cbor2``); a
+missing one is simply not offered in content negotiation.
+
+Usage (settings.REST_FRAMEWORK):
+    'DEFAULT_RENDERER_CLASSES': (..., 'sync_api.binary.MessagePackRenderer', 'sync_api.binary.CBORRenderer')
+    'DEFAULT_PARSER_CLASSES': (..., 'sync_api.binary.MessagePackParser', 'sync_api.binary.CBORParser')
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'sync_api.binary.ContentNegotiation'
+"""
+
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+MSGPACK = 'application/x-msgpack'
+CBOR = 'application/cbor'
+
+EXT_UUID = 1
+EXT_DECIMAL = 2
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _aware(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _fallback(obj):
+    """Values without a binary representation (same as the JSON encoder)"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)  # NaN / Infinity
+    raise TypeError(f"Object of type {type(obj).__name__} cannot be encoded")
+
+
+# ----------------------------------------------------------------------
+# MessagePack
+# ----------------------------------------------------------------------
+
+def _msgpack_default(obj):
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    if isinstance(obj, Decimal) and obj.is_finite():
+        sign, digits, exponent = obj.as_tuple()
+        mantissa = int(''.join(map(str, digits))) * (-1 if sign else 1)
+        return msgpack.ExtType(EXT_DECIMAL, msgpack.packb([exponent, mantissa]))
+    if isinstance(obj, datetime.datetime):
+        # Exact to the microsecond (Timestamp.from_datetime goes through a float)
+        delta = _aware(obj) - EPOCH
+        return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    return _fallback(obj)
+
+
+def _msgpack_ext(code, data):
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    if code == EXT_DECIMAL:
+        exponent, mantissa = msgpack.unpackb(data)
+        return Decimal(f"{mantissa}E{exponent}")
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_value(value):
+    if isinstance(value, msgpack.Timestamp):
+        return EPOCH + datetime.timedelta(seconds=value.seconds, microseconds=value.nanoseconds // 1000)
+    return value
+
+
+def _msgpack_map(pairs):
+    return {key: _msgpack_value(value) for key, value in pairs}
+
+
+def _msgpack_array(items):
+    return [_msgpack_value(item) for item in items]
+
+
+# ----------------------------------------------------------------------
+# CBOR
+# ----------------------------------------------------------------------
+
+def _cbor_default(encoder, obj):
+    encoder.encode(_fallback(obj))
+
+
+ENCODERS = {
+    MSGPACK: lambda data: msgpack.packb(data, default=_msgpack_default, use_bin_type=True),
+    CBOR: lambda data: cbor2.dumps(
+        data, default=_cbor_default, datetime_as_timestamp=True, timezone=datetime.timezone.utc
+    ),
+}
+
+DECODERS = {
+    MSGPACK: lambda body: _msgpack_value(msgpack.unpackb(
+        body, ext_hook=_msgpack_ext, object_pairs_hook=_msgpack_map, list_hook=_msgpack_array, raw=False
+    )),
+    CBOR: lambda body: cbor2.loads(body),
+}
+
+
+def available(media_type):
+    """Is the library of an encoding installed"""
+    return {MSGPACK: msgpack, CBOR: cbor2}.get(media_type) is not None
+
+
+def encode(data, media_type):
+    """Encode response data"""
+    return ENCODERS[media_type](data)
+
+
+def decode(body, media_type):
+    """Decode a request body"""
+    return DECODERS[media_type](body)
+
+
+def negotiated(request):
+    """Binary media type the request accepted, None for JSON (or outside DRF)"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer.media_type if isinstance(renderer, _BinaryRenderer) else None
+
+
+# ----------------------------------------------------------------------
+# DRF renderers, parsers and negotiation
+# ----------------------------------------------------------------------
+
+class _BinaryRenderer(BaseRenderer):
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return encode(data, self.media_type)
+
+
+class MessagePackRenderer(_BinaryRenderer):
+    media_type = MSGPACK
+    format = 'msgpack'
+
+
+class CBORRenderer(_BinaryRenderer):
+    media_type = CBOR
+    format = 'cbor'
+
+
+class _BinaryParser(BaseParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return decode(stream.read(), self.media_type)
+        except Exception as e:
+            raise ParseError(f"{self.media_type} parse error - {str(e)}")
+
+
+class MessagePackParser(_BinaryParser):
+    media_type = MSGPACK
+
+
+class CBORParser(_BinaryParser):
+    media_type = CBOR
+
+
+class ContentNegotiation(DefaultContentNegotiation):
+    """Default negotiation, without the binary encodings that are not installed"""
+
+    def _installed(self, items):
+        # Renderer / parser instances of the view
+        return [
+            item for item in items
+            if not isinstance(item, (_BinaryRenderer, _BinaryParser)) or available(item.media_type)
+        ]
+
+    def select_parser(self, request, parsers):
+        return super().select_parser(request, self._installed(parsers))
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return super().select_renderer(request, self._installed(renderers), format_suffix)
@@ -0,0 +1,363 @@
+"""
+Bundled Sync API Views
+One-shot master data sync for Edge Server bootstrap
+
+The bundle resolves the store context (store, company, store brands, sync
+settings) once and returns every requested entity set in one response.
+Each section carries a version stamp; sections whose version matches the
+one the Edge sent back are skipped.
+"""
+
+import hashlib
+import logging
+
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, OpenApiExample
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import Brand, Store, StoreBrand
+from products.models import ProductPhoto, TableArea, Tables
+from promotions.services import lookup_index
+from promotions.services.snapshot_cache import promotion_snapshot_cache
+from sync_api import changelog, compression, payloads, resources, store_context, tombstones, versions
+
+logger = logging.getLogger('promotions.sync_api')
+
+
+class BundleContext:
+    """Store context resolved once per bundle request"""
+
+    def __init__(self, request, company, store, brand_ids, sync_settings):
+        self.request = request
+        self.company = company
+        self.store = store
+        self.brand_ids = brand_ids
+        self.sync_settings = sync_settings
+        self.now = timezone.now()
+
+
+# ----------------------------------------------------------------------
+# Section builders (same filters as the full sync of each endpoint)
+# ----------------------------------------------------------------------
+
+def _companies(ctx):
+    # Only the store's company (the companies endpoint lists every company)
+    return [payloads.company_data(ctx.company)]
+
+
+def _brands(ctx):
+    brands = Brand.objects.filter(id__in=ctx.brand_ids).select_related('company').order_by('name')
+    return [payloads.brand_data(brand) for brand in brands]
+
+
+def _stores(ctx):
+    stores = Store.objects.filter(id=ctx.store.id).select_related('company').prefetch_related('brands')
+    return [payloads.store_data(store) for store in stores]
+
+
+def _store_brands(ctx):
+    store_brands = StoreBrand.objects.filter(store_id=ctx.store.id).select_related(
+        'store', 'store__company', 'brand'
+    ).order_by('brand__name')
+    return [payloads.store_brand_data(sb) for sb in store_brands]
+
+
+def _resource(name):
+    """Section builder reading a registered sync resource (see sync_api.resources)"""
+    def build(ctx):
+        return list(resources.REGISTRY[name].store_rows(ctx, ctx.request))
+    return build
+
+
+def _table_areas(ctx):
+    areas = TableArea.objects.filter(
+        company_id=ctx.company.id, brand_id__in=ctx.brand_ids, store_id=ctx.store.id, is_active=True
+    ).order_by('sort_order', 'name')
+    return [payloads.table_area_data(area, ctx.request) for area in areas]
+
+
+def _tables(ctx):
+    tables = Tables.objects.filter(
+        area__company_id=ctx.company.id,
+        area__brand_id__in=ctx.brand_ids,
+        area__store_id=ctx.store.id,
+        area__is_active=True,
+        is_active=True
+    ).select_related('area').order_by('area', 'number')
+    return [payloads.table_data(table) for table in tables]
+
+
+def _promotions(ctx):
+    # Food court: promotions of every brand operating in the store
+    compiled = []
+    for brand_id in ctx.brand_ids:
+        query = payloads.promotion_query(ctx.company.id, brand_id, ctx.store, ctx.sync_settings, ctx.now)
+        snapshot_key = promotion_snapshot_cache.build_key(
+            ctx.company.id, brand_id, ctx.store.id, ctx.sync_settings, ctx.now.date()
+        )
+        promotions, _total, _hit = payloads.compiled_promotions(query, ctx.sync_settings, snapshot_key)
+        compiled.extend(promotions)
+    return compiled
+
+
+def _product_photos(ctx):
+    photos = ProductPhoto.objects.select_related('product').filter(
+        product__company_id=ctx.company.id,
+        product__brand_id__in=ctx.brand_ids,
+        product__is_active=True
+    ).order_by('updated_at')
+    return [payloads.photo_data(photo) for photo in photos]
+
+
+STORE_SCOPE_MODELS = versions.STORE_SCOPE_MODELS
+
+# section name -> (builder, models the section version depends on)
+BUNDLE_SECTIONS = {
+    'companies': (_companies, []),
+    'brands': (_brands, STORE_SCOPE_MODELS),
+    'stores': (_stores, [tombstones.STORE] + STORE_SCOPE_MODELS),
+    'store_brands': (_store_brands, STORE_SCOPE_MODELS),
+    'categories': (_resource('categories'), [tombstones.CATEGORY] + STORE_SCOPE_MODELS),
+    'products': (_resource('products'), [tombstones.PRODUCT, tombstones.CATEGORY] + STORE_SCOPE_MODELS),
+    'modifiers': (_resource('modifiers'), [tombstones.MODIFIER, tombstones.MODIFIER_OPTION] + STORE_SCOPE_MODELS),
+    'modifier_options': (_resource('modifier_options'), [tombstones.MODIFIER_OPTION, tombstones.MODIFIER] + STORE_SCOPE_MODELS),
+    'product_modifiers': (_resource('product_modifiers'), [
+        tombstones.PRODUCT_MODIFIER, tombstones.PRODUCT, tombstones.MODIFIER,
+    ] + STORE_SCOPE_MODELS),
+    'table_areas': (_table_areas, [tombstones.TABLE_AREA] + STORE_SCOPE_MODELS),
+    'tables': (_tables, [tombstones.TABLE, tombstones.TABLE_AREA] + STORE_SCOPE_MODELS),
+    'table_groups': (_resource('table_groups'), [tombstones.TABLE_GROUP, tombstones.TABLE] + STORE_SCOPE_MODELS),
+    'promotions': (_promotions, [tombstones.PROMOTION] + STORE_SCOPE_MODELS),
+    'product_photos': (_product_photos, [tombstones.PRODUCT_PHOTO, tombstones.PRODUCT] + STORE_SCOPE_MODELS),
+}
+
+
+def endpoint_models():
+    """Version models per sync endpoint (promotions also follow the sync settings)"""
+    models = {name: section_models for name, (_, section_models) in BUNDLE_SECTIONS.items() if section_models}
+    models['promotions'] = models['promotions'] + [versions.PROMOTION_SETTINGS]
+    return models
+
+
+def endpoint_versions(company_id, brand_ids=(), store_id=None, today=None):
+    """
+    Version vector of a store and the version per sync endpoint it sees
+
+    An Edge calls only the endpoints whose value differs from the previous
+    poll (sync_version) or notification (sync_api.notifications).
+
+    Returns:
+        Tuple: (version_vector() result, {endpoint: version})
+    """
+    models_by_endpoint = endpoint_models()
+    models = sorted({model for models in models_by_endpoint.values() for model in models})
+    vector = versions.version_vector(company_id, models, brand_ids, store_id)
+    visible = versions.visible_versions(vector)
+    endpoints = {
+        name: versions.sync_etag(name, *[visible[model] for model in models]).strip('"')
+        for name, models in models_by_endpoint.items()
+    }
+    # Date based sync windows move every day
+    today = today or timezone.now().date()
+    endpoints['promotions'] = versions.sync_etag(endpoints['promotions'], today).strip('"')
+    return vector, endpoints
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+
+def section_versions(ctx, sections):
+    """
+    Version stamp per section
+
+    Built from the store scoped version counters (sync_api.versions, one
+    cache round trip), so a change only moves the sections of the stores
+    that see it. Companies are not counted; the company row's updated_at is
+    used instead. Promotions also depend on the sync settings and, for date
+    based strategies, on the current date.
+    """
+    models = sorted({model for name in sections for model in BUNDLE_SECTIONS[name][1]})
+    model_versions = versions.store_versions(ctx.company.id, models, ctx.brand_ids, ctx.store.id)
+
+    stamps = {}
+    for name in sections:
+        parts = [name, ctx.store.id] + [model_versions[model] for model in BUNDLE_SECTIONS[name][1]]
+        if name == 'companies':
+            parts.append(ctx.company.updated_at.isoformat())
+        elif name == 'promotions':
+            settings = ctx.sync_settings
+            parts += [
+                settings.sync_strategy, settings.future_days, settings.past_days,
+                settings.include_inactive, settings.max_promotions_per_sync,
+                ctx.now.date().isoformat() if settings.sync_strategy != 'all_active' else '-',
+            ]
+        stamps[name] = _digest(*parts)
+    return stamps
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'company_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Company UUID'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID'
+                },
+                'sections': {
+                    'type': 'array',
+                    'items': {'type': 'string', 'enum': list(BUNDLE_SECTIONS)},
+                    'description': 'Sections to return (optional, default all)'
+                },
+                'versions': {
+                    'type': 'object',
+                    'additionalProperties': {'type': 'string'},
+                    'description': 'Section versions of the previous bundle; unchanged sections are skipped (optional)'
+                }
+            },
+            'required': ['company_id', 'store_id']
+        }
+    },
+    examples=[
+        OpenApiExample(
+            'Bootstrap Store',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here'
+            }
+        ),
+        OpenApiExample(
+            'Refresh Changed Sections',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here',
+                'versions': {'products': '3f2a9c0d1e4b5a67', 'promotions': '9a8b7c6d5e4f3a21'}
+            }
+        )
+    ],
+    tags=['Sync API - Master Data']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_bundle(request):
+    """
+    Get all master data for a store in one call
+
+    POST /api/v1/sync/bundle/
+
+    Request Body:
+    {
+        "company_id": "uuid",
+        "store_id": "uuid",
+        "sections": ["products", "promotions"],  // optional, default all
+        "versions": {"products": "..."}  // optional, from the previous bundle
+    }
+
+    Returns:
+        - sections: {name: {"version", "unchanged", "data", "total"}}
+          ("data"/"total" are omitted for unchanged sections; promotions
+          also carry "indexes", see promotions.services.lookup_index)
+        - next_cursor: Cursor for incremental sync on the single endpoints
+        - sync_timestamp: Current server timestamp
+    """
+    try:
+        company_id = request.data.get('company_id')
+        store_id = request.data.get('store_id')
+        requested = request.data.get('sections') or list(BUNDLE_SECTIONS)
+        known_versions = request.data.get('versions') or {}
+
+        if not company_id:
+            return Response({
+                'error': 'company_id is required in request body',
+                'code': 'MISSING_COMPANY_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not store_id:
+            return Response({
+                'error': 'store_id is required in request body',
+                'code': 'MISSING_STORE_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        unknown = [name for name in requested if name not in BUNDLE_SECTIONS]
+        if unknown:
+            return Response({
+                'error': f"Unknown sections: {', '.join(unknown)}",
+                'code': 'INVALID_SECTION'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Resolve store context once (cached store context)
+        resolved = store_context.resolve(company_id, store_id)
+        if resolved is None:
+            return Response({
+                'error': 'Store not found or does not belong to the specified company',
+                'code': 'STORE_NOT_FOUND'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        company, store, brand_ids = resolved.company, resolved.store, resolved.brand_ids
+        ctx = BundleContext(request, company, store, brand_ids, resolved.sync_settings)
+
+        # Versions and cursor are taken before any data is read
+        next_seq = changelog.high_water_mark(company_id)
+        versions = section_versions(ctx, requested)
+
+        sections = {}
+        served_models = set()
+        for name in requested:
+            builder, models = BUNDLE_SECTIONS[name]
+            if known_versions.get(name) == versions[name]:
+                sections[name] = {'version': versions[name], 'unchanged': True}
+                continue
+            data = builder(ctx)
+            sections[name] = {
+                'version': versions[name],
+                'unchanged': False,
+                'data': data,
+                'total': len(data),
+            }
+            if name == 'promotions':
+                # Lookup indexes over every brand of the store
+                sections[name]['indexes'] = lookup_index.build(data)
+            served_models.update(models)
+
+        if served_models:
+            tombstones.record_store_sync(store.id, *sorted(served_models), synced_at=ctx.now)
+
+        logger.info(
+            f"Bundle sync: company={company_id}, store={store.store_code}, "
+            f"sent={[name for name in requested if not sections[name]['unchanged']]}, "
+            f"skipped={[name for name in requested if sections[name]['unchanged']]}"
+        )
+
+        return compression.respond(request, company_id, {
+            'sections': sections,
+            'next_cursor': changelog.encode_cursor(next_seq),
+            'sync_timestamp': ctx.now.isoformat(),
+            'company': {
+                'id': str(company.id),
+                'code': company.code,
+                'name': company.name,
+            },
+            'store': {
+                'id': str(store.id),
+                'code': store.store_code,
+                'name': store.store_name,
+            },
+            'brand_ids': [str(brand_id) for brand_id in brand_ids],
+        }, sync_settings=ctx.sync_settings)
+
+    except Exception as e:
+        logger.error(f"Error in sync_bundle: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'Internal server error',
+            'code': 'INTERNAL_ERROR'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
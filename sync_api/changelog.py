@@ -0,0 +1,214 @@
+"""
+Change Log Cursors for Incremental Sync
+
+Every save/delete of synced master data appends a SyncChange row in the
+same transaction (see sync_api.signals). Once that transaction has
+committed, the row is stamped with a commit sequence (a SyncCommit id), so
+Edge Servers resume from an opaque ``cursor`` instead of an
+``updated_since`` timestamp: no clock skew, no lost rows that share a
+timestamp, and an index range scan over the changes only.
+
+The row ID itself is allocated at insert time, and insert order is not
+commit order: a long transaction (e.g. an Excel import) can hold ID N
+uncommitted while N+1 commits. Rows are only sequenced after their commit,
+and commit sequences of a company are allocated one at a time under a lock
+on the company row, each committed before the next is taken. The highest
+visible sequence therefore has no lower one in flight, and a cursor never
+moves past a change that becomes visible later, however long the writing
+transaction ran.
+
+- record_change(): called from sync_api.signals
+- sequence_changes(): stamps committed rows (on commit, plus a sweep for
+  rows whose commit hook never ran)
+- decode_cursor() / encode_cursor(): opaque cursor <-> sequence number
+- high_water_mark(): sequence a sync response is consistent up to
+- changed_ids(): IDs touched in a sequence range
+- prune_changes(): removes rows older than CHANGE_LOG_RETENTION_DAYS
+
+Usage in a sync endpoint:
+    since_seq = changelog.decode_cursor(request.data.get('cursor'))
+    next_seq = changelog.high_water_mark(company_id, since_seq)
+    if since_seq is not None:
+        ids = changelog.changed_ids(company_id, tombstones.PRODUCT, since_seq, next_seq)
+        query &= Q(id__in=ids)
+    ...
+    response['next_cursor'] = changelog.encode_cursor(next_seq)
+"""
+
+import base64
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Company
+from sync_api.models import SyncChange, SyncCommit
+
+logger = logging.getLogger(__name__)
+
+# Change rows are kept this long; older cursors require a full resync
+CHANGE_LOG_RETENTION_DAYS = 30
+
+CURSOR_VERSION = 'c1'
+
+
+class CursorError(Exception):
+    """Cursor cannot be used"""
+    code = 'INVALID_CURSOR'
+    status_code = 400
+
+
+class CursorExpired(CursorError):
+    """Cursor points to change log rows that were already pruned"""
+    code = 'CURSOR_EXPIRED'
+    status_code = 410
+
+
+def record_change(model, object_id, company_id, brand_id=None, store_id=None, action='upsert'):
+    """Append a change row (sequenced once the transaction commits)"""
+    if not company_id:
+        logger.warning(f"Change skipped, no company for {model}:{object_id}")
+        return None
+    change = SyncChange.objects.create(
+        company_id=company_id,
+        model=model,
+        object_id=object_id,
+        brand_id=brand_id,
+        store_id=store_id,
+        action=action,
+    )
+    transaction.on_commit(lambda: sequence_changes(company_id))
+    return change
+
+
+def sequence_changes(company_id=None):
+    """
+    Stamp committed, unsequenced change rows with a new commit sequence
+
+    Every unsequenced row this sees is committed (uncommitted rows of other
+    transactions are invisible), so one commit sequence covers them all.
+
+    Args:
+        company_id: Only this company, None for every company (sweep)
+
+    Returns:
+        Number of stamped rows
+    """
+    pending = SyncChange.objects.filter(seq__isnull=True)
+    if company_id is not None:
+        pending = pending.filter(company_id=company_id)
+    company_ids = list(pending.order_by().values_list('company_id', flat=True).distinct())
+
+    stamped = 0
+    for pending_company_id in company_ids:
+        with transaction.atomic():
+            # Serializes the company's commit sequences (see module docstring)
+            list(Company.objects.select_for_update(
+                no_key=connection.features.has_select_for_no_key_update
+            ).filter(id=pending_company_id).values_list('id', flat=True))
+            commit = SyncCommit.objects.create(company_id=pending_company_id)
+            stamped += SyncChange.objects.filter(
+                company_id=pending_company_id, seq__isnull=True
+            ).update(seq=commit.id)
+    return stamped
+
+
+def encode_cursor(seq, issued_at=None):
+    """Encode a sequence number as an opaque cursor string"""
+    issued_at = issued_at or timezone.now()
+    raw = f"{CURSOR_VERSION}:{seq}:{int(issued_at.timestamp())}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor string
+
+    Returns:
+        Sequence number, or None if no cursor was given
+
+    Raises:
+        CursorError: cursor is malformed
+        CursorExpired: cursor is older than the change log retention
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        version, seq, issued = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        if version != CURSOR_VERSION:
+            raise ValueError(version)
+        seq, issued = int(seq), int(issued)
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError):
+        raise CursorError('Invalid cursor')
+
+    # Rows after the cursor may be pruned one day before the retention ends
+    oldest_valid = timezone.now() - timedelta(days=CHANGE_LOG_RETENTION_DAYS - 1)
+    if issued < oldest_valid.timestamp():
+        raise CursorExpired('Cursor expired, full sync required')
+    return seq
+
+
+def high_water_mark(company_id, since_seq=None):
+    """
+    Get the sequence number a sync response can safely cover
+
+    Must be taken before the sync queries run, so a change committed while
+    the response is built is served again on the next call. Never lower
+    than the request cursor.
+    """
+    # Index (company_id, id) scanned backwards - one row read
+    seq = SyncCommit.objects.filter(
+        company_id=company_id
+    ).order_by('-id').values_list('id', flat=True).first()
+    return max(seq or 0, since_seq or 0)
+
+
+def changed_ids(company_id, model, since_seq, upto_seq, brand_ids=None, store_id=None):
+    """
+    Get IDs of records changed in (since_seq, upto_seq]
+
+    Args:
+        company_id: Company UUID
+        model: Model name (e.g., tombstones.PRODUCT)
+        since_seq: Sequence from the request cursor (exclusive)
+        upto_seq: Sequence from high_water_mark() (inclusive)
+        brand_ids: Restrict to these brands (records without brand are always included)
+        store_id: Restrict to this store (records without store are always included)
+
+    Returns:
+        List of ID strings (saved and deleted records)
+    """
+    query = Q(company_id=company_id, model=model, seq__gt=since_seq, seq__lte=upto_seq)
+    if brand_ids is not None:
+        query &= Q(brand_id__in=list(brand_ids)) | Q(brand_id__isnull=True)
+    if store_id is not None:
+        query &= Q(store_id=store_id) | Q(store_id__isnull=True)
+
+    object_ids = SyncChange.objects.filter(query).order_by().values_list('object_id', flat=True).distinct()
+    return [str(object_id) for object_id in object_ids]
+
+
+def removed_ids(changed, returned):
+    """
+    Changed IDs missing from the response (deleted, deactivated or moved
+    out of the store scope) - the Edge must drop them
+    """
+    returned = {str(object_id) for object_id in returned}
+    return [object_id for object_id in changed if object_id not in returned]
+
+
+def prune_changes(retention_days=CHANGE_LOG_RETENTION_DAYS):
+    """
+    Delete change rows older than the retention
+
+    Returns:
+        Number of deleted rows
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted = SyncChange.objects.filter(created_at__lt=cutoff).delete()[0]
+    SyncCommit.objects.filter(created_at__lt=cutoff).delete()
+    logger.info(f"Pruned {deleted} sync change log rows")
+    return deleted
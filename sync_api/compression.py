@@ -0,0 +1,299 @@
+"""
+Negotiated Compression for Sync Responses
+
+Sync payloads are large, repetitive JSON sent over thin store uplinks.
+Responses are compressed when
+- the company's PromotionSyncSettings.enable_compression is on, and
+- the Edge Server announces a supported codec in Accept-Encoding:
+  zstd (faster, needs the optional ``zstandard`` package) or gzip.
+
+Compressed bodies of conditional (ETag) responses are cached per codec,
+so an unchanged payload is not compressed again for every poll. The ETag
+only follows the data versions, so responses carrying a cursor also key
+the body on the cursor's high water mark; a hit replays the sync_timestamp
+of the first build (the time that same data was read). Each
+response carries X-Compression-Ratio / X-Compression-Time-Ms and the
+totals per codec are kept in the cache (see compression_stats()).
+
+Usage:
+    return compression.respond(request, company_id, data, etag=etag)
+"""
+
+import gzip
+import hashlib
+import logging
+import time
+import zlib
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from promotions.models_settings import PromotionSyncSettings
+from sync_api import binary, telemetry
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'default'
+KEY_PREFIX = 'sync_compressed'
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Bodies smaller than this are sent as is
+MIN_COMPRESS_SIZE = 1024
+
+# Compressed bodies are cached this long (the ETag changes with the data)
+COMPRESSED_TIMEOUT = 60 * 60
+
+ZSTD = 'zstd'
+GZIP = 'gzip'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def available_codecs():
+    """Codecs in server preference order"""
+    return [ZSTD, GZIP] if zstandard else [GZIP]
+
+
+def negotiate(request):
+    """
+    Pick a codec from the request's Accept-Encoding
+
+    Returns:
+        Codec name, or None if the client accepts none of ours
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    candidates = [
+        codec for codec in available_codecs()
+        if accepted.get(codec, accepted.get('*', 0)) > 0
+    ]
+    if not candidates:
+        return None
+    # Highest client quality wins, server order breaks ties
+    return max(candidates, key=lambda codec: accepted.get(codec, accepted.get('*', 0)))
+
+
+def compression_enabled(company_id):
+    """Company sync setting (on when the company has no settings yet)"""
+    enabled = PromotionSyncSettings.objects.filter(
+        company_id=company_id
+    ).values_list('enable_compression', flat=True).first()
+    return True if enabled is None else enabled
+
+
+def response_codec(request, company_id, sync_settings=None):
+    """Codec for this response, None to send it uncompressed"""
+    codec = negotiate(request)
+    if codec is None:
+        return None
+    if sync_settings is not None:
+        enabled = sync_settings.enable_compression
+    else:
+        enabled = compression_enabled(company_id)
+    return codec if enabled else None
+
+
+def compress(data, codec):
+    """Compress bytes with a codec"""
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor for streamed responses"""
+
+    def __init__(self, codec):
+        self.codec = codec
+        if codec == ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+def compress_stream(chunks, codec):
+    """Compress an iterable of byte chunks, recording ratio and time at the end"""
+    compressor = StreamCompressor(codec)
+    raw_size = compressed_size = 0
+    elapsed = 0.0
+    for chunk in chunks:
+        started = time.perf_counter()
+        compressed = compressor.compress(chunk)
+        elapsed += time.perf_counter() - started
+        raw_size += len(chunk)
+        compressed_size += len(compressed)
+        if compressed:
+            yield compressed
+    tail = compressor.flush()
+    compressed_size += len(tail)
+    record_compression(codec, raw_size, compressed_size, elapsed)
+    yield tail
+
+
+def _cache_key(codec, cache_key):
+    digest = hashlib.sha1(str(cache_key).encode()).hexdigest()
+    return f"{KEY_PREFIX}:{codec}:{digest}"
+
+
+def compressed_body(codec, render, cache_key=None):
+    """
+    Compressed bytes of a rendered payload
+
+    Args:
+        codec: Codec name
+        render: Callable returning the raw bytes (only called on a cache miss)
+        cache_key: Identifies the payload (e.g. its ETag), None disables caching
+
+    Returns:
+        Tuple (compressed bytes, raw size, seconds spent compressing, cache hit),
+        or None if the payload is too small to be worth compressing
+    """
+    key = _cache_key(codec, cache_key) if cache_key else None
+    if key:
+        cached = _cache().get(key)
+        if cached is not None:
+            return cached['body'], cached['raw_size'], 0.0, True
+
+    raw = render()
+    if len(raw) < MIN_COMPRESS_SIZE:
+        return None
+    started = time.perf_counter()
+    body = compress(raw, codec)
+    elapsed = time.perf_counter() - started
+    record_compression(codec, len(raw), len(body), elapsed)
+
+    if key:
+        _cache().set(key, {'body': body, 'raw_size': len(raw)}, timeout=COMPRESSED_TIMEOUT)
+    return body, len(raw), elapsed, False
+
+
+def respond(request, company_id, data, etag=None, cache_key=None, sync_settings=None, headers=None,
+            next_seq=None):
+    """
+    JSON (or negotiated binary) response for a sync payload, compressed if negotiated
+
+    Args:
+        request: DRF request
+        company_id: Company whose sync settings decide about compression
+        data: Response data
+        etag: ETag header (also the default compressed body cache key)
+        cache_key: Compressed body cache key (defaults to etag)
+        sync_settings: PromotionSyncSettings if already loaded
+        headers: Extra response headers
+        next_seq: High water mark of the payload's next_cursor (part of the
+            cache key; the cursor can move while the ETag does not)
+
+    Returns:
+        HttpResponse with Content-Encoding, or a regular DRF Response
+    """
+    telemetry.annotate(request, rows=lambda: telemetry.count_rows(data))
+    codec = response_codec(request, company_id, sync_settings)
+    compressed = None
+    if codec:
+        # JSON, or the negotiated binary encoding (cached separately)
+        media_type = binary.negotiated(request)
+        key = cache_key or etag
+        if key and next_seq is not None:
+            key = f"{key}:seq={next_seq}"
+        if media_type:
+            renderer, key = request.accepted_renderer, key and f"{media_type}:{key}"
+        else:
+            renderer, media_type = JSONRenderer(), 'application/json'
+        compressed = compressed_body(codec, lambda: renderer.render(data), key)
+
+    if compressed is None:
+        response = Response(data)
+    else:
+        body, raw_size, elapsed, hit = compressed
+        response = HttpResponse(body, content_type=media_type)
+        response['Content-Encoding'] = codec
+        response['X-Compression-Ratio'] = f"{raw_size / max(len(body), 1):.2f}"
+        response['X-Compression-Time-Ms'] = f"{elapsed * 1000:.2f}"
+        response['X-Compression-Cache'] = 'HIT' if hit else 'MISS'
+
+    response['Vary'] = 'Accept, Accept-Encoding'
+    if etag:
+        response['ETag'] = etag
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+# ----------------------------------------------------------------------
+# Statistics
+# ----------------------------------------------------------------------
+
+STAT_FIELDS = ('responses', 'raw_bytes', 'compressed_bytes', 'time_us')
+
+
+def _stats_key(codec, name):
+    return f"{KEY_PREFIX}:stats:{codec}:{name}"
+
+
+def _add(key, amount):
+    cache = _cache()
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def record_compression(codec, raw_size, compressed_size, elapsed):
+    """Add one compressed response to the per codec totals"""
+    _add(_stats_key(codec, 'responses'), 1)
+    _add(_stats_key(codec, 'raw_bytes'), raw_size)
+    _add(_stats_key(codec, 'compressed_bytes'), compressed_size)
+    _add(_stats_key(codec, 'time_us'), int(elapsed * 1_000_000))
+    logger.debug(
+        f"Compressed sync response codec={codec} {raw_size}->{compressed_size} bytes "
+        f"in {elapsed * 1000:.2f}ms"
+    )
+
+
+def compression_stats():
+    """
+    Get compression totals per codec
+
+    Returns:
+        Dict: {codec: {'responses', 'raw_bytes', 'compressed_bytes', 'time_us', 'ratio'}}
+    """
+    stats = {}
+    for codec in (ZSTD, GZIP):
+        keys = {name: _stats_key(codec, name) for name in STAT_FIELDS}
+        values = _cache().get_many(list(keys.values()))
+        codec_stats = {name: values.get(key, 0) for name, key in keys.items()}
+        codec_stats['ratio'] = round(
+            codec_stats['raw_bytes'] / codec_stats['compressed_bytes'], 2
+        ) if codec_stats['compressed_bytes'] else 0.0
+        stats[codec] = codec_stats
+    return stats
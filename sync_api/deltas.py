@@ -0,0 +1,177 @@
+"""
+Snapshot Delta Patches
+Structural diffs between consecutive store snapshots
+
+When a snapshot is built, it is compared with the store's previous one
+and the difference is kept as a compact op list keyed by section, entity
+id and field:
+
+    {"section": "products", "op": "add", "id": "...", "data": {...full row...}}
+    {"section": "products", "op": "set", "id": "...", "fields": {"price": "27000.00"}}
+    {"section": "products", "op": "delete", "id": "..."}
+
+A "set" only carries the fields whose value changed (nested values such
+as modifier options are replaced as a whole). An Edge holding snapshot
+version A applies the chain of patches A -> ... -> latest, so the bytes
+per sync follow the size of the real change rather than of the rows.
+
+Usage:
+    chain = deltas.delta_chain(snapshot, from_version)  # None: full snapshot needed
+"""
+
+import gzip
+import io
+import json
+import logging
+
+from sync_api.models import SyncSnapshotDelta
+
+logger = logging.getLogger(__name__)
+
+# Longest patch chain served before the Edge is sent to the full snapshot
+MAX_DELTA_CHAIN = 10
+
+# Chains changing more than this share of the snapshot rows are not served
+MAX_DELTA_SHARE = 0.5
+
+# Deltas kept per store
+KEEP_DELTAS = 50
+
+# Fields that change on every build without a data change; they only travel
+# along with a real change of the row
+VOLATILE_FIELDS = {'compiled_at'}
+
+
+def read_rows(chunks):
+    """
+    Index the rows of a gzipped NDJSON snapshot
+
+    Args:
+        chunks: Iterable of compressed byte chunks
+
+    Returns:
+        Dict: {section: {id: row}}
+    """
+    raw = io.BytesIO()
+    for chunk in chunks:
+        raw.write(chunk)
+    raw.seek(0)
+
+    rows = {}
+    with gzip.GzipFile(fileobj=raw, mode='rb') as file:
+        for line in file:
+            item = json.loads(line)
+            if 'section' not in item:
+                continue  # header
+            rows.setdefault(item['section'], {})[item['data']['id']] = item['data']
+    return rows
+
+
+def diff_rows(old, new):
+    """
+    Op list turning snapshot rows `old` into `new`
+
+    Args:
+        old, new: {section: {id: row}} from read_rows()
+
+    Returns:
+        List of ops (see module docstring)
+    """
+    ops = []
+    for section in sorted(set(old) | set(new)):
+        old_rows = old.get(section, {})
+        new_rows = new.get(section, {})
+        for row_id, row in new_rows.items():
+            previous = old_rows.get(row_id)
+            if previous is None:
+                ops.append({'section': section, 'op': 'add', 'id': row_id, 'data': row})
+                continue
+            fields = {
+                field: value for field, value in row.items()
+                if field not in previous or previous[field] != value
+            }
+            for field in previous.keys() - row.keys():
+                fields[field] = None
+            if not set(fields) - VOLATILE_FIELDS:
+                continue
+            ops.append({'section': section, 'op': 'set', 'id': row_id, 'fields': fields})
+        for row_id in old_rows.keys() - new_rows.keys():
+            ops.append({'section': section, 'op': 'delete', 'id': row_id})
+    return ops
+
+
+def record_delta(previous, snapshot, old_rows, new_rows):
+    """
+    Store the delta from the previous snapshot of a store to a new one
+
+    Returns:
+        SyncSnapshotDelta
+    """
+    ops = diff_rows(old_rows, new_rows)
+    delta = SyncSnapshotDelta.objects.create(
+        store_id=snapshot.store_id,
+        from_version=previous.version,
+        to_version=snapshot.version,
+        ops=ops,
+        op_count=len(ops),
+        size=len(json.dumps(ops, separators=(',', ':'))),
+    )
+    logger.info(
+        f"Sync snapshot delta: store={snapshot.store_id}, "
+        f"{previous.version[:12]} -> {snapshot.version[:12]}, ops={len(ops)}"
+    )
+    return delta
+
+
+def delta_chain(snapshot, from_version, max_chain=MAX_DELTA_CHAIN):
+    """
+    Patches from a version to the given (latest) snapshot
+
+    Returns:
+        List of SyncSnapshotDelta oldest first (empty if from_version is the
+        snapshot's version), or None if there is no usable chain
+    """
+    if from_version == snapshot.version:
+        return []
+
+    # Newest delta leading to each version
+    by_target = {}
+    recent = SyncSnapshotDelta.objects.filter(store_id=snapshot.store_id).order_by('-created_at')
+    for delta in recent[:max_chain * 4]:
+        by_target.setdefault(delta.to_version, delta)
+
+    chain = []
+    version = snapshot.version
+    seen = {version}
+    while version != from_version:
+        delta = by_target.get(version)
+        if delta is None or len(chain) >= max_chain or delta.from_version in seen:
+            return None
+        chain.append(delta)
+        version = delta.from_version
+        seen.add(version)
+    chain.reverse()
+
+    total_rows = sum(snapshot.row_counts.values())
+    if sum(delta.op_count for delta in chain) > max(total_rows * MAX_DELTA_SHARE, 1):
+        return None
+    return chain
+
+
+def prune_deltas(keep=KEEP_DELTAS):
+    """
+    Delete all but the newest deltas of each store
+
+    Returns:
+        Number of deleted deltas
+    """
+    deleted = 0
+    store_ids = SyncSnapshotDelta.objects.values_list('store_id', flat=True).distinct()
+    for store_id in store_ids:
+        old_ids = list(SyncSnapshotDelta.objects.filter(
+            store_id=store_id
+        ).order_by('-created_at').values_list('id', flat=True)[keep:])
+        if old_ids:
+            deleted += SyncSnapshotDelta.objects.filter(id__in=old_ids).delete()[0]
+    logger.info(f"Pruned {deleted} sync snapshot deltas")
+    return deleted
@@ -0,0 +1,135 @@
+"""
+Management command to compare sync payload encodings (JSON vs MessagePack / CBOR)
+
+Builds catalog rows the way the sync endpoints do (string values for JSON,
+native values for the binary encodings) and reports build + encode time
+and payload size, raw and gzipped.
+
+Usage:
+    python manage.py benchmark_sync_encoding
+    python manage.py benchmark_sync_encoding --rows 20000 --repeat 10
+    python manage.py benchmark_sync_encoding --store-id <uuid>
+"""
+
+import gzip
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Store
+from sync_api import binary, payloads, resources
+
+
+class Command(BaseCommand):
+    help = 'Compare encode time and payload size of JSON and binary sync encodings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Number of synthetic product rows (without --store-id)',
+        )
+        parser.add_argument(
+            '--store-id',
+            type=str,
+            help='Use the catalog of a store instead of synthetic rows',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per encoding (best run is reported)',
+        )
+
+    def handle(self, *args, **options):
+        if options['store_id']:
+            build = self.store_rows(options['store_id'])
+        else:
+            build = self.synthetic_rows(options['rows'])
+
+        encodings = [('json', None)] + [
+            (media_type, media_type) for media_type in (binary.MSGPACK, binary.CBOR)
+            if binary.available(media_type)
+        ]
+        results = []
+        for name, media_type in encodings:
+            if media_type:
+                encode = lambda data, media_type=media_type: binary.encode(data, media_type)
+            else:
+                encode = JSONRenderer().render
+            build_times, encode_times = [], []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                data = build(native=media_type is not None)
+                built = time.perf_counter()
+                body = encode(data)
+                build_times.append(built - started)
+                encode_times.append(time.perf_counter() - built)
+            results.append((name, min(build_times), min(encode_times), len(body), len(gzip.compress(body, 6))))
+
+        rows = sum(len(value) for value in data.values())
+        self.stdout.write(self.style.SUCCESS(f'=== Sync Encoding Benchmark ({rows} rows) ===\n'))
+        self.stdout.write(f"{'encoding':<24}{'build ms':>10}{'encode ms':>11}{'bytes':>12}{'gzip bytes':>12}")
+        json_size = results[0][3]
+        for name, build_time, encode_time, size, gzip_size in results:
+            self.stdout.write(
+                f"{name:<24}{build_time * 1000:>10.1f}{encode_time * 1000:>11.1f}"
+                f"{size:>12}{gzip_size:>12}  ({size / json_size:.0%} of JSON)"
+            )
+        missing = {binary.MSGPACK, binary.CBOR} - {media_type for _name, media_type in encodings}
+        for media_type in sorted(missing):
+            self.stdout.write(self.style.WARNING(f'{media_type} skipped: package not installed'))
+
+    def store_rows(self, store_id):
+        """Full catalog of a store, one section per registered resource"""
+        from sync_api.snapshots import store_context
+
+        try:
+            store = Store.objects.select_related('company').get(id=store_id)
+        except (Store.DoesNotExist, ValueError):
+            raise CommandError(f'Store {store_id} not found')
+        ctx = store_context(store)
+
+        def build(native):
+            data = {}
+            for name, resource in resources.REGISTRY.items():
+                queryset = resource.queryset(resource.scope(ctx, ctx.brand_ids))
+                projection = payloads.Projection(resource.columns, native=native) if resource.columns else None
+                data[name] = list(resource.rows(queryset, ctx.request, ctx, projection))
+            return data
+        return build
+
+    def synthetic_rows(self, count):
+        """Product rows as read by values(), built per encoding"""
+        now = timezone.now()
+        company_id, brand_id, store_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        values = [{
+            'id': uuid.uuid4(),
+            'company_id': company_id,
+            'brand_id': brand_id,
+            'category_id': uuid.uuid4(),
+            'sku': f'SKU-{index:06d}',
+            'name': f'Product {index}',
+            'description': 'Nasi goreng dengan telur mata sapi dan kerupuk',
+            'image': '',
+            'price': Decimal('25000.00') + index,
+            'cost': Decimal('10000.00'),
+            'printer_target': 'kitchen',
+            'track_stock': True,
+            'stock_quantity': Decimal('100.000'),
+            'is_active': True,
+            'sort_order': index,
+            'created_at': now,
+            'updated_at': now,
+        } for index in range(count)]
+
+        def build(native):
+            projection = payloads.Projection(payloads.PRODUCT_COLUMNS, native=native)
+            context = {'request': None, 'store_id': store_id}
+            return {'products': [projection.build(row, context) for row in values]}
+        return build
@@ -0,0 +1,72 @@
+"""
+Management command to report Edge sync telemetry per store
+
+Rolls up SyncEvent rows (see sync_api.telemetry): calls, errors, 304s,
+rows, bytes, latency and cursor lag per store, or per store and endpoint.
+Buffered events are flushed first.
+
+Usage:
+    python manage.py sync_telemetry_report
+    python manage.py sync_telemetry_report --hours 168 --order max_ms
+    python manage.py sync_telemetry_report --store-id <uuid> --by-endpoint
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Store
+from sync_api import telemetry
+
+ORDERS = ['bytes', 'calls', 'rows', 'errors', 'avg_ms', 'max_ms', 'max_cursor_lag']
+
+
+class Command(BaseCommand):
+    help = 'Report sync calls, payload sizes and latency per store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Report window in hours')
+        parser.add_argument('--company-id', type=str, help='Only stores of this company')
+        parser.add_argument('--store-id', type=str, help='Only this store (implies --by-endpoint)')
+        parser.add_argument('--by-endpoint', action='store_true', help='One line per store and endpoint')
+        parser.add_argument('--order', choices=ORDERS, default='bytes', help='Sort column (descending)')
+        parser.add_argument('--limit', type=int, default=50, help='Lines shown')
+
+    def handle(self, *args, **options):
+        if options['hours'] <= 0:
+            raise CommandError('--hours must be positive')
+
+        flushed = telemetry.flush_events()
+        since = timezone.now() - timedelta(hours=options['hours'])
+        order_by = f"-{options['order']}"
+        if options['store_id'] or options['by_endpoint']:
+            rows = telemetry.endpoint_rollup(
+                since, options['company_id'], options['store_id'], order_by=order_by
+            )
+        else:
+            rows = telemetry.store_rollup(since, options['company_id'], order_by=order_by)
+        rows = rows[:options['limit']]
+
+        store_codes = dict(
+            Store.objects.filter(id__in={row['store_id'] for row in rows if row['store_id']})
+            .values_list('id', 'store_code')
+        )
+
+        self.stdout.write(f"Sync telemetry, last {options['hours']}h ({flushed} buffered events flushed)")
+        header = (
+            f"{'store':<20}{'endpoint':<34}{'calls':>8}{'err':>6}{'304':>7}{'rows':>10}"
+            f"{'MB':>9}{'avg ms':>9}{'max ms':>9}{'lag':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            store = store_codes.get(row['store_id'], str(row['store_id'] or '-')[:18])
+            endpoint = row.get('endpoint', '*')
+            self.stdout.write(
+                f"{store:<20}{endpoint[:33]:<34}{row['calls']:>8}{row['errors']:>6}{row['not_modified']:>7}"
+                f"{row['rows'] or 0:>10}{(row['bytes'] or 0) / 1048576:>9.2f}{row['avg_ms'] or 0:>9.1f}"
+                f"{row['max_ms'] or 0:>9.1f}{row['max_cursor_lag'] if row['max_cursor_lag'] is not None else '-':>8}"
+            )
+        if not rows:
+            self.stdout.write('No sync events in this window.')
@@ -0,0 +1,43 @@
+"""
+Sync API Middleware
+"""
+
+import time
+
+from sync_api import telemetry
+
+
+class SyncTelemetryMiddleware:
+    """
+    Record a SyncEvent for every sync / push call (see sync_api.telemetry)
+    Streamed responses are recorded once their last chunk is sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        direction = telemetry.direction(request.path)
+        if direction is None:
+            return self.get_response(request)
+
+        started = time.monotonic()
+        response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self._counted(
+                response.streaming_content, request, response, started, direction
+            )
+        else:
+            telemetry.record(request, response, started, len(response.content), direction)
+        return response
+
+    @staticmethod
+    def _counted(chunks, request, response, started, direction):
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            telemetry.record(request, response, started, sent, direction)
@@ -0,0 +1,131 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:25
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoreSyncWatermark",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("model", models.CharField(max_length=50)),
+                ("synced_at", models.DateTimeField()),
+                (
+                    "store",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_watermarks",
+                        to="core.store",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Store Sync Watermark",
+                "verbose_name_plural": "Store Sync Watermarks",
+                "db_table": "store_sync_watermark",
+                "indexes": [
+                    models.Index(
+                        fields=["model", "synced_at"],
+                        name="store_sync__model_1a5214_idx",
+                    )
+                ],
+                "unique_together": {("store", "model")},
+            },
+        ),
+        migrations.CreateModel(
+            name="SyncTombstone",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="Synced model name (e.g., product, promotion)",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.UUIDField(help_text="ID of the deleted/deactivated record"),
+                ),
+                (
+                    "brand_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Brand scope of the record (if any)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "store_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Store scope of the record (if any)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("deleted", "Deleted"),
+                            ("deactivated", "Deactivated"),
+                        ],
+                        default="deleted",
+                        max_length=20,
+                    ),
+                ),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_tombstones",
+                        to="core.company",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sync Tombstone",
+                "verbose_name_plural": "Sync Tombstones",
+                "db_table": "sync_tombstone",
+                "ordering": ["-deleted_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["company", "model", "deleted_at"],
+                        name="sync_tombst_company_a48831_idx",
+                    ),
+                    models.Index(
+                        fields=["model", "object_id"],
+                        name="sync_tombst_model_d20afa_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("sync_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="Synced model name (e.g., product, promotion)",
+                        max_length=50,
+                    ),
+                ),
+                ("object_id", models.UUIDField(help_text="ID of the changed record")),
+                (
+                    "brand_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Brand scope of the record (if any)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "store_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Store scope of the record (if any)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("upsert", "Created / Updated"),
+                            ("delete", "Deleted"),
+                        ],
+                        default="upsert",
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("seq", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_changes",
+                        to="core.company",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sync Change",
+                "verbose_name_plural": "Sync Changes",
+                "db_table": "sync_change",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["company", "model", "seq"],
+                        name="sync_change_company_0aedd5_idx",
+                    ),
+                    models.Index(
+                        fields=["company", "seq"],
+                        name="sync_change_company_c34c15_idx",
+                    ),
+                    models.Index(
+                        fields=["company", "created_at"],
+                        name="sync_change_company_c6a074_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SyncCommit",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("company_id", models.UUIDField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Sync Commit",
+                "verbose_name_plural": "Sync Commits",
+                "db_table": "sync_commit",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["company_id", "id"],
+                        name="sync_commit_company_009930_idx",
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="sync_commit_created_55bb42_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:27
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("sync_api", "0002_sync_change"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "version",
+                    models.CharField(
+                        help_text="Digest of the section versions the snapshot was built from",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "sections",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Section versions (same as the bundle endpoint)",
+                    ),
+                ),
+                (
+                    "row_counts",
+                    models.JSONField(default=dict, help_text="Rows per section"),
+                ),
+                (
+                    "change_seq",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Change log sequence covered by the snapshot",
+                    ),
+                ),
+                ("object_key", models.CharField(max_length=255)),
+                (
+                    "checksum",
+                    models.CharField(
+                        help_text="SHA-256 of the stored object", max_length=64
+                    ),
+                ),
+                (
+                    "size",
+                    models.BigIntegerField(default=0, help_text="Object size in bytes"),
+                ),
+                ("format", models.CharField(default="ndjson.gz", max_length=20)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_snapshots",
+                        to="core.company",
+                    ),
+                ),
+                (
+                    "store",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_snapshots",
+                        to="core.store",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sync Snapshot",
+                "verbose_name_plural": "Sync Snapshots",
+                "db_table": "sync_snapshot",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["store", "created_at"],
+                        name="sync_snapsh_store_i_f80950_idx",
+                    )
+                ],
+                "unique_together": {("store", "version")},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:29
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("sync_api", "0003_sync_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncSnapshotDelta",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("from_version", models.CharField(max_length=64)),
+                ("to_version", models.CharField(max_length=64)),
+                ("ops", models.JSONField(default=list)),
+                ("op_count", models.IntegerField(default=0)),
+                (
+                    "size",
+                    models.IntegerField(
+                        default=0, help_text="Encoded op list size in bytes"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "store",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_snapshot_deltas",
+                        to="core.store",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sync Snapshot Delta",
+                "verbose_name_plural": "Sync Snapshot Deltas",
+                "db_table": "sync_snapshot_delta",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["store", "created_at"],
+                        name="sync_snapsh_store_i_8b487f_idx",
+                    )
+                ],
+            },
+        ),
+    ]
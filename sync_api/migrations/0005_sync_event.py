@@ -0,0 +1,102 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sync_api", "0004_sync_snapshot_delta"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("company_id", models.UUIDField(blank=True, null=True)),
+                ("store_id", models.UUIDField(blank=True, null=True)),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[
+                            ("pull", "Sync (HO → Edge)"),
+                            ("push", "Push (Edge → HO)"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "endpoint",
+                    models.CharField(
+                        help_text="Request path below /api/v1/ (e.g., sync/products)",
+                        max_length=100,
+                    ),
+                ),
+                ("method", models.CharField(default="POST", max_length=10)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("ok", "OK"),
+                            ("not_modified", "Not Modified"),
+                            ("rejected", "Rejected (4xx)"),
+                            ("error", "Error (5xx)"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("status_code", models.PositiveSmallIntegerField()),
+                (
+                    "rows",
+                    models.IntegerField(
+                        default=0, help_text="Rows sent (sync) or received (push)"
+                    ),
+                ),
+                (
+                    "bytes",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Response body size as sent (after compression)",
+                    ),
+                ),
+                (
+                    "encoding",
+                    models.CharField(
+                        blank=True,
+                        help_text="Content-Encoding of the response",
+                        max_length=20,
+                    ),
+                ),
+                ("duration_ms", models.FloatField(default=0)),
+                (
+                    "cursor_lag",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Commit sequences between the Edge's cursor and the high water mark",
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Sync Event",
+                "verbose_name_plural": "Sync Events",
+                "db_table": "sync_event",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["store_id", "created_at"],
+                        name="sync_event_store_i_222409_idx",
+                    ),
+                    models.Index(
+                        fields=["company_id", "created_at"],
+                        name="sync_event_company_6b33a5_idx",
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="sync_event_created_489e6b_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,256 @@
+"""
+Sync API Models
+Bookkeeping for HO → Edge incremental synchronization
+"""
+
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class SyncTombstone(models.Model):
+    """
+    Deletion Tombstone - records removed/deactivated master data
+    Read by the sync endpoints to return real ``deleted_ids`` on incremental sync
+    """
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('deactivated', 'Deactivated'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # No DB constraint: Store/Brand tombstones are written while a Company delete cascades
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='sync_tombstones',
+        db_constraint=False
+    )
+    model = models.CharField(max_length=50, help_text="Synced model name (e.g., product, promotion)")
+    object_id = models.UUIDField(help_text="ID of the deleted/deactivated record")
+    
+    # Scope (plain IDs - the referenced rows may no longer exist)
+    brand_id = models.UUIDField(null=True, blank=True, help_text="Brand scope of the record (if any)")
+    store_id = models.UUIDField(null=True, blank=True, help_text="Store scope of the record (if any)")
+    
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='deleted')
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_tombstone'
+        verbose_name = 'Sync Tombstone'
+        verbose_name_plural = 'Sync Tombstones'
+        ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['company', 'model', 'deleted_at']),
+            models.Index(fields=['model', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.model}:{self.object_id} ({self.reason})"
+
+
+class StoreSyncWatermark(models.Model):
+    """
+    Last successful sync per store and model
+    Tombstones older than every store's watermark can be pruned
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    store = models.ForeignKey('core.Store', on_delete=models.CASCADE, related_name='sync_watermarks')
+    model = models.CharField(max_length=50)
+    synced_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'store_sync_watermark'
+        verbose_name = 'Store Sync Watermark'
+        verbose_name_plural = 'Store Sync Watermarks'
+        unique_together = [['store', 'model']]
+        indexes = [
+            models.Index(fields=['model', 'synced_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.store_id} - {self.model} @ {self.synced_at}"
+
+
+class SyncChange(models.Model):
+    """
+    Sync Change Log (outbox) - one row per master data save/delete
+    ``seq`` (a SyncCommit id, stamped once the saving transaction has
+    committed) is the change sequence used by sync cursors
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Created / Updated'),
+        ('delete', 'Deleted'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    # No DB constraint: rows are written while a Company delete cascades
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.CASCADE,
+        related_name='sync_changes',
+        db_constraint=False
+    )
+    model = models.CharField(max_length=50, help_text="Synced model name (e.g., product, promotion)")
+    object_id = models.UUIDField(help_text="ID of the changed record")
+    
+    # Scope (plain IDs - the referenced rows may no longer exist)
+    brand_id = models.UUIDField(null=True, blank=True, help_text="Brand scope of the record (if any)")
+    store_id = models.UUIDField(null=True, blank=True, help_text="Store scope of the record (if any)")
+    
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='upsert')
+    # Commit sequence, null until the saving transaction has committed
+    seq = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_change'
+        verbose_name = 'Sync Change'
+        verbose_name_plural = 'Sync Changes'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['company', 'model', 'seq']),
+            models.Index(fields=['company', 'seq']),
+            models.Index(fields=['company', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.model}:{self.object_id} ({self.action})"
+
+
+class SyncCommit(models.Model):
+    """
+    Commit sequence of the change log - one row per committed batch of
+    SyncChange rows, allocated after the saving transaction committed
+    """
+    id = models.BigAutoField(primary_key=True)
+    company_id = models.UUIDField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_commit'
+        verbose_name = 'Sync Commit'
+        verbose_name_plural = 'Sync Commits'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['company_id', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} ({self.company_id})"
+
+
+class SyncSnapshot(models.Model):
+    """
+    Prebuilt Store Snapshot - immutable sync artifact stored in MinIO
+    Gzipped NDJSON of every bundle section, fetched by the Edge Server
+    instead of assembling its catalog from the live endpoints
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='sync_snapshots')
+    store = models.ForeignKey('core.Store', on_delete=models.CASCADE, related_name='sync_snapshots')
+    version = models.CharField(max_length=64, help_text="Digest of the section versions the snapshot was built from")
+    sections = models.JSONField(default=dict, help_text="Section versions (same as the bundle endpoint)")
+    row_counts = models.JSONField(default=dict, help_text="Rows per section")
+    change_seq = models.BigIntegerField(default=0, help_text="Change log sequence covered by the snapshot")
+    
+    # MinIO object
+    object_key = models.CharField(max_length=255)
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the stored object")
+    size = models.BigIntegerField(default=0, help_text="Object size in bytes")
+    format = models.CharField(max_length=20, default='ndjson.gz')
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_snapshot'
+        verbose_name = 'Sync Snapshot'
+        verbose_name_plural = 'Sync Snapshots'
+        ordering = ['-created_at']
+        unique_together = [['store', 'version']]
+        indexes = [
+            models.Index(fields=['store', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.store_id} @ {self.version[:12]} ({self.size} bytes)"
+
+
+class SyncSnapshotDelta(models.Model):
+    """
+    Patch between two consecutive snapshot versions of a store
+    Op list keyed by section, entity id and field (see sync_api.deltas)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    store = models.ForeignKey('core.Store', on_delete=models.CASCADE, related_name='sync_snapshot_deltas')
+    from_version = models.CharField(max_length=64)
+    to_version = models.CharField(max_length=64)
+    ops = models.JSONField(default=list)
+    op_count = models.IntegerField(default=0)
+    size = models.IntegerField(default=0, help_text="Encoded op list size in bytes")
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_snapshot_delta'
+        verbose_name = 'Sync Snapshot Delta'
+        verbose_name_plural = 'Sync Snapshot Deltas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['store', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.store_id}: {self.from_version[:12]} -> {self.to_version[:12]} ({self.op_count} ops)"
+
+
+class SyncEvent(models.Model):
+    """
+    Sync Telemetry Event - one sync (HO → Edge) or push (Edge → HO) call
+    Buffered in Redis and bulk inserted by flush_sync_events_task (see sync_api.telemetry)
+    """
+    DIRECTION_CHOICES = [
+        ('pull', 'Sync (HO → Edge)'),
+        ('push', 'Push (Edge → HO)'),
+    ]
+    STATUS_CHOICES = [
+        ('ok', 'OK'),
+        ('not_modified', 'Not Modified'),
+        ('rejected', 'Rejected (4xx)'),
+        ('error', 'Error (5xx)'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    # Plain IDs - taken from the request, the store may not exist
+    company_id = models.UUIDField(null=True, blank=True)
+    store_id = models.UUIDField(null=True, blank=True)
+    
+    direction = models.CharField(max_length=10, choices=DIRECTION_CHOICES)
+    endpoint = models.CharField(max_length=100, help_text="Request path below /api/v1/ (e.g., sync/products)")
+    method = models.CharField(max_length=10, default='POST')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    status_code = models.PositiveSmallIntegerField()
+    rows = models.IntegerField(default=0, help_text="Rows sent (sync) or received (push)")
+    bytes = models.BigIntegerField(default=0, help_text="Response body size as sent (after compression)")
+    encoding = models.CharField(max_length=20, blank=True, help_text="Content-Encoding of the response")
+    duration_ms = models.FloatField(default=0)
+    cursor_lag = models.BigIntegerField(
+        null=True, blank=True, help_text="Commit sequences between the Edge's cursor and the high water mark"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_event'
+        verbose_name = 'Sync Event'
+        verbose_name_plural = 'Sync Events'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['store_id', 'created_at']),
+            models.Index(fields=['company_id', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.store_id} {self.endpoint} {self.status_code} ({self.duration_ms}ms)"
@@ -0,0 +1,287 @@
+"""
+Sync Change Notifications
+
+Edge Servers poll sync_version (and the sync endpoints) on a timer: load
+when nothing changed, minutes of delay when something did (price fix,
+pulled promotion). With notifications an Edge keeps one connection open
+and fetches only when told; polling drops to a slow safety interval
+(SAFETY_POLL_SECONDS).
+
+- versions.bump_version() publishes every committed change to the
+  company's Redis pub/sub channel: model, company version, scope
+- the ASGI notification endpoint (sync_api.asgi, Server-Sent Events or
+  WebSocket) subscribes per connected store and forwards the changes the
+  store can see (its brands, itself, unscoped records), coalesced per
+  model over COALESCE_SECONDS so a bulk import is one message per model
+- the first message ("hello") carries the version per sync endpoint, the
+  same as sync_version, so an Edge catches up on what it missed while
+  disconnected
+
+Messages:
+    hello:  {store_id, brand_ids, endpoints: {endpoint: version}, safety_poll_seconds}
+    change: {model, version, changed_at, endpoints: [endpoint, ...]}
+
+Without Redis (locmem cache in development) changes are delivered to
+subscribers of the same process only.
+
+Usage:
+    notifications.publish(company_id, 'product', version, brand_id=brand_id)
+
+    async for event, data in notifications.stream(company_id, store_id):
+        ...  # event is None for a heartbeat
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'default'
+CHANNEL_PREFIX = 'sync_notify'
+
+# Path of the notification endpoint (served by the ASGI application)
+PATH = '/api/v1/sync/events/'
+
+# Heartbeat while nothing changes (below proxy read timeouts)
+HEARTBEAT_SECONDS = 25
+
+# Changes collected before they are sent (bulk saves become one message per model)
+COALESCE_SECONDS = 0.25
+
+# Connections are closed after this long; the Edge reconnects (new token check)
+MAX_CONNECTION_SECONDS = 60 * 60
+
+# Poll interval an Edge keeps while connected (missed messages, broker restarts)
+SAFETY_POLL_SECONDS = 15 * 60
+
+
+class StoreNotFound(Exception):
+    """Store of a subscription does not exist or does not belong to the company"""
+
+    code = 'STORE_NOT_FOUND'
+
+
+def channel(company_id):
+    return caches[CACHE_ALIAS].make_key(f"{CHANNEL_PREFIX}:{company_id}")
+
+
+# ----------------------------------------------------------------------
+# Brokers
+# ----------------------------------------------------------------------
+
+class _RedisBroker:
+    """Redis pub/sub shared by every web and worker process"""
+
+    def __init__(self, cache):
+        self.client = cache.client.get_client(write=True)
+
+    def publish(self, name, data):
+        self.client.publish(name, data)
+
+    def subscribe(self, name):
+        return _RedisSubscription(name)
+
+
+class _RedisSubscription:
+    def __init__(self, name):
+        self.name = name
+
+    async def __aenter__(self):
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(settings.REDIS_URL)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.name)
+        return self
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return json.loads(message['data']) if message else None
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.unsubscribe(self.name)
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+
+class _LocalBroker:
+    """In-process fan out (caches without a Redis client)"""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, name, data):
+        with self._lock:
+            subscribers = list(self.subscribers[name])
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, data)
+            except RuntimeError:
+                # Event loop of a closed connection
+                pass
+
+    def subscribe(self, name):
+        return _LocalSubscription(self, name)
+
+
+class _LocalSubscription:
+    def __init__(self, broker, name):
+        self.broker = broker
+        self.name = name
+
+    async def __aenter__(self):
+        self.queue = asyncio.Queue()
+        self.entry = (asyncio.get_running_loop(), self.queue)
+        with self.broker._lock:
+            self.broker.subscribers[self.name].add(self.entry)
+        return self
+
+    async def get(self, timeout):
+        try:
+            return json.loads(await asyncio.wait_for(self.queue.get(), timeout))
+        except asyncio.TimeoutError:
+            return None
+
+    async def __aexit__(self, *exc_info):
+        with self.broker._lock:
+            self.broker.subscribers[self.name].discard(self.entry)
+
+
+_local_broker = _LocalBroker()
+
+
+def _broker():
+    cache = caches[CACHE_ALIAS]
+    client = getattr(cache, 'client', None)
+    if hasattr(client, 'get_client'):
+        return _RedisBroker(cache)
+    return _local_broker
+
+
+# ----------------------------------------------------------------------
+# Publishing
+# ----------------------------------------------------------------------
+
+def publish(company_id, model, version, brand_id=None, store_id=None, changed_at=None):
+    """Publish a committed change; a broker failure never fails the save"""
+    message = {
+        'model': model,
+        'version': version,
+        'brand_id': str(brand_id) if brand_id else None,
+        'store_id': str(store_id) if store_id else None,
+        'changed_at': changed_at,
+    }
+    try:
+        _broker().publish(channel(company_id), json.dumps(message))
+    except Exception as e:
+        logger.warning(f"Could not publish sync change {model} of company {company_id}: {e}")
+
+
+# ----------------------------------------------------------------------
+# Subscribing
+# ----------------------------------------------------------------------
+
+def endpoints_by_model():
+    """{model: [sync endpoints whose data depends on it]}"""
+    from sync_api.bundle_views import endpoint_models
+
+    endpoints = defaultdict(list)
+    for name, models in endpoint_models().items():
+        for model in models:
+            endpoints[model].append(name)
+    return dict(endpoints)
+
+
+def visible(message, store_id, brand_ids):
+    """Can a store see the changed record"""
+    if message.get('store_id'):
+        return message['store_id'] == str(store_id)
+    if message.get('brand_id'):
+        return message['brand_id'] in {str(brand_id) for brand_id in brand_ids}
+    return True
+
+
+def change_event(message, endpoints):
+    changed_at = message.get('changed_at')
+    return {
+        'model': message['model'],
+        'version': message['version'],
+        'changed_at': datetime.fromtimestamp(changed_at, tz=dt_timezone.utc).isoformat() if changed_at else None,
+        'endpoints': endpoints.get(message['model'], []),
+    }
+
+
+async def _collect(subscription, first):
+    """Changes arriving within COALESCE_SECONDS of the first one"""
+    messages = [first]
+    loop = asyncio.get_running_loop()
+    end = loop.time() + COALESCE_SECONDS
+    while (remaining := end - loop.time()) > 0:
+        message = await subscription.get(remaining)
+        if message is None:
+            break
+        messages.append(message)
+    return messages
+
+
+async def stream(company_id, store_id, max_seconds=MAX_CONNECTION_SECONDS):
+    """
+    Notification events of a store
+
+    Yields:
+        ('hello', data) first, then ('change', data) per changed model, and
+        (None, None) as heartbeat when nothing changed for HEARTBEAT_SECONDS
+
+    Raises:
+        StoreNotFound: unknown store (before anything is yielded)
+    """
+    from sync_api import store_context, versions
+    from sync_api.bundle_views import endpoint_versions
+
+    resolve = sync_to_async(store_context.resolve)
+    ctx = await resolve(company_id, store_id)
+    if ctx is None:
+        raise StoreNotFound('Store not found or does not belong to the specified company')
+
+    endpoints = endpoints_by_model()
+    # Subscribe before reading the versions: no change falls in between
+    async with _broker().subscribe(channel(company_id)) as subscription:
+        _, endpoint_map = await sync_to_async(endpoint_versions)(company_id, ctx.brand_ids, store_id)
+        yield 'hello', {
+            'store_id': str(store_id),
+            'brand_ids': [str(brand_id) for brand_id in ctx.brand_ids],
+            'endpoints': endpoint_map,
+            'safety_poll_seconds': SAFETY_POLL_SECONDS,
+        }
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(min(HEARTBEAT_SECONDS, remaining))
+            if message is None:
+                if remaining > HEARTBEAT_SECONDS:
+                    yield None, None
+                continue
+
+            latest = {}
+            for message in await _collect(subscription, message):
+                if not visible(message, store_id, ctx.brand_ids):
+                    continue
+                current = latest.get(message['model'])
+                if current is None or message['version'] > current['version']:
+                    latest[message['model']] = message
+
+            if any(model in versions.STORE_SCOPE_MODELS for model in latest):
+                # The store may have gained or lost a brand
+                ctx = await resolve(company_id, store_id) or ctx
+            for message in latest.values():
+                yield 'change', change_event(message, endpoints)
@@ -0,0 +1,166 @@
+"""
+Keyset Pagination for Sync Endpoints
+Seek pagination on (updated_at, id) with an opaque continuation token
+
+OFFSET/LIMIT reads and discards every skipped row, so late pages get
+slower as the offset grows. A keyset page continues after the last
+(updated_at, id) pair instead and is served by a (..., updated_at, id)
+index, so every page costs the same. Rows updated while an Edge is paging
+move behind the token and are picked up by a later page.
+
+Request parameters:
+- limit: rows per page (no paging without it, unless the endpoint has a default)
+- page_token: next_page_token of the previous page
+
+Usage:
+    page = pagination.KeysetPage(request, 'products', scope=(company_id, store_id))
+    rows = streaming.RowStream(page.rows(payloads.product_rows(page.paginate(queryset), ...)))
+    response = {..., 'has_more': lambda: page.has_more, 'next_page_token': page.next_page_token}
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+# Upper bound for the limit parameter
+MAX_PAGE_SIZE = 1000
+
+TOKEN_VERSION = 'k1'
+
+
+class PageTokenError(Exception):
+    """Page token or limit cannot be used"""
+    code = 'INVALID_PAGE_TOKEN'
+    status_code = 400
+
+
+def _fingerprint(endpoint, scope):
+    raw = '|'.join([endpoint] + [str(part) for part in scope])
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def encode_page_token(order_value, row_id, fingerprint):
+    """Encode the last (order value, id) of a page as an opaque token"""
+    if isinstance(order_value, datetime):
+        order_value = order_value.isoformat()
+    raw = json.dumps([TOKEN_VERSION, fingerprint, order_value, str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_page_token(token, fingerprint):
+    """
+    Decode a page token
+
+    Returns:
+        Tuple (order value string, id string), or None if no token was given
+
+    Raises:
+        PageTokenError: token is malformed or belongs to another query
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        version, token_fingerprint, order_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError):
+        raise PageTokenError('Invalid page_token')
+    if version != TOKEN_VERSION or token_fingerprint != fingerprint:
+        raise PageTokenError('page_token does not belong to this sync request')
+    return order_value, row_id
+
+
+class KeysetPage:
+    """
+    One page of a sync result ordered by (order_field, id)
+
+    Args:
+        request: DRF request (reads limit / page_token)
+        endpoint: Endpoint name, part of the token fingerprint
+        scope: Request parameters the token is bound to (company, store, updated_since, cursor...)
+        order_field: Timestamp field to order by, None to order by id only
+        default_limit: Page size when the request has no limit (None = no paging)
+
+    Raises:
+        PageTokenError: invalid limit or page_token
+    """
+
+    def __init__(self, request, endpoint, scope=(), order_field='updated_at', default_limit=None):
+        self.order_field = order_field
+        self.fingerprint = _fingerprint(endpoint, scope)
+        self.limit = default_limit
+        limit = request.data.get('limit')
+        if limit not in (None, ''):
+            try:
+                self.limit = int(limit)
+            except (TypeError, ValueError):
+                raise PageTokenError('limit must be an integer')
+        if self.limit is not None and not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise PageTokenError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+        self.after = decode_page_token(request.data.get('page_token'), self.fingerprint)
+        self.has_more = False
+        self.last_key = None
+
+    @property
+    def paged(self):
+        return self.limit is not None
+
+    @property
+    def cache_key(self):
+        """Identifies the page in cache keys"""
+        after = ':'.join(self.after) if self.after else '-'
+        return f"{self.limit}:{after}"
+
+    @property
+    def ordering(self):
+        return [self.order_field, 'id'] if self.order_field else ['id']
+
+    def paginate(self, queryset):
+        """
+        Order the queryset by the page key, seek past the token, fetch limit + 1 rows
+
+        Unpaged requests keep the endpoint's own ordering.
+        """
+        if not self.paged and not self.after:
+            return queryset
+        queryset = queryset.order_by(*self.ordering)
+        if self.after:
+            order_value, row_id = self.after
+            if self.order_field:
+                field = self.order_field
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': order_value}) | Q(**{field: order_value, 'id__gt': row_id})
+                )
+            else:
+                queryset = queryset.filter(id__gt=row_id)
+        if self.paged:
+            # One extra row tells whether another page follows
+            queryset = queryset[:self.limit + 1]
+        return queryset
+
+    def _key(self, row):
+        if isinstance(row, dict):
+            return (row[self.order_field] if self.order_field else None), row['id']
+        return (getattr(row, self.order_field) if self.order_field else None), row.pk
+
+    def rows(self, rows):
+        """Pass rows (dicts or model instances) through, stopping at the page limit"""
+        for index, row in enumerate(rows):
+            if self.paged:
+                if index >= self.limit:
+                    self.has_more = True
+                    return
+                self.last_key = self._key(row)
+            yield row
+
+    def next_page_token(self):
+        """Token for the next page, None on the last page"""
+        if not self.has_more or self.last_key is None:
+            return None
+        return encode_page_token(self.last_key[0], self.last_key[1], self.fingerprint)
+
+    def next_cursor(self, cursor):
+        """Change cursor is only handed out on the last page"""
+        return None if self.has_more else cursor
@@ -0,0 +1,550 @@
+"""
+Sync Payloads
+Row serializers and promotion payloads shared by the sync endpoints
+and the bundle endpoint
+
+Catalog rows (categories, products, modifiers, options, product
+modifiers) are built from values() projections and read with
+iterator(chunk_size), see the *_rows() generators. A Projection narrows
+them to a subset of their output fields (sparse fieldsets).
+"""
+
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Q
+
+from products import renditions
+from products.models import Product, ModifierOption
+from promotions.models import Promotion
+from promotions.services import precompiled
+from promotions.services.snapshot_cache import promotion_snapshot_cache
+
+
+# Rows fetched per database round trip by the *_rows() generators
+STREAM_CHUNK_SIZE = 500
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def company_data(company):
+    """Company row"""
+    return {
+        'id': str(company.id),
+        'code': company.code,
+        'name': company.name,
+        # Company has no address/phone/tax_id fields, keys kept for Edge compatibility
+        'address': '',
+        'phone': '',
+        'tax_id': '',
+        'timezone': company.timezone,
+        'is_active': company.is_active,
+        'point_expiry_months': company.point_expiry_months,
+        'points_per_currency': str(company.points_per_currency),
+        'created_at': company.created_at.isoformat(),
+        'updated_at': company.updated_at.isoformat(),
+    }
+
+
+def brand_data(brand):
+    """Brand row"""
+    return {
+        'id': str(brand.id),
+        'company_id': str(brand.company.id),
+        'company_code': brand.company.code,
+        'company_name': brand.company.name,
+        'code': brand.code,
+        'name': brand.name,
+        'address': brand.address,
+        'phone': brand.phone,
+        'tax_id': brand.tax_id,
+        'tax_rate': str(brand.tax_rate),
+        'service_charge': str(brand.service_charge),
+        'point_expiry_months_override': brand.point_expiry_months_override,
+        'point_expiry_months': brand.get_point_expiry_months(),
+        'is_active': brand.is_active,
+        'created_at': brand.created_at.isoformat(),
+        'updated_at': brand.updated_at.isoformat(),
+    }
+
+
+def store_data(store):
+    """Store row"""
+    # Get first active brand for legacy compatibility (from prefetched brands, ordered like first())
+    active_brands = [brand for brand in store.brands.all() if brand.is_active]
+    first_brand = min(active_brands, key=lambda brand: brand.pk, default=None)
+    return {
+        'id': str(store.id),
+        'brand_id': str(first_brand.id) if first_brand else None,
+        'brand_code': first_brand.code if first_brand else None,
+        'brand_name': first_brand.name if first_brand else None,
+        'company_id': str(store.company.id),
+        'company_code': store.company.code,
+        'company_name': store.company.name,
+        'store_code': store.store_code,
+        'store_name': store.store_name,
+        'address': store.address,
+        'phone': store.phone,
+        'timezone': store.timezone,
+        'latitude': str(store.latitude) if store.latitude else None,
+        'longitude': str(store.longitude) if store.longitude else None,
+        'is_active': store.is_active,
+        'created_at': store.created_at.isoformat(),
+        'updated_at': store.updated_at.isoformat(),
+    }
+
+
+def store_brand_data(sb):
+    """Store-brand relationship row"""
+    return {
+        'id': str(sb.id),
+        'store_id': str(sb.store_id),
+        'store_code': sb.store.store_code,
+        'store_name': sb.store.store_name,
+        'brand_id': str(sb.brand_id),
+        'brand_code': sb.brand.code,
+        'brand_name': sb.brand.name,
+        'company_id': str(sb.store.company_id),
+        'is_active': sb.is_active,
+        'start_date': sb.start_date.isoformat() if sb.start_date else None,
+        'end_date': sb.end_date.isoformat() if sb.end_date else None,
+        'created_at': sb.created_at.isoformat(),
+        'updated_at': sb.updated_at.isoformat(),
+    }
+
+
+class Column:
+    """
+    Output field of a catalog row: the values() columns it reads and how it is rendered
+
+    native renders the value for binary encodings (UUID, Decimal and
+    datetime kept as is, see sync_api.binary); defaults to render.
+    """
+
+    def __init__(self, sources, render, native=None):
+        self.sources = sources
+        self.render = render
+        self.native = native or render
+
+
+def _value(name):
+    return Column((name,), lambda row, context: row[name])
+
+
+def _text(name):
+    return Column((name,), lambda row, context: row[name] or '')
+
+
+def _raw(name):
+    return lambda row, context: row[name]
+
+
+def _str(name):
+    return Column((name,), lambda row, context: str(row[name]), _raw(name))
+
+
+def _optional_str(name):
+    return Column((name,), lambda row, context: str(row[name]) if row[name] else None, _raw(name))
+
+
+def _iso(name):
+    return Column((name,), lambda row, context: row[name].isoformat(), _raw(name))
+
+
+class Projection:
+    """
+    Output fields of catalog rows and the values() columns they read
+
+    Args:
+        columns: {output field: Column}
+        fields: Output fields to build, in column order (None = all)
+        native: Build native values for a binary encoding instead of strings
+
+    Unrequested fields are neither selected nor rendered, e.g. a product
+    projection without 'image' never builds an absolute URL.
+    """
+
+    def __init__(self, columns, fields=None, native=False):
+        self.columns = columns
+        self.fields = list(columns) if fields is None else [field for field in columns if field in fields]
+        sources = [source for field in self.fields for source in columns[field].sources]
+        self.values = tuple(dict.fromkeys(['id'] + sources))
+        self.native = native
+        self._renderers = [
+            (field, columns[field].native if native else columns[field].render) for field in self.fields
+        ]
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    def build(self, row, context=None):
+        return {field: render(row, context) for field, render in self._renderers}
+
+
+CATEGORY_COLUMNS = {
+    'id': _str('id'),
+    'company_id': _str('brand__company_id'),
+    'brand_id': _str('brand_id'),
+    'name': _value('name'),
+    'parent_id': _optional_str('parent_id'),
+    'icon': _text('icon'),
+    'sort_order': _value('sort_order'),
+    'is_active': _value('is_active'),
+    'created_at': _iso('created_at'),
+    'updated_at': _iso('updated_at'),
+}
+
+CATEGORY = Projection(CATEGORY_COLUMNS)
+CATEGORY_FIELDS = CATEGORY.values
+
+
+def category_data(row, projection=CATEGORY):
+    """Category row (from CATEGORY_FIELDS values)"""
+    return projection.build(row)
+
+
+def category_rows(queryset, projection=CATEGORY, chunk_size=STREAM_CHUNK_SIZE):
+    """Category rows of a queryset, read in chunks"""
+    for row in queryset.values(*projection.values).iterator(chunk_size=chunk_size):
+        yield projection.build(row)
+
+
+def _product_image(row, context):
+    if not row['image']:
+        return None
+    image_storage = Product._meta.get_field('image').storage
+    return context['request'].build_absolute_uri(image_storage.url(row['image']))
+
+
+PRODUCT_COLUMNS = {
+    'id': _str('id'),
+    'company_id': _str('company_id'),
+    'brand_id': _str('brand_id'),
+    'category_id': _optional_str('category_id'),
+    'store_id': Column((), lambda row, context: str(context['store_id'])),  # Add store_id from request context
+    'sku': _value('sku'),
+    'name': _value('name'),
+    'description': _text('description'),
+    'image': Column(('image',), _product_image),
+    'price': _str('price'),
+    'cost': _str('cost'),
+    'printer_target': _value('printer_target'),
+    'track_stock': _value('track_stock'),
+    'stock_quantity': _str('stock_quantity'),
+    'is_active': _value('is_active'),
+    'sort_order': _value('sort_order'),
+    'created_at': _iso('created_at'),
+    'updated_at': _iso('updated_at'),
+}
+
+PRODUCT = Projection(PRODUCT_COLUMNS)
+PRODUCT_FIELDS = PRODUCT.values
+
+
+def product_data(row, request, store_id, projection=PRODUCT):
+    """Product row from PRODUCT_FIELDS values (store_id from request context)"""
+    return projection.build(row, {'request': request, 'store_id': store_id})
+
+
+def product_rows(queryset, request, store_id, projection=PRODUCT, chunk_size=STREAM_CHUNK_SIZE):
+    """Product rows of a queryset, read in chunks"""
+    context = {'request': request, 'store_id': store_id}
+    for row in queryset.values(*projection.values).iterator(chunk_size=chunk_size):
+        yield projection.build(row, context)
+
+
+OPTION_FIELDS = (
+    'id', 'modifier_id', 'name', 'price_adjustment', 'is_default', 'sort_order',
+    'is_active', 'created_at',
+)
+
+
+def _option_data(row):
+    return {
+        'id': str(row['id']),
+        'modifier_id': str(row['modifier_id']),
+        'name': row['name'],
+        'price_adjustment': str(row['price_adjustment']),
+        'is_default': row['is_default'],
+        'sort_order': row['sort_order'],
+        'is_active': row['is_active'],
+        'created_at': row['created_at'].isoformat(),
+    }
+
+
+MODIFIER_COLUMNS = {
+    'id': _str('id'),
+    'brand_id': _str('brand_id'),
+    'company_id': _str('brand__company_id'),
+    'name': _value('name'),
+    'is_required': _value('is_required'),
+    'max_selections': _value('max_selections'),
+    'is_active': _value('is_active'),
+    # Active options, loaded per chunk of modifiers (see modifier_rows)
+    'options': Column((), lambda row, context: context['options'].get(row['id'], [])),
+    'created_at': _iso('created_at'),
+    'updated_at': _iso('updated_at'),
+}
+
+MODIFIER = Projection(MODIFIER_COLUMNS)
+MODIFIER_FIELDS = MODIFIER.values
+
+
+def modifier_data(row, options, projection=MODIFIER):
+    """Modifier row from MODIFIER_FIELDS values with its option rows nested"""
+    return projection.build(row, {'options': {row['id']: options}})
+
+
+def modifier_rows(queryset, projection=MODIFIER, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Modifier rows of a queryset with active options nested
+
+    Options are loaded with one query per chunk of modifiers (none if the
+    projection leaves them out).
+    """
+    values = queryset.values(*projection.values).iterator(chunk_size=chunk_size)
+    for chunk in chunked(values, chunk_size):
+        options = {}
+        if 'options' in projection:
+            option_values = ModifierOption.objects.filter(
+                modifier_id__in=[row['id'] for row in chunk], is_active=True
+            ).order_by('sort_order', 'name').values(*OPTION_FIELDS)
+            for option in option_values:
+                options.setdefault(option['modifier_id'], []).append(_option_data(option))
+        context = {'options': options}
+        for row in chunk:
+            yield projection.build(row, context)
+
+
+MODIFIER_OPTION_COLUMNS = {
+    'id': _str('id'),
+    'modifier_id': _str('modifier_id'),
+    'modifier_name': _value('modifier__name'),
+    'brand_id': _str('modifier__brand_id'),
+    'company_id': _str('modifier__brand__company_id'),
+    'name': _value('name'),
+    'price_adjustment': _str('price_adjustment'),
+    'is_default': _value('is_default'),
+    'sort_order': _value('sort_order'),
+    'is_active': _value('is_active'),
+    'created_at': _iso('created_at'),
+}
+
+MODIFIER_OPTION = Projection(MODIFIER_OPTION_COLUMNS)
+MODIFIER_OPTION_FIELDS = MODIFIER_OPTION.values
+
+
+def modifier_option_data(row, projection=MODIFIER_OPTION):
+    """Modifier option row from MODIFIER_OPTION_FIELDS values"""
+    return projection.build(row)
+
+
+def modifier_option_rows(queryset, projection=MODIFIER_OPTION, chunk_size=STREAM_CHUNK_SIZE):
+    """Modifier option rows of a queryset, read in chunks"""
+    for row in queryset.values(*projection.values).iterator(chunk_size=chunk_size):
+        yield projection.build(row)
+
+
+PRODUCT_MODIFIER_COLUMNS = {
+    'id': _str('id'),
+    'product_id': _str('product_id'),
+    'product_name': _value('product__name'),
+    'product_sku': _value('product__sku'),
+    'brand_id': _str('product__brand_id'),
+    'company_id': _str('product__company_id'),
+    'modifier_id': _str('modifier_id'),
+    'modifier_name': _value('modifier__name'),
+    'sort_order': _value('sort_order'),
+}
+
+PRODUCT_MODIFIER = Projection(PRODUCT_MODIFIER_COLUMNS)
+PRODUCT_MODIFIER_FIELDS = PRODUCT_MODIFIER.values
+
+
+def product_modifier_data(row, projection=PRODUCT_MODIFIER):
+    """Product-modifier relationship row from PRODUCT_MODIFIER_FIELDS values"""
+    return projection.build(row)
+
+
+def product_modifier_rows(queryset, projection=PRODUCT_MODIFIER, chunk_size=STREAM_CHUNK_SIZE):
+    """Product-modifier rows of a queryset, read in chunks"""
+    for row in queryset.values(*projection.values).iterator(chunk_size=chunk_size):
+        yield projection.build(row)
+
+
+def table_area_data(area, request):
+    """Table area row"""
+    return {
+        'id': str(area.id),
+        'company_id': str(area.company_id),
+        'brand_id': str(area.brand_id),
+        'store_id': str(area.store_id),
+        'name': area.name,
+        'description': area.description,
+        'sort_order': area.sort_order,
+        'floor_width': area.floor_width,
+        'floor_height': area.floor_height,
+        'floor_image': request.build_absolute_uri(area.floor_image.url) if area.floor_image else None,
+        'is_active': area.is_active,
+        'created_at': area.created_at.isoformat(),
+        'updated_at': area.updated_at.isoformat(),
+    }
+
+
+def table_data(table):
+    """Table row"""
+    return {
+        'id': str(table.id),
+        'area_id': str(table.area_id),
+        'area_name': table.area.name,
+        'brand_id': str(table.area.brand_id),
+        'company_id': str(table.area.company_id),
+        'store_id': str(table.area.store_id) if table.area.store_id else None,
+        'number': table.number,
+        'capacity': table.capacity,
+        'qr_code': table.qr_code,
+        'pos_x': table.pos_x,
+        'pos_y': table.pos_y,
+        'shape': table.shape,  # Table shape: round, square, rectangle
+        'status': table.status,  # Note: Status managed by Edge
+        'is_active': table.is_active,
+        'created_at': table.created_at.isoformat(),
+        'updated_at': table.updated_at.isoformat(),
+    }
+
+
+def table_group_data(group):
+    """Table group row with its member tables nested"""
+    # Get member tables
+    members = []
+    for member in group.members.all():
+        members.append({
+            'id': str(member.id),
+            'table_id': str(member.table_id),
+            'table_number': member.table.number,
+            'table_area': member.table.area.name,
+        })
+
+    return {
+        'id': str(group.id),
+        'brand_id': str(group.brand_id),
+        'company_id': str(group.brand.company_id),
+        'main_table_id': str(group.main_table_id),
+        'main_table_number': group.main_table.number,
+        'created_by_id': str(group.created_by_id),
+        'created_by_name': group.created_by.get_full_name() if hasattr(group.created_by, 'get_full_name') else str(group.created_by),
+        'created_at': group.created_at.isoformat(),
+        'members': members,
+        'total_members': len(members),
+    }
+
+
+def photo_data(photo):
+    """Product photo row"""
+    return {
+        'id': str(photo.id),
+        'product_id': str(photo.product_id),
+        'product_sku': photo.product.sku,
+        'product_name': photo.product.name,
+        'object_key': photo.object_key,
+        'filename': photo.filename,
+        'size': photo.size,
+        'content_type': photo.content_type,
+        'checksum': photo.checksum,
+        'version': photo.version,
+        'is_primary': photo.is_primary,
+        'sort_order': photo.sort_order,
+        'updated_at': photo.updated_at.isoformat() if photo.updated_at else None,
+        'image_url': photo.image_url,  # Includes cache-busting parameter
+        # Resized copies (thumb / pos / kiosk), empty until generated
+        'renditions': renditions.with_urls(photo.renditions),
+    }
+
+
+def promotion_query(company_id, brand_id, store, sync_settings, now):
+    """Promotion filter for a store/brand according to the company sync settings"""
+    if sync_settings.sync_strategy == 'current_only':
+        # Only promotions valid today
+        query = Q(
+            company_id=company_id,
+            start_date__lte=now.date(),
+            end_date__gte=now.date()
+        )
+    elif sync_settings.sync_strategy == 'include_future':
+        # Promotions valid from past_days ago to future_days ahead
+        query = Q(
+            company_id=company_id,
+            start_date__lte=now.date() + timedelta(days=sync_settings.future_days),
+            end_date__gte=now.date() - timedelta(days=sync_settings.past_days)
+        )
+    else:  # 'all_active'
+        # All active promotions regardless of dates
+        query = Q(company_id=company_id)
+    
+    # Apply active filter based on settings
+    if not sync_settings.include_inactive:
+        query &= Q(is_active=True)
+    
+    # Filter by brand (REQUIRED)
+    query &= Q(brand_id=brand_id)
+    
+    # Filter by store (if provided)
+    if store:
+        query &= (Q(all_stores=True) | Q(stores=store))
+    
+    return query
+
+
+def compiled_promotions(query, sync_settings, snapshot_key=None, page=None):
+    """
+    Compile promotions matching a query
+    
+    Args:
+        query: Q from promotion_query() (plus incremental filters)
+        sync_settings: PromotionSyncSettings
+        snapshot_key: Snapshot cache key, only for full syncs (must include the page)
+        page: pagination.KeysetPage, None compiles every promotion
+    
+    Returns:
+        Tuple (compiled promotions in execution order - highest
+        execution_priority first, then name -, total available, served
+        from snapshot)
+    """
+    if snapshot_key:
+        snapshot = promotion_snapshot_cache.get(snapshot_key)
+        if snapshot is not None:
+            if page:
+                page.has_more, page.last_key = snapshot['has_more'], snapshot['last_key']
+            return snapshot['promotions'], snapshot['total_available'], True
+    
+    promotions = Promotion.objects.filter(query).distinct().order_by('-execution_priority', 'name')
+    total_available = promotions.count()
+    
+    # Pages instead of a hard cap - no promotion is dropped. Pages are cut in
+    # (updated_at, id) order, each page is returned in execution order.
+    if page:
+        promotions = sorted(
+            page.rows(page.paginate(promotions)),
+            key=lambda promotion: (-promotion.execution_priority, promotion.name),
+        )
+    
+    # Precompiled rows (pending ones are compiled in memory)
+    compiled = precompiled.load(promotions)
+    
+    if snapshot_key:
+        promotion_snapshot_cache.set(snapshot_key, {
+            'promotions': compiled,
+            'total_available': total_available,
+            'has_more': page.has_more if page else False,
+            'last_key': page.last_key if page else None,
+        })
+    
+    return compiled, total_available, False
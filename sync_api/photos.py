@@ -0,0 +1,132 @@
+"""
+Content-Addressed Product Photo Manifest
+
+sync_product_photos returns one metadata record (and URL) per photo, so an
+Edge Server compares photos one by one. The manifest describes a store's
+photos by content instead:
+
+- one (product_id, checksum, version, size) tuple per product with a photo
+  (the primary photo, else the first by sort_order)
+- photos are identified by ProductPhoto.checksum (MD5 of the image), so an
+  image shared by several products or brands is one blob, downloaded once
+- the Edge posts what it already has and only gets the tuples that are new
+  or changed, plus the blobs it does not store yet
+
+``have`` is either the Edge's current {product_id: checksum} map, or just
+the list of checksums in its image cache (every tuple is returned then,
+blobs still only for the unknown checksums).
+
+Photos without checksum (legacy uploads) are not part of the manifest.
+Each blob lists its resized renditions (products.renditions) as well.
+
+Usage:
+    entries = photos.store_photos(company_id, brand_ids)
+    diff = photos.manifest_diff(entries, have)
+"""
+
+from products import renditions
+from products.models import ProductPhoto
+
+COLUMNS = ['product_id', 'checksum', 'version', 'size']
+
+
+class HaveError(ValueError):
+    """Malformed ``have`` of a manifest request"""
+
+    code = 'INVALID_HAVE'
+    status_code = 400
+
+
+def _storage():
+    from core.storage import minio_storage
+    return minio_storage
+
+
+def store_photos(company_id, brand_ids):
+    """
+    Photo of every active product of the store's brands
+
+    Returns:
+        List of (product_id, checksum, version, size, object_key, content_type,
+        renditions) ordered by product_id, one per product
+    """
+    rows = ProductPhoto.objects.filter(
+        product__company_id=company_id,
+        product__brand_id__in=brand_ids,
+        product__is_active=True,
+    ).exclude(checksum='').order_by(
+        'product_id', '-is_primary', 'sort_order', 'id'
+    ).values_list('product_id', 'checksum', 'version', 'size', 'object_key', 'content_type', 'renditions')
+
+    entries = []
+    last_product_id = None
+    for product_id, *rest in rows:
+        if product_id != last_product_id:
+            entries.append((str(product_id), *rest))
+            last_product_id = product_id
+    return entries
+
+
+def parse_have(have):
+    """
+    Normalize ``have`` of a request
+
+    Returns:
+        Tuple: ({product_id: checksum}, {checksum}) - the map is empty if
+        only checksums were posted
+    """
+    if have is None:
+        return {}, set()
+    if isinstance(have, dict):
+        if not all(isinstance(value, str) for value in have.values()):
+            raise HaveError('have must map product_id to checksum')
+        return {str(key): value for key, value in have.items()}, set(have.values())
+    if isinstance(have, list):
+        if not all(isinstance(value, str) for value in have):
+            raise HaveError('have must be a list of checksums')
+        return {}, set(have)
+    raise HaveError('have must be a {product_id: checksum} object or a list of checksums')
+
+
+def manifest_diff(entries, have=None):
+    """
+    Tuples and blobs the Edge is missing
+
+    Args:
+        entries: store_photos() result
+        have: Request ``have`` (see parse_have)
+
+    Returns:
+        Dict: photos (new/changed tuples), removed (product_ids of the map
+        without photo now), blobs (one per missing checksum, with its
+        renditions) and counts
+    """
+    current, known = parse_have(have)
+
+    photos = []
+    blobs = {}
+    product_ids = set()
+    storage = _storage()
+    for product_id, checksum, version, size, object_key, content_type, sizes in entries:
+        product_ids.add(product_id)
+        if current.get(product_id) == checksum:
+            continue
+        photos.append([product_id, checksum, version, size])
+        if checksum not in known and checksum not in blobs:
+            blobs[checksum] = {
+                'checksum': checksum,
+                'size': size,
+                'content_type': content_type,
+                'url': storage.get_image_url(object_key),
+                # Resized copies, download only the one the Edge renders
+                'renditions': renditions.with_urls(sizes, storage),
+            }
+
+    return {
+        'columns': COLUMNS,
+        'photos': photos,
+        'removed': sorted(set(current) - product_ids),
+        'blobs': list(blobs.values()),
+        'total': len(entries),
+        'unique': len({entry[1] for entry in entries}),
+    }
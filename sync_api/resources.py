@@ -0,0 +1,442 @@
+"""
+Declarative Sync Resources
+Store scoped catalog endpoints described as data, served by one engine
+
+Every catalog sync endpoint runs the same flow: resolve the store context,
+answer conditional requests, select the changed rows (cursor or
+updated_since), page by keyset, project the rows with values(), report
+deleted ids and stream the envelope. A SyncResource declares what differs
+between endpoints (model, tenant filter, projection, prefetches, ordering,
+cursor field); serve() runs the flow. The queries of a call therefore
+depend on the resource declaration only, never on the number of rows:
+
+- store context: none when warm (see store_context)
+- cursor sync: high water mark, changed ids (+ one per nested resource)
+- rows: one query per STREAM_CHUNK_SIZE rows (+ one per nested/prefetched relation)
+- deleted ids: one query (+ one per nested resource)
+
+The bundle and snapshot builders read the same declarations, so a full
+sync of an endpoint and its bundle section run the same query.
+
+Sparse fieldsets: a request may ask for a subset of the row fields, either
+as an explicit list ("fields": ["id", "name", "price"]) or as a named
+profile of the resource ("profile": "pos"). The values() projection is
+narrowed to the columns those fields read, so both the selected columns
+and the JSON rows shrink. "id" is always included, and so is the keyset
+order field of paged requests.
+
+Usage:
+    @api_view(['POST'])
+    def sync_categories(request):
+        return resources.serve(request, 'categories')
+"""
+
+import logging
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from products.models import Category, Product, Modifier, ModifierOption, ProductModifier, TableGroup
+from sync_api import (
+    binary, changelog, pagination, payloads, store_context, streaming, telemetry, tombstones, versions,
+)
+
+logger = logging.getLogger('promotions.sync_api')
+
+
+class ProjectionError(Exception):
+    """Requested fields or profile cannot be served"""
+    code = 'INVALID_FIELDS'
+    status_code = 400
+
+
+class NestedResource:
+    """
+    Child rows embedded in the rows of a resource (e.g. modifier options)
+
+    A changed child re-sends its parent row; children removed since the
+    last sync are listed under their own deleted key.
+
+    Args:
+        model: Child model
+        change_model: Change log / tombstone model name of the child
+        parent_field: Foreign key of the child to the parent
+        deleted_key: Response key of the removed child ids
+        scope: Filter of the children embedded in a parent row
+    """
+
+    def __init__(self, model, change_model, parent_field, deleted_key, scope=None):
+        self.model = model
+        self.change_model = change_model
+        self.parent_field = parent_field
+        self.deleted_key = deleted_key
+        self.scope = scope if scope is not None else Q()
+
+
+class SyncResource:
+    """
+    Declarative description of a store scoped sync endpoint
+
+    Args:
+        name: Endpoint name, also the response key of the rows
+        model: Synced model
+        change_model: Change log / tombstone model name (see sync_api.tombstones)
+        scope: callable(ctx, brand_ids) -> Q of the rows the store sees
+        columns: {output field: payloads.Column} of values() rows, None reads model instances
+        rows: callable(queryset, request, ctx, projection) -> row dicts (values() rows)
+        serializer: callable(instance) -> row dict (model instances)
+        profiles: {profile name: output fields} of sparse fieldset profiles
+        depends_on: Further change models the rows contain (ETag)
+        order_field: Timestamp of the keyset page and of updated_since, None pages by id
+        ordering: Order of unpaged results (None = model ordering)
+        select_related, prefetch_related: Relations loaded with model instances
+        nested: NestedResource list
+        brand_param: Accept a brand_id narrowing the store's brands
+        full_rows: Rows are always sent in full, cursor/updated_since only select deleted_ids
+    """
+
+    def __init__(self, name, model, change_model, scope, columns=None, rows=None, serializer=None,
+                 profiles=None, depends_on=(), order_field='updated_at', ordering=None, select_related=(),
+                 prefetch_related=(), nested=(), brand_param=False, full_rows=False):
+        self.name = name
+        self.model = model
+        self.change_model = change_model
+        self.scope = scope
+        self.columns = columns
+        self._rows = rows
+        self.serializer = serializer
+        self.profiles = profiles or {}
+        self.version_models = [change_model] + list(depends_on) + versions.STORE_SCOPE_MODELS
+        self.order_field = order_field
+        self.ordering = ordering
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.nested = list(nested)
+        self.brand_param = brand_param
+        self.full_rows = full_rows
+
+    def queryset(self, query):
+        """Unpaged queryset of the rows matching a filter"""
+        queryset = self.model.objects.filter(query)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset
+
+    def projection(self, request, keep=()):
+        """
+        Sparse fieldset of a sync request ("fields" list or "profile" name)
+
+        Args:
+            request: DRF request
+            keep: Fields included whatever was requested
+
+        Returns:
+            payloads.Projection (all fields if none were requested, native
+            values for binary encodings), None for resources read as model instances
+
+        Raises:
+            ProjectionError: unknown field or profile
+        """
+        fields = request.data.get('fields')
+        profile = request.data.get('profile')
+        native = binary.negotiated(request) is not None
+        if self.columns is None:
+            if fields or profile:
+                raise ProjectionError(f"{self.name} rows do not support fields or profile")
+            return None
+
+        if fields:
+            if isinstance(fields, str):
+                fields = fields.split(',')
+            if not isinstance(fields, (list, tuple)):
+                raise ProjectionError('fields must be a list of field names')
+            fields = [str(field).strip() for field in fields if str(field).strip()]
+            unknown = [field for field in fields if field not in self.columns]
+            if unknown:
+                raise ProjectionError(f"Unknown fields for {self.name}: {', '.join(unknown)}")
+        elif profile and profile != 'full':
+            if profile not in self.profiles:
+                raise ProjectionError(f"Unknown profile for {self.name}: {profile}")
+            fields = self.profiles[profile]
+        else:
+            return payloads.Projection(self.columns, native=native)
+        return payloads.Projection(self.columns, set(fields) | {'id'} | set(keep), native=native)
+
+    def rows(self, queryset, request, ctx, projection=None):
+        """Row dicts of a queryset, read in chunks"""
+        if self.columns is not None:
+            return self._rows(queryset, request, ctx, projection or payloads.Projection(self.columns))
+        # Prefetches run once per chunk
+        instances = queryset.iterator(chunk_size=payloads.STREAM_CHUNK_SIZE)
+        return (self.serializer(instance) for instance in instances)
+
+    def store_rows(self, ctx, request):
+        """Every row a store sees, all fields (full sync, bundle and snapshot sections)"""
+        return self.rows(self.queryset(self.scope(ctx, ctx.brand_ids)), request, ctx)
+
+
+REGISTRY = {}
+
+
+def register(resource):
+    """Add a resource to the registry"""
+    REGISTRY[resource.name] = resource
+    return resource
+
+
+register(SyncResource(
+    'categories', Category, tombstones.CATEGORY,
+    scope=lambda ctx, brand_ids: Q(brand_id__in=brand_ids, is_active=True),
+    columns=payloads.CATEGORY_COLUMNS,
+    rows=lambda queryset, request, ctx, projection: payloads.category_rows(queryset, projection),
+    profiles={'pos': ('id', 'brand_id', 'name', 'parent_id', 'icon', 'sort_order', 'is_active')},
+    brand_param=True,
+))
+
+register(SyncResource(
+    'products', Product, tombstones.PRODUCT,
+    # Product does NOT have store_id field, only brand_id
+    scope=lambda ctx, brand_ids: Q(company_id=ctx.company.id, brand_id__in=brand_ids, is_active=True),
+    columns=payloads.PRODUCT_COLUMNS,
+    rows=lambda queryset, request, ctx, projection: payloads.product_rows(
+        queryset, request, ctx.store.id, projection
+    ),
+    # POS terminals: no description, cost, image URL or timestamps
+    profiles={'pos': (
+        'id', 'brand_id', 'category_id', 'sku', 'name', 'price', 'printer_target',
+        'track_stock', 'stock_quantity', 'is_active', 'sort_order',
+    )},
+))
+
+register(SyncResource(
+    'modifiers', Modifier, tombstones.MODIFIER,
+    scope=lambda ctx, brand_ids: Q(brand_id__in=brand_ids, is_active=True),
+    columns=payloads.MODIFIER_COLUMNS,
+    # Options are loaded per chunk of modifiers
+    rows=lambda queryset, request, ctx, projection: payloads.modifier_rows(queryset, projection),
+    profiles={'pos': ('id', 'brand_id', 'name', 'is_required', 'max_selections', 'is_active', 'options')},
+    depends_on=[tombstones.MODIFIER_OPTION],
+    nested=[NestedResource(
+        ModifierOption, tombstones.MODIFIER_OPTION, 'modifier', 'deleted_option_ids', scope=Q(is_active=True)
+    )],
+))
+
+register(SyncResource(
+    'modifier_options', ModifierOption, tombstones.MODIFIER_OPTION,
+    scope=lambda ctx, brand_ids: Q(
+        modifier__brand_id__in=brand_ids, modifier__is_active=True, is_active=True
+    ),
+    columns=payloads.MODIFIER_OPTION_COLUMNS,
+    rows=lambda queryset, request, ctx, projection: payloads.modifier_option_rows(queryset, projection),
+    profiles={'pos': (
+        'id', 'modifier_id', 'name', 'price_adjustment', 'is_default', 'sort_order', 'is_active',
+    )},
+    depends_on=[tombstones.MODIFIER],
+    order_field='created_at',  # ModifierOption doesn't have updated_at
+    ordering=('modifier', 'sort_order'),
+))
+
+register(SyncResource(
+    'product_modifiers', ProductModifier, tombstones.PRODUCT_MODIFIER,
+    scope=lambda ctx, brand_ids: Q(
+        product__company_id=ctx.company.id,
+        product__brand_id__in=brand_ids,
+        product__is_active=True,
+        modifier__is_active=True
+    ),
+    columns=payloads.PRODUCT_MODIFIER_COLUMNS,
+    rows=lambda queryset, request, ctx, projection: payloads.product_modifier_rows(queryset, projection),
+    profiles={'pos': ('id', 'product_id', 'modifier_id', 'sort_order')},
+    depends_on=[tombstones.PRODUCT, tombstones.MODIFIER],
+    order_field=None,  # No timestamps, pages by id
+    ordering=('product', 'sort_order'),
+    full_rows=True,
+))
+
+register(SyncResource(
+    'table_groups', TableGroup, tombstones.TABLE_GROUP,
+    scope=lambda ctx, brand_ids: Q(brand_id__in=brand_ids),
+    serializer=payloads.table_group_data,
+    depends_on=[tombstones.TABLE],
+    order_field='created_at',
+    ordering=('-created_at',),
+    select_related=('brand', 'main_table', 'created_by'),
+    prefetch_related=('members__table__area',),
+))
+
+
+def _error(message, code, status_code=status.HTTP_400_BAD_REQUEST):
+    return Response({'error': message, 'code': code}, status=status_code)
+
+
+def serve(request, name):
+    """
+    Run a sync request for a registered resource
+
+    Request body: company_id, store_id, brand_id (brand_param resources),
+    updated_since, cursor, stream, limit, page_token, fields, profile.
+
+    Returns:
+        Response (streamed if requested), 304 for a matching If-None-Match
+    """
+    resource = REGISTRY[name]
+    try:
+        return _serve(request, resource)
+    except Exception as e:
+        logger.error(f"Error in sync_{resource.name}: {str(e)}", exc_info=True)
+        return _error('Internal server error', 'INTERNAL_ERROR', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _serve(request, resource):
+    company_id = request.data.get('company_id')
+    store_id = request.data.get('store_id')
+
+    if not company_id:
+        return _error('company_id is required in request body', 'MISSING_COMPANY_ID')
+
+    if not store_id:
+        return _error('store_id is required in request body', 'MISSING_STORE_ID')
+
+    # Verify store exists and belongs to company (cached store context)
+    ctx = store_context.resolve(company_id, store_id)
+    if ctx is None:
+        return _error(
+            'Store not found or does not belong to the specified company', 'STORE_NOT_FOUND',
+            status.HTTP_404_NOT_FOUND
+        )
+    store = ctx.store
+
+    updated_since = request.data.get('updated_since')
+    cursor = request.data.get('cursor')
+
+    # Brands operating in this store (food court), optionally narrowed to one
+    brand_id = request.data.get('brand_id') if resource.brand_param else None
+    brand_ids = ctx.brand_ids
+    if brand_id:
+        brand_ids = [b for b in brand_ids if str(b) == str(brand_id)]
+
+    # Keyset pagination on (order_field, id) - optional limit / page_token
+    scope = (company_id, store_id) + ((brand_id,) if resource.brand_param else ()) + (updated_since, cursor)
+    try:
+        page = pagination.KeysetPage(request, resource.name, scope=scope, order_field=resource.order_field)
+    except pagination.PageTokenError as e:
+        return _error(str(e), e.code, e.status_code)
+
+    # Sparse fieldset (paged rows keep the order field for the page token)
+    try:
+        projection = resource.projection(
+            request, keep=[resource.order_field] if page.paged and resource.order_field else []
+        )
+    except ProjectionError as e:
+        return _error(str(e), e.code, e.status_code)
+
+    # Conditional request: skip the querysets if the store's data did not change
+    etag = versions.sync_etag(
+        resource.name, store_id, brand_id, updated_since, cursor, request.get_host(),
+        request.data.get('limit'), request.data.get('page_token'),
+        ','.join(projection.fields) if projection else None, binary.negotiated(request),
+        versions.store_versions(company_id, resource.version_models, brand_ids, store_id),
+    )
+    if versions.etag_matches(request, etag):
+        return versions.not_modified(etag)
+
+    # Cursor based incremental sync (preferred over updated_since)
+    try:
+        since_seq = changelog.decode_cursor(cursor)
+    except changelog.CursorError as e:
+        return _error(str(e), e.code, e.status_code)
+    next_seq = changelog.high_water_mark(company_id, since_seq)
+    telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
+
+    query = resource.scope(ctx, brand_ids)
+    changed_ids = None
+    changed_children = {}
+    updated_since_dt = None
+    if since_seq is not None:
+        changed_ids = changelog.changed_ids(
+            company_id, resource.change_model, since_seq, next_seq, brand_ids=brand_ids
+        )
+        for child in resource.nested:
+            changed_children[child.deleted_key] = changelog.changed_ids(
+                company_id, child.change_model, since_seq, next_seq, brand_ids=brand_ids
+            )
+        if not resource.full_rows:
+            selected = Q(id__in=changed_ids)
+            for child in resource.nested:
+                # A changed child re-sends its parent (children are nested)
+                selected |= Q(id__in=child.model.objects.filter(
+                    id__in=changed_children[child.deleted_key]
+                ).values_list(child.parent_field, flat=True))
+            query &= selected
+    elif updated_since:
+        try:
+            updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            return _error('Invalid updated_since format', 'INVALID_DATE_FORMAT')
+        if not resource.full_rows and resource.order_field:
+            query &= Q(**{f'{resource.order_field}__gte': updated_since_dt})
+
+    # Rows are read in chunks (values projection), streamed if requested
+    rows = streaming.RowStream(
+        page.rows(resource.rows(page.paginate(resource.queryset(query)), request, ctx, projection))
+    )
+
+    def deleted_ids():
+        if changed_ids is not None:
+            return changelog.removed_ids(
+                changed_ids, resource.model.objects.filter(query).values_list('id', flat=True)
+            )
+        if updated_since_dt:
+            return tombstones.deleted_ids_since(
+                company_id, resource.change_model, updated_since_dt, brand_ids=brand_ids
+            )
+        return []
+
+    def deleted_child_ids(child):
+        def deleted():
+            if changed_ids is not None:
+                changed = changed_children[child.deleted_key]
+                return changelog.removed_ids(changed, child.model.objects.filter(
+                    child.scope, id__in=changed,
+                    **{f'{child.parent_field}__in': resource.model.objects.filter(query)}
+                ).values_list('id', flat=True))
+            if updated_since_dt:
+                return tombstones.deleted_ids_since(
+                    company_id, child.change_model, updated_since_dt, brand_ids=brand_ids
+                )
+            return []
+        return deleted
+
+    tombstones.record_store_sync(
+        store.id, resource.change_model, *[child.change_model for child in resource.nested]
+    )
+
+    envelope = {resource.name: rows, 'deleted_ids': deleted_ids}
+    for child in resource.nested:
+        envelope[child.deleted_key] = deleted_child_ids(child)
+    sync_filter = {'company_id': str(company_id), 'store_id': str(store_id)}
+    if resource.brand_param:
+        sync_filter['brand_id'] = str(brand_id) if brand_id else None
+    envelope.update({
+        'next_cursor': lambda: page.next_cursor(changelog.encode_cursor(next_seq)),
+        'sync_timestamp': timezone.now().isoformat(),
+        'total': lambda: rows.count,
+        'has_more': lambda: page.has_more,
+        'next_page_token': page.next_page_token,
+        'filter': sync_filter,
+        'store': {
+            'id': str(store.id),
+            'code': store.store_code,
+            'name': store.store_name,
+        },
+    })
+    return streaming.sync_response(
+        request, envelope, company_id, etag=etag, sync_settings=ctx.sync_settings, next_seq=next_seq
+    )
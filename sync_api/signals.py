@@ -0,0 +1,219 @@
+"""
+Sync API Signals
+Record deletion tombstones, change log rows and data versions for every
+model synced to Edge Servers, and invalidate cached store contexts
+"""
+
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, m2m_changed
+
+from core.models import Brand, Company, Store, StoreBrand
+from products.models import (
+    Category, Product, ProductPhoto, Modifier, ModifierOption, ProductModifier,
+    TableArea, Tables, TableGroup,
+)
+from promotions.models import Promotion, PromotionTier, PackagePromotion, PackageItem
+from promotions.models_settings import PromotionSyncSettings
+from promotions.signals import COMPILED_M2M_FIELDS
+from sync_api import changelog, store_context, tombstones, versions
+
+
+def _brand_company_id(brand_id):
+    return Brand.objects.filter(id=brand_id).values_list('company_id', flat=True).first()
+
+
+def _store_company_id(store_id):
+    return Store.objects.filter(id=store_id).values_list('company_id', flat=True).first()
+
+
+def _product_scope(product_id):
+    row = Product.objects.filter(id=product_id).values_list('company_id', 'brand_id', 'brand__company_id').first()
+    if not row:
+        return None, None, None
+    company_id, brand_id, brand_company_id = row
+    return company_id or brand_company_id, brand_id, None
+
+
+def _modifier_scope(modifier_id):
+    row = Modifier.objects.filter(id=modifier_id).values_list('brand__company_id', 'brand_id').first()
+    if not row:
+        return None, None, None
+    return row[0], row[1], None
+
+
+def _area_scope(area_id):
+    row = TableArea.objects.filter(id=area_id).values_list(
+        'company_id', 'brand__company_id', 'brand_id', 'store_id'
+    ).first()
+    if not row:
+        return None, None, None
+    company_id, brand_company_id, brand_id, store_id = row
+    return company_id or brand_company_id, brand_id, store_id
+
+
+# model class -> (tombstone model name, scope resolver returning (company_id, brand_id, store_id))
+SYNCED_MODELS = {
+    Promotion: (tombstones.PROMOTION, lambda i: (i.company_id, i.brand_id, None)),
+    Product: (tombstones.PRODUCT, lambda i: (i.company_id or _brand_company_id(i.brand_id), i.brand_id, None)),
+    Category: (tombstones.CATEGORY, lambda i: (_brand_company_id(i.brand_id), i.brand_id, None)),
+    Modifier: (tombstones.MODIFIER, lambda i: (_brand_company_id(i.brand_id), i.brand_id, None)),
+    ModifierOption: (tombstones.MODIFIER_OPTION, lambda i: _modifier_scope(i.modifier_id)),
+    ProductModifier: (tombstones.PRODUCT_MODIFIER, lambda i: _product_scope(i.product_id)),
+    TableArea: (tombstones.TABLE_AREA, lambda i: (i.company_id or _brand_company_id(i.brand_id), i.brand_id, i.store_id)),
+    Tables: (tombstones.TABLE, lambda i: _area_scope(i.area_id)),
+    TableGroup: (tombstones.TABLE_GROUP, lambda i: (_brand_company_id(i.brand_id), i.brand_id, None)),
+    ProductPhoto: (tombstones.PRODUCT_PHOTO, lambda i: _product_scope(i.product_id)),
+    Store: (tombstones.STORE, lambda i: (i.company_id, None, i.id)),
+    Brand: (tombstones.BRAND, lambda i: (i.company_id, i.id, None)),
+    StoreBrand: (tombstones.STORE_BRAND, lambda i: (_store_company_id(i.store_id), i.brand_id, i.store_id)),
+}
+
+
+def _record(sender, instance, reason):
+    model_name, resolve_scope = SYNCED_MODELS[sender]
+    company_id, brand_id, store_id = resolve_scope(instance)
+    tombstones.record_tombstone(
+        model_name, instance.pk, company_id,
+        brand_id=brand_id, store_id=store_id, reason=reason,
+    )
+
+
+def _record_change(sender, instance, action):
+    model_name, resolve_scope = SYNCED_MODELS[sender]
+    company_id, brand_id, store_id = resolve_scope(instance)
+    changelog.record_change(
+        model_name, instance.pk, company_id,
+        brand_id=brand_id, store_id=store_id, action=action,
+    )
+    versions.bump_version(model_name, company_id, brand_id=brand_id, store_id=store_id)
+
+
+def _record_promotion_changes(promotion_ids):
+    """Tier/package/M2M change - the compiled promotion changed"""
+    for promotion in Promotion.objects.filter(id__in=promotion_ids).only('id', 'company_id', 'brand_id'):
+        _record_change(Promotion, promotion, 'upsert')
+
+
+def synced_model_post_init(sender, instance, **kwargs):
+    """Remember the loaded is_active, so saves detect transitions without a query"""
+    instance._sync_loaded_active = instance.__dict__.get('is_active')
+
+
+def synced_model_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Detect is_active transitions (deactivation is a deletion for Edge)"""
+    instance._sync_was_active = None
+    if instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    was_active = getattr(instance, '_sync_loaded_active', None)
+    if was_active is None:
+        # Loaded with is_active deferred
+        was_active = sender.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+    instance._sync_was_active = was_active
+
+
+def synced_model_post_save(sender, instance, created, update_fields=None, **kwargs):
+    """Append change log row, record deactivation / clear tombstones on reactivation"""
+    _record_change(sender, instance, 'upsert')
+
+    if hasattr(instance, '_sync_loaded_active') and (update_fields is None or 'is_active' in update_fields):
+        instance._sync_loaded_active = instance.is_active
+    was_active = getattr(instance, '_sync_was_active', None)
+    if created or was_active is None:
+        return
+    if was_active and not instance.is_active:
+        _record(sender, instance, 'deactivated')
+    elif not was_active and instance.is_active:
+        tombstones.clear_tombstones(SYNCED_MODELS[sender][0], instance.pk)
+
+
+def synced_model_post_delete(sender, instance, **kwargs):
+    """Record deletion"""
+    _record(sender, instance, 'deleted')
+    _record_change(sender, instance, 'delete')
+
+
+def promotion_child_changed(sender, instance, **kwargs):
+    """Tier or package saved/deleted"""
+    _record_promotion_changes([instance.promotion_id])
+
+
+def package_item_changed(sender, instance, **kwargs):
+    """Package component saved/deleted"""
+    _record_promotion_changes(
+        PackagePromotion.objects.filter(id=instance.package_id).values_list('promotion_id', flat=True)
+    )
+
+
+def promotion_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Promotion M2M changed (forward or reverse side)"""
+    if action in ('post_add', 'post_remove'):
+        _record_promotion_changes(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear' and reverse:
+        # pk_set is empty on clear(), collect the promotions before the rows are gone
+        field = next(f for f in sender._meta.fields if f.is_relation and f.related_model is type(instance))
+        instance._sync_cleared_promotion_ids = list(
+            sender.objects.filter(**{field.name: instance.pk}).values_list('promotion_id', flat=True)
+        )
+    elif action == 'post_clear':
+        _record_promotion_changes(
+            getattr(instance, '_sync_cleared_promotion_ids', []) if reverse else [instance.pk]
+        )
+
+
+def promotion_settings_changed(sender, instance, **kwargs):
+    """Sync window changed - the promotion set of every store may differ"""
+    versions.bump_version(versions.PROMOTION_SETTINGS, instance.company_id)
+
+
+# model class -> company of the store contexts a change affects
+STORE_CONTEXT_MODELS = {
+    Company: lambda i: i.pk,
+    Store: lambda i: i.company_id,
+    Brand: lambda i: i.company_id,
+    StoreBrand: lambda i: _store_company_id(i.store_id),
+    PromotionSyncSettings: lambda i: i.company_id,
+}
+
+
+def store_context_changed(sender, instance, **kwargs):
+    """Store, brand assignment or sync settings changed"""
+    store_context.invalidate(STORE_CONTEXT_MODELS[sender](instance))
+
+
+def store_brands_m2m_changed(sender, instance, action, **kwargs):
+    """store.brands / brand.stores changed without StoreBrand saves"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        store_context.invalidate(instance.company_id)
+
+
+def promotion_m2m_row_deleted(sender, instance, **kwargs):
+    """Through row deleted by cascade (e.g. a Product was deleted)"""
+    _record_promotion_changes([instance.promotion_id])
+
+
+for _model in SYNCED_MODELS:
+    _uid = f'sync_tombstone_{_model._meta.label_lower}'
+    post_delete.connect(synced_model_post_delete, sender=_model, dispatch_uid=f'{_uid}_delete')
+    post_save.connect(synced_model_post_save, sender=_model, dispatch_uid=f'{_uid}_post_save')
+    if any(field.name == 'is_active' for field in _model._meta.fields):
+        post_init.connect(synced_model_post_init, sender=_model, dispatch_uid=f'{_uid}_post_init')
+        pre_save.connect(synced_model_pre_save, sender=_model, dispatch_uid=f'{_uid}_pre_save')
+
+for _model in (PromotionTier, PackagePromotion):
+    post_save.connect(promotion_child_changed, sender=_model, dispatch_uid=f'sync_change_{_model._meta.label_lower}_save')
+    post_delete.connect(promotion_child_changed, sender=_model, dispatch_uid=f'sync_change_{_model._meta.label_lower}_delete')
+post_save.connect(package_item_changed, sender=PackageItem, dispatch_uid='sync_change_package_item_save')
+post_delete.connect(package_item_changed, sender=PackageItem, dispatch_uid='sync_change_package_item_delete')
+post_save.connect(promotion_settings_changed, sender=PromotionSyncSettings, dispatch_uid='sync_version_promotion_settings')
+
+for _field_name in COMPILED_M2M_FIELDS:
+    _through = getattr(Promotion, _field_name).through
+    m2m_changed.connect(promotion_m2m_changed, sender=_through, dispatch_uid=f'sync_change_m2m_{_field_name}')
+    post_delete.connect(promotion_m2m_row_deleted, sender=_through, dispatch_uid=f'sync_change_m2m_row_{_field_name}')
+
+for _model in STORE_CONTEXT_MODELS:
+    _uid = f'sync_store_context_{_model._meta.label_lower}'
+    post_save.connect(store_context_changed, sender=_model, dispatch_uid=f'{_uid}_save')
+    post_delete.connect(store_context_changed, sender=_model, dispatch_uid=f'{_uid}_delete')
+m2m_changed.connect(store_brands_m2m_changed, sender=StoreBrand, dispatch_uid='sync_store_context_store_brands_m2m')
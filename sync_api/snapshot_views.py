@@ -0,0 +1,376 @@
+"""
+Sync Snapshot API Views
+Prebuilt per-store snapshot artifacts for Edge Server bootstrap
+
+The Edge asks for the latest snapshot of its store, downloads the object
+(directly from MinIO or through the download endpoint, with Range for
+resume), verifies the SHA-256 checksum and then syncs deltas from the
+snapshot's next_cursor on the live endpoints.
+
+An Edge that already holds a snapshot version asks the delta endpoint for
+the patches up to the latest version instead of downloading it again.
+"""
+
+import logging
+import re
+from urllib.parse import urlencode
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from sync_api import changelog, compression, deltas, snapshots
+from sync_api.models import SyncSnapshot
+
+logger = logging.getLogger('promotions.sync_api')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Lifetime of the direct download URL
+DOWNLOAD_URL_EXPIRES = 60 * 60
+
+
+def snapshot_etag(snapshot):
+    return f'"{snapshot.checksum}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single byte range
+
+    Returns:
+        Tuple (first byte, last byte), or None to send the whole object
+
+    Raises:
+        ValueError: range cannot be satisfied
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match:
+        # No range, or several ranges: the full object is sent
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError('Range not satisfiable')
+    return first, last
+
+
+def snapshot_data(snapshot, request):
+    """Snapshot metadata row"""
+    try:
+        download_url = snapshots._storage().get_sync_snapshot_url(
+            snapshot.object_key, expires=DOWNLOAD_URL_EXPIRES
+        )
+    except Exception as e:
+        logger.warning(f"Presigned snapshot URL failed: {str(e)}")
+        download_url = None
+    return {
+        'id': str(snapshot.id),
+        'version': snapshot.version,
+        'format': snapshot.format,
+        'size': snapshot.size,
+        'checksum': snapshot.checksum,
+        'checksum_algorithm': 'sha256',
+        'sections': snapshot.sections,
+        'row_counts': snapshot.row_counts,
+        # Issued at build time: a snapshot older than the change log retention gets an expired cursor
+        'next_cursor': changelog.encode_cursor(snapshot.change_seq, issued_at=snapshot.created_at),
+        'created_at': snapshot.created_at.isoformat(),
+        'download_url': download_url,
+        # Same snapshot through the API (Range / If-Range resume)
+        'proxy_url': request.build_absolute_uri(
+            reverse('sync_api_v1:snapshot_download') + '?' + urlencode({
+                'company_id': snapshot.company_id,
+                'store_id': snapshot.store_id,
+                'version': snapshot.version,
+            })
+        ),
+    }
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'company_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Company UUID'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID'
+                },
+                'version': {
+                    'type': 'string',
+                    'description': 'Version of the snapshot the Edge already has (optional)'
+                }
+            },
+            'required': ['company_id', 'store_id']
+        }
+    },
+    examples=[
+        OpenApiExample(
+            'Latest Snapshot',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here'
+            }
+        )
+    ],
+    tags=['Sync API - Master Data']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_snapshot(request):
+    """
+    Get the latest prebuilt snapshot of a store
+
+    POST /api/v1/sync/snapshot/
+
+    Returns:
+        - snapshot: version, size, checksum, next_cursor, download_url, proxy_url
+        - unchanged: True if the Edge already has this version
+
+    404 SNAPSHOT_NOT_AVAILABLE: no snapshot built yet, use the bundle endpoint
+    """
+    try:
+        company_id = request.data.get('company_id')
+        store_id = request.data.get('store_id')
+
+        if not company_id:
+            return Response({
+                'error': 'company_id is required in request body',
+                'code': 'MISSING_COMPANY_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not store_id:
+            return Response({
+                'error': 'store_id is required in request body',
+                'code': 'MISSING_STORE_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = SyncSnapshot.objects.filter(
+            company_id=company_id, store_id=store_id, store__is_active=True
+        ).order_by('-created_at').first()
+        if snapshot is None:
+            return Response({
+                'error': 'No snapshot available for this store, use the bundle endpoint',
+                'code': 'SNAPSHOT_NOT_AVAILABLE'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'snapshot': snapshot_data(snapshot, request),
+            'unchanged': request.data.get('version') == snapshot.version,
+        })
+
+    except Exception as e:
+        logger.error(f"Error in sync_snapshot: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'Internal server error',
+            'code': 'INTERNAL_ERROR'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter('company_id', str, required=True, description='Company UUID'),
+        OpenApiParameter('store_id', str, required=True, description='Store UUID'),
+        OpenApiParameter('version', str, required=True, description='Snapshot version'),
+    ],
+    responses={200: bytes, 206: bytes},
+    tags=['Sync API - Master Data']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_snapshot(request):
+    """
+    Download a snapshot object (gzipped NDJSON)
+
+    GET /api/v1/sync/snapshot/download/?company_id=&store_id=&version=
+
+    Supports Range (single range) and If-Range for resuming an interrupted
+    download. ETag is the quoted SHA-256 checksum.
+    """
+    try:
+        snapshot = SyncSnapshot.objects.filter(
+            company_id=request.query_params.get('company_id'),
+            store_id=request.query_params.get('store_id'),
+            version=request.query_params.get('version'),
+        ).first()
+    except Exception:
+        snapshot = None
+    if snapshot is None:
+        return Response({
+            'error': 'Snapshot not found',
+            'code': 'SNAPSHOT_NOT_FOUND'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    etag = snapshot_etag(snapshot)
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range.strip() != etag:
+        # Partial copy of another object: start over
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, snapshot.size)
+    except ValueError:
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response['Content-Range'] = f"bytes */{snapshot.size}"
+        return response
+
+    if byte_range:
+        first, last = byte_range
+        length = last - first + 1
+        response = StreamingHttpResponse(
+            snapshots.iter_object(snapshot.object_key, offset=first, length=length),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type='application/gzip'
+        )
+        response['Content-Range'] = f"bytes {first}-{last}/{snapshot.size}"
+    else:
+        length = snapshot.size
+        response = StreamingHttpResponse(
+            snapshots.iter_object(snapshot.object_key), content_type='application/gzip'
+        )
+
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'attachment; filename="snapshot-{snapshot.version}.{snapshot.format}"'
+    return response
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'company_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Company UUID'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID'
+                },
+                'from_version': {
+                    'type': 'string',
+                    'description': 'Snapshot version the Edge holds (also accepted as query parameter)'
+                }
+            },
+            'required': ['company_id', 'store_id', 'from_version']
+        }
+    },
+    examples=[
+        OpenApiExample(
+            'Patch To Latest',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here',
+                'from_version': '5d41402abc4b2a76b9719d911017c592'
+            }
+        )
+    ],
+    tags=['Sync API - Master Data']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_delta(request):
+    """
+    Get the patches from a snapshot version to the latest one
+
+    POST /api/v1/sync/delta/?from_version=...
+
+    Returns:
+        - mode: "unchanged", "delta" or "snapshot"
+        - patches: [{"from_version", "to_version", "ops"}] oldest first (mode "delta")
+        - snapshot: latest snapshot metadata (mode "snapshot": the chain is
+          unknown or too long, download the full snapshot)
+        - version / next_cursor: latest snapshot version and its change cursor
+    """
+    try:
+        company_id = request.data.get('company_id')
+        store_id = request.data.get('store_id')
+        from_version = request.data.get('from_version', request.query_params.get('from_version'))
+
+        if not company_id:
+            return Response({
+                'error': 'company_id is required in request body',
+                'code': 'MISSING_COMPANY_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not store_id:
+            return Response({
+                'error': 'store_id is required in request body',
+                'code': 'MISSING_STORE_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not from_version:
+            return Response({
+                'error': 'from_version is required',
+                'code': 'MISSING_FROM_VERSION'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = SyncSnapshot.objects.filter(
+            company_id=company_id, store_id=store_id, store__is_active=True
+        ).order_by('-created_at').first()
+        if snapshot is None:
+            return Response({
+                'error': 'No snapshot available for this store, use the bundle endpoint',
+                'code': 'SNAPSHOT_NOT_AVAILABLE'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        chain = deltas.delta_chain(snapshot, from_version)
+        response_data = {
+            'from_version': from_version,
+            'version': snapshot.version,
+            'next_cursor': changelog.encode_cursor(snapshot.change_seq, issued_at=snapshot.created_at),
+        }
+        if chain is None:
+            response_data.update({'mode': 'snapshot', 'snapshot': snapshot_data(snapshot, request)})
+        elif not chain:
+            response_data['mode'] = 'unchanged'
+        else:
+            response_data.update({
+                'mode': 'delta',
+                'patches': [
+                    {'from_version': delta.from_version, 'to_version': delta.to_version, 'ops': delta.ops}
+                    for delta in chain
+                ],
+            })
+
+        logger.info(
+            f"Delta sync: store={store_id}, from={from_version[:12]}, "
+            f"to={snapshot.version[:12]}, mode={response_data['mode']}"
+        )
+
+        return compression.respond(
+            request, company_id, response_data,
+            cache_key=f"delta:{store_id}:{from_version}:{snapshot.id}" if chain else None
+        )
+
+    except Exception as e:
+        logger.error(f"Error in sync_delta: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'Internal server error',
+            'code': 'INTERNAL_ERROR'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,270 @@
+"""
+Prebuilt Store Sync Snapshots
+Immutable per-store sync artifacts built by Celery and served from MinIO
+
+Bootstrapping an Edge Server from the live endpoints makes PostgreSQL
+assemble the whole catalog for every store. A snapshot is built once per
+store data version instead:
+
+- one gzipped NDJSON object per (store, version) in the sync bucket:
+  a header line, then one line per row: {"section": "products", "data": {...}}
+- rows are the same as the bundle endpoint (same section builders)
+- version = digest of the bundle section versions, so an unchanged store
+  is not rebuilt
+- the SyncSnapshot row records object key, SHA-256 checksum, size and the
+  change log sequence the snapshot covers; its cursor is issued at build
+  time, so it expires with the change log retention like any other cursor
+  (unchanged snapshots are rebuilt after MAX_SNAPSHOT_AGE_DAYS)
+- the delta from the store's previous snapshot is kept (sync_api.deltas)
+
+The Edge downloads the object (direct presigned URL or the download
+endpoint, both support Range for resume), verifies the checksum, then
+continues with cursor based incremental sync from the snapshot cursor.
+
+Usage:
+    snapshot = snapshots.build_snapshot(store)
+    snapshot = snapshots.latest_snapshot(store_id)
+"""
+
+import gzip
+import hashlib
+import logging
+import tempfile
+from datetime import timedelta
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Store
+from sync_api import changelog, deltas, store_context
+from sync_api.bundle_views import BUNDLE_SECTIONS, BundleContext, section_versions
+from sync_api.models import SyncSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 'ndjson.gz'
+FORMAT_VERSION = 1
+
+# Snapshots kept per store (older ones are deleted with their object)
+KEEP_SNAPSHOTS = 3
+
+# Unchanged snapshots are rebuilt after this long, so the cursor they hand
+# out stays well inside the change log retention
+MAX_SNAPSHOT_AGE_DAYS = changelog.CHANGE_LOG_RETENTION_DAYS // 2
+
+# Spooled in memory up to this size, then on disk
+SPOOL_SIZE = 8 * 1024 * 1024
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def _storage():
+    from core.storage import minio_storage
+    return minio_storage
+
+
+class SnapshotRequest:
+    """Stand-in for the HTTP request the section builders expect"""
+
+    data = {}
+
+    def build_absolute_uri(self, location):
+        return urljoin(settings.SYNC_SNAPSHOT_BASE_URL, location)
+
+
+def bundle_context(store):
+    """Bundle context of a store outside a request (same store context as the live endpoints)"""
+    resolved = store_context.resolve(store.company_id, store.id, active_only=False)
+    if resolved is None:
+        raise Store.DoesNotExist(f"Store {store.id} not found")
+    return BundleContext(
+        SnapshotRequest(), resolved.company, resolved.store, resolved.brand_ids, resolved.sync_settings,
+    )
+
+
+def snapshot_version(section_versions_):
+    """Snapshot version from the section versions"""
+    raw = '|'.join(f"{name}={version}" for name, version in sorted(section_versions_.items()))
+    return hashlib.sha256(f"{FORMAT_VERSION}|{raw}".encode()).hexdigest()[:32]
+
+
+def object_key(store, version, checksum):
+    # Checksum in the key: a concurrent build never overwrites a recorded object
+    return f"stores/{store.id}/{version}-{checksum[:16]}.{SNAPSHOT_FORMAT}"
+
+
+class _HashingWriter:
+    """File wrapper hashing and counting the bytes written"""
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+def write_snapshot(ctx, versions, change_seq, file):
+    """
+    Write the gzipped NDJSON snapshot of a store to a file
+
+    Returns:
+        Tuple (sha256 hex digest, size in bytes, rows per section)
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    writer = _HashingWriter(file)
+    counts = {}
+    with gzip.GzipFile(fileobj=writer, mode='wb', compresslevel=6, mtime=0) as out:
+        header = {
+            'type': 'header',
+            'format': FORMAT_VERSION,
+            'company_id': str(ctx.company.id),
+            'store_id': str(ctx.store.id),
+            'version': snapshot_version(versions),
+            'sections': versions,
+            'next_cursor': changelog.encode_cursor(change_seq, issued_at=ctx.now),
+            'generated_at': ctx.now.isoformat(),
+        }
+        out.write((encoder.encode(header) + '\n').encode())
+        for name, (builder, _models) in BUNDLE_SECTIONS.items():
+            counts[name] = 0
+            for row in builder(ctx):
+                out.write((encoder.encode({'section': name, 'data': row}) + '\n').encode())
+                counts[name] += 1
+    return writer.sha256.hexdigest(), writer.size, counts
+
+
+def build_snapshot(store, force=False):
+    """
+    Build and upload the snapshot of a store, unless its version exists
+
+    Args:
+        store: Store instance
+        force: Rebuild even if a recent snapshot of the current version exists
+
+    Returns:
+        Tuple (SyncSnapshot, built)
+    """
+    ctx = bundle_context(store)
+    # Cursor and versions are taken before any data is read
+    change_seq = changelog.high_water_mark(store.company_id)
+    versions = section_versions(ctx, list(BUNDLE_SECTIONS))
+    version = snapshot_version(versions)
+
+    existing = SyncSnapshot.objects.filter(store=store, version=version).first()
+    max_age = timezone.now() - timedelta(days=MAX_SNAPSHOT_AGE_DAYS)
+    if existing and not force and existing.created_at >= max_age:
+        return existing, False
+
+    previous = latest_snapshot(store.id)
+    if previous and previous.version == version:
+        previous = None
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as file:
+        checksum, size, counts = write_snapshot(ctx, versions, change_seq, file)
+        key = object_key(store, version, checksum)
+        file.seek(0)
+        _storage().upload_sync_snapshot(file, key, size)
+        if previous:
+            file.seek(0)
+            new_rows = deltas.read_rows([file.read()])
+
+    if existing:
+        _storage().delete_sync_snapshot(existing.object_key)
+        existing.delete()
+    try:
+        snapshot = SyncSnapshot.objects.create(
+            company_id=store.company_id,
+            store=store,
+            version=version,
+            sections=versions,
+            row_counts=counts,
+            change_seq=change_seq,
+            object_key=key,
+            checksum=checksum,
+            size=size,
+            format=SNAPSHOT_FORMAT,
+        )
+    except IntegrityError:
+        # Built concurrently - keep the recorded one
+        _storage().delete_sync_snapshot(key)
+        return SyncSnapshot.objects.get(store=store, version=version), False
+
+    if previous:
+        try:
+            old_rows = deltas.read_rows(iter_object(previous.object_key))
+            deltas.record_delta(previous, snapshot, old_rows, new_rows)
+        except Exception as e:
+            # No delta: Edges on the previous version download the snapshot
+            logger.warning(f"Sync snapshot delta of store {store.store_code} skipped: {str(e)}")
+
+    logger.info(
+        f"Sync snapshot built: store={store.store_code}, version={version[:12]}, "
+        f"size={size}, rows={sum(counts.values())}"
+    )
+    return snapshot, True
+
+
+def build_snapshots(company_id=None, force=False):
+    """
+    Build snapshots of every active store
+
+    Returns:
+        Dict: {'built': int, 'unchanged': int, 'failed': int}
+    """
+    stores = Store.objects.filter(is_active=True).select_related('company')
+    if company_id:
+        stores = stores.filter(company_id=company_id)
+
+    result = {'built': 0, 'unchanged': 0, 'failed': 0}
+    for store in stores:
+        try:
+            _snapshot, built = build_snapshot(store, force=force)
+            result['built' if built else 'unchanged'] += 1
+        except Exception as e:
+            logger.error(f"Sync snapshot of store {store.store_code} failed: {str(e)}", exc_info=True)
+            result['failed'] += 1
+    return result
+
+
+def latest_snapshot(store_id):
+    """Newest snapshot of a store, or None"""
+    return SyncSnapshot.objects.filter(store_id=store_id).order_by('-created_at').first()
+
+
+def prune_snapshots(keep=KEEP_SNAPSHOTS):
+    """
+    Delete all but the newest snapshots of each store (rows and objects)
+
+    Returns:
+        Number of deleted snapshots
+    """
+    deleted = 0
+    store_ids = SyncSnapshot.objects.values_list('store_id', flat=True).distinct()
+    for store_id in store_ids:
+        old = SyncSnapshot.objects.filter(store_id=store_id).order_by('-created_at')[keep:]
+        for snapshot in list(old):
+            _storage().delete_sync_snapshot(snapshot.object_key)
+            snapshot.delete()
+            deleted += 1
+    logger.info(f"Pruned {deleted} sync snapshots")
+    return deleted
+
+
+def iter_object(key, offset=0, length=0, chunk_size=COPY_BUFFER_SIZE):
+    """Stream a byte range of a snapshot object from MinIO"""
+    response = _storage().open_sync_snapshot(key, offset=offset, length=length)
+    try:
+        for chunk in response.stream(chunk_size):
+            yield chunk
+    finally:
+        response.close()
+        response.release_conn()
@@ -0,0 +1,179 @@
+"""
+Store Context Resolver
+Store, company, active brand ids and sync settings of a sync request
+
+Every sync endpoint starts by loading the store, the brands operating in
+it and (for promotions) the company sync settings: 2-4 queries per call.
+The resolved context is cached in two levels:
+
+- Redis (default cache), key versioned by a per-company generation
+- an in-process LRU, valid while the company generation is unchanged
+
+A save/delete of Company, Store, StoreBrand, Brand or PromotionSyncSettings
+bumps the company generation once the transaction commits (see
+sync_api.signals), so both levels miss on the next call. A warm call costs
+one cache read and no query.
+
+Usage:
+    ctx = store_context.resolve(company_id, store_id)
+    if ctx is None:
+        return 404 STORE_NOT_FOUND
+    ctx.store, ctx.company, ctx.brand_ids, ctx.sync_settings
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.models import Brand, Store
+from promotions.models_settings import PromotionSyncSettings
+
+KEY_PREFIX = 'sync_ctx'
+CACHE_ALIAS = 'default'
+
+# Redis copy lifetime (the generation makes stale entries unreachable anyway)
+CONTEXT_TIMEOUT = 60 * 60
+
+# Contexts kept per worker process
+LRU_SIZE = 2048
+
+
+class StoreContext:
+    """Resolved store context (picklable, shared between requests)"""
+
+    def __init__(self, store, brand_ids, sync_settings):
+        self.store = store
+        self.company = store.company
+        self.brand_ids = brand_ids
+        self.sync_settings = sync_settings
+
+    @property
+    def store_id(self):
+        return self.store.id
+
+    @property
+    def company_id(self):
+        return self.store.company_id
+
+
+class _LRU:
+    """Small thread safe LRU of (generation, context)"""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != generation:
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, generation, value):
+        with self._lock:
+            self._items[key] = (generation, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_local = _LRU(LRU_SIZE)
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(company_id):
+    return f"{KEY_PREFIX}:gen:{company_id}"
+
+
+def _context_key(company_id, store_id, generation):
+    return f"{KEY_PREFIX}:{company_id}:{store_id}:{generation}"
+
+
+def _generation(company_id):
+    cache = _cache()
+    key = _generation_key(company_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Seeded from the clock: never reuses a generation after a cache flush
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _load(company_id, store_id):
+    try:
+        store = Store.objects.select_related('company').get(id=store_id, company_id=company_id)
+    except (Store.DoesNotExist, ValueError, ValidationError):
+        return None
+    brand_ids = list(Brand.objects.filter(
+        company_id=company_id,
+        is_active=True,
+        stores__id=store_id
+    ).values_list('id', flat=True))
+    return StoreContext(store, brand_ids, PromotionSyncSettings.get_for_company(store.company))
+
+
+def resolve(company_id, store_id, active_only=True):
+    """
+    Get the context of a store
+
+    Args:
+        company_id: Company UUID the store must belong to
+        store_id: Store UUID
+        active_only: Treat inactive stores as not found
+
+    Returns:
+        StoreContext, or None if the store does not exist in the company
+    """
+    try:
+        company_id, store_id = str(uuid.UUID(str(company_id))), str(uuid.UUID(str(store_id)))
+    except ValueError:
+        return None
+
+    generation = _generation(company_id)
+    local_key = (company_id, store_id)
+    ctx = _local.get(local_key, generation)
+    if ctx is None:
+        key = _context_key(company_id, store_id, generation)
+        ctx = _cache().get(key)
+        if ctx is None:
+            ctx = _load(company_id, store_id)
+            if ctx is None:
+                return None
+            _cache().set(key, ctx, timeout=CONTEXT_TIMEOUT)
+        _local.set(local_key, generation, ctx)
+
+    if active_only and not ctx.store.is_active:
+        return None
+    return ctx
+
+
+def invalidate(company_id):
+    """Drop the cached contexts of a company's stores once the transaction commits"""
+    if not company_id:
+        return
+    key = _generation_key(company_id)
+
+    def _bump():
+        cache = _cache()
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), timeout=None)
+
+    transaction.on_commit(_bump)
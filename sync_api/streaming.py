@@ -0,0 +1,126 @@
+"""
+Streaming Sync Responses
+Large sync payloads written to the client row by row
+
+Sync endpoints describe their response as an envelope dict:
+- a RowStream value is the row list, produced lazily from the *_rows()
+  generators in sync_api.payloads (values() + iterator(chunk_size))
+- callable values (total, has_more, ...) are evaluated after the rows were
+  written, so they can use the row count and page state
+- everything else is a plain JSON value
+
+With "stream": true in the request body the envelope is encoded
+incrementally into a StreamingHttpResponse and worker memory stays flat
+regardless of the catalog size. Otherwise it is resolved into a normal
+DRF Response (same JSON). Both are compressed when negotiated, see
+sync_api.compression.
+
+Usage:
+    rows = streaming.RowStream(payloads.product_rows(queryset, request, store_id))
+    return streaming.sync_response(request, {
+        'products': rows,
+        'total': lambda: rows.count,
+    }, company_id, etag=etag)
+"""
+
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from sync_api import binary, compression, telemetry
+
+# Encoded bytes collected before a chunk is written to the client
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class RowStream:
+    """Row generator that counts the rows it produced"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def wants_stream(request):
+    """Did the client ask for a streamed response"""
+    value = request.data.get('stream', request.query_params.get('stream'))
+    return value in (True, 1, '1', 'true', 'True')
+
+
+def resolve(envelope):
+    """Evaluate an envelope into plain JSON values (rows first, then callables)"""
+    data = {}
+    for key, value in envelope.items():
+        if isinstance(value, RowStream):
+            value = list(value)
+        elif callable(value):
+            value = value()
+        data[key] = value
+    return data
+
+
+def iter_json(envelope):
+    """Encode an envelope as JSON text chunks, one row at a time"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for index, (key, value) in enumerate(envelope.items()):
+        yield ('{' if index == 0 else ',') + json.dumps(key) + ':'
+        if isinstance(value, RowStream):
+            yield '['
+            for row_index, row in enumerate(value):
+                yield (',' if row_index else '') + encoder.encode(row)
+            yield ']'
+        else:
+            yield encoder.encode(value() if callable(value) else value)
+    yield '}' if envelope else '{}'
+
+
+def _buffered(parts, size=STREAM_BUFFER_SIZE):
+    buffer = []
+    buffered = 0
+    for part in parts:
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def sync_response(request, envelope, company_id, etag=None, sync_settings=None, next_seq=None):
+    """
+    Streamed or regular response for a sync envelope, compressed if negotiated
+
+    sync_settings: PromotionSyncSettings if already loaded (store context),
+    saves the compression setting query
+    next_seq: High water mark of the envelope's next_cursor (see
+    compression.respond)
+    """
+    # Binary encodings are compact enough to be sent in one piece
+    if not wants_stream(request) or binary.negotiated(request):
+        return compression.respond(
+            request, company_id, resolve(envelope), etag=etag, sync_settings=sync_settings,
+            next_seq=next_seq,
+        )
+
+    telemetry.annotate(request, rows=lambda: sum(
+        value.count for value in envelope.values() if isinstance(value, RowStream)
+    ))
+    chunks = _buffered(iter_json(envelope))
+    codec = compression.response_codec(request, company_id, sync_settings)
+    if codec:
+        chunks = compression.compress_stream(chunks, codec)
+    response = StreamingHttpResponse(chunks, content_type='application/json')
+    if codec:
+        response['Content-Encoding'] = codec
+    response['Vary'] = 'Accept, Accept-Encoding'
+    if etag:
+        response['ETag'] = etag
+    return response
@@ -4,7 +4,7 @@ URLs for Edge Server synchronization
 """
 
 from django.urls import path
-from sync_api import sync_views
+from sync_api import sync_views, bundle_views, snapshot_views
 
 app_name = 'sync_api'
 
@@ -20,6 +20,10 @@ urlpatterns = [
     path('table-areas/', sync_views.sync_table_areas, name='table_areas'),  # Areas only
     path('table-groups/', sync_views.sync_table_groups, name='table_groups'),  # Table groups
     path('version/', sync_views.sync_version, name='version'),
+    path('bundle/', bundle_views.sync_bundle, name='bundle'),  # All sections in one call
+    path('snapshot/', snapshot_views.sync_snapshot, name='snapshot'),  # Prebuilt store snapshot
+    path('snapshot/download/', snapshot_views.download_snapshot, name='snapshot_download'),
+    path('delta/', snapshot_views.sync_delta, name='delta'),  # Patches between snapshot versions
     
     # Upload endpoints
     path('usage/', sync_views.upload_usage, name='upload_usage'),
@@ -32,4 +36,5 @@ urlpatterns = [
     
     # Product Photo Sync endpoint
     path('product-photos/', sync_views.sync_product_photos, name='product_photos'),
+    path('product-photos/manifest/', sync_views.sync_photo_manifest, name='photo_manifest'),
 ]
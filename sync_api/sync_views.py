@@ -9,16 +9,19 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from django.db.models import Q
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
 from promotions.models import Promotion
-from promotions.models_settings import PromotionSyncSettings
-from promotions.services.compiler import PromotionCompiler
+from promotions.services import lookup_index
+from promotions.services.snapshot_cache import promotion_snapshot_cache
 from core.models import Store, Company, Brand, StoreBrand
-from products.models import Category, Product
-from datetime import timedelta
+from sync_api import (
+    binary, changelog, compression, notifications, pagination, payloads, photos, resources, store_context, telemetry,
+    tombstones, versions,
+)
+from sync_api.bundle_views import endpoint_versions
 import logging
 
 logger = logging.getLogger('promotions.sync_api')
@@ -48,6 +51,18 @@ logger = logging.getLogger('promotions.sync_api')
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -83,14 +98,28 @@ def sync_promotions(request):
         "company_id": "uuid",
         "store_id": "uuid",
         "brand_id": "uuid"  // Optional
-        "updated_since": "2026-01-29T00:00:00Z"  // Optional
+        "updated_since": "2026-01-29T00:00:00Z",  // Optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page
     }
     
     Returns:
-        - promotions: List of compiled promotion JSON
+        - promotions: List of compiled promotion JSON, in execution order
+          (execution_priority descending, then name) within the response
+        - indexes: Lookup indexes of the store's promotions (promotions.services.lookup_index),
+          full single-page syncs only; after incremental or paged syncs the
+          Edge rebuilds them from its merged promotion list
         - deleted_ids: List of deleted promotion IDs
+        - next_cursor: Cursor for the next incremental sync (last page only)
         - sync_timestamp: Current server timestamp
         - total: Total number of promotions
+        - has_more / next_page_token: Pages of max_promotions_per_sync (default page size)
+    
+    Pages are cut in (updated_at, id) order, so a store with more than
+    max_promotions_per_sync promotions receives them over several pages:
+    the Edge merges the pages and sorts them by execution_priority (then
+    name) before evaluating, and rebuilds the lookup indexes.
     """
     try:
         # Get parameters from POST request body
@@ -112,63 +141,64 @@ def sync_promotions(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.prefetch_related('brands').get(id=store_id, company_id=company_id)
-            # Get brand_id from first active brand if not provided
-            if not brand_id:
-                first_brand = store.brands.filter(is_active=True).first()
-                brand_id = first_brand.id if first_brand else None
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached store context)
+        ctx = store_context.resolve(company_id, store_id, active_only=False)
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
+        # Get brand_id from first active brand if not provided
+        if not brand_id:
+            brand_id = ctx.brand_ids[0] if ctx.brand_ids else None
         
-        # Get sync settings for company
-        try:
-            company = Company.objects.get(id=company_id)
-            sync_settings = PromotionSyncSettings.get_for_company(company)
-        except Company.DoesNotExist:
-            return Response({
-                'error': 'Company not found',
-                'code': 'COMPANY_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
+        # Sync settings for company
+        sync_settings = ctx.sync_settings
         
-        # Build query based on sync strategy
+        # Conditional request: skip compiling if nothing changed for this store/brand
         now = timezone.now()
+        etag = versions.sync_etag(
+            'promotions', store_id, brand_id, updated_since, request.data.get('cursor'),
+            request.data.get('limit'), request.data.get('page_token'),
+            sync_settings.sync_strategy, sync_settings.future_days, sync_settings.past_days,
+            sync_settings.include_inactive, sync_settings.max_promotions_per_sync,
+            now.date() if sync_settings.sync_strategy != 'all_active' else '-', binary.negotiated(request),
+            versions.store_versions(
+                company_id, [tombstones.PROMOTION] + versions.STORE_SCOPE_MODELS, [brand_id], store_id
+            ),
+        )
+        if versions.etag_matches(request, etag):
+            return versions.not_modified(etag)
         
-        if sync_settings.sync_strategy == 'current_only':
-            # Only promotions valid today
-            query = Q(
-                company_id=company_id,
-                start_date__lte=now.date(),
-                end_date__gte=now.date()
-            )
-        elif sync_settings.sync_strategy == 'include_future':
-            # Promotions valid from past_days ago to future_days ahead
-            query = Q(
-                company_id=company_id,
-                start_date__lte=now.date() + timedelta(days=sync_settings.future_days),
-                end_date__gte=now.date() - timedelta(days=sync_settings.past_days)
-            )
-        else:  # 'all_active'
-            # All active promotions regardless of dates
-            query = Q(company_id=company_id)
-        
-        # Apply active filter based on settings
-        if not sync_settings.include_inactive:
-            query &= Q(is_active=True)
+        # Cursor based incremental sync (preferred over updated_since)
+        try:
+            since_seq = changelog.decode_cursor(request.data.get('cursor'))
+        except changelog.CursorError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        next_seq = changelog.high_water_mark(company_id, since_seq)
+        telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
         
-        # Filter by brand (REQUIRED)
-        query &= Q(brand_id=brand_id)
+        # Keyset pagination on (updated_at, id), max_promotions_per_sync per page
+        try:
+            page = pagination.KeysetPage(
+                request, 'promotions',
+                scope=(company_id, brand_id, store_id, updated_since, request.data.get('cursor')),
+                default_limit=min(sync_settings.max_promotions_per_sync, pagination.MAX_PAGE_SIZE),
+            )
+        except pagination.PageTokenError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
         
-        # Filter by store (if provided)
-        if store:
-            query &= (Q(all_stores=True) | Q(stores=store))
+        # Build query based on sync strategy
+        query = payloads.promotion_query(company_id, brand_id, store, sync_settings, now)
         
         # Incremental sync
-        if updated_since:
+        if since_seq is not None:
+            changed_ids = changelog.changed_ids(
+                company_id, tombstones.PROMOTION, since_seq, next_seq, brand_ids=[brand_id]
+            )
+            query &= Q(id__in=changed_ids)
+        elif updated_since:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -178,37 +208,48 @@ def sync_promotions(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get promotions with limit from settings
-        promotions = Promotion.objects.filter(query).distinct().order_by('-execution_priority', 'name')
-        
-        # Apply max promotions limit
-        total_available = promotions.count()
-        promotions = promotions[:sync_settings.max_promotions_per_sync]
-        
-        # Compile promotions
-        compiler = PromotionCompiler()
-        compiled_promotions = compiler.compile_multiple(promotions)
+        # Full sync is served from the compiled snapshot cache
+        snapshot_key = None
+        if not updated_since and since_seq is None:
+            snapshot_key = promotion_snapshot_cache.build_key(
+                company_id, brand_id, store_id, sync_settings, now.date(), page=page.cache_key
+            )
+        compiled_promotions, total_available, snapshot_hit = payloads.compiled_promotions(
+            query, sync_settings, snapshot_key, page=page
+        )
         
         # Get deleted IDs (if incremental sync)
         deleted_ids = []
-        if updated_since:
-            # TODO: Track deleted promotions in a separate table
-            # For now, return empty list
-            pass
+        if since_seq is not None:
+            deleted_ids = changelog.removed_ids(
+                changed_ids, Promotion.objects.filter(query).values_list('id', flat=True)
+            )
+        elif updated_since:
+            deleted_ids = tombstones.deleted_ids_since(
+                company_id, tombstones.PROMOTION, updated_since_dt,
+                brand_ids=[brand_id],
+                # Inactive promotions are still synced when include_inactive is on
+                reasons=['deleted'] if sync_settings.include_inactive else None,
+            )
         
+        tombstones.record_store_sync(store.id, tombstones.PROMOTION, synced_at=now)
         sync_timestamp = now.isoformat()
         
         logger.info(
             f"Sync request: company={company_id}, brand={brand_id}, store={store.store_code if store else 'ALL'}, "
-            f"strategy={sync_settings.sync_strategy}, promotions={len(compiled_promotions)}/{total_available}"
+            f"strategy={sync_settings.sync_strategy}, promotions={len(compiled_promotions)}/{total_available}, "
+            f"snapshot={'hit' if snapshot_hit else 'miss'}"
         )
         
         response_data = {
             'promotions': compiled_promotions,
             'deleted_ids': deleted_ids,
+            'next_cursor': page.next_cursor(changelog.encode_cursor(next_seq)),
             'sync_timestamp': sync_timestamp,
             'total': len(compiled_promotions),
             'total_available': total_available,
+            'has_more': page.has_more,
+            'next_page_token': page.next_page_token(),
             'settings': {
                 'strategy': sync_settings.sync_strategy,
                 'future_days': sync_settings.future_days,
@@ -222,6 +263,10 @@ def sync_promotions(request):
             }
         }
         
+        # Lookup indexes only cover a complete set: full sync in a single page
+        if since_seq is None and not updated_since and not page.after and not page.has_more:
+            response_data['indexes'] = lookup_index.build(compiled_promotions)
+        
         # Add store info if provided
         if store:
             response_data['store'] = {
@@ -230,7 +275,11 @@ def sync_promotions(request):
                 'name': store.store_name
             }
         
-        return Response(response_data)
+        headers = {'X-Snapshot-Cache': 'HIT' if snapshot_hit else 'MISS'} if snapshot_key else None
+        return compression.respond(
+            request, company_id, response_data, etag=etag, sync_settings=sync_settings, headers=headers,
+            next_seq=next_seq,
+        )
         
     except Exception as e:
         logger.error(f"Error in sync_promotions: {str(e)}", exc_info=True)
@@ -265,6 +314,31 @@ def sync_promotions(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream the JSON response row by row for large catalogs (optional)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
+                'fields': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'Row fields to return, id is always included (optional)'
+                },
+                'profile': {
+                    'type': 'string',
+                    'description': 'Named field profile, e.g. "pos" (optional, ignored if fields is given)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -302,102 +376,16 @@ def sync_categories(request):
         "company_id": "uuid",
         "store_id": "uuid",
         "brand_id": "uuid",  // optional
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "stream": true,  // optional, stream the JSON row by row
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page,
+        "fields": ["id", "name"],  // optional, sparse fieldset
+        "profile": "pos"  // optional, named field profile
     }
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        brand_id = request.data.get('brand_id')
-        updated_since = request.data.get('updated_since')
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Build query - filter by brands in this store
-        query = Q(brand_id__in=store_brands, is_active=True)
-        
-        # If specific brand_id provided, filter further
-        if brand_id:
-            query &= Q(brand_id=brand_id)
-        
-        if updated_since:
-            try:
-                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
-                query &= Q(updated_at__gte=updated_since_dt)
-            except (ValueError, AttributeError):
-                return Response({
-                    'error': 'Invalid updated_since format',
-                    'code': 'INVALID_DATE_FORMAT'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        categories = Category.objects.filter(query).select_related('brand')
-        
-        # Convert to list and rename brand__company_id to company_id
-        category_list = []
-        for cat in categories:
-            category_list.append({
-                'id': str(cat.id),
-                'company_id': str(cat.brand.company_id),
-                'brand_id': str(cat.brand_id),
-                'name': cat.name,
-                'parent_id': str(cat.parent_id) if cat.parent_id else None,
-                'icon': cat.icon or '',
-                'sort_order': cat.sort_order,
-                'is_active': cat.is_active,
-                'created_at': cat.created_at.isoformat(),
-                'updated_at': cat.updated_at.isoformat(),
-            })
-        
-        return Response({
-            'categories': category_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(category_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-                'brand_id': str(brand_id) if brand_id else None,
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_categories: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'categories')
 
 
 @extend_schema(
@@ -419,6 +407,31 @@ def sync_categories(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream the JSON response row by row for large catalogs (optional)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
+                'fields': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'Row fields to return, id is always included (optional)'
+                },
+                'profile': {
+                    'type': 'string',
+                    'description': 'Named field profile, e.g. "pos" (optional, ignored if fields is given)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -431,6 +444,14 @@ def sync_categories(request):
                 'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
                 'store_id': 'uuid-here'
             }
+        ),
+        OpenApiExample(
+            'Sync Products for POS',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here',
+                'profile': 'pos'
+            }
         )
     ],
     tags=['Sync API - Master Data']
@@ -447,105 +468,16 @@ def sync_products(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "stream": true,  // optional, stream the JSON row by row
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page,
+        "fields": ["id", "name"],  // optional, sparse fieldset
+        "profile": "pos"  // optional, named field profile
     }
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        updated_since = request.data.get('updated_since')
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Build query - filter by company and brands operating in this store
-        # Note: Product does NOT have store_id field, only brand_id
-        query = Q(company_id=company_id, brand_id__in=store_brands, is_active=True)
-        
-        if updated_since:
-            try:
-                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
-                query &= Q(updated_at__gte=updated_since_dt)
-            except (ValueError, AttributeError):
-                return Response({
-                    'error': 'Invalid updated_since format',
-                    'code': 'INVALID_DATE_FORMAT'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        products = Product.objects.filter(query).select_related('category')
-        
-        # Convert to list and add store_id from context
-        product_list = []
-        for prod in products:
-            product_list.append({
-                'id': str(prod.id),
-                'company_id': str(prod.company_id),
-                'brand_id': str(prod.brand_id),
-                'category_id': str(prod.category_id) if prod.category_id else None,
-                'store_id': str(store_id),  # Add store_id from request context
-                'sku': prod.sku,
-                'name': prod.name,
-                'description': prod.description or '',
-                'image': request.build_absolute_uri(prod.image.url) if prod.image else None,
-                'price': str(prod.price),
-                'cost': str(prod.cost),
-                'printer_target': prod.printer_target,
-                'track_stock': prod.track_stock,
-                'stock_quantity': str(prod.stock_quantity),
-                'is_active': prod.is_active,
-                'sort_order': prod.sort_order,
-                'created_at': prod.created_at.isoformat(),
-                'updated_at': prod.updated_at.isoformat(),
-            })
-        
-        return Response({
-            'products': product_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(product_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_products: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'products')
 
 
 @extend_schema(
@@ -557,6 +489,11 @@ def sync_products(request):
                     'type': 'string',
                     'format': 'uuid',
                     'description': 'Company UUID to get version info'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID - adds store and brand scopes (optional)'
                 }
             },
             'required': ['company_id']
@@ -566,6 +503,13 @@ def sync_products(request):
         OpenApiExample(
             'Get Version Info',
             value={'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97'}
+        ),
+        OpenApiExample(
+            'Get Store Version Vector',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': '7c9e6679-7425-40de-944b-e07fc1f90ae7'
+            }
         )
     ],
     tags=['Sync API - Master Data']
@@ -580,35 +524,57 @@ def sync_version(request):
     
     Request Body:
     {
-        "company_id": "uuid"
+        "company_id": "uuid",
+        "store_id": "uuid"  // Optional
     }
     
-    Returns current data version to help Edge Server decide if sync is needed
+    Returns the data version vector to help Edge Server decide which
+    endpoints need a sync:
+    - versions: counters per entity type for the company, unscoped records
+      and (with store_id) each brand of the store and the store itself
+    - endpoints: version per sync endpoint as seen by the store; call only
+      the endpoints whose value differs from the previous poll
+    - notifications: URL of the change notification stream (sync_api.asgi);
+      while connected, fetch on notification and poll at the safety interval
+    
+    Counters are maintained on every save (sync_api.versions), no table scans.
     """
     try:
         company_id = request.data.get('company_id')
+        store_id = request.data.get('store_id')
         
         if not company_id:
             return Response({
                 'error': 'company_id is required in request body'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get latest promotion update
-        latest_promotion = Promotion.objects.filter(
-            company_id=company_id
-        ).order_by('-updated_at').first()
+        brand_ids = []
+        if store_id:
+            ctx = store_context.resolve(company_id, store_id)
+            brand_ids = ctx.brand_ids if ctx else []
         
-        if latest_promotion:
-            last_updated = latest_promotion.updated_at
-            version = int(last_updated.timestamp())
-        else:
-            last_updated = timezone.now()
-            version = 0
+        now = timezone.now()
+        vector, endpoints = endpoint_versions(company_id, brand_ids, store_id, now.date())
         
+        changed_at = {
+            model: datetime.fromtimestamp(value, tz=dt_timezone.utc).isoformat() if value else None
+            for model, value in vector.pop('changed_at').items()
+        }
         return Response({
-            'version': version,
-            'last_updated': last_updated.isoformat(),
-            'force_update': False
+            # Kept for Edge Servers that only track promotions
+            'version': vector['company'][tombstones.PROMOTION],
+            'last_updated': changed_at[tombstones.PROMOTION] or now.isoformat(),
+            'force_update': False,
+            'versions': vector,
+            'changed_at': changed_at,
+            'endpoints': endpoints,
+            'store_id': store_id,
+            'brand_ids': [str(brand_id) for brand_id in brand_ids],
+            # Change notifications (SSE / WebSocket); poll at the safety interval while connected
+            'notifications': {
+                'url': notifications.PATH,
+                'safety_poll_seconds': notifications.SAFETY_POLL_SECONDS,
+            },
         })
         
     except Exception as e:
@@ -801,20 +767,7 @@ def sync_companies(request):
         
         company_list = []
         for company in companies:
-            company_list.append({
-                'id': str(company.id),
-                'code': company.code,
-                'name': company.name,
-                'address': company.address or '',
-                'phone': company.phone or '',
-                'tax_id': company.tax_id or '',
-                'timezone': company.timezone,
-                'is_active': company.is_active,
-                'point_expiry_months': company.point_expiry_months,
-                'points_per_currency': str(company.points_per_currency),
-                'created_at': company.created_at.isoformat(),
-                'updated_at': company.updated_at.isoformat(),
-            })
+            company_list.append(payloads.company_data(company))
         
         return Response({
             'companies': company_list,
@@ -921,19 +874,18 @@ def sync_brands(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached store context)
+        ctx = store_context.resolve(company_id, store_id)
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
         
         # Validate company exists
-        try:
-            company = Company.objects.get(id=company_id, is_active=True)
-        except Company.DoesNotExist:
+        company = ctx.company
+        if not company.is_active:
             return Response({
                 'error': f'Company not found: {company_id}',
                 'code': 'COMPANY_NOT_FOUND'
@@ -949,24 +901,7 @@ def sync_brands(request):
         
         brand_list = []
         for brand in brands:
-            brand_list.append({
-                'id': str(brand.id),
-                'company_id': str(brand.company.id),
-                'company_code': brand.company.code,
-                'company_name': brand.company.name,
-                'code': brand.code,
-                'name': brand.name,
-                'address': brand.address,
-                'phone': brand.phone,
-                'tax_id': brand.tax_id,
-                'tax_rate': str(brand.tax_rate),
-                'service_charge': str(brand.service_charge),
-                'point_expiry_months_override': brand.point_expiry_months_override,
-                'point_expiry_months': brand.get_point_expiry_months(),
-                'is_active': brand.is_active,
-                'created_at': brand.created_at.isoformat(),
-                'updated_at': brand.updated_at.isoformat(),
-            })
+            brand_list.append(payloads.brand_data(brand))
         
         return Response({
             'brands': brand_list,
@@ -1092,14 +1027,14 @@ def sync_stores(request):
         query = Q(company_id=company_id, is_active=True)
         
         if store_id:
-            # Verify store exists and belongs to company
-            try:
-                store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-            except Store.DoesNotExist:
+            # Verify store exists and belongs to company (cached store context)
+            ctx = store_context.resolve(company_id, store_id)
+            if ctx is None:
                 return Response({
                     'error': 'Store not found or does not belong to the specified company',
                     'code': 'STORE_NOT_FOUND'
                 }, status=status.HTTP_404_NOT_FOUND)
+            store = ctx.store
             
             # Build query for stores - filter by specific store
             query &= Q(id=store_id)
@@ -1109,27 +1044,7 @@ def sync_stores(request):
         
         store_list = []
         for store in stores:
-            # Get first active brand for legacy compatibility
-            first_brand = store.brands.filter(is_active=True).first()
-            store_list.append({
-                'id': str(store.id),
-                'brand_id': str(first_brand.id) if first_brand else None,
-                'brand_code': first_brand.code if first_brand else None,
-                'brand_name': first_brand.name if first_brand else None,
-                'company_id': str(store.company.id),
-                'company_code': store.company.code,
-                'company_name': store.company.name,
-                'store_code': store.store_code,
-                'store_name': store.store_name,
-                'address': store.address,
-                'phone': store.phone,
-                'timezone': store.timezone,
-                'latitude': str(store.latitude) if store.latitude else None,
-                'longitude': str(store.longitude) if store.longitude else None,
-                'is_active': store.is_active,
-                'created_at': store.created_at.isoformat(),
-                'updated_at': store.updated_at.isoformat(),
-            })
+            store_list.append(payloads.store_data(store))
         
         return Response({
             'stores': store_list,
@@ -1281,23 +1196,22 @@ def sync_store_brands(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Validate company exists
-        try:
-            company = Company.objects.get(id=company_id, is_active=True)
-        except Company.DoesNotExist:
+        # Validate company exists (store context carries it)
+        ctx = store_context.resolve(company_id, store_id)
+        company = ctx.company if ctx else Company.objects.filter(id=company_id).first()
+        if company is None or not company.is_active:
             return Response({
                 'error': f'Company not found: {company_id}',
                 'code': 'COMPANY_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Validate store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
         
         # Build query - filter by company and store
         query = Q(store_id=store_id, store__company_id=company_id, store__is_active=True)
@@ -1320,21 +1234,7 @@ def sync_store_brands(request):
         
         store_brand_list = []
         for sb in store_brands:
-            store_brand_list.append({
-                'id': str(sb.id),
-                'store_id': str(sb.store_id),
-                'store_code': sb.store.store_code,
-                'store_name': sb.store.store_name,
-                'brand_id': str(sb.brand_id),
-                'brand_code': sb.brand.code,
-                'brand_name': sb.brand.name,
-                'company_id': str(sb.store.company_id),
-                'is_active': sb.is_active,
-                'start_date': sb.start_date.isoformat() if sb.start_date else None,
-                'end_date': sb.end_date.isoformat() if sb.end_date else None,
-                'created_at': sb.created_at.isoformat(),
-                'updated_at': sb.updated_at.isoformat(),
-            })
+            store_brand_list.append(payloads.store_brand_data(sb))
         
         return Response({
             'store_brands': store_brand_list,
@@ -1384,6 +1284,10 @@ def sync_store_brands(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -1410,7 +1314,8 @@ def sync_tables(request):
     Body: {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // Optional
+        "updated_since": "2026-01-29T00:00:00Z",  // Optional
+        "cursor": "..."  // optional, next_cursor of the previous sync
     }
     
     Returns:
@@ -1439,24 +1344,31 @@ def sync_tables(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached store context)
+        ctx = store_context.resolve(company_id, store_id)
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
         
         # Import models
         from products.models import TableArea, Tables
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = ctx.brand_ids
+        
+        # Conditional request: skip the querysets if the store's data did not change
+        etag = versions.sync_etag(
+            'tables', store_id, updated_since, request.data.get('cursor'), request.get_host(),
+            binary.negotiated(request),
+            versions.store_versions(
+                company_id, [tombstones.TABLE_AREA, tombstones.TABLE] + versions.STORE_SCOPE_MODELS, store_brands, store_id
+            ),
+        )
+        if versions.etag_matches(request, etag):
+            return versions.not_modified(etag)
         
         # Build query for table areas - get tables from all brands in this store
         areas_query = Q(
@@ -1466,8 +1378,27 @@ def sync_tables(request):
             is_active=True
         )
         
+        # Cursor based incremental sync (preferred over updated_since)
+        try:
+            since_seq = changelog.decode_cursor(request.data.get('cursor'))
+        except changelog.CursorError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        next_seq = changelog.high_water_mark(company_id, since_seq)
+        telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
+        
         # Incremental sync for areas
-        if updated_since:
+        all_areas_query = areas_query
+        if since_seq is not None:
+            changed_area_ids = changelog.changed_ids(
+                company_id, tombstones.TABLE_AREA, since_seq, next_seq,
+                brand_ids=store_brands, store_id=store.id,
+            )
+            changed_table_ids = changelog.changed_ids(
+                company_id, tombstones.TABLE, since_seq, next_seq,
+                brand_ids=store_brands, store_id=store.id,
+            )
+            areas_query &= Q(id__in=changed_area_ids)
+        elif updated_since:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 areas_query &= Q(updated_at__gte=updated_since_dt)
@@ -1482,60 +1413,55 @@ def sync_tables(request):
         
         area_list = []
         for area in table_areas:
-            area_list.append({
-                'id': str(area.id),
-                'company_id': str(area.company_id),
-                'brand_id': str(area.brand_id),
-                'store_id': str(area.store_id),
-                'name': area.name,
-                'description': area.description,
-                'sort_order': area.sort_order,
-                'floor_width': area.floor_width,
-                'floor_height': area.floor_height,
-                'floor_image': request.build_absolute_uri(area.floor_image.url) if area.floor_image else None,
-                'is_active': area.is_active,
-                'created_at': area.created_at.isoformat(),
-                'updated_at': area.updated_at.isoformat(),
-            })
+            area_list.append(payloads.table_area_data(area, request))
         
         # Get tables for these areas
         area_ids = [area.id for area in table_areas]
         tables_query = Q(area_id__in=area_ids, is_active=True)
         
-        if updated_since:
+        if since_seq is not None:
+            # Changed tables may belong to areas that did not change
+            tables_query = Q(
+                area__in=TableArea.objects.filter(all_areas_query),
+                id__in=changed_table_ids,
+                is_active=True,
+            )
+        elif updated_since:
             tables_query &= Q(updated_at__gte=updated_since_dt)
         
         tables = Tables.objects.filter(tables_query).select_related('area').order_by('area', 'number')
         
         table_list = []
         for table in tables:
-            table_list.append({
-                'id': str(table.id),
-                'area_id': str(table.area_id),
-                'area_name': table.area.name,
-                'brand_id': str(table.area.brand_id),
-                'company_id': str(table.area.company_id),
-                'store_id': str(table.area.store_id) if table.area.store_id else None,
-                'number': table.number,
-                'capacity': table.capacity,
-                'qr_code': table.qr_code,
-                'pos_x': table.pos_x,
-                'pos_y': table.pos_y,
-                'shape': table.shape,  # Table shape: round, square, rectangle
-                'status': table.status,  # Note: Status managed by Edge
-                'is_active': table.is_active,
-                'created_at': table.created_at.isoformat(),
-                'updated_at': table.updated_at.isoformat(),
-            })
+            table_list.append(payloads.table_data(table))
         
         logger.info(
             f"Tables sync: company={company_id}, store={store.store_code}, "
             f"areas={len(area_list)}, tables={len(table_list)}"
         )
         
+        deleted_area_ids = []
+        deleted_table_ids = []
+        if since_seq is not None:
+            deleted_area_ids = changelog.removed_ids(changed_area_ids, [area['id'] for area in area_list])
+            deleted_table_ids = changelog.removed_ids(changed_table_ids, [table['id'] for table in table_list])
+        elif updated_since:
+            deleted_area_ids = tombstones.deleted_ids_since(
+                company_id, tombstones.TABLE_AREA, updated_since_dt,
+                brand_ids=store_brands, store_id=store.id,
+            )
+            deleted_table_ids = tombstones.deleted_ids_since(
+                company_id, tombstones.TABLE, updated_since_dt,
+                brand_ids=store_brands, store_id=store.id,
+            )
+        tombstones.record_store_sync(store.id, tombstones.TABLE_AREA, tombstones.TABLE)
+        
         response_data = {
             'table_areas': area_list,
             'tables': table_list,
+            'deleted_area_ids': deleted_area_ids,
+            'deleted_table_ids': deleted_table_ids,
+            'next_cursor': changelog.encode_cursor(next_seq),
             'total_areas': len(area_list),
             'total_tables': len(table_list),
             'sync_timestamp': timezone.now().isoformat(),
@@ -1550,7 +1476,7 @@ def sync_tables(request):
             }
         }
         
-        return Response(response_data)
+        return compression.respond(request, company_id, response_data, etag=etag, next_seq=next_seq)
         
     except Exception as e:
         logger.error(f"Error in sync_tables: {str(e)}", exc_info=True)
@@ -1580,6 +1506,18 @@ def sync_tables(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -1608,7 +1546,10 @@ def sync_table_areas(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page
     }
     
     Returns:
@@ -1634,23 +1575,19 @@ def sync_table_areas(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached store context)
+        ctx = store_context.resolve(company_id, store_id)
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
         
         updated_since = request.data.get('updated_since')
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = ctx.brand_ids
         
         # Import models
         from products.models import TableArea
@@ -1663,7 +1600,30 @@ def sync_table_areas(request):
             is_active=True
         )
         
-        if updated_since:
+        # Cursor based incremental sync (preferred over updated_since)
+        try:
+            since_seq = changelog.decode_cursor(request.data.get('cursor'))
+        except changelog.CursorError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        next_seq = changelog.high_water_mark(company_id, since_seq)
+        telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
+        
+        # Keyset pagination on (updated_at, id) - optional limit / page_token
+        try:
+            page = pagination.KeysetPage(
+                request, 'table_areas',
+                scope=(company_id, store_id, request.data.get('updated_since'), request.data.get('cursor')),
+            )
+        except pagination.PageTokenError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        
+        if since_seq is not None:
+            changed_ids = changelog.changed_ids(
+                company_id, tombstones.TABLE_AREA, since_seq, next_seq,
+                brand_ids=store_brands, store_id=store.id,
+            )
+            query &= Q(id__in=changed_ids)
+        elif updated_since:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -1673,31 +1633,32 @@ def sync_table_areas(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        table_areas = TableArea.objects.filter(query).order_by('sort_order', 'name')
+        table_areas = page.paginate(TableArea.objects.filter(query).order_by('sort_order', 'name'))
         
         area_list = []
-        for area in table_areas:
-            area_list.append({
-                'id': str(area.id),
-                'company_id': str(area.company_id),
-                'brand_id': str(area.brand_id),
-                'store_id': str(area.store_id),
-                'name': area.name,
-                'description': area.description,
-                'sort_order': area.sort_order,
-                'floor_width': area.floor_width,
-                'floor_height': area.floor_height,
-                'floor_image': request.build_absolute_uri(area.floor_image.url) if area.floor_image else None,
-                'is_active': area.is_active,
-                'created_at': area.created_at.isoformat(),
-                'updated_at': area.updated_at.isoformat(),
-            })
+        for area in page.rows(table_areas):
+            area_list.append(payloads.table_area_data(area, request))
         
-        return Response({
+        deleted_ids = []
+        if since_seq is not None:
+            deleted_ids = changelog.removed_ids(
+                changed_ids, TableArea.objects.filter(query).values_list('id', flat=True)
+            )
+        elif updated_since:
+            deleted_ids = tombstones.deleted_ids_since(
+                company_id, tombstones.TABLE_AREA, updated_since_dt,
+                brand_ids=store_brands, store_id=store.id,
+            )
+        tombstones.record_store_sync(store.id, tombstones.TABLE_AREA)
+        
+        return compression.respond(request, company_id, {
             'table_areas': area_list,
-            'deleted_ids': [],
+            'deleted_ids': deleted_ids,
+            'next_cursor': page.next_cursor(changelog.encode_cursor(next_seq)),
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(area_list),
+            'has_more': page.has_more,
+            'next_page_token': page.next_page_token(),
             'filter': {
                 'company_id': str(company_id),
                 'store_id': str(store_id),
@@ -1737,6 +1698,18 @@ def sync_table_areas(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -1765,7 +1738,10 @@ def sync_table_groups(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page
     }
     
     Returns:
@@ -1776,108 +1752,7 @@ def sync_table_groups(request):
     Note: Table groups are managed by Edge Server.
     This API is mainly for reference/reporting at HO.
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        updated_since = request.data.get('updated_since')
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Import models
-        from products.models import TableGroup
-        
-        # Build query for table groups
-        query = Q(brand_id__in=store_brands)
-        
-        if updated_since:
-            try:
-                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
-                query &= Q(created_at__gte=updated_since_dt)
-            except (ValueError, AttributeError):
-                return Response({
-                    'error': 'Invalid updated_since format',
-                    'code': 'INVALID_DATE_FORMAT'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        table_groups = TableGroup.objects.filter(query).select_related(
-            'brand', 'main_table', 'created_by'
-        ).prefetch_related('members__table').order_by('-created_at')
-        
-        group_list = []
-        for group in table_groups:
-            # Get member tables
-            members = []
-            for member in group.members.all():
-                members.append({
-                    'id': str(member.id),
-                    'table_id': str(member.table_id),
-                    'table_number': member.table.number,
-                    'table_area': member.table.area.name,
-                })
-            
-            group_list.append({
-                'id': str(group.id),
-                'brand_id': str(group.brand_id),
-                'company_id': str(group.brand.company_id),
-                'main_table_id': str(group.main_table_id),
-                'main_table_number': group.main_table.number,
-                'created_by_id': str(group.created_by_id),
-                'created_by_name': group.created_by.get_full_name() if hasattr(group.created_by, 'get_full_name') else str(group.created_by),
-                'created_at': group.created_at.isoformat(),
-                'members': members,
-                'total_members': len(members),
-            })
-        
-        return Response({
-            'table_groups': group_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(group_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_table_groups: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'table_groups')
 
 
 @extend_schema(
@@ -1899,6 +1774,31 @@ def sync_table_groups(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream the JSON response row by row for large catalogs (optional)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
+                'fields': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'Row fields to return, id is always included (optional)'
+                },
+                'profile': {
+                    'type': 'string',
+                    'description': 'Named field profile, e.g. "pos" (optional, ignored if fields is given)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -1927,7 +1827,13 @@ def sync_modifiers(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "stream": true,  // optional, stream the JSON row by row
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page,
+        "fields": ["id", "name"],  // optional, sparse fieldset
+        "profile": "pos"  // optional, named field profile
     }
     
     Returns:
@@ -1935,110 +1841,7 @@ def sync_modifiers(request):
         - total: Total number of modifiers
         - sync_timestamp: Current server timestamp
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        updated_since = request.data.get('updated_since')
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Import Modifier model
-        from products.models import Modifier, ModifierOption
-        
-        # Build query - filter by brands operating in this store
-        query = Q(brand_id__in=store_brands, is_active=True)
-        
-        if updated_since:
-            try:
-                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
-                query &= Q(updated_at__gte=updated_since_dt)
-            except (ValueError, AttributeError):
-                return Response({
-                    'error': 'Invalid updated_since format',
-                    'code': 'INVALID_DATE_FORMAT'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        modifiers = Modifier.objects.filter(query).select_related('brand').prefetch_related('options')
-        
-        modifier_list = []
-        for modifier in modifiers:
-            # Get options for this modifier
-            options = []
-            for option in modifier.options.filter(is_active=True):
-                options.append({
-                    'id': str(option.id),
-                    'modifier_id': str(option.modifier_id),
-                    'name': option.name,
-                    'price_adjustment': str(option.price_adjustment),
-                    'is_default': option.is_default,
-                    'sort_order': option.sort_order,
-                    'is_active': option.is_active,
-                    'created_at': option.created_at.isoformat(),
-                })
-            
-            modifier_list.append({
-                'id': str(modifier.id),
-                'brand_id': str(modifier.brand_id),
-                'company_id': str(modifier.brand.company_id),
-                'name': modifier.name,
-                'is_required': modifier.is_required,
-                'max_selections': modifier.max_selections,
-                'is_active': modifier.is_active,
-                'options': options,
-                'created_at': modifier.created_at.isoformat(),
-                'updated_at': modifier.updated_at.isoformat(),
-            })
-        
-        return Response({
-            'modifiers': modifier_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(modifier_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_modifiers: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'modifiers')
 
 
 @extend_schema(
@@ -2060,6 +1863,31 @@ def sync_modifiers(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream the JSON response row by row for large catalogs (optional)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
+                'fields': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'Row fields to return, id is always included (optional)'
+                },
+                'profile': {
+                    'type': 'string',
+                    'description': 'Named field profile, e.g. "pos" (optional, ignored if fields is given)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -2088,7 +1916,13 @@ def sync_modifier_options(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "stream": true,  // optional, stream the JSON row by row
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page,
+        "fields": ["id", "name"],  // optional, sparse fieldset
+        "profile": "pos"  // optional, named field profile
     }
     
     Returns:
@@ -2099,103 +1933,7 @@ def sync_modifier_options(request):
     Note: This is useful for incremental sync of options only.
     For full sync, use /sync/modifiers/ which includes options.
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        updated_since = request.data.get('updated_since')
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Import ModifierOption model
-        from products.models import ModifierOption
-        
-        # Build query - filter by modifiers from brands operating in this store
-        query = Q(
-            modifier__brand_id__in=store_brands,
-            modifier__is_active=True,
-            is_active=True
-        )
-        
-        if updated_since:
-            try:
-                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
-                query &= Q(created_at__gte=updated_since_dt)  # ModifierOption doesn't have updated_at
-            except (ValueError, AttributeError):
-                return Response({
-                    'error': 'Invalid updated_since format',
-                    'code': 'INVALID_DATE_FORMAT'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        options = ModifierOption.objects.filter(query).select_related(
-            'modifier', 'modifier__brand'
-        ).order_by('modifier', 'sort_order')
-        
-        option_list = []
-        for option in options:
-            option_list.append({
-                'id': str(option.id),
-                'modifier_id': str(option.modifier_id),
-                'modifier_name': option.modifier.name,
-                'brand_id': str(option.modifier.brand_id),
-                'company_id': str(option.modifier.brand.company_id),
-                'name': option.name,
-                'price_adjustment': str(option.price_adjustment),
-                'is_default': option.is_default,
-                'sort_order': option.sort_order,
-                'is_active': option.is_active,
-                'created_at': option.created_at.isoformat(),
-            })
-        
-        return Response({
-            'modifier_options': option_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(option_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_modifier_options: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'modifier_options')
 
 
 @extend_schema(
@@ -2217,6 +1955,31 @@ def sync_modifier_options(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
+                },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream the JSON response row by row for large catalogs (optional)'
+                },
+                'limit': {
+                    'type': 'integer',
+                    'description': 'Page size, enables keyset pagination (optional)'
+                },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
+                'fields': {
+                    'type': 'array',
+                    'items': {'type': 'string'},
+                    'description': 'Row fields to return, id is always included (optional)'
+                },
+                'profile': {
+                    'type': 'string',
+                    'description': 'Named field profile, e.g. "pos" (optional, ignored if fields is given)'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -2245,98 +2008,22 @@ def sync_product_modifiers(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
+        "stream": true,  // optional, stream the JSON row by row
+        "limit": 500,  // optional, page size (keyset pagination)
+        "page_token": "..."  // optional, next_page_token of the previous page,
+        "fields": ["id", "name"],  // optional, sparse fieldset
+        "profile": "pos"  // optional, named field profile
     }
     
     Returns:
         - product_modifiers: List of product-modifier relationships
+        - deleted_ids: Relationships removed since updated_since
         - total: Total number of relationships
         - sync_timestamp: Current server timestamp
     """
-    try:
-        company_id = request.data.get('company_id')
-        store_id = request.data.get('store_id')
-        
-        if not company_id:
-            return Response({
-                'error': 'company_id is required in request body',
-                'code': 'MISSING_COMPANY_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store_id:
-            return Response({
-                'error': 'store_id is required in request body',
-                'code': 'MISSING_STORE_ID'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
-            return Response({
-                'error': 'Store not found or does not belong to the specified company',
-                'code': 'STORE_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
-        
-        # Import ProductModifier model
-        from products.models import ProductModifier
-        
-        # Build query - get product modifiers for products in this store
-        query = Q(
-            product__company_id=company_id,
-            product__brand_id__in=store_brands,
-            product__is_active=True,
-            modifier__is_active=True
-        )
-        
-        product_modifiers = ProductModifier.objects.filter(query).select_related(
-            'product', 'modifier'
-        ).order_by('product', 'sort_order')
-        
-        pm_list = []
-        for pm in product_modifiers:
-            pm_list.append({
-                'id': str(pm.id),
-                'product_id': str(pm.product_id),
-                'product_name': pm.product.name,
-                'product_sku': pm.product.sku,
-                'brand_id': str(pm.product.brand_id),
-                'company_id': str(pm.product.company_id),
-                'modifier_id': str(pm.modifier_id),
-                'modifier_name': pm.modifier.name,
-                'sort_order': pm.sort_order,
-            })
-        
-        return Response({
-            'product_modifiers': pm_list,
-            'deleted_ids': [],
-            'sync_timestamp': timezone.now().isoformat(),
-            'total': len(pm_list),
-            'filter': {
-                'company_id': str(company_id),
-                'store_id': str(store_id),
-            },
-            'store': {
-                'id': str(store.id),
-                'code': store.store_code,
-                'name': store.store_name,
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in sync_product_modifiers: {str(e)}", exc_info=True)
-        return Response({
-            'error': 'Internal server error',
-            'code': 'INTERNAL_ERROR',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return resources.serve(request, 'product_modifiers')
 
 
 @extend_schema(
@@ -2359,13 +2046,21 @@ def sync_product_modifiers(request):
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
                 },
+                'cursor': {
+                    'type': 'string',
+                    'description': 'next_cursor of the previous sync (optional, preferred over updated_since)'
+                },
                 'limit': {
                     'type': 'integer',
                     'description': 'Max records per request (default: 100)'
                 },
+                'page_token': {
+                    'type': 'string',
+                    'description': 'next_page_token of the previous page (optional)'
+                },
                 'offset': {
                     'type': 'integer',
-                    'description': 'Pagination offset (default: 0)'
+                    'description': 'Deprecated pagination offset, use page_token'
                 }
             },
             'required': ['company_id', 'store_id']
@@ -2377,8 +2072,7 @@ def sync_product_modifiers(request):
             value={
                 'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
                 'store_id': 'uuid-here',
-                'limit': 100,
-                'offset': 0
+                'limit': 100
             }
         )
     ],
@@ -2397,15 +2091,17 @@ def sync_product_photos(request):
         "company_id": "uuid",
         "store_id": "uuid",
         "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "cursor": "...",  // optional, next_cursor of the previous sync
         "limit": 100,  // optional, default 100
-        "offset": 0    // optional, default 0
+        "page_token": "..."  // optional, next_page_token of the previous page
     }
     
     Returns:
         - photos: List of photo metadata with image URLs
         - total: Total number of photos
         - has_more: Boolean indicating if more records exist
-        - next_offset: Next offset for pagination
+        - next_page_token: Token for the next page (keyset on updated_at, id)
+        - next_offset: Deprecated, only for requests paging with offset
     """
     try:
         from products.models import ProductPhoto
@@ -2413,7 +2109,6 @@ def sync_product_photos(request):
         company_id = request.data.get('company_id')
         store_id = request.data.get('store_id')
         updated_since = request.data.get('updated_since')
-        limit = int(request.data.get('limit', 100))
         offset = int(request.data.get('offset', 0))
         
         if not company_id:
@@ -2428,21 +2123,17 @@ def sync_product_photos(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached store context)
+        ctx = store_context.resolve(company_id, store_id)
+        if ctx is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = ctx.store
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = ctx.brand_ids
         
         # Query photos for products in this store's brands
         queryset = ProductPhoto.objects.select_related('product').filter(
@@ -2451,7 +2142,30 @@ def sync_product_photos(request):
             product__is_active=True
         )
         
-        if updated_since:
+        # Cursor based incremental sync (preferred over updated_since)
+        try:
+            since_seq = changelog.decode_cursor(request.data.get('cursor'))
+        except changelog.CursorError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        next_seq = changelog.high_water_mark(company_id, since_seq)
+        telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
+        
+        # Keyset pagination on (updated_at, id), 100 photos per page by default
+        try:
+            page = pagination.KeysetPage(
+                request, 'product_photos',
+                scope=(company_id, store_id, updated_since, request.data.get('cursor')),
+                default_limit=100,
+            )
+        except pagination.PageTokenError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        
+        if since_seq is not None:
+            changed_ids = changelog.changed_ids(
+                company_id, tombstones.PRODUCT_PHOTO, since_seq, next_seq, brand_ids=store_brands
+            )
+            queryset = queryset.filter(id__in=changed_ids)
+        elif updated_since:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 queryset = queryset.filter(updated_at__gte=updated_since_dt)
@@ -2462,34 +2176,36 @@ def sync_product_photos(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
         
         total = queryset.count()
-        photos = queryset.order_by('updated_at')[offset:offset + limit]
+        if offset and not request.data.get('page_token'):
+            # Deprecated OFFSET paging, kept for Edge Servers without page_token support
+            photos = queryset.order_by(*page.ordering)[offset:offset + page.limit + 1]
+        else:
+            photos = page.paginate(queryset)
         
         data = []
-        for photo in photos:
-            data.append({
-                'id': str(photo.id),
-                'product_id': str(photo.product_id),
-                'product_sku': photo.product.sku,
-                'product_name': photo.product.name,
-                'object_key': photo.object_key,
-                'filename': photo.filename,
-                'size': photo.size,
-                'content_type': photo.content_type,
-                'checksum': photo.checksum,
-                'version': photo.version,
-                'is_primary': photo.is_primary,
-                'sort_order': photo.sort_order,
-                'updated_at': photo.updated_at.isoformat() if photo.updated_at else None,
-                'image_url': photo.image_url  # Includes cache-busting parameter
-            })
+        for photo in page.rows(photos):
+            data.append(payloads.photo_data(photo))
         
-        return Response({
+        deleted_ids = []
+        if since_seq is not None:
+            # Checked against the whole result, not only this page
+            deleted_ids = changelog.removed_ids(changed_ids, queryset.values_list('id', flat=True))
+        elif updated_since:
+            deleted_ids = tombstones.deleted_ids_since(
+                company_id, tombstones.PRODUCT_PHOTO, updated_since_dt, brand_ids=store_brands
+            )
+        tombstones.record_store_sync(store.id, tombstones.PRODUCT_PHOTO)
+        
+        return compression.respond(request, company_id, {
             'photos': data,
-            'deleted_ids': [],
+            'deleted_ids': deleted_ids,
+            # Keep paging with the same cursor until has_more is false
+            'next_cursor': page.next_cursor(changelog.encode_cursor(next_seq)),
             'sync_timestamp': timezone.now().isoformat(),
             'total': total,
-            'has_more': (offset + limit) < total,
-            'next_offset': offset + limit if (offset + limit) < total else None,
+            'has_more': page.has_more,
+            'next_page_token': page.next_page_token(),
+            'next_offset': offset + page.limit if page.has_more else None,
             'filter': {
                 'company_id': str(company_id),
                 'store_id': str(store_id),
@@ -2508,3 +2224,123 @@ def sync_product_photos(request):
             'code': 'INTERNAL_ERROR',
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'company_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Company UUID'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID'
+                },
+                'have': {
+                    'description': (
+                        'Photos the Edge already has: {product_id: checksum} map, '
+                        'or a list of checksums in its image cache (optional)'
+                    )
+                }
+            },
+            'required': ['company_id', 'store_id']
+        }
+    },
+    examples=[
+        OpenApiExample(
+            'Full Photo Manifest',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here'
+            }
+        ),
+        OpenApiExample(
+            'Changed Photos Only',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here',
+                'have': {'product-uuid': 'md5-checksum'}
+            }
+        )
+    ],
+    tags=['Sync API - Master Data']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_photo_manifest(request):
+    """
+    Content-addressed manifest of a store's product photos
+    
+    POST /api/v1/sync/product-photos/manifest/
+    
+    Request Body:
+    {
+        "company_id": "uuid",
+        "store_id": "uuid",
+        "have": {"product_uuid": "checksum"}  // optional, or ["checksum", ...]
+    }
+    
+    Returns:
+        - columns: ["product_id", "checksum", "version", "size"]
+        - photos: New or changed tuples (all of them without have)
+        - removed: product_ids of have that no longer have a photo
+        - blobs: One entry per checksum the Edge does not have (checksum,
+          size, content_type, url); shared images are listed once
+        - total / unique: Products with a photo / distinct images
+    """
+    try:
+        company_id = request.data.get('company_id')
+        store_id = request.data.get('store_id')
+        have = request.data.get('have')
+        
+        if not company_id:
+            return Response({
+                'error': 'company_id is required in request body',
+                'code': 'MISSING_COMPANY_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not store_id:
+            return Response({
+                'error': 'store_id is required in request body',
+                'code': 'MISSING_STORE_ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        ctx = store_context.resolve(company_id, store_id)
+        if ctx is None:
+            return Response({
+                'error': 'Store not found or does not belong to the specified company',
+                'code': 'STORE_NOT_FOUND'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            photos.parse_have(have)
+        except photos.HaveError as e:
+            return Response({'error': str(e), 'code': e.code}, status=e.status_code)
+        
+        # Conditional request: same photos and same have
+        etag = versions.sync_etag(
+            'photo_manifest', store_id,
+            have if isinstance(have, dict) else sorted(have or []), binary.negotiated(request),
+            versions.store_versions(
+                company_id, [tombstones.PRODUCT_PHOTO, tombstones.PRODUCT] + versions.STORE_SCOPE_MODELS,
+                ctx.brand_ids, store_id,
+            ),
+        )
+        if versions.etag_matches(request, etag):
+            return versions.not_modified(etag)
+        
+        data = photos.manifest_diff(photos.store_photos(company_id, ctx.brand_ids), have)
+        data['sync_timestamp'] = timezone.now().isoformat()
+        return compression.respond(request, company_id, data, etag=etag)
+        
+    except Exception as e:
+        logger.error(f"Error in sync_photo_manifest: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'Internal server error',
+            'code': 'INTERNAL_ERROR'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
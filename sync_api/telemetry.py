@@ -0,0 +1,365 @@
+"""
+Edge Sync Telemetry
+
+One SyncEvent per sync (HO → Edge) and push (Edge → HO) call: store,
+endpoint, status, rows, bytes, duration and cursor lag. Recording must not
+slow the sync path down, so events are not written to the database by the
+request:
+
+- SyncTelemetryMiddleware builds the event once the response is done
+  (streamed responses: once the last chunk is sent) and appends it to a
+  Redis list (RPUSH, capped at MAX_BUFFERED events)
+- flush_sync_events_task drains the list every minute and bulk inserts
+  the events (FLUSH_BATCH_SIZE per INSERT)
+
+Without Redis (locmem cache in development) events are buffered in the
+process instead.
+
+Views add what only they know with annotate(): the cursor lag (changes
+between the Edge's cursor and the high water mark) and row counts of
+streamed payloads. Store and company come from the request body.
+
+store_rollup() / endpoint_rollup() aggregate the events per store (and
+endpoint): calls, errors, 304s, rows, bytes, latency and lag. They back
+the admin, the sync_telemetry_report command and sync_health_check_task.
+
+Usage:
+    telemetry.annotate(request, cursor_lag=telemetry.cursor_lag(since_seq, next_seq))
+    telemetry.flush_events()
+    telemetry.store_rollup(since=timezone.now() - timedelta(hours=24))
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import caches
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'default'
+BUFFER_KEY = 'sync_telemetry:events'
+
+# Events kept while nothing flushes (oldest are dropped first)
+MAX_BUFFERED = 100000
+
+# Events per bulk INSERT (and per Redis read)
+FLUSH_BATCH_SIZE = 1000
+
+# Events older than this are pruned
+RETENTION_DAYS = 30
+
+# Request paths recorded, by direction
+PATH_PREFIXES = {
+    '/api/v1/sync/': 'pull',
+    '/api/v1/transactions/': 'push',
+}
+
+# Request attribute holding the annotations of a call
+ATTRIBUTE = '_sync_telemetry'
+
+
+# ----------------------------------------------------------------------
+# Buffer
+# ----------------------------------------------------------------------
+
+class _RedisBuffer:
+    """Capped Redis list shared by every worker"""
+
+    def __init__(self, cache):
+        self.client = cache.client.get_client(write=True)
+        self.key = cache.make_key(BUFFER_KEY)
+
+    def push(self, item):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(self.key, item)
+        pipe.ltrim(self.key, -MAX_BUFFERED, -1)
+        pipe.execute()
+
+    def pop(self, count):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self.key, 0, count - 1)
+        pipe.ltrim(self.key, count, -1)
+        items, _ = pipe.execute()
+        return items
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+class _LocalBuffer:
+    """In-process buffer (caches without a Redis client)"""
+
+    def __init__(self):
+        self.items = deque(maxlen=MAX_BUFFERED)
+        self._lock = threading.Lock()
+
+    def push(self, item):
+        with self._lock:
+            self.items.append(item)
+
+    def pop(self, count):
+        with self._lock:
+            return [self.items.popleft() for _ in range(min(count, len(self.items)))]
+
+    def __len__(self):
+        return len(self.items)
+
+
+_local_buffer = _LocalBuffer()
+
+
+def _buffer():
+    cache = caches[CACHE_ALIAS]
+    client = getattr(cache, 'client', None)
+    if hasattr(client, 'get_client'):
+        return _RedisBuffer(cache)
+    return _local_buffer
+
+
+def buffered_count():
+    """Events waiting for the next flush"""
+    return len(_buffer())
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+def direction(path):
+    """'pull' / 'push' for recorded paths, None otherwise"""
+    for prefix, name in PATH_PREFIXES.items():
+        if path.startswith(prefix):
+            return name
+    return None
+
+
+def annotate(request, **fields):
+    """
+    Add fields to the event of a call (cursor_lag, rows, store_id, company_id)
+
+    A callable value is evaluated when the event is recorded (after a
+    streamed body is sent).
+    """
+    django_request = getattr(request, '_request', request)
+    annotations = django_request.__dict__.setdefault(ATTRIBUTE, {})
+    if django_request is not request:
+        # Parsed body of the DRF request, read for store / company ids
+        annotations.setdefault('request', request)
+    annotations.update(fields)
+
+
+def cursor_lag(since_seq, next_seq):
+    """Commit sequences between an Edge's cursor and the high water mark (None without cursor)"""
+    if since_seq is None or next_seq is None:
+        return None
+    return max(next_seq - since_seq, 0)
+
+
+def count_rows(data):
+    """Rows of a payload: items of its top level lists (and of sections one level down)"""
+    if isinstance(data, list):
+        return len(data)
+    if not isinstance(data, dict):
+        return 0
+    rows = 0
+    for value in data.values():
+        if isinstance(value, list):
+            rows += len(value)
+        elif isinstance(value, dict):
+            rows += sum(len(item) for item in value.values() if isinstance(item, list))
+    return rows
+
+
+def _uuid(value):
+    if value is None or value == '':
+        return None
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _request_data(drf_request):
+    if drf_request is None:
+        return {}
+    try:
+        data = drf_request.data
+    except Exception:
+        return {}
+    return data if hasattr(data, 'get') else {}
+
+
+def _push_store_id(data):
+    """Store of pushed records: top level or first record of a bulk list"""
+    store_id = data.get('store_id') or data.get('store')
+    if store_id:
+        return store_id
+    for value in data.values():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            return value[0].get('store_id') or value[0].get('store')
+    return None
+
+
+def _status(status_code):
+    if status_code == 304:
+        return 'not_modified'
+    if status_code >= 500:
+        return 'error'
+    if status_code >= 400:
+        return 'rejected'
+    return 'ok'
+
+
+def build_event(request, response, started, response_bytes, direction_name):
+    """Event dict of a finished call"""
+    annotations = dict(getattr(request, ATTRIBUTE, {}))
+    drf_request = annotations.pop('request', None)
+    if drf_request is None:
+        drf_request = (getattr(response, 'renderer_context', None) or {}).get('request')
+    for key, value in annotations.items():
+        if callable(value):
+            annotations[key] = value()
+
+    data = _request_data(drf_request)
+    if direction_name == 'push':
+        store_id = annotations.get('store_id') or _push_store_id(data)
+        rows = annotations.get('rows')
+        if rows is None:
+            rows = count_rows(data) or 1
+    else:
+        store_id = annotations.get('store_id') or data.get('store_id')
+        rows = annotations.get('rows')
+        if rows is None:
+            rows = count_rows(getattr(response, 'data', None))
+
+    return {
+        'company_id': _uuid(annotations.get('company_id') or data.get('company_id')),
+        'store_id': _uuid(store_id),
+        'direction': direction_name,
+        'endpoint': request.path.removeprefix('/api/v1/').strip('/')[:100],
+        'method': request.method,
+        'status': _status(response.status_code),
+        'status_code': response.status_code,
+        'rows': rows or 0,
+        'bytes': response_bytes,
+        'encoding': response.get('Content-Encoding', '')[:20],
+        'duration_ms': round((time.monotonic() - started) * 1000, 2),
+        'cursor_lag': annotations.get('cursor_lag'),
+        'created_at': time.time(),
+    }
+
+
+def record(request, response, started, response_bytes, direction_name):
+    """Buffer the event of a finished call; telemetry never fails the call"""
+    try:
+        event = build_event(request, response, started, response_bytes, direction_name)
+        _buffer().push(json.dumps(event, separators=(',', ':')))
+    except Exception as e:
+        logger.warning(f"Could not record sync event of {request.path}: {e}")
+
+
+# ----------------------------------------------------------------------
+# Flush & retention
+# ----------------------------------------------------------------------
+
+def _to_model(item):
+    from sync_api.models import SyncEvent
+
+    event = json.loads(item)
+    event['created_at'] = datetime.fromtimestamp(event['created_at'], tz=dt_timezone.utc)
+    return SyncEvent(**event)
+
+
+def flush_events(batch_size=FLUSH_BATCH_SIZE, max_batches=None):
+    """
+    Move buffered events to the SyncEvent table
+
+    Returns:
+        Number of events written
+    """
+    from sync_api.models import SyncEvent
+
+    buffer = _buffer()
+    written = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        items = buffer.pop(batch_size)
+        if not items:
+            break
+        events = []
+        for item in items:
+            try:
+                events.append(_to_model(item))
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Dropping malformed sync event: {e}")
+        SyncEvent.objects.bulk_create(events)
+        written += len(events)
+        batches += 1
+    return written
+
+
+def prune_events(days=RETENTION_DAYS):
+    """Delete events older than the retention period"""
+    from sync_api.models import SyncEvent
+
+    cutoff = timezone.now() - timedelta(days=days)
+    return SyncEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+# ----------------------------------------------------------------------
+# Rollups
+# ----------------------------------------------------------------------
+
+ROLLUP = {
+    'calls': Count('id'),
+    'errors': Count('id', filter=Q(status__in=['error', 'rejected'])),
+    'not_modified': Count('id', filter=Q(status='not_modified')),
+    'rows': Sum('rows'),
+    'bytes': Sum('bytes'),
+    'avg_ms': Avg('duration_ms'),
+    'max_ms': Max('duration_ms'),
+    'max_cursor_lag': Max('cursor_lag'),
+    'last_seen': Max('created_at'),
+}
+
+
+def _events(since=None, company_id=None, store_id=None):
+    from sync_api.models import SyncEvent
+
+    events = SyncEvent.objects.all()
+    if since is not None:
+        events = events.filter(created_at__gte=since)
+    if company_id:
+        events = events.filter(company_id=company_id)
+    if store_id:
+        events = events.filter(store_id=store_id)
+    return events
+
+
+def store_rollup(since=None, company_id=None, order_by='-bytes'):
+    """
+    Totals per store
+
+    Returns:
+        List of dicts: store_id, calls, errors, not_modified, rows, bytes,
+        avg_ms, max_ms, max_cursor_lag, last_seen
+    """
+    return list(
+        _events(since, company_id).exclude(store_id=None)
+        .values('store_id').annotate(**ROLLUP).order_by(order_by, 'store_id')
+    )
+
+
+def endpoint_rollup(since=None, company_id=None, store_id=None, order_by='-bytes'):
+    """Totals per store and endpoint (same fields as store_rollup, plus direction / endpoint)"""
+    return list(
+        _events(since, company_id, store_id)
+        .values('store_id', 'direction', 'endpoint').annotate(**ROLLUP).order_by(order_by, 'store_id', 'endpoint')
+    )
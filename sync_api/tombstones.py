@@ -0,0 +1,149 @@
+"""
+Deletion Tombstones for Incremental Sync
+
+Synced master data that is deleted or deactivated leaves a SyncTombstone row
+so Edge Servers can remove it on their next incremental sync instead of
+running periodic full resyncs.
+
+- record_tombstone(): called from sync_api.signals
+- deleted_ids_since(): read by the ``updated_since`` path of each sync endpoint
+- record_store_sync(): per-store watermark, written at most once per
+  WATERMARK_RESOLUTION_SECONDS per store and model
+- prune_tombstones(): removes tombstones every store has already synced past
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db.models import Q, Min, Count
+from django.utils import timezone
+
+from sync_api.models import SyncTombstone, StoreSyncWatermark
+
+logger = logging.getLogger(__name__)
+
+# Tombstones are kept at most this long, even if a store never syncs again
+TOMBSTONE_MAX_AGE_DAYS = 90
+
+CACHE_ALIAS = 'default'
+
+# Sync reads write the watermark at most this often per store and model.
+# A watermark that lags by a few minutes only delays pruning (days), while
+# an UPDATE per read would lock the row on every endpoint call of an Edge.
+WATERMARK_RESOLUTION_SECONDS = 300
+
+
+# Model names used in SyncTombstone.model / StoreSyncWatermark.model
+PROMOTION = 'promotion'
+PRODUCT = 'product'
+CATEGORY = 'category'
+MODIFIER = 'modifier'
+MODIFIER_OPTION = 'modifier_option'
+PRODUCT_MODIFIER = 'product_modifier'
+TABLE_AREA = 'table_area'
+TABLE = 'table'
+TABLE_GROUP = 'table_group'
+PRODUCT_PHOTO = 'product_photo'
+STORE = 'store'
+BRAND = 'brand'
+STORE_BRAND = 'store_brand'
+
+
+def record_tombstone(model, object_id, company_id, brand_id=None, store_id=None, reason='deleted'):
+    """Record a deleted/deactivated record"""
+    if not company_id:
+        logger.warning(f"Tombstone skipped, no company for {model}:{object_id}")
+        return None
+    return SyncTombstone.objects.create(
+        company_id=company_id,
+        model=model,
+        object_id=object_id,
+        brand_id=brand_id,
+        store_id=store_id,
+        reason=reason,
+    )
+
+
+def clear_tombstones(model, object_id):
+    """Remove tombstones of a record that was re-activated"""
+    SyncTombstone.objects.filter(model=model, object_id=object_id).delete()
+
+
+def deleted_ids_since(company_id, model, since, brand_ids=None, store_id=None, reasons=None):
+    """
+    Get IDs deleted/deactivated since a timestamp
+
+    Args:
+        company_id: Company UUID
+        model: Model name (e.g., PRODUCT)
+        since: datetime (updated_since of the sync request)
+        brand_ids: Restrict to these brands (records without brand are always included)
+        store_id: Restrict to this store (records without store are always included)
+        reasons: Restrict to these reasons (e.g., ['deleted'])
+
+    Returns:
+        List of ID strings
+    """
+    query = Q(company_id=company_id, model=model, deleted_at__gte=since)
+    if brand_ids is not None:
+        query &= Q(brand_id__in=list(brand_ids)) | Q(brand_id__isnull=True)
+    if store_id is not None:
+        query &= Q(store_id=store_id) | Q(store_id__isnull=True)
+    if reasons:
+        query &= Q(reason__in=reasons)
+
+    object_ids = SyncTombstone.objects.filter(query).values_list('object_id', flat=True).distinct()
+    return [str(object_id) for object_id in object_ids]
+
+
+def record_store_sync(store_id, *models, synced_at=None):
+    """Update the sync watermark of a store for one or more models (throttled)"""
+    synced_at = synced_at or timezone.now()
+    cache = caches[CACHE_ALIAS]
+    for model in models:
+        # add() is atomic: one of the concurrent calls in a window writes
+        if not cache.add(f"sync_watermark:{store_id}:{model}", 1, timeout=WATERMARK_RESOLUTION_SECONDS):
+            continue
+        updated = StoreSyncWatermark.objects.filter(store_id=store_id, model=model).update(synced_at=synced_at)
+        if not updated:
+            StoreSyncWatermark.objects.get_or_create(
+                store_id=store_id, model=model, defaults={'synced_at': synced_at}
+            )
+
+
+def prune_tombstones(max_age_days=TOMBSTONE_MAX_AGE_DAYS):
+    """
+    Delete tombstones that every active store has synced past
+
+    A (company, model) pair is only pruned when every active store of the
+    company has a watermark for that model. Anything older than
+    ``max_age_days`` is removed unconditionally.
+
+    Returns:
+        Number of deleted tombstones
+    """
+    from core.models import Store
+
+    hard_cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted = SyncTombstone.objects.filter(deleted_at__lt=hard_cutoff).delete()[0]
+
+    pairs = SyncTombstone.objects.values_list('company_id', 'model').distinct()
+    for company_id, model in pairs:
+        store_ids = list(Store.objects.filter(company_id=company_id, is_active=True).values_list('id', flat=True))
+        if not store_ids:
+            continue
+
+        watermark = StoreSyncWatermark.objects.filter(
+            store_id__in=store_ids, model=model
+        ).aggregate(oldest=Min('synced_at'), stores=Count('store_id'))
+
+        if watermark['stores'] < len(store_ids):
+            continue  # Some store has not synced this model yet
+
+        deleted += SyncTombstone.objects.filter(
+            company_id=company_id, model=model, deleted_at__lt=watermark['oldest']
+        ).delete()[0]
+
+    logger.info(f"Pruned {deleted} sync tombstones")
+    return deleted
@@ -0,0 +1,246 @@
+"""
+Sync Data Versions
+
+Per company / model / scope version counters kept in the ``default`` cache
+(Redis in production). sync_api.signals bumps them after every committed
+change of synced master data, so reading the version of a store's data is
+a single cache round trip instead of a database query.
+
+Scopes:
+- company: every change of the model in the company
+- brand:   changes of records that belong to a brand
+- store:   changes of records that belong to a store
+- none:    changes of records without brand and store
+
+Counters are seeded with a timestamp, so an evicted counter never repeats
+an old value (clients only ever re-download, never miss a change).
+
+version_vector() reads every counter a store depends on in one round trip;
+sync_version returns it so an Edge polls once and only calls the endpoints
+whose version moved. Every bump is also published to the Edge Servers
+subscribed to change notifications (sync_api.notifications).
+
+Usage:
+    from sync_api import versions
+
+    etag = versions.sync_etag(
+        'products', store_id,
+        versions.store_versions(company_id, [tombstones.PRODUCT] + versions.STORE_SCOPE_MODELS, brand_ids, store_id),
+    )
+    if versions.etag_matches(request, etag):
+        return versions.not_modified(etag)
+"""
+
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from sync_api import notifications, tombstones
+
+VERSION_PREFIX = 'sync_ver'
+CACHE_ALIAS = 'default'
+
+# Models whose changes alter which brands a store serves
+STORE_SCOPE_MODELS = [tombstones.STORE_BRAND, tombstones.BRAND]
+
+# PromotionSyncSettings changes (sync window of compiled promotions)
+PROMOTION_SETTINGS = 'promotion_settings'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(company_id, model, scope):
+    return f"{VERSION_PREFIX}:{company_id}:{model}:{scope}"
+
+
+def _changed_key(company_id, model):
+    return f"{VERSION_PREFIX}:{company_id}:{model}:changed_at"
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def _incr(key):
+    """Increment a counter (seeding a missing one), returns the new value"""
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        value = _new_version()
+        cache.set(key, value, timeout=None)
+        return value
+
+
+def _scopes(brand_id=None, store_id=None):
+    scopes = ['company']
+    if brand_id:
+        scopes.append(f'brand:{brand_id}')
+    if store_id:
+        scopes.append(f'store:{store_id}')
+    if not brand_id and not store_id:
+        scopes.append('none')
+    return scopes
+
+
+def bump_version(model, company_id, brand_id=None, store_id=None):
+    """Bump version counters of a changed record once the transaction commits"""
+    if not company_id:
+        return
+    keys = [_key(company_id, model, scope) for scope in _scopes(brand_id, store_id)]
+    changed_key = _changed_key(company_id, model)
+
+    def _bump():
+        # keys[0] is the company scope
+        company_version = [_incr(key) for key in keys][0]
+        changed_at = time.time()
+        _cache().set(changed_key, changed_at, timeout=None)
+        # Subscribed Edge Servers fetch now instead of on their next poll
+        notifications.publish(company_id, model, company_version, brand_id, store_id, changed_at)
+
+    transaction.on_commit(_bump)
+
+
+def _read(keys):
+    """Read counters, seeding missing ones"""
+    cache = _cache()
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        seed = _new_version()
+        for key in missing:
+            cache.add(key, seed, timeout=None)
+        values.update(cache.get_many(missing))
+    return values
+
+
+def company_versions(company_id, models):
+    """
+    Company wide version per model
+
+    Returns:
+        Dict: {model: int}
+    """
+    keys = {model: _key(company_id, model, 'company') for model in models}
+    values = _read(list(keys.values()))
+    return {model: values.get(key, 0) for model, key in keys.items()}
+
+
+def store_versions(company_id, models, brand_ids=(), store_id=None):
+    """
+    Version of the data a store sees, per model
+
+    Combines the counters of the store's brands, the store itself and
+    records without scope. Any change visible to the store changes the
+    result.
+
+    Returns:
+        Dict: {model: str}
+    """
+    scopes = [f'brand:{brand_id}' for brand_id in sorted(str(b) for b in brand_ids)]
+    if store_id:
+        scopes.append(f'store:{store_id}')
+    scopes.append('none')
+
+    keys = {model: [_key(company_id, model, scope) for scope in scopes] for model in models}
+    values = _read([key for model_keys in keys.values() for key in model_keys])
+    return {
+        model: '.'.join(str(values.get(key, 0)) for key in model_keys)
+        for model, model_keys in keys.items()
+    }
+
+
+def version_vector(company_id, models, brand_ids=(), store_id=None):
+    """
+    Version counters per model and scope (one cache round trip)
+
+    Args:
+        company_id: Company UUID
+        models: Model names
+        brand_ids: Brand scopes to include
+        store_id: Store scope to include (optional)
+
+    Returns:
+        Dict: {
+            'company': {model: int},
+            'brands': {brand_id: {model: int}},
+            'store': {model: int} or None,
+            'unscoped': {model: int},
+            'changed_at': {model: timestamp or None},
+        }
+    """
+    brand_ids = sorted(str(brand_id) for brand_id in brand_ids)
+    scopes = ['company', 'none'] + [f'brand:{brand_id}' for brand_id in brand_ids]
+    if store_id:
+        scopes.append(f'store:{store_id}')
+
+    keys = [_key(company_id, model, scope) for model in models for scope in scopes]
+    changed_keys = [_changed_key(company_id, model) for model in models]
+    values = _cache().get_many(keys + changed_keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        values.update(_read(missing))
+
+    def scope_versions(scope):
+        return {model: values.get(_key(company_id, model, scope), 0) for model in models}
+
+    return {
+        'company': scope_versions('company'),
+        'brands': {brand_id: scope_versions(f'brand:{brand_id}') for brand_id in brand_ids},
+        'store': scope_versions(f'store:{store_id}') if store_id else None,
+        'unscoped': scope_versions('none'),
+        'changed_at': {model: values.get(_changed_key(company_id, model)) for model in models},
+    }
+
+
+def visible_versions(vector):
+    """
+    Collapse a version_vector() to the version a store sees, per model
+
+    Without brand/store scopes the company version is used.
+
+    Returns:
+        Dict: {model: str}
+    """
+    if not vector['brands'] and vector['store'] is None:
+        return {model: str(version) for model, version in vector['company'].items()}
+    scoped = [vector['brands'][brand_id] for brand_id in sorted(vector['brands'])]
+    if vector['store'] is not None:
+        scoped.append(vector['store'])
+    scoped.append(vector['unscoped'])
+    return {
+        model: '.'.join(str(versions[model]) for versions in scoped)
+        for model in vector['company']
+    }
+
+
+def sync_etag(*parts):
+    """Strong ETag from request parameters and data versions"""
+    raw = '|'.join(
+        repr(sorted(part.items())) if isinstance(part, dict) else str(part)
+        for part in parts
+    )
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    """Does If-None-Match of the request match the ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [value.strip() for value in header.split(',')]
+
+
+def not_modified(etag):
+    """304 response for a matching ETag (same Vary as the full response)"""
+    return Response(
+        status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag, 'Vary': 'Accept, Accept-Encoding'}
+    )